@@ -35,6 +35,23 @@ except ImportError:
 # (This is usually handled correctly when running python launcher.py from the project root)
 try:
     from ui_modules import settings, management, logs, analysis
+    from ui_modules.idle_proxy import IdleSleepProxy
+    from ui_modules.resource_monitor import ResourceSampler
+    from ui_modules.telemetry import ComfyUITelemetry, SETTINGS_KEYS as TELEMETRY_SETTINGS_KEYS
+    from ui_modules.import_profiler import NodeImportProfiler
+    from ui_modules.boot_profiles import BootProfileStore, BootProfileEditor, ALL_NODES_PROFILE
+    from ui_modules.repo_cache import RepoMirrorCache
+    from ui_modules.dependencies import DependencyManager
+    from ui_modules.wheelhouse import Wheelhouse, DEFAULT_WHEELHOUSE_MAX_GB
+    from ui_modules.dependency_check import DependencyConflictChecker, format_conflict_report
+    from ui_modules.worktree_pool import WorktreePool, DEFAULT_WORKTREE_POOL_MAX_GB
+    from ui_modules.env_cache import EnvironmentCache
+    from ui_modules.bytecode import BytecodePrecompiler
+    from ui_modules.git_maintenance import GitMaintenanceScheduler
+    from ui_modules.node_trash import NodeTrash, TRASH_RETENTION_SEC
+    from ui_modules.snapshots import EnvironmentSnapshots, SnapshotManagerWindow
+    from ui_modules.offline_bundle import OfflineBundle
+    from ui_modules.mirrors import MirrorSelector
 except ImportError as e:
     print(f"[Launcher CRITICAL] Failed to import UI modules: {e}")
     print("Please ensure the 'ui_modules' directory exists in the same directory as launcher.py")
@@ -48,6 +65,26 @@ CONFIG_FILE = os.path.join(BASE_DIR, "ui_modules", "launcher_config.json")
 # Updated LOG_FILE path to ui_modules directory - used only in on_closing
 LOG_FILE = os.path.join(BASE_DIR, "ui_modules", "ComLauncher.org")
 ICON_PATH = os.path.join(BASE_DIR, "templates", "icon.ico") # Path to icon
+# Per-session execution telemetry summaries (prompt times, model loads)
+TELEMETRY_HISTORY_FILE = os.path.join(BASE_DIR, "ui_modules", "telemetry_sessions.json")
+BOOT_PROFILES_FILE = os.path.join(BASE_DIR, "ui_modules", "boot_profiles.json")
+BOOT_PROFILE_JOURNAL_FILE = os.path.join(BASE_DIR, "ui_modules", "boot_profile_restore.json")
+BOOT_STARTUP_HISTORY_FILE = os.path.join(BASE_DIR, "ui_modules", "boot_startup_times.json")
+DEPENDENCY_STATE_FILE = os.path.join(BASE_DIR, "ui_modules", "dependency_state.json")
+CACHE_DIR = os.path.join(BASE_DIR, "cache") # Launcher-managed caches (repository mirrors, ...)
+REPO_CACHE_DIR = os.path.join(CACHE_DIR, "repos")
+WHEELHOUSE_DIR = os.path.join(CACHE_DIR, "wheels")
+WHEELHOUSE_INDEX_FILE = os.path.join(BASE_DIR, "ui_modules", "wheelhouse_index.json")
+WORKTREE_POOL_DIR = os.path.join(CACHE_DIR, "worktrees")
+WORKTREE_POOL_FILE = os.path.join(BASE_DIR, "ui_modules", "worktree_pool.json")
+ENV_CACHE_DIR = os.path.join(CACHE_DIR, "envs")
+ENV_CACHE_INDEX_FILE = os.path.join(BASE_DIR, "ui_modules", "env_cache.json")
+BYTECODE_HISTORY_FILE = os.path.join(BASE_DIR, "ui_modules", "bytecode_compiles.json")
+GIT_MAINTENANCE_HISTORY_FILE = os.path.join(BASE_DIR, "ui_modules", "git_maintenance.json")
+NODE_TRASH_INDEX_FILE = os.path.join(BASE_DIR, "ui_modules", "node_trash.json")
+SNAPSHOTS_FILE = os.path.join(BASE_DIR, "ui_modules", "env_snapshots.json")
+MIRRORS_FILE = os.path.join(BASE_DIR, "ui_modules", "mirrors.json")
+MIRROR_PROBES_FILE = os.path.join(BASE_DIR, "ui_modules", "mirror_probes.json")
 
 # --- Default Values ---
 DEFAULT_COMFYUI_INSTALL_DIR = ""
@@ -71,6 +108,20 @@ DEFAULT_NODE_CONFIG_URL = "https://raw.githubusercontent.com/ltdrdata/ComfyUI-Ma
 DEFAULT_ERROR_API_ENDPOINT = ""
 DEFAULT_ERROR_API_KEY = ""
 
+# --- Idle Sleep Defaults ---
+DEFAULT_IDLE_SLEEP_ENABLED = "禁用"
+DEFAULT_IDLE_SLEEP_TIMEOUT_MIN = "30"
+DEFAULT_RESOURCE_SAMPLE_INTERVAL = "1.0" # Seconds between backend resource samples
+DEFAULT_PYTHON_IMPORTTIME = "禁用" # Run the backend with python -X importtime
+DEFAULT_REPO_CACHE_ENABLED = "启用" # Clone nodes with objects from local bare mirrors
+DEFAULT_WHEELHOUSE_ENABLED = "启用" # Install dependencies from the local wheelhouse first
+DEFAULT_WORKTREE_POOL_ENABLED = "禁用" # Activate main body versions as pooled git worktrees
+DEFAULT_ENV_CACHE_ENABLED = "禁用" # Launch with a cached Python environment per requirements combination
+DEFAULT_BYTECODE_PRECOMPILE = "启用" # Compile changed sources after node/main body updates
+DEFAULT_GIT_MAINTENANCE_ENABLED = "启用" # Daily gc/commit-graph/pack-refs of all repositories while idle
+DEFAULT_GIT_FS_CACHE_ENABLED = "禁用" # Also enable core.untrackedCache (and core.fsmonitor on Windows/macOS)
+DEFAULT_MIRROR_SELECTION_ENABLED = "禁用" # Opt-in: routes GitHub clones/fetches and catalog downloads through third-party mirrors
+
 # MOD: Version Updated
 VERSION_INFO = "Kerry, Ver. 2.6.3"
 
@@ -140,6 +191,28 @@ class ComLauncherApp:
         self.comfyui_ready_marker_sent = False
         self.comfyui_externally_detected = False
         self._update_task_running = False
+        self.idle_proxy = None # IdleSleepProxy instance when idle sleep is enabled
+        self.comfyui_idle_sleeping = False # Backend stopped by the idle proxy, will wake on demand
+        self.idle_wake_in_progress = False # Suppresses opening a new browser tab after a wake
+        self.resource_sampler = None # ResourceSampler for the current/last backend process
+        self.comfyui_telemetry = None # ComfyUITelemetry for the current/last backend session
+        self.node_import_profiler = None # NodeImportProfiler for the current backend startup
+        self.boot_profiles = BootProfileStore(BOOT_PROFILES_FILE, BOOT_PROFILE_JOURNAL_FILE, BOOT_STARTUP_HISTORY_FILE)
+        self.active_boot_profile = None # Profile applied to the backend that is currently starting
+        self.boot_started_at = None # time.time() of the Popen call, cleared once the ready line is seen
+        self.repo_cache = RepoMirrorCache(self, REPO_CACHE_DIR)
+        self.dependency_manager = DependencyManager(self, DEPENDENCY_STATE_FILE)
+        self.wheelhouse = Wheelhouse(self, WHEELHOUSE_DIR, WHEELHOUSE_INDEX_FILE)
+        self.dependency_checker = DependencyConflictChecker(self)
+        self.worktree_pool = WorktreePool(self, WORKTREE_POOL_DIR, WORKTREE_POOL_FILE)
+        self.env_cache = EnvironmentCache(self, ENV_CACHE_DIR, ENV_CACHE_INDEX_FILE)
+        self.bytecode_compiler = BytecodePrecompiler(self, BYTECODE_HISTORY_FILE)
+        self.git_maintenance = GitMaintenanceScheduler(self, GIT_MAINTENANCE_HISTORY_FILE)
+        self.node_trash = NodeTrash(self, NODE_TRASH_INDEX_FILE)
+        self.snapshots = EnvironmentSnapshots(self, SNAPSHOTS_FILE)
+        self.offline_bundle = OfflineBundle(self)
+        self.mirrors = MirrorSelector(self, MIRRORS_FILE, MIRROR_PROBES_FILE)
+        self.telemetry_history_file = TELEMETRY_HISTORY_FILE
 
         # Configuration variables (using StringVar for UI binding)
         self.comfyui_dir_var = tk.StringVar()
@@ -150,6 +223,22 @@ class ComLauncherApp:
         self.node_config_url_var = tk.StringVar()
         self.error_api_endpoint_var = tk.StringVar()
         self.error_api_key_var = tk.StringVar()
+        self.idle_sleep_enabled_var = tk.StringVar()
+        self.idle_sleep_timeout_min_var = tk.StringVar()
+        self.resource_sample_interval_var = tk.StringVar()
+        self.python_importtime_var = tk.StringVar()
+        self.boot_profile_var = tk.StringVar()
+        self.repo_cache_enabled_var = tk.StringVar()
+        self.node_install_mode_var = tk.StringVar()
+        self.wheelhouse_enabled_var = tk.StringVar()
+        self.wheelhouse_max_gb_var = tk.StringVar()
+        self.worktree_pool_enabled_var = tk.StringVar()
+        self.worktree_pool_max_gb_var = tk.StringVar()
+        self.env_cache_enabled_var = tk.StringVar()
+        self.bytecode_precompile_var = tk.StringVar()
+        self.git_maintenance_enabled_var = tk.StringVar()
+        self.git_fs_cache_enabled_var = tk.StringVar()
+        self.mirror_selection_enabled_var = tk.StringVar()
 
         # Performance variables
         self.vram_mode_var = tk.StringVar()
@@ -178,9 +267,11 @@ class ComLauncherApp:
 
         # Internal derived paths (updated from config variables)
         self.comfyui_install_dir = ""
+        self.comfyui_repo_dir = "" # comfyui_dir itself; differs from comfyui_install_dir while a pool worktree is active
         self.comfyui_portable_python = ""
         self.git_exe_path = ""
         self.comfyui_api_port = ""
+        self.comfyui_backend_port = "" # Differs from comfyui_api_port when the idle proxy owns the public port
         self.comfyui_nodes_dir = ""
         self.comfyui_models_dir = ""
         self.comfyui_lora_dir = ""
@@ -208,6 +299,8 @@ class ComLauncherApp:
 
         # Set initial UI state and start initial background data loading *after* UI is ready
         self.root.after(0, self._update_ui_state)
+        # Undo a boot profile left applied by a crash or forced exit before anything scans custom_nodes
+        self.root.after(0, self._restore_boot_profile)
         # Delay the initial data load slightly to ensure UI is fully initialized and updated first (Fix for Bug 2 & 3)
         self.root.after(500, self.start_initial_data_load)
 
@@ -246,6 +339,22 @@ class ComLauncherApp:
             "node_config_url": loaded_config.get("node_config_url", DEFAULT_NODE_CONFIG_URL),
             "error_api_endpoint": loaded_config.get("error_api_endpoint", DEFAULT_ERROR_API_ENDPOINT),
             "error_api_key": loaded_config.get("error_api_key", DEFAULT_ERROR_API_KEY),
+            "idle_sleep_enabled": loaded_config.get("idle_sleep_enabled", DEFAULT_IDLE_SLEEP_ENABLED),
+            "idle_sleep_timeout_min": loaded_config.get("idle_sleep_timeout_min", DEFAULT_IDLE_SLEEP_TIMEOUT_MIN),
+            "resource_sample_interval": loaded_config.get("resource_sample_interval", DEFAULT_RESOURCE_SAMPLE_INTERVAL),
+            "python_importtime": loaded_config.get("python_importtime", DEFAULT_PYTHON_IMPORTTIME),
+            "boot_profile": loaded_config.get("boot_profile", ALL_NODES_PROFILE),
+            "repo_cache_enabled": loaded_config.get("repo_cache_enabled", DEFAULT_REPO_CACHE_ENABLED),
+            "node_install_mode": loaded_config.get("node_install_mode", management.DEFAULT_NODE_INSTALL_MODE),
+            "wheelhouse_enabled": loaded_config.get("wheelhouse_enabled", DEFAULT_WHEELHOUSE_ENABLED),
+            "wheelhouse_max_gb": loaded_config.get("wheelhouse_max_gb", DEFAULT_WHEELHOUSE_MAX_GB),
+            "worktree_pool_enabled": loaded_config.get("worktree_pool_enabled", DEFAULT_WORKTREE_POOL_ENABLED),
+            "worktree_pool_max_gb": loaded_config.get("worktree_pool_max_gb", DEFAULT_WORKTREE_POOL_MAX_GB),
+            "env_cache_enabled": loaded_config.get("env_cache_enabled", DEFAULT_ENV_CACHE_ENABLED),
+            "bytecode_precompile": loaded_config.get("bytecode_precompile", DEFAULT_BYTECODE_PRECOMPILE),
+            "git_maintenance_enabled": loaded_config.get("git_maintenance_enabled", DEFAULT_GIT_MAINTENANCE_ENABLED),
+            "git_fs_cache_enabled": loaded_config.get("git_fs_cache_enabled", DEFAULT_GIT_FS_CACHE_ENABLED),
+            "mirror_selection_enabled": loaded_config.get("mirror_selection_enabled", DEFAULT_MIRROR_SELECTION_ENABLED),
         }
 
         self.comfyui_dir_var.set(self.config["comfyui_dir"])
@@ -264,6 +373,22 @@ class ComLauncherApp:
         self.node_config_url_var.set(self.config["node_config_url"])
         self.error_api_endpoint_var.set(self.config["error_api_endpoint"])
         self.error_api_key_var.set(self.config["error_api_key"])
+        self.idle_sleep_enabled_var.set(self.config["idle_sleep_enabled"])
+        self.idle_sleep_timeout_min_var.set(self.config["idle_sleep_timeout_min"])
+        self.resource_sample_interval_var.set(self.config["resource_sample_interval"])
+        self.python_importtime_var.set(self.config["python_importtime"])
+        self.boot_profile_var.set(self.config["boot_profile"])
+        self.repo_cache_enabled_var.set(self.config["repo_cache_enabled"])
+        self.node_install_mode_var.set(self.config["node_install_mode"])
+        self.wheelhouse_enabled_var.set(self.config["wheelhouse_enabled"])
+        self.wheelhouse_max_gb_var.set(self.config["wheelhouse_max_gb"])
+        self.worktree_pool_enabled_var.set(self.config["worktree_pool_enabled"])
+        self.worktree_pool_max_gb_var.set(self.config["worktree_pool_max_gb"])
+        self.env_cache_enabled_var.set(self.config["env_cache_enabled"])
+        self.bytecode_precompile_var.set(self.config["bytecode_precompile"])
+        self.git_maintenance_enabled_var.set(self.config["git_maintenance_enabled"])
+        self.git_fs_cache_enabled_var.set(self.config["git_fs_cache_enabled"])
+        self.mirror_selection_enabled_var.set(self.config["mirror_selection_enabled"])
 
         if not os.path.exists(CONFIG_FILE) or not loaded_config:
             print("[Launcher INFO] Attempting to save default configuration...")
@@ -297,6 +422,14 @@ class ComLauncherApp:
             "clip_precision": self.clip_precision_var, "unet_precision": self.unet_precision_var,
             "vae_precision": self.vae_precision_var, "cuda_malloc": self.cuda_malloc_var,
             "ipex_optimization": self.ipex_optimization_var, "xformers_acceleration": self.xformers_acceleration_var,
+            "idle_sleep_enabled": self.idle_sleep_enabled_var, "idle_sleep_timeout_min": self.idle_sleep_timeout_min_var,
+            "resource_sample_interval": self.resource_sample_interval_var, "python_importtime": self.python_importtime_var,
+            "boot_profile": self.boot_profile_var, "repo_cache_enabled": self.repo_cache_enabled_var,
+            "node_install_mode": self.node_install_mode_var, "wheelhouse_enabled": self.wheelhouse_enabled_var,
+            "wheelhouse_max_gb": self.wheelhouse_max_gb_var, "worktree_pool_enabled": self.worktree_pool_enabled_var,
+            "worktree_pool_max_gb": self.worktree_pool_max_gb_var, "env_cache_enabled": self.env_cache_enabled_var,
+            "bytecode_precompile": self.bytecode_precompile_var, "git_maintenance_enabled": self.git_maintenance_enabled_var,
+            "git_fs_cache_enabled": self.git_fs_cache_enabled_var, "mirror_selection_enabled": self.mirror_selection_enabled_var,
         }
 
         for var_name, var_instance in vars_to_trace.items():
@@ -341,6 +474,14 @@ class ComLauncherApp:
             "clip_precision": self.clip_precision_var, "unet_precision": self.unet_precision_var,
             "vae_precision": self.vae_precision_var, "cuda_malloc": self.cuda_malloc_var,
             "ipex_optimization": self.ipex_optimization_var, "xformers_acceleration": self.xformers_acceleration_var,
+            "idle_sleep_enabled": self.idle_sleep_enabled_var, "idle_sleep_timeout_min": self.idle_sleep_timeout_min_var,
+            "resource_sample_interval": self.resource_sample_interval_var, "python_importtime": self.python_importtime_var,
+            "boot_profile": self.boot_profile_var, "repo_cache_enabled": self.repo_cache_enabled_var,
+            "node_install_mode": self.node_install_mode_var, "wheelhouse_enabled": self.wheelhouse_enabled_var,
+            "wheelhouse_max_gb": self.wheelhouse_max_gb_var, "worktree_pool_enabled": self.worktree_pool_enabled_var,
+            "worktree_pool_max_gb": self.worktree_pool_max_gb_var, "env_cache_enabled": self.env_cache_enabled_var,
+            "bytecode_precompile": self.bytecode_precompile_var, "git_maintenance_enabled": self.git_maintenance_enabled_var,
+            "git_fs_cache_enabled": self.git_fs_cache_enabled_var, "mirror_selection_enabled": self.mirror_selection_enabled_var,
         }
 
         if config_key_changed in key_to_var_map:
@@ -354,9 +495,16 @@ class ComLauncherApp:
                     except ValueError as e:
                         print(f"[Launcher WARNING] Invalid port value '{new_value}' entered, auto-save skipped for port. Error: {e}")
                         return
+                if config_key_changed in ("idle_sleep_timeout_min", "resource_sample_interval", "wheelhouse_max_gb", "worktree_pool_max_gb"):
+                    try:
+                        if float(new_value) <= 0:
+                            raise ValueError("Value must be positive")
+                    except ValueError as e:
+                        print(f"[Launcher WARNING] Invalid value '{new_value}' entered for '{config_key_changed}', auto-save skipped. Error: {e}")
+                        return
 
                 self.config[config_key_changed] = new_value
-                if config_key_changed in ["comfyui_dir", "python_exe", "git_exe_path", "comfyui_api_port"] or config_key_changed.startswith("vram_") or config_key_changed.endswith(("_precision", "_malloc", "_optimization", "_acceleration")):
+                if config_key_changed in ["comfyui_dir", "python_exe", "git_exe_path", "comfyui_api_port", "idle_sleep_enabled", "worktree_pool_enabled"] or config_key_changed.startswith("vram_") or config_key_changed.endswith(("_precision", "_malloc", "_optimization", "_acceleration")):
                     self.update_derived_paths()
 
                 self.save_config_to_file(show_success=False)
@@ -368,18 +516,27 @@ class ComLauncherApp:
 
     def update_derived_paths(self):
         """Updates internal path variables and base arguments based on current config."""
-        self.comfyui_install_dir = self.config.get("comfyui_dir", "")
+        self.comfyui_repo_dir = self.config.get("comfyui_dir", "")
+        # An active pool worktree replaces the repository checkout as the launched tree; user data stays in comfyui_dir
+        self.comfyui_install_dir = self.worktree_pool.active_path(self.comfyui_repo_dir) or self.comfyui_repo_dir
         self.comfyui_portable_python = self.config.get("python_exe", "")
         self.git_exe_path = self.config.get("git_exe_path", DEFAULT_GIT_EXE_PATH)
         self.comfyui_api_port = self.config.get("comfyui_api_port", DEFAULT_COMFYUI_API_PORT)
+        # With idle sleep the proxy owns the public port and the backend moves to the next port up
+        self.comfyui_backend_port = self.comfyui_api_port
+        if self.config.get("idle_sleep_enabled", DEFAULT_IDLE_SLEEP_ENABLED) == "启用":
+            try:
+                self.comfyui_backend_port = str(int(self.comfyui_api_port) + 1)
+            except ValueError:
+                pass
 
         if self.comfyui_install_dir and os.path.isdir(self.comfyui_install_dir):
-            self.comfyui_nodes_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, "custom_nodes"))
-            self.comfyui_models_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, "models"))
-            self.comfyui_lora_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, r"models\loras"))
-            self.comfyui_input_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, "input"))
-            self.comfyui_output_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, "output"))
-            self.comfyui_workflows_dir = os.path.normpath(os.path.join(self.comfyui_install_dir, r"user\default\workflows"))
+            self.comfyui_nodes_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, "custom_nodes"))
+            self.comfyui_models_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, "models"))
+            self.comfyui_lora_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, r"models\loras"))
+            self.comfyui_input_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, "input"))
+            self.comfyui_output_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, "output"))
+            self.comfyui_workflows_dir = os.path.normpath(os.path.join(self.comfyui_repo_dir, r"user\default\workflows"))
             self.comfyui_main_script = os.path.normpath(os.path.join(self.comfyui_install_dir, "main.py"))
         else:
             self.comfyui_nodes_dir = ""
@@ -391,7 +548,7 @@ class ComLauncherApp:
             self.comfyui_main_script = ""
 
         self.comfyui_base_args = [
-            "--listen", "127.0.0.1", f"--port={self.comfyui_api_port}",
+            "--listen", "127.0.0.1", f"--port={self.comfyui_backend_port}",
         ]
 
         vram_mode = self.config.get("vram_mode", DEFAULT_VRAM_MODE)
@@ -612,10 +769,17 @@ class ComLauncherApp:
         self.progress_bar = ttk.Progressbar(control_frame, mode='indeterminate', length=350, style='Horizontal.TProgressbar')
         self.progress_bar.grid(row=0, column=2, padx=10)
         self.progress_bar.stop()
+        boot_profile_frame = ttk.Frame(control_frame, style='Control.TFrame')
+        boot_profile_frame.grid(row=0, column=3, padx=(0, 10))
+        ttk.Label(boot_profile_frame, text="启动配置:", style='Status.TLabel').pack(side=tk.LEFT)
+        self.boot_profile_combo = ttk.Combobox(boot_profile_frame, textvariable=self.boot_profile_var, values=self.boot_profiles.profile_names(), style='TCombobox', state="readonly", width=14)
+        self.boot_profile_combo.pack(side=tk.LEFT, padx=(0, 5))
+        self.boot_profile_edit_button = ttk.Button(boot_profile_frame, text="编辑", style="Tab.TButton", command=self._open_boot_profile_editor, width=5)
+        self.boot_profile_edit_button.pack(side=tk.LEFT)
         self.stop_all_button = ttk.Button(control_frame, text="停止", command=self.stop_all_services, style="Stop.TButton", width=12)
-        self.stop_all_button.grid(row=0, column=3, padx=(0, 5))
+        self.stop_all_button.grid(row=0, column=4, padx=(0, 5))
         self.run_all_button = ttk.Button(control_frame, text="运行 ComfyUI", command=self.start_comfyui_service_thread, style="Accent.TButton", width=12)
-        self.run_all_button.grid(row=0, column=4, padx=(0, 0))
+        self.run_all_button.grid(row=0, column=5, padx=(0, 0))
 
         top_area_frame = ttk.Frame(self.root, style='TFrame')
         top_area_frame.grid(row=1, column=0, sticky="nsew")
@@ -797,6 +961,7 @@ class ComLauncherApp:
                 # Handle special marker
                 if line.strip() == _COMFYUI_READY_MARKER_.strip():
                     print("[Launcher INFO] Received ComfyUI ready marker.")
+                    self._on_backend_startup_complete()
                     self._trigger_comfyui_browser_opening()
                 elif self.main_output_text and self.main_output_text.winfo_exists(): # Safely access widget
                     # Route ComfyUI logs to main_output_text
@@ -825,7 +990,7 @@ class ComLauncherApp:
         # Determine log level/tag
         log_level = "stderr" if is_stderr else ("stdout" if is_comfyui_stream else "info")
 
-        api_port = self.config.get("comfyui_api_port", DEFAULT_COMFYUI_API_PORT)
+        api_port = self.comfyui_backend_port or self.config.get("comfyui_api_port", DEFAULT_COMFYUI_API_PORT)
         # More robust ready string detection
         ready_strings = [
             f"To see the GUI go to: http://127.0.0.1:{api_port}",
@@ -841,10 +1006,20 @@ class ComLauncherApp:
                     break
 
                 if line:
+                    # -X importtime rows are consumed by the profiler instead of flooding the log
+                    profiler = self.node_import_profiler
+                    if is_comfyui_stream and profiler and profiler.feed_line(line):
+                        continue
+
                     # Put the raw line into the queue with prefix and level
                     # Prefix is added here for streams, log_to_gui adds prefix for its own messages
                     target_queue.put((stream_name_prefix + " " + line, log_level))
 
+                    # ComfyUI logs to both streams, so both readers feed the telemetry parser
+                    telemetry = self.comfyui_telemetry
+                    if is_comfyui_stream and telemetry:
+                        telemetry.feed_line(line)
+
                     # Check for ComfyUI ready marker ONLY if it's a ComfyUI stream
                     # and we haven't sent the internal marker yet.
                     if is_comfyui_stream and not self.comfyui_ready_marker_sent:
@@ -959,6 +1134,11 @@ class ComLauncherApp:
         if not self._validate_paths_for_execution(check_comfyui=True, check_git=False):
             return # Validation failed, error shown by validate function
 
+        if not self._ensure_idle_proxy():
+            return # Proxy could not bind the public port, error already shown
+
+        self.comfyui_idle_sleeping = False
+        self.idle_wake_in_progress = False
         self.stop_event.clear()
         self.comfyui_externally_detected = False
         self.backend_browser_triggered_for_session = False
@@ -1008,7 +1188,7 @@ class ComLauncherApp:
         if self._is_comfyui_running(): # Double check within thread
             return
 
-        port_to_check = int(self.config.get("comfyui_api_port", DEFAULT_COMFYUI_API_PORT))
+        port_to_check = int(self.comfyui_backend_port or self.config.get("comfyui_api_port", DEFAULT_COMFYUI_API_PORT))
         check_url = f"http://127.0.0.1:{port_to_check}/queue"
         is_already_running = False
 
@@ -1042,7 +1222,13 @@ class ComLauncherApp:
             self.log_to_gui("ComfyUI", f"启动 ComfyUI 后台于 {self.comfyui_install_dir}...", "info")
             # Ensure args are current
             self.update_derived_paths()
-            base_cmd = [self.comfyui_portable_python, "-s", "-u", self.comfyui_main_script]
+            self.worktree_pool.sync_shared_files(self.comfyui_repo_dir)
+            self._apply_boot_profile()
+            # Matching cached environment (same requirements combination) if one is ready, else the configured Python
+            base_cmd = [self.env_cache.python_for_launch(), "-s", "-u"]
+            if self.config.get("python_importtime", DEFAULT_PYTHON_IMPORTTIME) == "启用":
+                base_cmd += ["-X", "importtime"] # Module-level import timings on stderr (filtered from the log)
+            base_cmd.append(self.comfyui_main_script)
             comfyui_cmd_list = base_cmd + self.comfyui_base_args
 
             cmd_log_list = [shlex.quote(arg) for arg in comfyui_cmd_list]
@@ -1070,6 +1256,11 @@ class ComLauncherApp:
                 env=comfy_env, text=True, encoding='utf-8', errors='replace'
             )
             self.log_to_gui("ComfyUI", f"Backend PID: {self.comfyui_process.pid}", "info")
+            self.boot_started_at = time.time()
+            self._start_resource_sampler(self.comfyui_process.pid)
+            self._start_telemetry_session()
+            self.node_import_profiler = NodeImportProfiler(
+                on_block_complete=lambda results: self.root.after(0, lambda: self._on_node_import_times(results)))
 
             # Start threads to read stdout and stderr
             self.comfyui_reader_thread_stdout = threading.Thread(target=self.stream_output, args=(self.comfyui_process.stdout, "[ComfyUI]"), daemon=True)
@@ -1162,6 +1353,9 @@ class ComLauncherApp:
             print(f"[Launcher ERROR] {error_msg}")
             self.log_to_gui("ComfyUI", error_msg, "stderr")
         finally:
+            self._stop_resource_sampler()
+            self._finish_telemetry_session()
+            self._restore_boot_profile()
             self.comfyui_process = None
             self.stop_event.clear()
             self.backend_browser_triggered_for_session = False
@@ -1190,6 +1384,8 @@ class ComLauncherApp:
         task_running = self._is_update_task_running()
         comfy_externally_detected = self.comfyui_externally_detected
 
+        # An explicit stop also releases the public port held by the idle proxy
+        self._stop_idle_proxy()
 
         if not process_running and not comfy_externally_detected and not task_running:
              print("[Launcher INFO] Stop all: No managed process active or detected.")
@@ -1225,6 +1421,237 @@ class ComLauncherApp:
         self.root.after(500, self._update_ui_state)
 
 
+    # --- Resource Sampling ---
+    def _start_resource_sampler(self, pid):
+        """Starts a new resource sampler for the backend process, replacing the previous one."""
+        self._stop_resource_sampler()
+        try:
+            interval = float(self.config.get("resource_sample_interval", DEFAULT_RESOURCE_SAMPLE_INTERVAL))
+        except (TypeError, ValueError):
+            interval = float(DEFAULT_RESOURCE_SAMPLE_INTERVAL)
+        sampler = ResourceSampler(self, pid, interval_sec=interval)
+        if sampler.start():
+            self.resource_sampler = sampler
+
+    def _stop_resource_sampler(self):
+        """Stops the running sampler; its samples stay available for the Performance tab and export."""
+        if self.resource_sampler:
+            self.resource_sampler.stop()
+
+
+    # --- Execution Telemetry ---
+    def _start_telemetry_session(self):
+        """Starts a telemetry session for a new backend process, closing any unfinished previous session."""
+        self._finish_telemetry_session()
+        settings_snapshot = {key: self.config.get(key, "") for key in TELEMETRY_SETTINGS_KEYS}
+        self.comfyui_telemetry = ComfyUITelemetry(self.telemetry_history_file, settings_snapshot)
+
+    def _finish_telemetry_session(self):
+        """Saves the current telemetry session summary (no-op if already saved or empty)."""
+        telemetry = self.comfyui_telemetry
+        if not telemetry:
+            return
+        try:
+            record = telemetry.finish()
+            if record:
+                p50 = f"{record['p50']:.2f}s" if record['p50'] is not None else "-"
+                self.log_to_gui("Launcher", f"本次会话遥测已保存: {record['prompts']} 次执行, p50 {p50}, 模型加载 {record['model_loads']} 次。", "info")
+        except Exception as e:
+            print(f"[Launcher WARNING] Failed to save telemetry session: {e}")
+
+
+    # --- Custom Node Import Times ---
+    def _on_node_import_times(self, node_times):
+        """Hands one launch's custom node import times to the management tab. Runs in GUI thread."""
+        management = self.modules.get('management')
+        if management:
+            try:
+                management.record_import_times(node_times)
+            except Exception as e:
+                print(f"[Launcher WARNING] Failed to record node import times: {e}")
+        profiler = self.node_import_profiler
+        if profiler and profiler.has_module_data():
+            top = ", ".join(f"{package} {seconds:.2f}s" for package, seconds in profiler.top_modules())
+            self.log_to_gui("Launcher", f"-X importtime 最慢的模块包: {top}", "info")
+
+
+    # --- Boot Profiles ---
+    def _apply_boot_profile(self):
+        """Disables custom nodes excluded by the selected boot profile. Runs in the start thread before Popen."""
+        profile_name = self.config.get("boot_profile", ALL_NODES_PROFILE)
+        self.active_boot_profile = profile_name
+        if profile_name == ALL_NODES_PROFILE or not self.comfyui_nodes_dir or not os.path.isdir(self.comfyui_nodes_dir):
+            self.boot_profiles.restore() # Leftovers from an interrupted launch
+            return
+        if self.boot_profiles.get_nodes(profile_name) is None:
+            self.log_to_gui("Launcher", f"启动配置 '{profile_name}' 不存在，将加载全部节点。", "warn")
+            self.active_boot_profile = ALL_NODES_PROFILE
+            self.boot_profiles.restore()
+            return
+        disabled, failed = self.boot_profiles.apply(profile_name, self.comfyui_nodes_dir)
+        self.log_to_gui("Launcher", f"启动配置 '{profile_name}': 临时禁用 {len(disabled)} 个节点，启动完成后恢复。", "info")
+        if failed:
+            self.log_to_gui("Launcher", f"以下节点无法临时禁用，将照常加载: {', '.join(failed)}", "warn")
+
+    def _restore_boot_profile(self):
+        """Renames nodes disabled by the boot profile back. Safe to call repeatedly."""
+        if not self.boot_profiles.has_pending_restore():
+            return
+        restored, failed = self.boot_profiles.restore()
+        if restored:
+            self.log_to_gui("Launcher", f"已恢复启动配置临时禁用的 {len(restored)} 个节点。", "info")
+        if failed:
+            self.log_to_gui("Launcher", f"以下节点恢复失败 (目标已存在或被占用)，请手动去掉 .disabled 后缀: {', '.join(failed)}", "error")
+
+    def _on_backend_startup_complete(self):
+        """Records the startup time for the active profile and restores disabled nodes. Runs in GUI thread."""
+        started_at, self.boot_started_at = self.boot_started_at, None
+        if started_at is not None:
+            seconds = time.time() - started_at
+            profile_name = self.active_boot_profile or ALL_NODES_PROFILE
+            enabled = self.boot_profiles.get_nodes(profile_name)
+            self.log_to_gui("Launcher", f"ComfyUI 启动耗时 {seconds:.1f}s (启动配置: {profile_name})", "info")
+            try:
+                baseline = self.boot_profiles.startup_stats().get(profile_name, {}).get("mean")
+                self.boot_profiles.record_startup(profile_name, seconds, len(enabled) if enabled is not None else None)
+                self.bytecode_compiler.record_startup(seconds, baseline)
+            except Exception as e:
+                print(f"[Launcher WARNING] Failed to record startup time: {e}")
+        # Excluded nodes were never imported, so they can be renamed back while the backend runs
+        self._restore_boot_profile()
+
+    def _refresh_boot_profile_choices(self):
+        """Reloads the profile list of the run controls combobox."""
+        try:
+            if hasattr(self, 'boot_profile_combo') and self.boot_profile_combo.winfo_exists():
+                self.boot_profile_combo.config(values=self.boot_profiles.profile_names())
+        except tk.TclError:
+            pass
+
+    def _open_boot_profile_editor(self):
+        """Opens the boot profile editor window."""
+        if not self.comfyui_nodes_dir or not os.path.isdir(self.comfyui_nodes_dir):
+            messagebox.showerror("目录错误", f"ComfyUI custom_nodes 目录未找到或无效:\n{self.comfyui_nodes_dir}", parent=self.root)
+            return
+        if self.boot_profiles.has_pending_restore():
+            self._restore_boot_profile() # Show every node in the editor, not only the enabled ones
+        BootProfileEditor(self, self.boot_profiles)
+
+    def _open_snapshot_manager(self):
+        """Opens the environment snapshot window (create / restore / delete)."""
+        if self.modules.get('management') and hasattr(self.modules['management'], 'is_modal_open') and self.modules['management'].is_modal_open():
+             messagebox.showwarning("操作进行中", "请先关闭节点版本历史弹窗。", parent=self.root)
+             return
+        if not self._validate_paths_for_execution(check_comfyui=True, check_git=True, show_error=True):
+             return
+        SnapshotManagerWindow(self, self.snapshots)
+
+
+    # --- Idle Sleep (socket-activated backend) ---
+    def _ensure_idle_proxy(self):
+        """Starts, restarts or stops the idle proxy to match the config. Returns False if the public port could not be bound."""
+        if self.config.get("idle_sleep_enabled", DEFAULT_IDLE_SLEEP_ENABLED) != "启用":
+            self._stop_idle_proxy()
+            return True
+
+        if self.idle_proxy and self.idle_proxy.is_running():
+            if self.idle_proxy.matches_ports(self.comfyui_api_port, self.comfyui_backend_port):
+                return True
+            self._stop_idle_proxy() # Port config changed since the proxy was bound
+
+        try:
+            proxy = IdleSleepProxy(self, self.comfyui_api_port, self.comfyui_backend_port)
+            proxy.start()
+            self.idle_proxy = proxy
+            return True
+        except (OSError, ValueError) as e:
+            self.idle_proxy = None
+            error_msg = f"无法在端口 {self.comfyui_api_port} 上启动空闲休眠代理: {e}"
+            self.log_to_gui("Launcher", error_msg, "error")
+            messagebox.showerror("空闲休眠代理错误", f"{error_msg}\n\n请检查端口是否被占用，或在设置中禁用空闲自动休眠。", parent=self.root)
+            return False
+
+    def _stop_idle_proxy(self):
+        """Stops the idle proxy (if any) and leaves the sleeping state."""
+        self.comfyui_idle_sleeping = False
+        self.idle_wake_in_progress = False
+        if self.idle_proxy:
+            try:
+                self.idle_proxy.stop()
+            except Exception as e:
+                print(f"[Launcher WARNING] Failed to stop idle proxy: {e}")
+            self.idle_proxy = None
+
+    def _enter_idle_sleep(self):
+        """Called in the GUI thread by the idle proxy: stops the backend but keeps the proxy listening."""
+        if not self.idle_proxy or not self._is_comfyui_running() or self._is_update_task_running():
+            if self.idle_proxy:
+                self.idle_proxy.reset_idle_timer()
+            return
+
+        self.log_to_gui("Launcher", "ComfyUI 后台空闲，释放内存/显存并进入休眠。下次访问时自动唤醒。", "info")
+        self.comfyui_idle_sleeping = True
+        # Waiting for the process to exit takes up to ~15 s, so it happens in the update worker, not in the GUI thread
+        self.update_task_queue.put((self._idle_sleep_stop_task, [self.comfyui_process], {}))
+        self._update_ui_state()
+
+    def _idle_sleep_stop_task(self, process):
+        """Terminates the backend process for idle sleep. Runs in worker thread."""
+        # Do not touch stop_event here: it would also end the update worker loop
+        try:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.log_to_gui("ComfyUI", "强制终止 ComfyUI 后台...", "warn")
+                process.kill()
+                process.wait(timeout=5)
+            self.log_to_gui("ComfyUI", "ComfyUI 后台已休眠。", "info")
+        except Exception as e:
+            self.log_to_gui("ComfyUI", f"休眠时停止 ComfyUI 后台出错: {e}", "stderr")
+        finally:
+            self.root.after(0, lambda: self._finish_idle_sleep(process))
+
+    def _finish_idle_sleep(self, process):
+        """GUI thread part of entering idle sleep, once the backend process has exited."""
+        if self.comfyui_process is not process:
+            return # Already replaced by a wake-up; its start reset the per-session state
+        self._stop_resource_sampler()
+        self._finish_telemetry_session()
+        self._restore_boot_profile()
+        self.comfyui_process = None
+        self.comfyui_ready_marker_sent = False
+        try:
+            if hasattr(self, 'status_label') and self.status_label.winfo_exists():
+                self.status_label.config(text="状态: ComfyUI 休眠中")
+        except tk.TclError:
+            pass
+        self._update_ui_state()
+
+    def _wake_from_idle_sleep(self):
+        """Called in the GUI thread by the idle proxy when a request arrives and the backend is down."""
+        if not self.idle_proxy or self.idle_wake_in_progress:
+            return
+        if self._is_update_task_running(): # Includes the idle sleep stop itself
+            self.log_to_gui("Launcher", "更新任务正在进行中，暂不唤醒 ComfyUI 后台。", "warn")
+            self.idle_proxy.wake_failed("更新任务进行中")
+            return
+        if self._is_comfyui_running():
+            return
+        if not self._validate_paths_for_execution(check_comfyui=True, check_git=False, show_error=False):
+            self.log_to_gui("Launcher", "路径配置无效，无法唤醒 ComfyUI 后台。", "error")
+            self.idle_proxy.wake_failed("路径配置无效")
+            return
+
+        self.log_to_gui("Launcher", "收到访问请求，正在唤醒 ComfyUI 后台...", "info")
+        self.comfyui_idle_sleeping = False
+        self.idle_wake_in_progress = True
+        self.comfyui_externally_detected = False
+        self.comfyui_ready_marker_sent = False
+        threading.Thread(target=self._start_comfyui_service, daemon=True).start()
+        self._update_ui_state()
+
+
     # --- Git Execution Helper (Remains in launcher.py) ---
     def _run_git_command(self, command_list, cwd, timeout=300, log_output=True):
         """Runs a git command, logs output, and returns stdout, stderr, return code."""
@@ -1235,23 +1662,27 @@ class ComLauncherApp:
                  self.log_to_gui("Git", err_msg, "error", target_override="Launcher")
              return "", err_msg, 127
 
-        full_cmd = [git_exe] + command_list
-        git_env = os.environ.copy()
-        git_env['PYTHONIOENCODING'] = 'utf-8'
-        git_env['GIT_TERMINAL_PROMPT'] = '0' # Prevent interactive prompts
+        # Network commands go through the fastest mirror (url.<mirror>.insteadOf), retried on the next one if it fails
+        return self.mirrors.run_git(command_list, lambda args: self._run_process_command([git_exe] + args, cwd, timeout=timeout, log_output=log_output, log_source="Git"))
+
+    def _run_process_command(self, full_cmd, cwd, timeout=300, log_output=True, log_source="Process"):
+        """Runs a complete command line (e.g. python -m pip ...), logs output, and returns stdout, stderr, return code."""
+        proc_env = os.environ.copy()
+        proc_env['PYTHONIOENCODING'] = 'utf-8'
+        proc_env['GIT_TERMINAL_PROMPT'] = '0' # Prevent interactive prompts
 
         if not os.path.isdir(cwd):
-             err_msg = f"Git 命令工作目录不存在或无效: {cwd}"
+             err_msg = f"{log_source} 命令工作目录不存在或无效: {cwd}"
              if log_output:
-                 self.log_to_gui("Git", err_msg, "error", target_override="Launcher")
+                 self.log_to_gui(log_source, err_msg, "error", target_override="Launcher")
              return "", err_msg, 1
 
         try:
             cmd_log_list = [shlex.quote(arg) for arg in full_cmd]
             cmd_log_str = ' '.join(cmd_log_list)
             if log_output:
-                 self.log_to_gui("Git", f"执行: {cmd_log_str}", "cmd", target_override="Launcher")
-                 self.log_to_gui("Git", f"工作目录: {cwd}", "cmd", target_override="Launcher")
+                 self.log_to_gui(log_source, f"执行: {cmd_log_str}", "cmd", target_override="Launcher")
+                 self.log_to_gui(log_source, f"工作目录: {cwd}", "cmd", target_override="Launcher")
 
             startupinfo = None
             creationflags = 0
@@ -1264,7 +1695,7 @@ class ComLauncherApp:
                 stdout=subprocess.PIPE, stderr=subprocess.PIPE,
                 text=True, encoding='utf-8', errors='replace',
                 startupinfo=startupinfo, creationflags=creationflags,
-                env=git_env
+                env=proc_env
             )
 
             stdout_full = ""
@@ -1274,12 +1705,12 @@ class ComLauncherApp:
                 returncode = process.returncode
                 if log_output:
                     if stdout_full:
-                        self.log_to_gui("Git", stdout_full, "stdout", target_override="Launcher")
+                        self.log_to_gui(log_source, stdout_full, "stdout", target_override="Launcher")
                     if stderr_full:
-                        self.log_to_gui("Git", stderr_full, "stderr", target_override="Launcher")
+                        self.log_to_gui(log_source, stderr_full, "stderr", target_override="Launcher")
             except subprocess.TimeoutExpired:
                 if log_output:
-                    self.log_to_gui("Git", f"Git 命令超时 ({timeout} 秒), 进程被终止。", "error", target_override="Launcher")
+                    self.log_to_gui(log_source, f"{log_source} 命令超时 ({timeout} 秒), 进程被终止。", "error", target_override="Launcher")
                 try:
                     process.kill()
                 except OSError:
@@ -1288,19 +1719,19 @@ class ComLauncherApp:
                 stdout_full, stderr_full = "", "命令执行超时 / Command timed out"
 
             if log_output and returncode != 0:
-                 self.log_to_gui("Git", f"Git 命令返回非零退出码 {returncode}。", "warn", target_override="Launcher")
+                 self.log_to_gui(log_source, f"{log_source} 命令返回非零退出码 {returncode}。", "warn", target_override="Launcher")
 
             return stdout_full, stderr_full, returncode
 
         except FileNotFoundError:
-            error_msg = f"Git 可执行文件未找到: {git_exe}"
+            error_msg = f"{log_source} 可执行文件未找到: {full_cmd[0]}"
             if log_output:
-                self.log_to_gui("Git", error_msg, "error", target_override="Launcher")
+                self.log_to_gui(log_source, error_msg, "error", target_override="Launcher")
             return "", error_msg, 127
         except Exception as e:
-            error_msg = f"执行 Git 命令时发生意外错误: {e}\n命令: {' '.join(full_cmd)}"
+            error_msg = f"执行 {log_source} 命令时发生意外错误: {e}\n命令: {' '.join(full_cmd)}"
             if log_output:
-                self.log_to_gui("Git", error_msg, "error", target_override="Launcher")
+                self.log_to_gui(log_source, error_msg, "error", target_override="Launcher")
             return "", error_msg, 1
 
 
@@ -1576,6 +2007,72 @@ class ComLauncherApp:
                 time.sleep(1)
 
 
+    def _queue_after_dependency_precheck(self, requirement_sources, action_desc, operation, parent=None, on_queued=None):
+        """
+        Queues an install/update/activation behind the offline conflict pre-check (GUI thread).
+        Reading the requirements (git show) and the check run as a task in the update worker; the confirmation, shown only
+        if the pending requirements introduce a conflict, and the queueing of the operation follow in the GUI thread.
+
+        Args:
+            requirement_sources: [(label, repo_path, ref)] whose requirements.txt at ref is checked.
+            action_desc: Short description for the log and the confirmation.
+            operation: (task, args, kwargs) put on the update queue once confirmed.
+            parent: Parent window of the confirmation (default: the main window).
+            on_queued: Called in the GUI thread after the operation was queued.
+        """
+        if not requirement_sources or not self.dependency_checker.is_available():
+            self._queue_precheck_operation(operation, on_queued)
+            return
+        self.log_to_gui("Dependencies", f"依赖冲突预检 ({action_desc}) 已添加到队列...", "info")
+        self.update_task_queue.put((self._dependency_precheck_task, [requirement_sources, action_desc, operation, parent, on_queued], {}))
+        self._update_ui_state()
+
+    def _dependency_precheck_task(self, requirement_sources, action_desc, operation, parent, on_queued):
+        """Reads the pending requirements and runs the pre-check. Runs in worker thread; logs the full report."""
+        introduced = []
+        try:
+            mgmt_module = self.modules.get('management')
+            pending_requirements = {}
+            for label, repo_path, ref in requirement_sources:
+                requirements = mgmt_module._read_requirements_at_ref(repo_path, ref)
+                if requirements is not None:
+                    pending_requirements[label] = requirements
+            if pending_requirements:
+                started = time.time()
+                result = self.dependency_checker.check(pending_requirements)
+                elapsed_ms = (time.time() - started) * 1000
+                self.log_to_gui("Dependencies", f"依赖冲突预检 ({action_desc}): 检查 {result['checked']} 个 requirements，{len(result['conflicts'])} 个冲突，{len(result['changes'])} 个版本变更 ({elapsed_ms:.0f} ms)。", "warn" if result["conflicts"] else "info")
+                for line in format_conflict_report(result):
+                    self.log_to_gui("Dependencies", line, "warn")
+                introduced = [conflict for conflict in result["conflicts"] if conflict["introduced_by"]]
+        except Exception as e:
+            print(f"[Launcher WARNING] Dependency pre-check failed, continuing without it: {e}")
+        self.root.after(0, lambda: self._confirm_dependency_precheck(introduced, action_desc, operation, parent, on_queued))
+
+    def _confirm_dependency_precheck(self, introduced, action_desc, operation, parent, on_queued):
+        """GUI thread part of the pre-check: asks for confirmation if conflicts are introduced, then queues the operation."""
+        if introduced:
+            report_lines = format_conflict_report({"conflicts": introduced, "changes": []}, limit=8)
+            if not messagebox.askyesno(
+                "依赖冲突预检",
+                f"{action_desc} 将引入 {len(introduced)} 个依赖冲突:\n\n" + "\n".join(report_lines) +
+                "\n\n继续安装时 pip 可能升级或降级已安装的包，导致其他节点或 ComfyUI 无法运行。\n仍要继续吗？",
+                icon="warning", parent=parent if parent and self.window_to_exists(parent) else self.root):
+                return
+        if self._is_comfyui_running() or self.comfyui_externally_detected:
+            # Started while the pre-check was running
+            messagebox.showwarning("服务运行中", f"ComfyUI 后台服务正在运行，已取消: {action_desc}。", parent=self.root)
+            return
+        self._queue_precheck_operation(operation, on_queued)
+
+    def _queue_precheck_operation(self, operation, on_queued):
+        """Puts the confirmed operation on the update queue (GUI thread)."""
+        self.update_task_queue.put(operation)
+        if on_queued:
+            on_queued()
+        self._update_ui_state()
+
+
     # --- Queueing Methods for UI actions (Remains in launcher.py, calls module methods) ---
     # These methods are typically called from the GUI thread (e.g., button clicks).
     # They perform basic validation and then add a task (which is a method of the module instance)
@@ -1678,9 +2175,10 @@ class ComLauncherApp:
             return
 
         self.log_to_gui("Launcher", f"将激活本体版本 '{full_commit_id[:8]}' task添加到队列...", "info") # Corrected to 'task'
-        # Queue the task method of the management module instance
+        # Queue the task method of the management module instance (behind the dependency pre-check)
         if hasattr(mgmt_module, '_activate_main_body_version_task'):
-            self.update_task_queue.put((mgmt_module._activate_main_body_version_task, [comfyui_dir, full_commit_id], {}))
+            self._queue_after_dependency_precheck([("ComfyUI", comfyui_dir, full_commit_id)], f"激活本体版本 '{full_commit_id[:8]}'",
+                                                  (mgmt_module._activate_main_body_version_task, [comfyui_dir, full_commit_id], {}))
         else:
             self.log_to_gui("Launcher", "Management module _activate_main_body_version_task method not found.", "error")
             messagebox.showerror("模块错误", "节点管理模块部分功能缺失，无法执行激活。", parent=self.root)
@@ -1737,6 +2235,13 @@ class ComLauncherApp:
              self.log_to_gui("Launcher", "更新任务正在进行中...", "warn")
              return
 
+        # Several selected nodes: one confirmation and one batch task instead of one task per node
+        if hasattr(mgmt_module, 'get_selected_nodes_item_data'):
+             selected_nodes = mgmt_module.get_selected_nodes_item_data()
+             if len(selected_nodes) > 1:
+                  self._queue_node_batch_operation(mgmt_module, selected_nodes)
+                  return
+
         # Access selected item data via management module
         selected_item_data = None
         if hasattr(mgmt_module, 'get_selected_node_item_data'):
@@ -1788,31 +2293,7 @@ class ComLauncherApp:
                   messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再进行节点安装。", parent=self.root)
                   return
 
-             target_ref_for_install = "main" # Default branch (can be overridden)
-             # Try to infer target reference (branch/tag) from online config info if available
-             # Access cached data via management module safely
-             found_online_node = None
-             if hasattr(mgmt_module, 'all_known_nodes'):
-                  # Find the node in the combined list (which includes online nodes)
-                  found_online_node = next((n for n in mgmt_module.all_known_nodes if n.get("name","").lower() == node_name.lower()), None)
-
-             if found_online_node:
-                  potential_ref = found_online_node.get("reference") or found_online_node.get("branch")
-                  if potential_ref:
-                       target_ref_for_install = potential_ref
-                       self.log_to_gui("Management", f"从在线配置获取到目标引用: {target_ref_for_install}", "info")
-             elif repo_info and not repo_info.startswith("信息获取失败"):
-                 # Fallback to parsing the repo_info string if online config wasn't used or failed
-                 if "在线目标:" in repo_info:
-                      potential_ref = repo_info.split("在线目标:", 1)[-1].strip()
-                      if potential_ref:
-                           target_ref_for_install = potential_ref
-                 # Attempt to parse branch name from repo_info like "branch (commit)"
-                 elif '(' in repo_info and ')' in repo_info:
-                     parts = repo_info.split('(')
-                     potential_ref = parts[0].strip()
-                     if potential_ref:
-                         target_ref_for_install = potential_ref
+             target_ref_for_install = self._infer_node_target_ref(mgmt_module, node_name, repo_info) or "main" # Default branch (can be overridden)
 
 
              confirm_msg = f"确定要安装节点 '{node_name}' 吗？\n" \
@@ -1824,10 +2305,14 @@ class ComLauncherApp:
              if not confirm:
                  return
 
+             # The requirements of a node that isn't cloned yet are only known offline if its mirror is cached
+             requirement_sources = [(node_name, self.repo_cache.mirror_path(repo_url), target_ref_for_install)] if self.repo_cache.has_mirror(repo_url) else []
+
              self.log_to_gui("Launcher", f"将安装节点 '{node_name}' (目标引用: {target_ref_for_install})任务添加到队列...", "info")
-             # Queue the install task method of the management module
+             # Queue the install task method of the management module (behind the dependency pre-check)
              if hasattr(mgmt_module, '_install_node_task'):
-                 self.update_task_queue.put((mgmt_module._install_node_task, [node_name, node_install_path, repo_url, target_ref_for_install], {}))
+                 self._queue_after_dependency_precheck(requirement_sources, f"安装节点 '{node_name}'",
+                                                       (mgmt_module._install_node_task, [node_name, node_install_path, repo_url, target_ref_for_install], {}))
              else:
                  self.log_to_gui("Launcher", "Management module _install_node_task method not found.", "error")
                  messagebox.showerror("模块错误", "节点管理模块部分功能缺失，无法执行安装。", parent=self.root)
@@ -1837,6 +2322,100 @@ class ComLauncherApp:
         self.root.after(0, self._update_ui_state)
 
 
+    def _infer_node_target_ref(self, mgmt_module, node_name, repo_info):
+        """Target reference (branch/tag) of a node from the online config, else parsed from its repo_info column, or None."""
+        # Access cached data via management module safely
+        found_online_node = None
+        if hasattr(mgmt_module, 'catalog'):
+             # Find the node in the combined catalog (which includes online nodes)
+             found_online_node = mgmt_module.catalog.find(node_name)
+
+        if found_online_node:
+             potential_ref = found_online_node.get("reference") or found_online_node.get("branch")
+             if potential_ref:
+                  self.log_to_gui("Management", f"从在线配置获取到目标引用: {potential_ref}", "info")
+                  return potential_ref
+        elif repo_info and not repo_info.startswith("信息获取失败"):
+            # Fallback to parsing the repo_info string if online config wasn't used or failed
+            if "在线目标:" in repo_info:
+                 potential_ref = repo_info.split("在线目标:", 1)[-1].strip()
+                 if potential_ref:
+                      return potential_ref
+            # Attempt to parse branch name from repo_info like "branch (commit)"
+            elif '(' in repo_info and ')' in repo_info:
+                potential_ref = repo_info.split('(')[0].strip()
+                if potential_ref:
+                    return potential_ref
+        return None
+
+    def _queue_node_batch_operation(self, mgmt_module, selected_nodes):
+        """
+        Multi-selection variant of '切换版本'/'安装节点': installs the selected nodes that are not installed and switches
+        installed git nodes to their target reference (online config, else latest of the tracking branch).
+        One confirmation and one dependency pre-check for all of them; the work is queued as a single batch task.
+        """
+        if not self._validate_paths_for_execution(check_comfyui=True, check_git=True, show_error=True):
+             return
+        if not self.comfyui_nodes_dir or not os.path.isdir(self.comfyui_nodes_dir):
+             messagebox.showerror("目录错误", f"ComfyUI custom_nodes 目录未找到或无效:\n{self.comfyui_nodes_dir}", parent=self.root)
+             return
+        if self._is_comfyui_running() or self.comfyui_externally_detected:
+             messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再进行节点安装或版本切换。", parent=self.root)
+             return
+
+        operations = []
+        skipped = []
+        requirement_sources = []
+        for node_data in selected_nodes:
+             if len(node_data) < 5:
+                  continue
+             node_name, repo_info, repo_url = node_data[0], node_data[3], node_data[4]
+             node_install_path = os.path.normpath(os.path.join(self.comfyui_nodes_dir, node_name))
+             has_url = bool(repo_url) and repo_url not in ("本地安装，无Git信息", "无法获取远程 URL", "本地安装", "N/A", "无远程仓库")
+             if os.path.isdir(os.path.join(node_install_path, ".git")):
+                  local_info = (mgmt_module.catalog.find_local(node_name) if hasattr(mgmt_module, 'catalog') else None) or {}
+                  target_ref = self._infer_node_target_ref(mgmt_module, node_name, None)
+                  if not target_ref and local_info.get("remote_branch"):
+                       target_ref = f"origin/{local_info['remote_branch']}"
+                  if not target_ref:
+                       skipped.append(f"{node_name} (无目标引用)")
+                       continue
+                  operations.append({"action": "switch", "name": node_name, "path": node_install_path, "repo_url": repo_url, "ref": target_ref})
+                  requirement_sources.append((node_name, node_install_path, target_ref))
+             elif os.path.exists(node_install_path):
+                  skipped.append(f"{node_name} (已安装，非 Git 仓库)")
+                  continue
+             elif not has_url:
+                  skipped.append(f"{node_name} (无仓库地址)")
+                  continue
+             else:
+                  target_ref = self._infer_node_target_ref(mgmt_module, node_name, repo_info) or "main"
+                  operations.append({"action": "install", "name": node_name, "path": node_install_path, "repo_url": repo_url, "ref": target_ref})
+                  if self.repo_cache.has_mirror(repo_url):
+                       requirement_sources.append((node_name, self.repo_cache.mirror_path(repo_url), target_ref))
+
+        if not operations:
+             messagebox.showwarning("无可操作节点", "所选节点均无法安装或切换版本:\n- " + "\n- ".join(skipped), parent=self.root)
+             return
+
+        lines = [f"{'安装' if op['action'] == 'install' else '切换'} {op['name']} -> {op['ref']}" for op in operations]
+        confirm_msg = f"确定要批量处理 {len(operations)} 个节点吗？\n\n" + "\n".join(lines[:15])
+        if len(lines) > 15:
+             confirm_msg += f"\n... 以及另外 {len(lines) - 15} 个"
+        if skipped:
+             confirm_msg += "\n\n将跳过:\n- " + "\n- ".join(skipped)
+        confirm_msg += "\n\n切换版本会通过 checkout --force 覆盖本地修改。\n确认前请确保 ComfyUI 已停止运行。"
+        if not messagebox.askyesno("确认批量操作", confirm_msg, parent=self.root):
+             return
+
+        self.log_to_gui("Launcher", f"将批量节点操作任务添加到队列 (共 {len(operations)} 个)...", "info")
+        if hasattr(mgmt_module, '_batch_nodes_task'):
+             self._queue_after_dependency_precheck(requirement_sources, f"批量处理 {len(operations)} 个节点", (mgmt_module._batch_nodes_task, [operations], {}))
+        else:
+             self.log_to_gui("Launcher", "Management module _batch_nodes_task method not found.", "error")
+             messagebox.showerror("模块错误", "节点管理模块部分功能缺失，无法执行批量操作。", parent=self.root)
+        self.root.after(0, self._update_ui_state)
+
     def _queue_all_nodes_update(self):
         """Queues the task to update all installed git nodes (calls management module)."""
         # Access modal state via the management module instance safely
@@ -1860,18 +2439,18 @@ class ComLauncherApp:
              messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再进行全部节点更新。", parent=self.root)
              return
 
-        # Access management module and its local_nodes_only attribute safely
+        # Access management module and its node catalog safely
         mgmt_module = self.modules.get('management')
         nodes_to_update = []
-        if mgmt_module and hasattr(mgmt_module, 'local_nodes_only'):
+        if mgmt_module and hasattr(mgmt_module, 'catalog'):
              # Filter for installed git nodes with a known remote branch
              nodes_to_update = [
-                 node for node in mgmt_module.local_nodes_only
+                 node for node in mgmt_module.catalog.local_nodes
                  # Check if it's a git repo, has a URL, and has a remote tracking branch
                  if node.get("is_git") and node.get("repo_url") and node.get("repo_url") not in ("本地安装，无Git信息", "无法获取远程 URL", "本地安装", "N/A", "无远程仓库") and node.get("remote_branch") and node.get("remote_branch") != "N/A"
              ]
         else:
-             self.log_to_gui("Launcher", "Management module not loaded or local_nodes_only attribute missing, cannot get node list for update.", "error")
+             self.log_to_gui("Launcher", "Management module not loaded or node catalog missing, cannot get node list for update.", "error")
              messagebox.showerror("模块错误", "无法加载节点管理模块，无法更新全部节点。", parent=self.root)
              return
 
@@ -1884,10 +2463,13 @@ class ComLauncherApp:
         if not confirm:
             return
 
+        # Pre-check against the last fetched upstream state (the update task fetches again before pulling)
+        requirement_sources = [(node["name"], os.path.join(self.comfyui_nodes_dir, node["name"]), f"origin/{node['remote_branch']}") for node in nodes_to_update]
+
         self.log_to_gui("Launcher", f"将更新全部节点任务添加到队列 (共 {len(nodes_to_update)} 个)...", "info")
-        # Queue the update task method of the management module
+        # Queue the update task method of the management module (behind the dependency pre-check)
         if hasattr(mgmt_module, '_update_all_nodes_task'):
-            self.update_task_queue.put((mgmt_module._update_all_nodes_task, [nodes_to_update], {}))
+            self._queue_after_dependency_precheck(requirement_sources, "更新全部节点", (mgmt_module._update_all_nodes_task, [nodes_to_update], {}))
         else:
              self.log_to_gui("Launcher", "Management module _update_all_nodes_task method not found.", "error")
              messagebox.showerror("模块错误", "节点管理模块部分功能缺失，无法执行更新全部。", parent=self.root)
@@ -1913,6 +2495,12 @@ class ComLauncherApp:
              messagebox.showerror("模块错误", "节点管理模块未加载，无法进行更新管理。", parent=self.root)
              return
 
+        if hasattr(mgmt_module, 'get_selected_nodes_item_data'):
+             selected_nodes = mgmt_module.get_selected_nodes_item_data()
+             if len(selected_nodes) > 1:
+                  self._queue_node_batch_uninstall(mgmt_module, selected_nodes)
+                  return
+
         selected_item_data = None
         if hasattr(mgmt_module, 'get_selected_node_item_data'):
              selected_item_data = mgmt_module.get_selected_node_item_data()
@@ -1948,7 +2536,7 @@ class ComLauncherApp:
 
         confirm = messagebox.askyesno(
              "确认卸载节点",
-             f"确定要永久删除节点 '{node_name}' 及其目录 '{node_install_path}' 吗？\n此操作不可撤销。\n\n确认前请确保 ComfyUI 已停止运行。",
+             f"确定要卸载节点 '{node_name}' 吗？\n目录 '{node_install_path}' 将移入回收区，{TRASH_RETENTION_SEC // 3600} 小时内可通过“撤销卸载”恢复，之后自动删除。\n\n确认前请确保 ComfyUI 已停止运行。",
              parent=self.root)
         if not confirm:
             return
@@ -1965,6 +2553,76 @@ class ComLauncherApp:
         self.root.after(0, self._update_ui_state)
 
 
+    def _queue_node_batch_uninstall(self, mgmt_module, selected_nodes):
+        """Multi-selection variant of '卸载节点': one confirmation, then one batch task deleting all selected installed nodes."""
+        if not self.comfyui_nodes_dir or not os.path.isdir(self.comfyui_nodes_dir):
+             messagebox.showerror("目录错误", f"ComfyUI custom_nodes 目录未找到或无效:\n{self.comfyui_nodes_dir}", parent=self.root)
+             return
+        if self._is_comfyui_running() or self.comfyui_externally_detected:
+             messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再进行节点卸载。", parent=self.root)
+             return
+
+        operations = []
+        for node_data in selected_nodes:
+             if len(node_data) < 5 or node_data[1] != "已安装":
+                  continue
+             node_install_path = os.path.normpath(os.path.join(self.comfyui_nodes_dir, node_data[0]))
+             if os.path.isdir(node_install_path):
+                  operations.append({"action": "uninstall", "name": node_data[0], "path": node_install_path, "repo_url": node_data[4], "ref": None})
+        if not operations:
+             messagebox.showwarning("节点未安装", "所选节点均未安装。", parent=self.root)
+             return
+
+        names = [op["name"] for op in operations]
+        names_text = "\n".join(names[:15]) + (f"\n... 以及另外 {len(names) - 15} 个" if len(names) > 15 else "")
+        confirm = messagebox.askyesno(
+             "确认批量卸载节点",
+             f"确定要卸载以下 {len(operations)} 个节点吗？\n\n{names_text}\n\n节点目录将移入回收区，{TRASH_RETENTION_SEC // 3600} 小时内可通过“撤销卸载”逐个恢复 (最近卸载的优先)，之后自动删除。\n\n确认前请确保 ComfyUI 已停止运行。",
+             parent=self.root)
+        if not confirm:
+            return
+
+        self.log_to_gui("Launcher", f"将批量卸载 {len(operations)} 个节点任务添加到队列...", "info")
+        if hasattr(mgmt_module, '_batch_nodes_task'):
+            self.update_task_queue.put((mgmt_module._batch_nodes_task, [operations], {}))
+        else:
+             self.log_to_gui("Launcher", "Management module _batch_nodes_task method not found.", "error")
+             messagebox.showerror("模块错误", "节点管理模块部分功能缺失，无法执行批量卸载。", parent=self.root)
+        self.root.after(0, self._update_ui_state)
+
+
+    def _queue_node_restore(self):
+        """Queues undoing the most recent uninstall (renames the node back out of the trash area)."""
+        if self.modules.get('management') and hasattr(self.modules['management'], 'is_modal_open') and self.modules['management'].is_modal_open():
+             messagebox.showwarning("操作进行中", "请先关闭节点版本历史弹窗。", parent=self.root)
+             return
+        if self._is_update_task_running():
+             self.log_to_gui("Launcher", "更新任务正在进行中...", "warn")
+             return
+        mgmt_module = self.modules.get('management')
+        if not mgmt_module or not hasattr(mgmt_module, '_node_restore_task'):
+             messagebox.showerror("模块错误", "节点管理模块未加载，无法撤销卸载。", parent=self.root)
+             return
+        if self._is_comfyui_running() or self.comfyui_externally_detected:
+             messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再恢复节点。", parent=self.root)
+             return
+
+        entry_id, entry = self.node_trash.latest_restorable()
+        if not entry_id:
+             messagebox.showinfo("无可恢复节点", "回收区中没有可恢复的已卸载节点。", parent=self.root)
+             return
+        confirm = messagebox.askyesno(
+             "确认撤销卸载",
+             f"确定要恢复最近卸载的节点 '{entry['name']}' 吗？\n卸载时间: {entry.get('time', '')}\n恢复到: {entry['original_path']}",
+             parent=self.root)
+        if not confirm:
+            return
+
+        self.log_to_gui("Launcher", f"将恢复节点 '{entry['name']}' 任务添加到队列...", "info")
+        self.update_task_queue.put((mgmt_module._node_restore_task, [entry_id], {}))
+        self.root.after(0, self._update_ui_state)
+
+
     # --- Initial Data Loading Task (Remains in launcher.py) ---
     def start_initial_data_load(self):
          """Starts the initial data loading tasks in a background thread."""
@@ -2029,6 +2687,15 @@ class ComLauncherApp:
          # Use the getter method
          if not self.stop_event_set():
              self.log_to_gui("Launcher", "后台数据加载完成。", "info")
+             # Bring stale repository mirrors up to date without blocking the worker queue
+             if git_path_ok:
+                  self.repo_cache.refresh_all_async()
+                  # Periodic repository maintenance, only while the backend is idle
+                  self.git_maintenance.start()
+             # Uninstalled nodes and failed clones in the trash area are deleted in the background
+             self.node_trash.start()
+             # Measures the registered mirrors in the background; clones and downloads use the fastest one
+             self.mirrors.start()
 
 
     # --- Update Management Tasks (Moved to management.py) ---
@@ -2095,6 +2762,8 @@ class ComLauncherApp:
             status_text = "状态: ComfyUI 后台运行中"
         elif comfy_detected_externally:
             status_text = f"状态: 外部 ComfyUI 运行中 (端口 {self.comfyui_api_port_var.get()})" # Use current port from var
+        elif self.comfyui_idle_sleeping:
+            status_text = f"状态: ComfyUI 休眠中 (访问端口 {self.comfyui_api_port} 时自动唤醒)"
         else: # Neither ComfyUI running/detected/starting/stopping, nor update task running
             status_text = "状态: 服务已停止"
 
@@ -2105,7 +2774,7 @@ class ComLauncherApp:
         run_comfyui_enabled = tk.NORMAL if comfy_can_run_paths and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status) and not modal_is_open else tk.DISABLED
 
         # "停止" enabled if internal ComfyUI running OR any update task is running OR ComfyUI is starting/stopping (based on status text).
-        stop_all_enabled = tk.NORMAL if comfy_running_internally or update_task_running or is_starting_stopping_comfy_status else tk.DISABLED
+        stop_all_enabled = tk.NORMAL if comfy_running_internally or update_task_running or is_starting_stopping_comfy_status or self.comfyui_idle_sleeping else tk.DISABLED
         # Style for "停止" button
         main_stop_style = "StopRunning.TButton" if stop_all_enabled == tk.NORMAL else "Stop.TButton"
 
@@ -2148,6 +2817,8 @@ class ComLauncherApp:
         try:
             if hasattr(self, 'run_all_button') and self.run_all_button.winfo_exists():
                  self.run_all_button.config(state=run_comfyui_enabled)
+            if hasattr(self, 'boot_profile_combo') and self.boot_profile_combo.winfo_exists():
+                 self.boot_profile_combo.config(state="readonly" if run_comfyui_enabled == tk.NORMAL else tk.DISABLED)
             if hasattr(self, 'stop_all_button') and self.stop_all_button.winfo_exists():
                  self.stop_all_button.config(state=stop_all_enabled, style=main_stop_style)
         except tk.TclError:
@@ -2173,8 +2844,8 @@ class ComLauncherApp:
 
                      comfy_dir_is_repo = False
                      # Safely access install_dir via app instance
-                     if self.comfyui_install_dir and os.path.isdir(self.comfyui_install_dir):
-                          comfy_dir_is_repo = os.path.isdir(os.path.join(self.comfyui_install_dir, ".git"))
+                     if self.comfyui_repo_dir and os.path.isdir(self.comfyui_repo_dir):
+                          comfy_dir_is_repo = os.path.isdir(os.path.join(self.comfyui_repo_dir, ".git"))
 
                      # Activate requires base enabled, item selected, ComfyUI dir is git repo AND ComfyUI not running/detected/starting/stopping
                      activate_enabled_state = tk.DISABLED
@@ -2186,6 +2857,8 @@ class ComLauncherApp:
                 # Nodes Tab
                 # Safely check if treeview exists before querying selection
                 item_selected_nodes = hasattr(mgmt_module, 'nodes_tree') and mgmt_module.nodes_tree and mgmt_module.nodes_tree.winfo_exists() and bool(mgmt_module.nodes_tree.focus())
+                # More than one selected node: the buttons queue batch operations (each node is checked when queuing)
+                multi_selected_nodes = len(mgmt_module.nodes_tree.selection()) if item_selected_nodes else 0
 
                 node_is_installed = False; node_is_git = False; node_has_url = False
                 # Safely access nodes_tree and nodes_dir before trying to get item data
@@ -2196,12 +2869,12 @@ class ComLauncherApp:
                                node_name_selected = node_data[0]; node_status = node_data[1]; repo_url = node_data[4]
                                node_is_installed = (node_status == "已安装")
                                node_has_url = bool(repo_url) and repo_url not in ("本地安装，无Git信息", "无法获取远程 URL", "本地安装", "N/A", "无远程仓库")
-                               # Try finding in cached local list first (accessing local_nodes_only safely)
-                               found_node_info = hasattr(mgmt_module, 'local_nodes_only') and next((n for n in mgmt_module.local_nodes_only if n.get("name") == node_name_selected), None)
+                               # Try finding in the cached catalog first (O(1) by name, this runs on every UI state update)
+                               found_node_info = hasattr(mgmt_module, 'catalog') and mgmt_module.catalog.find_local(node_name_selected)
                                if found_node_info:
                                    node_is_git = found_node_info.get("is_git", False)
                                else:
-                                    # Fallback check by path if not in local_nodes_only (shouldn't happen if list is fresh?)
+                                    # Fallback check by path if not in the catalog (shouldn't happen if list is fresh?)
                                     node_install_path = os.path.normpath(os.path.join(self.comfyui_nodes_dir, node_name_selected))
                                     node_is_git = os.path.isdir(node_install_path) and os.path.isdir(os.path.join(node_install_path, ".git"))
 
@@ -2225,7 +2898,7 @@ class ComLauncherApp:
                 can_install = not node_is_installed and node_has_url # Need remote URL to install
                 switch_install_final_state = tk.DISABLED
                 # Check if ComfyUI is running/starting/stopping based on flags
-                if base_update_enabled == tk.NORMAL and item_selected_nodes and (can_switch or can_install) and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status):
+                if base_update_enabled == tk.NORMAL and item_selected_nodes and (can_switch or can_install or multi_selected_nodes > 1) and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status):
                     switch_install_final_state = tk.NORMAL
 
                 # Safely access switch/install button widget
@@ -2235,6 +2908,8 @@ class ComLauncherApp:
                      if item_selected_nodes: # Only change text if an item is actually selected
                           # Check if it's installed and git for '切换版本', otherwise '安装节点' if URL exists
                           button_text = "切换版本" if node_is_installed and node_is_git else "安装节点" if node_has_url else "切换版本" # Default if no URL
+                     if multi_selected_nodes > 1:
+                          button_text = f"批量安装/切换 ({multi_selected_nodes})"
                      mgmt_module.switch_install_node_button.config(state=switch_install_final_state, text=button_text)
 
 
@@ -2242,11 +2917,15 @@ class ComLauncherApp:
                 # Enabled if base enabled, item selected, installed, AND ComfyUI not running
                 uninstall_final_state = tk.DISABLED
                 # Check if ComfyUI is running/starting/stopping based on flags
-                if base_update_enabled == tk.NORMAL and item_selected_nodes and node_is_installed and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status):
+                if base_update_enabled == tk.NORMAL and item_selected_nodes and (node_is_installed or multi_selected_nodes > 1) and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status):
                      uninstall_final_state = tk.NORMAL
                 # Safely access uninstall button widget
                 if hasattr(mgmt_module, 'uninstall_node_button') and mgmt_module.uninstall_node_button and mgmt_module.uninstall_node_button.winfo_exists():
                      mgmt_module.uninstall_node_button.config(state=uninstall_final_state)
+                # Undo Uninstall Button Logic: same conditions without a selection (the click checks the trash area)
+                if hasattr(mgmt_module, 'restore_node_button') and mgmt_module.restore_node_button and mgmt_module.restore_node_button.winfo_exists():
+                     restore_enabled = base_update_enabled == tk.NORMAL and not (comfy_running_internally or comfy_detected_externally or is_starting_stopping_comfy_status)
+                     mgmt_module.restore_node_button.config(state=tk.NORMAL if restore_enabled else tk.DISABLED)
 
                 # Update All Button Logic:
                 # Enabled if base enabled AND ComfyUI not running
@@ -2366,6 +3045,10 @@ class ComLauncherApp:
         self.stop_event.clear()
         self.backend_browser_triggered_for_session = False
         self.comfyui_ready_marker_sent = False
+        self.idle_wake_in_progress = False
+        if self.idle_proxy:
+            self.idle_proxy.wake_failed("启动失败") # Held connections get a 503 instead of waiting for the timeout
+        self._restore_boot_profile() # Backend failed to start, don't leave nodes disabled
         # Keep external detection status as it might still be running outside
         # self.comfyui_externally_detected = False # Maybe don't reset this on *internal* error?
 
@@ -2384,6 +3067,11 @@ class ComLauncherApp:
     def _trigger_comfyui_browser_opening(self):
         """Opens the ComfyUI URL in a web browser when ComfyUI is ready."""
         comfy_is_active = self._is_comfyui_running() or self.comfyui_externally_detected
+        if self.idle_wake_in_progress:
+            # Woken by a client that is already connected; don't open another tab
+            self.idle_wake_in_progress = False
+            self.backend_browser_triggered_for_session = True
+            return
         if comfy_is_active and not self.backend_browser_triggered_for_session:
             self.backend_browser_triggered_for_session = True
             self.root.after(100, self._open_frontend_browser) # Slight delay to ensure port is fully open
@@ -2584,6 +3272,9 @@ class ComLauncherApp:
 
 
         # --- Stop Services ---
+        self.git_maintenance.stop()
+        self.node_trash.stop()
+        self.mirrors.stop()
         # Check if any managed process is running
         process_running = self._is_comfyui_running()
         task_running = self._is_update_task_running()
@@ -2640,6 +3331,13 @@ class ComLauncherApp:
                            pass # Ignore errors on terminate
                   # GUI will be destroyed below
 
+        # Save the telemetry session if it wasn't closed by a stop above
+        self._finish_telemetry_session()
+        # Release the public port if the idle proxy is still listening
+        self._stop_idle_proxy()
+        # Nodes disabled by a boot profile must not stay disabled after exit
+        self._restore_boot_profile()
+
         # --- Destroy GUI ---
         # Ensure the GUI is destroyed whether or not processes were running/stopped
         try:
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_boot_profiles.py
+# Tests for ui_modules/boot_profiles.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from ui_modules.boot_profiles import ALL_NODES_PROFILE, DISABLED_SUFFIX, BootProfileStore, list_custom_node_entries
+
+
+class BootProfileStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.nodes_dir = os.path.join(self.tmp_dir, "custom_nodes")
+        os.makedirs(os.path.join(self.nodes_dir, "__pycache__"))
+        for name in ("Alpha", "beta", "Gamma"):
+            os.makedirs(os.path.join(self.nodes_dir, name))
+        for name in ("single_node.py", "readme.txt"):
+            open(os.path.join(self.nodes_dir, name), "w").close()
+        os.makedirs(os.path.join(self.nodes_dir, "old" + DISABLED_SUFFIX))
+        data_dir = os.path.join(self.tmp_dir, "data")
+        self.profiles_file = os.path.join(data_dir, "boot_profiles.json")
+        self.journal_file = os.path.join(data_dir, "boot_profile_journal.json")
+        self.startup_file = os.path.join(data_dir, "boot_startup_times.json")
+        self.store = self._new_store()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _new_store(self):
+        return BootProfileStore(self.profiles_file, self.journal_file, self.startup_file)
+
+    def test_list_entries(self):
+        self.assertEqual(list_custom_node_entries(self.nodes_dir), ["Alpha", "beta", "Gamma", "single_node.py"])
+
+    def test_profiles_persist_sorted_and_deduplicated(self):
+        self.store.save_profile("minimal", ["beta", "Alpha", "beta"])
+        store = self._new_store()
+        self.assertEqual(store.get_nodes("minimal"), ["Alpha", "beta"])
+        self.assertEqual(store.profile_names(), [ALL_NODES_PROFILE, "minimal"])
+        self.assertIsNone(store.get_nodes(ALL_NODES_PROFILE))
+        store.delete_profile("minimal")
+        self.assertEqual(self._new_store().profiles, {})
+
+    def test_invalid_profiles_file_ignored(self):
+        os.makedirs(os.path.dirname(self.profiles_file))
+        with open(self.profiles_file, "w", encoding="utf-8") as f:
+            json.dump({"good": ["Alpha"], "bad": "Alpha"}, f)
+        self.assertEqual(self._new_store().profiles, {"good": ["Alpha"]})
+
+    def test_apply_and_restore(self):
+        self.store.save_profile("minimal", ["Alpha"])
+        disabled, failed = self.store.apply("minimal", self.nodes_dir)
+        self.assertEqual(sorted(disabled), ["Gamma", "beta", "single_node.py"])
+        self.assertEqual(failed, [])
+        self.assertEqual(list_custom_node_entries(self.nodes_dir), ["Alpha"])
+        self.assertTrue(self.store.has_pending_restore())
+
+        restored, failed = self._new_store().restore() # The journal survives a restart
+        self.assertEqual(sorted(restored), ["Gamma", "beta", "single_node.py"])
+        self.assertEqual(failed, [])
+        self.assertFalse(self.store.has_pending_restore())
+        self.assertEqual(list_custom_node_entries(self.nodes_dir), ["Alpha", "beta", "Gamma", "single_node.py"])
+
+    def test_applying_another_profile_restores_first(self):
+        self.store.save_profile("a", ["Alpha"])
+        self.store.save_profile("b", ["beta", "Gamma", "single_node.py"])
+        self.store.apply("a", self.nodes_dir)
+        disabled, _ = self.store.apply("b", self.nodes_dir)
+        self.assertEqual(disabled, ["Alpha"])
+        self.assertEqual(list_custom_node_entries(self.nodes_dir), ["beta", "Gamma", "single_node.py"])
+
+    def test_existing_disabled_copy_left_alone(self):
+        os.makedirs(os.path.join(self.nodes_dir, "beta" + DISABLED_SUFFIX))
+        self.store.save_profile("minimal", ["Alpha", "Gamma", "single_node.py"])
+        disabled, failed = self.store.apply("minimal", self.nodes_dir)
+        self.assertEqual((disabled, failed), ([], ["beta"]))
+        self.assertFalse(self.store.has_pending_restore())
+
+    def test_restore_keeps_entries_it_cannot_rename_back(self):
+        self.store.save_profile("minimal", ["Alpha", "Gamma", "single_node.py"])
+        self.store.apply("minimal", self.nodes_dir)
+        os.makedirs(os.path.join(self.nodes_dir, "beta")) # Reinstalled while disabled
+        restored, failed = self.store.restore()
+        self.assertEqual((restored, failed), ([], ["beta"]))
+        self.assertTrue(self.store.has_pending_restore())
+
+    def test_unreadable_journal_is_kept(self):
+        os.makedirs(os.path.dirname(self.journal_file))
+        with open(self.journal_file, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        self.assertEqual(self.store.restore(), ([], []))
+        self.assertTrue(self.store.has_pending_restore())
+
+    def test_unknown_profile_disables_nothing(self):
+        self.assertEqual(self.store.apply(ALL_NODES_PROFILE, self.nodes_dir), ([], []))
+        self.assertEqual(len(list_custom_node_entries(self.nodes_dir)), 4)
+
+    def test_startup_stats_per_profile(self):
+        for profile_name, seconds in (("minimal", 10.0), ("minimal", 20.0), (ALL_NODES_PROFILE, 60.0)):
+            self.store.record_startup(profile_name, seconds, 1)
+        stats = self.store.startup_stats()
+        self.assertEqual(stats["minimal"], {"count": 2, "mean": 15.0, "last": 20.0})
+        self.assertEqual(stats[ALL_NODES_PROFILE]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_bytecode.py
+# Tests for ui_modules/bytecode.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import re
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+from ui_modules import history_store
+from ui_modules.bytecode import BytecodePrecompiler, _exclude_pattern
+from ui_modules.dependency_check import COMFYUI_LABEL
+
+
+class ExcludePatternTest(unittest.TestCase):
+    def setUp(self):
+        self.main_body = os.path.join(os.sep, "opt", "ComfyUI")
+        self.pattern = re.compile(_exclude_pattern({COMFYUI_LABEL: self.main_body, "node-a": "/opt/node-a"}, skip_custom_nodes=True))
+
+    def _excluded(self, *parts):
+        return bool(self.pattern.search(os.path.join(self.main_body, *parts)))
+
+    def test_data_folders_only_at_the_top_level(self):
+        self.assertTrue(self._excluded("models", "checkpoints", "x.py"))
+        self.assertTrue(self._excluded("output", "x.py"))
+        self.assertFalse(self._excluded("comfy", "ldm", "models", "x.py"))
+        self.assertFalse(self._excluded("models.py"))
+
+    def test_vcs_and_cache_dirs_at_any_depth(self):
+        self.assertTrue(self.pattern.search("/opt/node-a/.git/hooks/x.py"))
+        self.assertTrue(self._excluded("comfy", "__pycache__", "x.py"))
+        self.assertFalse(self.pattern.search("/opt/node-a/models/x.py")) # Only the main body has data folders
+
+    def test_custom_nodes_skipped_on_request(self):
+        self.assertTrue(self._excluded("custom_nodes", "node-b", "x.py"))
+        pattern = re.compile(_exclude_pattern({COMFYUI_LABEL: self.main_body}, skip_custom_nodes=False))
+        self.assertFalse(pattern.search(os.path.join(self.main_body, "custom_nodes", "node-b", "x.py")))
+
+
+class _App:
+    """Just the attributes BytecodePrecompiler reads; runs the real compileall with this interpreter."""
+    def __init__(self):
+        self.config = {"bytecode_precompile": "启用"}
+        self.python_exe_var = self
+        self.logged = []
+
+    def get(self):
+        return sys.executable
+
+    def log_to_gui(self, source, message, level="info"):
+        self.logged.append((source, message, level))
+
+    def _run_process_command(self, command_list, cwd=None, timeout=None, log_output=True, log_source=None):
+        result = subprocess.run(command_list, cwd=cwd, capture_output=True, text=True, timeout=timeout)
+        return result.stdout, result.stderr, result.returncode
+
+
+class PrecompileTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.main_body = os.path.join(self.tmp_dir, "ComfyUI")
+        for parts in (("main.py",), ("comfy", "ldm", "models", "unet.py"), ("models", "loras", "helper.py"), ("custom_nodes", "node-a", "__init__.py")):
+            path = os.path.join(self.main_body, *parts)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("VALUE = 1\n")
+        self.history_file = os.path.join(self.tmp_dir, "bytecode_history.json")
+        self.precompiler = BytecodePrecompiler(_App(), self.history_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_compiles_changed_files_once(self):
+        self.assertEqual(self.precompiler.precompile({COMFYUI_LABEL: self.main_body}, skip_custom_nodes=True), 2)
+        self.assertTrue(os.path.isdir(os.path.join(self.main_body, "comfy", "ldm", "models", "__pycache__")))
+        self.assertFalse(os.path.exists(os.path.join(self.main_body, "models", "loras", "__pycache__")))
+        self.assertFalse(os.path.exists(os.path.join(self.main_body, "custom_nodes", "node-a", "__pycache__")))
+        self.assertEqual(self.precompiler.precompile({COMFYUI_LABEL: self.main_body}, skip_custom_nodes=True), 0) # Up to date
+        self.assertEqual([record["files"] for record in history_store.load_records(self.history_file)], [2])
+
+    def test_disabled_or_without_targets(self):
+        self.assertEqual(self.precompiler.precompile({}), 0)
+        self.precompiler.app.config["bytecode_precompile"] = "禁用"
+        self.assertEqual(self.precompiler.precompile({COMFYUI_LABEL: self.main_body}), 0)
+
+    def test_startup_attached_to_latest_record_once(self):
+        self.precompiler.precompile({COMFYUI_LABEL: self.main_body})
+        self.precompiler.record_startup(8.0, 10.0)
+        self.precompiler.record_startup(30.0, 10.0) # Later starts are not attributed to the precompile
+        record = history_store.load_records(self.history_file)[-1]
+        self.assertEqual((record["startup_seconds"], record["baseline_seconds"]), (8.0, 10.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
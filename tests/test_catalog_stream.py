@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_catalog_stream.py
+# Tests for ui_modules/catalog_stream.py (run: python -m unittest discover -s tests -t .)
+
+import json
+import random
+import unittest
+
+from ui_modules.catalog_stream import iter_catalog_entries
+
+ENTRIES = [
+    {"title": "ComfyUI-Manager", "reference": "https://github.com/ltdrdata/ComfyUI-Manager", "files": ["https://github.com/ltdrdata/ComfyUI-Manager.git"]},
+    {"title": "中文节点 ✓", "description": "多字节字符跨越分块边界", "files": [{"url": "https://github.com/example/zh-node.git"}]},
+    {"title": "Brackets ] and \"quotes\" [", "nested": {"list": [1, 2, {"deep": [3]}]}, "files": []},
+]
+
+
+def _split(data, rng):
+    """Splits bytes at random positions (including inside multi-byte characters and escapes)."""
+    chunks, pos = [], 0
+    while pos < len(data):
+        size = rng.randint(1, 17)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+
+class IterCatalogEntriesTest(unittest.TestCase):
+    def test_list_format(self):
+        data = json.dumps(ENTRIES, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(list(iter_catalog_entries([data])), ENTRIES)
+
+    def test_manager_format(self):
+        data = json.dumps({"custom_nodes": ENTRIES, "version": 2}, ensure_ascii=False, indent=2).encode("utf-8")
+        self.assertEqual(list(iter_catalog_entries([data])), ENTRIES)
+
+    def test_empty_list(self):
+        self.assertEqual(list(iter_catalog_entries([b'{"custom_nodes": []}'])), [])
+        self.assertEqual(list(iter_catalog_entries([b" [ ] "])), [])
+
+    def test_random_chunk_splits(self):
+        rng = random.Random(1234)
+        documents = [
+            json.dumps(ENTRIES, ensure_ascii=False).encode("utf-8"),
+            json.dumps({"custom_nodes": ENTRIES * 50}, ensure_ascii=False, indent=1).encode("utf-8"),
+            b"\xef\xbb\xbf" + json.dumps(ENTRIES).encode("utf-8"), # UTF-8 BOM, \u escapes
+        ]
+        for document in documents:
+            expected = json.loads(document.decode("utf-8-sig"))
+            expected = expected["custom_nodes"] if isinstance(expected, dict) else expected
+            for _ in range(50):
+                self.assertEqual(list(iter_catalog_entries(_split(document, rng))), expected)
+
+    def test_buffer_compaction(self):
+        # Enough entries to pass COMPACT_THRESHOLD_CHARS several times
+        entries = [{"title": f"Node-{i}", "files": [f"https://github.com/author/node-{i}.git"]} for i in range(5000)]
+        data = json.dumps(entries).encode("utf-8")
+        self.assertEqual(list(iter_catalog_entries(data[i:i + 4096] for i in range(0, len(data), 4096))), entries)
+
+    def test_truncated_document_raises(self):
+        data = json.dumps({"custom_nodes": ENTRIES}).encode("utf-8")
+        with self.assertRaises(ValueError):
+            list(iter_catalog_entries([data[:len(data) // 2]]))
+
+    def test_not_a_catalog_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_catalog_entries([b'"just a string"']))
+        with self.assertRaises(ValueError):
+            list(iter_catalog_entries([b'{"other": 1}']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_dependency_check.py
+# Tests for ui_modules/dependency_check.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version
+except ImportError: # packaging is optional for the launcher (the pre-check is skipped without it)
+    raise unittest.SkipTest("packaging is not installed")
+
+from ui_modules.dependency_check import (DependencyConflictChecker, InstalledDistributions, _boundary_versions,
+                                         format_conflict_report, parse_requirements_text, specifiers_compatible)
+
+
+def _compatible(*specs, installed=None):
+    return specifiers_compatible([SpecifierSet(spec) for spec in specs], Version(installed) if installed else None)
+
+
+class SpecifiersCompatibleTest(unittest.TestCase):
+    def test_fewer_than_two_sets_always_compatible(self):
+        self.assertTrue(_compatible())
+        self.assertTrue(_compatible("==1.0,==2.0")) # A single source is pip's problem, not a cross-source conflict
+        self.assertTrue(_compatible("", "==1.0"))
+
+    def test_overlapping_ranges(self):
+        self.assertTrue(_compatible(">=1.20", "<2"))
+        self.assertTrue(_compatible("~=1.4.2", "<1.5", "!=1.4.3"))
+        self.assertTrue(_compatible("==1.4.*", ">=1.4.5"))
+        self.assertTrue(_compatible(">1.0", "<1.1"))
+
+    def test_disjoint_ranges(self):
+        self.assertFalse(_compatible("<2", ">=2"))
+        self.assertFalse(_compatible("==1.0", "!=1.0"))
+        self.assertFalse(_compatible("==1.4.*", ">=1.5"))
+        self.assertFalse(_compatible(">1.0", "<=1.0"))
+        self.assertFalse(_compatible("~=1.4", ">=2.0"))
+
+    def test_narrow_open_interval(self):
+        # Only versions such as 1.0.0.1 lie strictly between the two bounds
+        self.assertTrue(_compatible(">1.0", "<1.0.1"))
+        self.assertTrue(_compatible(">1.0.post1", "<1.0.1"))
+
+    def test_exact_pins_with_local_and_epoch(self):
+        self.assertTrue(_compatible("==2.1.0+cu121", ">=2.1"))
+        self.assertFalse(_compatible("==2.1.0+cu121", "==2.1.0+cu118"))
+        self.assertTrue(_compatible(">=1!1.0", ">2.0"))
+
+    def test_pre_releases(self):
+        self.assertTrue(_compatible(">=2.0rc1", "<2.1"))
+        self.assertFalse(_compatible(">=2.0rc1", "<2.0")) # <V excludes pre-releases of V itself
+
+    def test_installed_version_is_a_candidate(self):
+        self.assertTrue(_compatible(">1.0.3", "<1.0.4", installed="1.0.3.7"))
+
+    def test_boundary_candidates(self):
+        candidates = _boundary_versions([SpecifierSet(">=1.2,!=1.3.*"), SpecifierSet("===weird")], Version("5.0"))
+        self.assertTrue({Version("0"), Version("1.2"), Version("1.2.0.0.1"), Version("1.3"), Version("5.0")} <= candidates)
+
+
+class ParseRequirementsTextTest(unittest.TestCase):
+    def test_skips_options_paths_urls_and_comments(self):
+        text = "\n".join([
+            "# comment", "--extra-index-url https://download.pytorch.org/whl/cu121", "-r other.txt", "-e .", "./local_pkg",
+            "git+https://github.com/a/b.git", "pkg @ https://example.com/pkg.whl", "numpy>=1.25 # trailing comment",
+            "Pillow  --hash=sha256:abc", "torch", "not a valid requirement ===",
+        ])
+        parsed = parse_requirements_text(text)
+        self.assertEqual(sorted(parsed), ["numpy", "pillow", "torch"])
+        self.assertEqual(str(parsed["numpy"]), ">=1.25")
+        self.assertEqual(str(parsed["torch"]), "")
+
+    def test_repeated_entries_merged_and_names_canonical(self):
+        parsed = parse_requirements_text("Opencv_Python>=4\nopencv-python<5\n")
+        self.assertEqual(list(parsed), ["opencv-python"])
+        self.assertEqual(parsed["opencv-python"], SpecifierSet(">=4,<5"))
+
+    def test_markers_evaluated(self):
+        parsed = parse_requirements_text('a==1; python_version < "3"\nb==2; python_version >= "3"\n')
+        self.assertEqual(list(parsed), ["b"])
+
+
+class _App:
+    """Just the attributes DependencyConflictChecker reads."""
+    def __init__(self, python_exe, comfyui_dir):
+        self.comfyui_install_dir = comfyui_dir
+        self.comfyui_nodes_dir = os.path.join(comfyui_dir, "custom_nodes")
+        self.python_exe_var = self
+        self._python_exe = python_exe
+
+    def get(self):
+        return self._python_exe
+
+
+class ConflictCheckTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        env_dir = os.path.join(self.tmp_dir, "venv")
+        self.site_dir = os.path.join(env_dir, "lib", "python3.11", "site-packages")
+        os.makedirs(self.site_dir)
+        os.makedirs(os.path.join(env_dir, "bin"))
+        python_exe = os.path.join(env_dir, "bin", "python")
+        open(python_exe, "w").close()
+        self._install("numpy", "1.26.4")
+        self._install("opencv-python", "4.9.0.80", ["numpy>=1.21.2"])
+        self._install("scipy", "1.11.4", ["numpy<1.28.0,>=1.21.6"])
+
+        comfyui_dir = os.path.join(self.tmp_dir, "ComfyUI")
+        self._write(os.path.join(comfyui_dir, "requirements.txt"), "torch\nnumpy>=1.25.0\n")
+        self._write(os.path.join(comfyui_dir, "custom_nodes", "node-a", "requirements.txt"), "opencv-python\n")
+        self._write(os.path.join(comfyui_dir, "custom_nodes", "old-node.disabled", "requirements.txt"), "numpy<1.0\n")
+        self.checker = DependencyConflictChecker(_App(python_exe, comfyui_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def _install(self, name, version, requires=()):
+        lines = ["Metadata-Version: 2.1", f"Name: {name}", f"Version: {version}"] + [f"Requires-Dist: {r}" for r in requires]
+        self._write(os.path.join(self.site_dir, f"{name.replace('-', '_')}-{version}.dist-info", "METADATA"),
+                    "\n".join(lines) + "\n\nLong description mentioning Requires-Dist: nothing\n")
+
+    def test_installed_distributions(self):
+        installed = InstalledDistributions([self.site_dir])
+        self.assertEqual(installed.versions["numpy"], Version("1.26.4"))
+        self.assertEqual(sorted(dependent for dependent, _, _ in installed.dependents["numpy"]), ["opencv-python", "scipy"])
+        self.assertNotIn("nothing", installed.dependents)
+
+    def test_disabled_nodes_not_sources(self):
+        self.assertEqual(sorted(self.checker.current_requirement_sources()), ["ComfyUI", "node-a"])
+
+    def test_compatible_update(self):
+        result = self.checker.check({"node-b": "numpy>=1.26,<2\n"})
+        self.assertEqual(result["conflicts"], [])
+        self.assertEqual(result["checked"], 3)
+
+    def test_introduced_conflict_with_installed_dependent(self):
+        result = self.checker.check({"node-b": "numpy>=2.0\n"})
+        self.assertEqual(len(result["conflicts"]), 1)
+        conflict = result["conflicts"][0]
+        self.assertEqual(conflict["package"], "numpy")
+        self.assertEqual(conflict["introduced_by"], ["node-b"])
+        self.assertIn(("scipy 1.11.4 (已安装)", "<1.28.0,>=1.21.6"), conflict["sources"])
+        self.assertNotIn("opencv-python 4.9.0.80 (已安装)", [label for label, _ in conflict["sources"]]) # Not part of a failing pair
+        self.assertEqual(result["changes"], [{"package": "numpy", "source": "node-b", "spec": ">=2.0", "installed": "1.26.4"}])
+        self.assertTrue(format_conflict_report(result)[0].startswith("冲突 numpy [当前 1.26.4]"))
+
+    def test_pending_replaces_current_source(self):
+        # ComfyUI's new requirements replace its current file instead of being added next to it
+        result = self.checker.check({"ComfyUI": "numpy<1.20\n"})
+        self.assertEqual([conflict["introduced_by"] for conflict in result["conflicts"]], [["ComfyUI"]])
+        self.assertNotIn(("ComfyUI", ">=1.25.0"), result["conflicts"][0]["sources"])
+
+    def test_dependent_ignored_when_requirements_replace_it(self):
+        result = self.checker.check({"node-b": "numpy>=2.0\nscipy>=1.13\n"})
+        self.assertEqual(result["conflicts"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_import_profiler.py
+# Tests for ui_modules/import_profiler.py (run: python -m unittest discover -s tests -t .)
+
+import unittest
+
+from ui_modules.import_profiler import NodeImportProfiler, node_name_from_path
+
+STARTUP_OUTPUT = [
+    "Traceback (most recent call last):",
+    "Cannot import /ComfyUI/custom_nodes/broken-node module for custom nodes: No module named 'cv2'",
+    "",
+    "Import times for custom nodes:",
+    "   0.0 seconds: /ComfyUI/custom_nodes/websocket_image_save.py",
+    "   0.1 seconds (IMPORT FAILED): /ComfyUI/custom_nodes/broken-node",
+    "   4.2 seconds: /ComfyUI/custom_nodes/ComfyUI-Impact-Pack/",
+    "",
+    "Starting server",
+]
+
+
+class NodeImportProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.completed = []
+        self.profiler = NodeImportProfiler(on_block_complete=self.completed.append)
+
+    def test_block_parsed_once_at_its_end(self):
+        for line in STARTUP_OUTPUT:
+            self.profiler.feed_line(line)
+        self.assertEqual(len(self.completed), 1)
+        self.assertEqual(self.completed[0], {
+            "websocket_image_save.py": {"seconds": 0.0, "failed": False},
+            "broken-node": {"seconds": 0.1, "failed": True},
+            "ComfyUI-Impact-Pack": {"seconds": 4.2, "failed": False},
+        })
+
+    def test_cannot_import_line_marks_node_failed(self):
+        self.profiler.feed_line("Cannot import /ComfyUI/custom_nodes/other module for custom nodes: boom")
+        for line in ("Import times for custom nodes:", "   1.5 seconds: /ComfyUI/custom_nodes/other", ""):
+            self.profiler.feed_line(line)
+        self.assertTrue(self.completed[0]["other"]["failed"])
+
+    def test_second_report_ignored(self):
+        for line in STARTUP_OUTPUT + ["Import times for custom nodes:", "   9.0 seconds: /ComfyUI/custom_nodes/late", ""]:
+            self.profiler.feed_line(line)
+        self.assertEqual(len(self.completed), 1)
+        self.assertNotIn("late", self.profiler.node_times)
+
+    def test_importtime_rows_aggregated_by_package_and_hidden(self):
+        rows = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:      1500 |       1500 |   torch._C",
+            "import time:      2500 |       4000 | torch",
+            "import time:       300 |        300 |     numpy.core",
+            "import time:   1000000 |    1000000 | cv2",
+        ]
+        self.assertTrue(all(self.profiler.feed_line(row) for row in rows))
+        self.assertFalse(self.profiler.feed_line("To see the GUI go to: http://127.0.0.1:8188"))
+        self.assertTrue(self.profiler.has_module_data())
+        self.assertEqual(self.profiler.top_modules(), [("cv2", 1.0), ("torch", 0.004), ("numpy", 0.0003)])
+        self.assertEqual(self.profiler.top_modules(limit=1), [("cv2", 1.0)])
+
+    def test_node_name_from_path(self):
+        self.assertEqual(node_name_from_path(" /ComfyUI/custom_nodes/ComfyUI-Manager/ "), "ComfyUI-Manager")
+        self.assertEqual(node_name_from_path("custom_nodes/example.py"), "example.py")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_mirrors.py
+# Tests for ui_modules/mirrors.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    from ui_modules.mirrors import ORIGIN_PREFERENCE, MirrorSelector
+except ImportError: # requests is not installed in this environment
+    raise unittest.SkipTest("requests is not installed")
+
+from ui_modules import history_store
+
+GITHUB = "https://github.com/"
+FAST = "https://fast.example/https://github.com/"
+SLOW = "https://slow.example/"
+DEAD = "https://dead.example/"
+REGISTRY = {GITHUB: {"probe": "a/b.git/info/refs", "mirrors": [FAST, SLOW, DEAD]}}
+
+
+class _App:
+    """Just the attributes MirrorSelector reads."""
+    def __init__(self):
+        self.config = {"mirror_selection_enabled": "启用"}
+        self.logged = []
+
+    def log_to_gui(self, source, message, level="info"):
+        self.logged.append((source, message, level))
+
+
+class MirrorSelectorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = _App()
+        registry_file = os.path.join(self.tmp_dir, "mirrors.json")
+        probes_file = os.path.join(self.tmp_dir, "mirror_probes.json")
+        history_store.save_mapping(registry_file, REGISTRY)
+        history_store.save_mapping(probes_file, {GITHUB: {"time": 0, "results": {
+            GITHUB: {"ok": True, "latency_ms": 300, "speed_kbps": 100},
+            FAST: {"ok": True, "latency_ms": 80, "speed_kbps": 1000},
+            SLOW: {"ok": True, "latency_ms": 90, "speed_kbps": 100 * ORIGIN_PREFERENCE - 1},
+            DEAD: {"ok": False},
+        }}})
+        self.selector = MirrorSelector(self.app, registry_file, probes_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_ranking_requires_a_clear_win_over_the_origin(self):
+        self.assertEqual(self.selector._ranked(GITHUB), [FAST, GITHUB])
+        self.assertEqual(self.selector._ranked(GITHUB, excluded={FAST}), [GITHUB])
+        self.assertEqual(self.selector._ranked("https://unmeasured.example/"), ["https://unmeasured.example/"])
+
+    def test_rewrite_url_keeps_the_path_and_ends_with_the_original(self):
+        url = GITHUB + "comfyanonymous/ComfyUI.git"
+        self.assertEqual(self.selector.rewrite_url(url), [FAST + "comfyanonymous/ComfyUI.git", url])
+        self.assertEqual(self.selector.rewrite_url("https://gitlab.com/a/b.git"), ["https://gitlab.com/a/b.git"])
+
+    def test_disabled_selection_rewrites_nothing(self):
+        self.app.config["mirror_selection_enabled"] = "禁用"
+        url = GITHUB + "a/b.git"
+        self.assertEqual(self.selector.rewrite_url(url), [url])
+        self.assertEqual(self.selector.selected_rewrites(), {})
+
+    def test_failed_mirror_skipped(self):
+        self.selector.mark_failed(FAST)
+        self.assertEqual(self.selector.selected_rewrites(), {})
+        self.assertEqual(self.selector.rewrite_url(GITHUB + "a/b.git"), [GITHUB + "a/b.git"])
+
+    def test_local_git_commands_run_unchanged(self):
+        calls = []
+        self.selector.run_git(["status"], lambda args: calls.append(args) or ("", "", 0))
+        self.assertEqual(calls, [["status"]])
+
+    def test_git_uses_insteadof_and_fails_over_to_origin(self):
+        calls = []
+
+        def run(args):
+            calls.append(args)
+            if len(calls) == 1:
+                return "", "fatal: unable to access 'https://fast.example/https://github.com/a/b.git/': Could not resolve host", 128
+            return "done", "", 0
+
+        self.assertEqual(self.selector.run_git(["fetch", "origin"], run), ("done", "", 0))
+        self.assertIn(f"url.{FAST}.insteadOf={GITHUB}", calls[0])
+        self.assertEqual(calls[0][-2:], ["fetch", "origin"])
+        self.assertEqual(calls[1], ["fetch", "origin"]) # No mirror left: plain origin URLs
+        self.assertEqual(self.app.logged[0][2], "warn")
+        self.assertEqual(self.selector.selected_rewrites(), {}) # Still in cooldown for later commands
+
+    def test_non_network_git_error_not_retried(self):
+        calls = []
+        result = self.selector.run_git(["pull"], lambda args: calls.append(args) or ("", "error: Your local changes would be overwritten", 1))
+        self.assertEqual(result[2], 1)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
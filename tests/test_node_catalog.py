@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_node_catalog.py
+# Tests for ui_modules/node_catalog.py (run: python -m unittest discover -s tests -t .)
+
+import unittest
+
+from ui_modules.node_catalog import NodeCatalog, NodeRecord, RepoJoinIndex, NODE_FIELDS, matches_search
+
+NODE_DICT = {
+    "name": "ComfyUI-Impact-Pack", "status": "已安装", "local_id": "abc1234", "local_commit_full": "abc1234" + "0" * 33,
+    "repo_info": "main", "repo_url": "https://github.com/ltdrdata/ComfyUI-Impact-Pack.git", "is_git": True,
+    "remote_branch": "main", "catalog_name": None,
+}
+
+
+class NodeRecordTest(unittest.TestCase):
+    def test_dict_round_trip(self):
+        self.assertEqual(NodeRecord.from_dict(NODE_DICT).to_dict(), NODE_DICT)
+
+    def test_missing_fields_get_defaults(self):
+        record = NodeRecord.from_dict({"name": "Only-Name"})
+        self.assertEqual(record.status, "未知")
+        self.assertFalse(record.is_git)
+        self.assertIsNone(record.repo_key)
+
+    def test_get_and_getitem(self):
+        record = NodeRecord.from_dict(NODE_DICT)
+        for field in NODE_FIELDS:
+            self.assertEqual(record.get(field), NODE_DICT[field])
+            self.assertEqual(record[field], NODE_DICT[field])
+        self.assertEqual(record.get("unknown", "fallback"), "fallback")
+        self.assertIsNone(record.get("name_lower")) # Internal slots are not part of the dict view
+        with self.assertRaises(KeyError):
+            record["unknown"]
+
+    def test_contains_and_setdefault(self):
+        record = NodeRecord.from_dict(NODE_DICT)
+        self.assertIn("repo_url", record)
+        self.assertNotIn("unknown", record)
+        self.assertEqual(record.setdefault("status", "ignored"), "已安装")
+
+    def test_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            NodeRecord("x").extra = 1
+
+    def test_repo_key_only_for_git_urls(self):
+        self.assertEqual(NodeRecord.from_dict(NODE_DICT).repo_key, "github.com/ltdrdata/comfyui-impact-pack")
+        self.assertIsNone(NodeRecord("local", repo_url="无远程仓库", is_git=True).repo_key)
+
+
+class NodeCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.local = [NodeRecord("zeta-node", status="已安装"), NodeRecord.from_dict(NODE_DICT)]
+        self.online = [NodeRecord("Alpha", status="未安装", repo_url="https://github.com/a/alpha.git", is_git=True),
+                       NodeRecord("comfyui-impact-pack", status="未安装", repo_url="https://github.com/ltdrdata/ComfyUI-Impact-Pack.git", is_git=True)]
+        self.catalog = NodeCatalog(self.local, self.local + self.online)
+
+    def test_sorted_by_lowercase_name(self):
+        self.assertEqual([r.name for r in self.catalog.local_nodes], ["ComfyUI-Impact-Pack", "zeta-node"])
+        self.assertEqual([r.name_lower for r in self.catalog.all_nodes], sorted(r.name_lower for r in self.catalog.all_nodes))
+
+    def test_find_prefers_installed(self):
+        self.assertEqual(self.catalog.find("COMFYUI-IMPACT-PACK").status, "已安装")
+        self.assertIsNone(self.catalog.find_local("alpha"))
+        self.assertEqual(self.catalog.find("alpha").name, "Alpha")
+
+    def test_find_by_repo_ignores_url_form(self):
+        self.assertEqual(self.catalog.find_by_repo("git@github.com:ltdrdata/comfyui-impact-pack").status, "已安装")
+        self.assertIsNone(self.catalog.find_by_repo("https://github.com/other/alpha.git"))
+
+    def test_search(self):
+        self.assertEqual(self.catalog.search(""), self.catalog.local_nodes)
+        self.assertEqual([r.name for r in self.catalog.search("alpha")], ["Alpha"])
+        self.assertTrue(all(matches_search(r, "impact") for r in self.catalog.search("impact")))
+
+    def test_from_dicts_drops_nameless_entries(self):
+        catalog = NodeCatalog.from_dicts([NODE_DICT], [NODE_DICT, {"status": "未安装"}, "not a dict"])
+        self.assertEqual(len(catalog), 1)
+        self.assertEqual(NodeCatalog.to_dicts(catalog.all_nodes), [NODE_DICT])
+
+
+class RepoJoinIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.installed = NodeRecord("utils", status="已安装", repo_url="https://github.com/alice/ComfyUI-Utils", is_git=True)
+        self.index = RepoJoinIndex([self.installed, NodeRecord("no-remote", status="已安装", repo_url="无远程仓库", is_git=True)])
+
+    def test_same_repository_in_any_url_form(self):
+        for url in ("https://github.com/alice/ComfyUI-Utils.git", "git@github.com:alice/comfyui-utils.git",
+                    "ssh://git@github.com/alice/ComfyUI-Utils", "https://github.com/alice/ComfyUI-Utils/"):
+            self.assertIs(self.index.match(url), self.installed, url)
+
+    def test_unrelated_repository_with_same_name(self):
+        # Other owners' repositories of the same name are different projects and stay installable
+        self.assertIsNone(self.index.match("https://github.com/bob/ComfyUI-Utils.git"))
+        self.assertIsNone(self.index.match("https://github.com/carol/comfyui-utils.git"))
+        self.assertIsNone(self.index.match("https://gitlab.com/alice/ComfyUI-Utils.git"))
+
+    def test_invalid_urls(self):
+        for url in (None, "", "无远程仓库", "N/A"):
+            self.assertIsNone(self.index.match(url))
+
+    def test_catalog_index_covers_local_nodes_only(self):
+        online = NodeRecord("Other", status="未安装", repo_url="https://github.com/x/other.git", is_git=True)
+        catalog = NodeCatalog([self.installed], [self.installed, online])
+        self.assertIs(catalog.local_repo_index.match("git@github.com:alice/ComfyUI-Utils"), self.installed)
+        self.assertIsNone(catalog.local_repo_index.match("https://github.com/x/other.git"))
+
+
+if __name__ == "__main__":
+    unittest.main()
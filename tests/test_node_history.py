@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_node_history.py
+# Tests for ui_modules/node_history.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from ui_modules.node_history import HistoryIndex, read_head_state, read_origin_url, ref_category, ref_to_entry
+
+ENTRIES = [
+    {"type": "branch", "name": "main", "commit_id": "a1b2c3d4e5", "date_iso": "2024-05-03T10:00:00+00:00"},
+    {"type": "branch (remote)", "name": "dev", "commit_id": "f0e1d2c3b4", "date_iso": "2024-04-20T08:30:00+02:00"},
+    {"type": "tag", "name": "v1.2.0", "commit_id": "0123456789", "date_iso": "2024-03-01T00:00:00+00:00"},
+    {"type": "tag", "name": "v1.1.0", "commit_id": "abcdef0123", "date_iso": "2023-12-24T12:00:00+00:00"},
+    {"type": "commit (HEAD)", "name": "Detached at 99887766", "commit_id": "9988776655", "date_iso": ""},
+]
+
+
+def _parse_date(date_iso):
+    try:
+        return datetime.fromisoformat(date_iso)
+    except ValueError:
+        return None
+
+
+class HistoryIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = HistoryIndex(ENTRIES, _parse_date)
+
+    def test_no_filters_lists_everything(self):
+        self.assertEqual(self.index.filter(), [0, 1, 2, 3, 4])
+
+    def test_text_matches_name_or_commit_prefix(self):
+        self.assertEqual(self.index.filter(text="V1."), [2, 3])
+        self.assertEqual(self.index.filter(text=" abcdef "), [3])
+        self.assertEqual(self.index.filter(text="nothing"), [])
+
+    def test_type_ahead_narrows_and_widens(self):
+        self.assertEqual(self.index.filter(text="v"), [1, 2, 3])
+        self.assertEqual(self.index.filter(text="v1.1"), [3])
+        self.assertEqual(self.index.filter(text="v1"), [2, 3]) # Deleting characters rescans
+        self.assertEqual(self.index.filter(text="v1", category="tag"), [2, 3])
+        self.assertEqual(self.index.filter(text="v1.2", category="branch"), [])
+        self.assertEqual(self.index.filter(text="v1.2"), [2]) # A changed category rescans
+
+    def test_categories(self):
+        self.assertEqual(self.index.filter(category="branch"), [0])
+        self.assertEqual(self.index.filter(category="remote"), [1])
+        self.assertEqual(self.index.filter(category="commit"), [4])
+
+    def test_date_range_is_inclusive_and_skips_undated(self):
+        self.assertEqual(self.index.filter(date_from="2024-03-01"), [0, 1, 2])
+        self.assertEqual(self.index.filter(date_to="2024-03-01"), [2, 3])
+        self.assertEqual(self.index.filter(date_from="2024-01-01", date_to="2024-04-30"), [1, 2])
+
+    def test_incomplete_dates_ignored(self):
+        self.assertEqual(self.index.filter(date_from="2024-0"), [0, 1, 2, 3, 4])
+        self.assertEqual(self.index.filter(date_to="2024/03/01"), [0, 1, 2, 3, 4])
+
+
+class RefEntryTest(unittest.TestCase):
+    def test_ref_to_entry(self):
+        self.assertEqual(ref_to_entry("refs/heads/feature/x", "c1", "d", "subject")["name"], "feature/x")
+        remote = ref_to_entry("refs/remotes/origin/dev", "c2", "d", "subject")
+        self.assertEqual((remote["type"], remote["name"]), ("branch (remote)", "dev"))
+        tag = ref_to_entry("refs/tags/v1.0", "c3", "d", "release")
+        self.assertEqual((tag["type"], tag["description"]), ("tag", "TAG - release"))
+        for refname in ("refs/remotes/origin/HEAD", "refs/remotes/fork/main", "refs/notes/commits", "refs/stash"):
+            self.assertIsNone(ref_to_entry(refname, "c4", "d", "s"), refname)
+
+    def test_ref_category(self):
+        self.assertEqual([ref_category(entry["type"]) for entry in ENTRIES], ["branch", "remote", "tag", "tag", "commit"])
+        self.assertEqual(ref_category("branch (local)"), "branch")
+
+
+class GitFileReadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp_dir, "node")
+        self.gdir = os.path.join(self.repo, ".git")
+        self._write(os.path.join(self.gdir, "HEAD"), "ref: refs/heads/main\n")
+        self._write(os.path.join(self.gdir, "config"),
+                    '[core]\n\tbare = false\n[remote "upstream"]\n\turl = https://example.com/up.git\n'
+                    '[remote "origin"]\n\tfetch = +refs/heads/*:refs/remotes/origin/*\n\turl = https://example.com/node.git\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_loose_and_packed_refs(self):
+        self._write(os.path.join(self.gdir, "packed-refs"), "# pack-refs with: peeled\n" + "1" * 40 + " refs/heads/main\n")
+        self.assertEqual(read_head_state(self.repo), ("1" * 40, "main"))
+        self._write(os.path.join(self.gdir, "refs", "heads", "main"), "2" * 40 + "\n") # Loose refs win
+        self.assertEqual(read_head_state(self.repo), ("2" * 40, "main"))
+
+    def test_detached_head_and_missing_repo(self):
+        self._write(os.path.join(self.gdir, "HEAD"), "3" * 40 + "\n")
+        self.assertEqual(read_head_state(self.repo), ("3" * 40, None))
+        self.assertEqual(read_head_state(self.tmp_dir), (None, None))
+
+    def test_worktree_reads_main_git_dir(self):
+        self._write(os.path.join(self.gdir, "refs", "heads", "feature"), "4" * 40 + "\n")
+        worktree_gdir = os.path.join(self.gdir, "worktrees", "wt")
+        self._write(os.path.join(worktree_gdir, "HEAD"), "ref: refs/heads/feature\n")
+        self._write(os.path.join(worktree_gdir, "commondir"), "../..\n")
+        worktree = os.path.join(self.tmp_dir, "wt")
+        self._write(os.path.join(worktree, ".git"), f"gitdir: {worktree_gdir}\n")
+        self.assertEqual(read_head_state(worktree), ("4" * 40, "feature"))
+        self.assertEqual(read_origin_url(worktree), "https://example.com/node.git")
+
+    def test_origin_url(self):
+        self.assertEqual(read_origin_url(self.repo), "https://example.com/node.git")
+        self.assertIsNone(read_origin_url(self.tmp_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
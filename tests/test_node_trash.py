@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_node_trash.py
+# Tests for ui_modules/node_trash.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ui_modules import history_store
+from ui_modules.node_trash import TRASH_DIR_NAME, TRASH_RETENTION_SEC, NodeTrash
+
+
+class _App:
+    """Just the attributes NodeTrash reads."""
+    def __init__(self):
+        self.logged = []
+
+    def log_to_gui(self, source, message, level="info"):
+        self.logged.append((source, message, level))
+
+    def _is_update_task_running(self):
+        return False
+
+
+class NodeTrashTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.nodes_dir = os.path.join(self.tmp_dir, "ComfyUI", "custom_nodes")
+        self.index_file = os.path.join(self.tmp_dir, "data", "node_trash.json")
+        self.trash = NodeTrash(_App(), self.index_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _make_node(self, name):
+        path = os.path.join(self.nodes_dir, name)
+        os.makedirs(os.path.join(path, ".git", "objects"))
+        with open(os.path.join(path, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write("NODE_CLASS_MAPPINGS = {}\n")
+        return path
+
+    def test_move_and_restore(self):
+        path = self._make_node("node-a")
+        entry_id = self.trash.move_to_trash(path, "node-a")
+        self.assertFalse(os.path.exists(path))
+        entry = history_store.load_mapping(self.index_file)[entry_id]
+        self.assertEqual(os.path.dirname(entry["trash_path"]), os.path.join(self.tmp_dir, "ComfyUI", TRASH_DIR_NAME))
+
+        self.assertEqual(self.trash.latest_restorable()[0], entry_id)
+        self.trash.restore(entry_id)
+        self.assertTrue(os.path.isfile(os.path.join(path, "__init__.py")))
+        self.assertEqual(history_store.load_mapping(self.index_file), {})
+        self.assertEqual(self.trash.latest_restorable(), (None, None))
+
+    def test_same_name_twice_gets_distinct_entries(self):
+        first = self.trash.move_to_trash(self._make_node("node-a"), "node-a")
+        second = self.trash.move_to_trash(self._make_node("node-a"), "node-a")
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(history_store.load_mapping(self.index_file)), 2)
+
+    def test_restore_refused_when_reinstalled(self):
+        path = self._make_node("node-a")
+        entry_id = self.trash.move_to_trash(path, "node-a")
+        self._make_node("node-a")
+        with self.assertRaises(Exception):
+            self.trash.restore(entry_id)
+        self.assertIn(entry_id, history_store.load_mapping(self.index_file))
+
+    def test_failed_rename_leaves_directory(self):
+        self.assertIsNone(self.trash.move_to_trash(os.path.join(self.nodes_dir, "missing"), "missing"))
+        self.assertEqual(history_store.load_mapping(self.index_file), {})
+
+    def test_purge_keeps_recent_restorable_entries(self):
+        kept = self.trash.move_to_trash(self._make_node("node-a"), "node-a")
+        partial = self._make_node("partial-clone")
+        self.trash.discard(partial, "partial-clone")
+        self.trash.purge_expired()
+        index = history_store.load_mapping(self.index_file)
+        self.assertEqual(list(index), [kept])
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir, "ComfyUI", TRASH_DIR_NAME)), [kept])
+        self.assertEqual(self.trash.app.logged, []) # Partial clones are removed silently
+
+    def test_purge_expired_entry_and_not_link_targets(self):
+        shared_models = os.path.join(self.tmp_dir, "shared_models")
+        os.makedirs(shared_models)
+        open(os.path.join(shared_models, "model.safetensors"), "w").close()
+        path = self._make_node("node-a")
+        try:
+            os.symlink(shared_models, os.path.join(path, "models"), target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.skipTest("symlinks are not available")
+        entry_id = self.trash.move_to_trash(path, "node-a")
+        index = history_store.load_mapping(self.index_file)
+        index[entry_id]["trashed_at"] -= TRASH_RETENTION_SEC
+        history_store.save_mapping(self.index_file, index)
+
+        self.trash.purge_expired()
+        self.assertEqual(history_store.load_mapping(self.index_file), {})
+        self.assertFalse(os.path.exists(index[entry_id]["trash_path"]))
+        self.assertTrue(os.path.isfile(os.path.join(shared_models, "model.safetensors")))
+        self.assertEqual(len(self.trash.app.logged), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_requirements_diff.py
+# Tests for the requirements diff in ui_modules/dependencies.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ui_modules.dependencies import _needs_own_cwd, diff_requirements
+
+OLD = """\
+# ComfyUI requirements
+torch
+torchsde
+numpy>=1.25.0
+einops
+transformers>=4.28.1
+safetensors>=0.3.0
+aiohttp
+pyyaml
+Pillow
+"""
+
+
+class DiffRequirementsTest(unittest.TestCase):
+    def test_identical_and_cosmetic_changes(self):
+        self.assertEqual(diff_requirements(OLD, OLD), {"added": [], "removed": [], "options": [], "nested": False})
+        cosmetic = OLD.replace("numpy>=1.25.0", "numpy>=1.25.0   # needed by everything").replace("einops", "einops  ") + "\n\n# trailing\n"
+        self.assertEqual(diff_requirements(OLD, cosmetic)["added"], [])
+
+    def test_added_changed_and_removed_lines(self):
+        new = OLD.replace("transformers>=4.28.1", "transformers>=4.37.2").replace("pyyaml\n", "") + "kornia>=0.7.1\nspandrel\n"
+        diff = diff_requirements(OLD, new)
+        self.assertEqual(diff["added"], ["transformers>=4.37.2", "kornia>=0.7.1", "spandrel"])
+        # A changed pin is not a removal of the package
+        self.assertEqual(diff["removed"], ["pyyaml"])
+
+    def test_removed_matches_project_names_loosely(self):
+        diff = diff_requirements("Pillow\nsafe_tensors>=0.3\n", "pillow>=10\nSafe-Tensors>=0.4\n")
+        self.assertEqual(diff["added"], ["pillow>=10", "Safe-Tensors>=0.4"])
+        self.assertEqual(diff["removed"], [])
+
+    def test_duplicate_lines_reported_once(self):
+        self.assertEqual(diff_requirements("", "a\na\nb\n")["added"], ["a", "b"])
+
+    def test_options_kept_separate(self):
+        new = OLD + "--extra-index-url https://download.pytorch.org/whl/cu121\n-e git+https://github.com/a/b.git#egg=b\n"
+        diff = diff_requirements(OLD, new)
+        self.assertEqual(diff["options"], ["--extra-index-url https://download.pytorch.org/whl/cu121"])
+        self.assertEqual(diff["added"], ["-e git+https://github.com/a/b.git#egg=b"]) # Editable installs are requirements
+        self.assertFalse(diff["nested"])
+
+    def test_nested_files_detected(self):
+        for line in ("-r extra.txt", "--requirement=extra.txt", "-c constraints.txt", "--constraint constraints.txt"):
+            self.assertTrue(diff_requirements(OLD, OLD + line + "\n")["nested"], line)
+
+    def test_removed_options_are_not_removals(self):
+        diff = diff_requirements(OLD + "--pre\n", OLD)
+        self.assertEqual(diff["removed"], [])
+
+
+class NeedsOwnCwdTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "requirements.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _needs_own_cwd(self, text):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return _needs_own_cwd(self.path)
+
+    def test_relative_paths(self):
+        for line in ("./wheels/pkg.whl", "-e .", "-e ./sub", "file:vendor/pkg"):
+            self.assertTrue(self._needs_own_cwd(f"numpy\n{line}\n"), line)
+
+    def test_plain_requirements_and_comments(self):
+        self.assertFalse(self._needs_own_cwd("numpy\n# ./not-a-path\n-e git+https://github.com/a/b.git#egg=b\n"))
+        self.assertFalse(_needs_own_cwd(os.path.join(self.tmp_dir, "missing.txt")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_snapshots.py
+# Tests for ui_modules/snapshots.py capture and restore plans (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ui_modules.snapshots import MAX_SNAPSHOTS, EnvironmentSnapshots
+
+
+class _Installed:
+    def __init__(self, versions):
+        self.versions = versions
+
+
+class _App:
+    """Just the attributes EnvironmentSnapshots reads for capture and plan; installed packages come from a dict."""
+    def __init__(self, tmp_dir):
+        self.comfyui_install_dir = os.path.join(tmp_dir, "ComfyUI")
+        self.comfyui_nodes_dir = os.path.join(self.comfyui_install_dir, "custom_nodes")
+        self.python_exe = os.path.join(tmp_dir, "python")
+        open(self.python_exe, "w").close()
+        self.python_exe_var = self
+        self.dependency_checker = self
+        self.packages = {"numpy": "1.26.4", "torch": "2.3.0"}
+        self.logged = []
+
+    def get(self):
+        return self.python_exe
+
+    def is_available(self):
+        return True
+
+    def installed_distributions(self, python_exe):
+        return _Installed(dict(self.packages))
+
+    def log_to_gui(self, source, message, level="info"):
+        self.logged.append((source, message, level))
+
+
+class EnvironmentSnapshotsTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.app = _App(self.tmp_dir)
+        self._make_repo(self.app.comfyui_install_dir, "a" * 40, "master")
+        self._make_repo(os.path.join(self.app.comfyui_nodes_dir, "node-a"), "b" * 40, "main")
+        self._make_repo(os.path.join(self.app.comfyui_nodes_dir, "node-b.disabled"), "c" * 40, None)
+        os.makedirs(os.path.join(self.app.comfyui_nodes_dir, "not-a-repo"))
+        self.store = EnvironmentSnapshots(self.app, os.path.join(self.tmp_dir, "snapshots.json"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def _make_repo(self, path, commit, branch):
+        gdir = os.path.join(path, ".git")
+        if branch:
+            self._write(os.path.join(gdir, "HEAD"), f"ref: refs/heads/{branch}\n")
+            self._write(os.path.join(gdir, "refs", "heads", branch), commit + "\n")
+        else:
+            self._write(os.path.join(gdir, "HEAD"), commit + "\n")
+        self._write(os.path.join(gdir, "config"), f'[remote "origin"]\n\turl = https://github.com/x/{os.path.basename(path)}.git\n')
+
+    def test_capture_reads_git_files_and_packages(self):
+        record = self.store.capture("before update")
+        self.assertEqual(record["comfyui"], {"commit": "a" * 40, "branch": "master", "repo_url": "https://github.com/x/ComfyUI.git"})
+        self.assertEqual(sorted(record["nodes"]), ["node-a", "node-b.disabled"])
+        self.assertEqual(record["nodes"]["node-b.disabled"]["branch"], None)
+        self.assertEqual(record["packages"], {"numpy": "1.26.4", "torch": "2.3.0"})
+        self.assertEqual(self.store.get(record["id"])["label"], "before update")
+
+    def test_unchanged_environment_plans_nothing(self):
+        record = self.store.capture("now")
+        self.assertEqual(self.store.plan(record), {"main_body": False, "checkout": [], "clone": [], "extra": [], "packages": []})
+
+    def test_plan_lists_every_difference(self):
+        record = self.store.capture("before update")
+        self._make_repo(self.app.comfyui_install_dir, "d" * 40, "master")
+        self._make_repo(os.path.join(self.app.comfyui_nodes_dir, "node-a"), "b" * 40, "dev") # Same commit, other branch
+        shutil.rmtree(os.path.join(self.app.comfyui_nodes_dir, "node-b.disabled"))
+        self._make_repo(os.path.join(self.app.comfyui_nodes_dir, "node-c"), "e" * 40, "main")
+        self.app.packages = {"numpy": "2.0.0"}
+
+        plan = self.store.plan(record)
+        self.assertTrue(plan["main_body"])
+        self.assertEqual(plan["checkout"], ["node-a"])
+        self.assertEqual(plan["clone"], ["node-b.disabled"])
+        self.assertEqual(plan["extra"], ["node-c"])
+        self.assertEqual(plan["packages"], ["numpy==1.26.4", "torch==2.3.0"])
+
+    def test_without_python_only_code_is_recorded(self):
+        self.app.python_exe = ""
+        record = self.store.capture("no python")
+        self.assertEqual(record["packages"], {})
+        self.assertEqual(self.app.logged[0][2], "warn")
+        self.assertEqual(self.store.plan(record)["packages"], [])
+
+    def test_history_bounded_and_newest_first(self):
+        ids = [self.store.capture(f"s{i}")["id"] for i in range(MAX_SNAPSHOTS + 2)]
+        self.assertEqual([record["id"] for record in self.store.snapshots()], list(reversed(ids[2:])))
+        self.store.delete(ids[-1])
+        self.assertIsNone(self.store.get(ids[-1]))
+        self.assertEqual(len(self.store.snapshots()), MAX_SNAPSHOTS - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
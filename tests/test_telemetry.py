@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# File: tests/test_telemetry.py
+# Tests for ui_modules/telemetry.py and ui_modules/history_store.py (run: python -m unittest discover -s tests -t .)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ui_modules import history_store
+from ui_modules.telemetry import ComfyUITelemetry, MAX_SESSIONS, RECENT_WINDOW, load_sessions, percentile
+
+
+class PercentileTest(unittest.TestCase):
+    def test_empty_and_single(self):
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([3.0], 99), 3.0)
+
+    def test_linear_interpolation(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(values, 0), 1.0)
+        self.assertEqual(percentile(values, 100), 4.0)
+        self.assertAlmostEqual(percentile(values, 50), 2.5)
+        self.assertAlmostEqual(percentile(values, 95), 3.85)
+
+
+class TelemetryParsingTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp_dir, "telemetry_sessions.json")
+        self.telemetry = ComfyUITelemetry(self.history_file, {"vram_mode": "高负载"})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_prompts_and_loads(self):
+        for line in ("got prompt", "Requested to load SDXLClipModel", "Requested to load SDXL",
+                     "loaded completely 9000.0 1560.8 True", "loaded partially 5000.0 4000.0 0",
+                     "Prompt executed in 12.50 seconds", "Unloading models", "Prompt executed in 7.5 seconds"):
+            self.telemetry.feed_line(line)
+        summary = self.telemetry.summary()
+        self.assertEqual(summary["prompts"], 2)
+        self.assertEqual(summary["p50"], 10.0)
+        self.assertEqual(summary["load_requests"], 2)
+        self.assertEqual(summary["model_loads"], 2)
+        self.assertEqual(summary["unloads"], 1)
+        # "loaded ..." lines are paired with the requests in order
+        self.assertEqual([(load["model"], load["mode"]) for load in self.telemetry.model_loads],
+                         [("SDXLClipModel", "completely"), ("SDXL", "partially")])
+
+    def test_unrelated_lines_ignored(self):
+        for line in ("Starting server", "To see the GUI go to: http://127.0.0.1:8188", "Prompt executed in soon"):
+            self.telemetry.feed_line(line)
+        self.assertEqual(self.telemetry.summary()["prompts"], 0)
+
+    def test_recent_window_keeps_latest_prompts(self):
+        for i in range(RECENT_WINDOW + 10):
+            self.telemetry.feed_line(f"Prompt executed in {100 if i < 10 else 1}.0 seconds")
+        summary = self.telemetry.summary()
+        self.assertEqual(summary["recent_p95"], 1.0)
+        self.assertEqual(summary["prompts"], RECENT_WINDOW + 10)
+
+    def test_finish_saves_once_and_skips_empty_sessions(self):
+        self.assertIsNone(self.telemetry.finish())
+        self.assertEqual(load_sessions(self.history_file), [])
+
+        telemetry = ComfyUITelemetry(self.history_file, {"vram_mode": "高负载"})
+        telemetry.feed_line("Prompt executed in 2.0 seconds")
+        record = telemetry.finish()
+        self.assertEqual(record["settings"], {"vram_mode": "高负载"})
+        self.assertIsNone(telemetry.finish())
+        self.assertEqual(len(load_sessions(self.history_file)), 1)
+
+
+class HistoryPruningTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp_dir, "nested", "history.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_append_keeps_newest_records(self):
+        for i in range(12):
+            history_store.append_record(self.history_file, {"n": i}, max_records=5)
+        self.assertEqual([record["n"] for record in history_store.load_records(self.history_file)], [7, 8, 9, 10, 11])
+
+    def test_sessions_pruned_to_max_and_listed_newest_first(self):
+        for i in range(MAX_SESSIONS + 3):
+            telemetry = ComfyUITelemetry(self.history_file)
+            telemetry.feed_line(f"Prompt executed in {i + 1}.0 seconds")
+            telemetry.finish()
+        sessions = load_sessions(self.history_file)
+        self.assertEqual(len(sessions), MAX_SESSIONS)
+        self.assertEqual(sessions[0]["p50"], MAX_SESSIONS + 3.0)
+        self.assertEqual(sessions[-1]["p50"], 4.0)
+
+    def test_corrupt_or_wrong_type_files_read_as_empty(self):
+        os.makedirs(os.path.dirname(self.history_file))
+        with open(self.history_file, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        self.assertEqual(history_store.load_records(self.history_file), [])
+        history_store.save_mapping(self.history_file, {"a": 1})
+        self.assertEqual(history_store.load_records(self.history_file), [])
+        self.assertEqual(history_store.load_mapping(self.history_file), {"a": 1})
+        self.assertFalse(os.path.exists(self.history_file + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
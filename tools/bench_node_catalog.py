@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# File: tools/bench_node_catalog.py
+# Memory and join benchmark of ui_modules/node_catalog.py against the former lists of plain dicts
+# (run: python tools/bench_node_catalog.py [entries])
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ui_modules.node_catalog import NodeCatalog, NodeRecord, RepoJoinIndex
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    # Parsed from JSON text like the persisted / downloaded lists, so equal values are separate strings
+    raw = json.dumps([{
+        "name": f"ComfyUI-Example-Node-{i}", "status": "已安装" if i % 25 == 0 else "未安装", "local_id": "N/A",
+        "local_commit_full": None, "repo_info": "在线目标: main", "repo_url": f"https://github.com/author{i % 900}/ComfyUI-Example-Node-{i}.git",
+        "is_git": True, "remote_branch": "main",
+    } for i in range(count)], ensure_ascii=False)
+    tracemalloc.start()
+    dict_lists = json.loads(raw)
+    local_dicts = sorted([node for node in dict_lists if node["status"] == "已安装"], key=lambda x: x.get('name', '').lower())
+    all_dicts = sorted(dict_lists, key=lambda x: x.get('name', '').lower())
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del dict_lists, local_dicts, all_dicts
+
+    tracemalloc.start()
+    parsed = json.loads(raw)
+    catalog = NodeCatalog.from_dicts([node for node in parsed if node["status"] == "已安装"], parsed)
+    del parsed
+    catalog_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{len(catalog)} entries: dict lists {dict_bytes / 1024:.0f} KB, NodeCatalog {catalog_bytes / 1024:.0f} KB "
+          f"({catalog_bytes / dict_bytes:.0%}, including name and repository indexes)")
+
+    # Join of catalog entries to installed nodes whose folder names and URL forms differ
+    entries = [(f"Example Node {i}", f"https://github.com/author{i % 900}/ComfyUI-Example-Node-{i}.git") for i in range(3000)]
+    installed = [NodeRecord(f"example-node-{i}", status="已安装", repo_url=f"git@github.com:author{i % 900}/comfyui-example-node-{i}", is_git=True) for i in range(0, 3000, 20)]
+    started = time.perf_counter()
+    index = RepoJoinIndex(installed)
+    joined = sum(1 for _, url in entries if index.match(url))
+    print(f"{len(entries)}x{len(installed)} join: {joined} matched in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
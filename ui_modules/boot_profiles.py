@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/boot_profiles.py
+# Boot Profiles Module (launch ComfyUI with a subset of custom nodes)
+
+import tkinter as tk
+from tkinter import ttk, messagebox, Toplevel
+import os
+import threading
+from datetime import datetime
+
+from ui_modules import history_store
+
+ALL_NODES_PROFILE = "全部节点" # Built-in profile: nothing is disabled
+DISABLED_SUFFIX = ".disabled" # ComfyUI skips custom_nodes entries ending with this
+MAX_STARTUP_RECORDS = 300
+
+
+def list_custom_node_entries(custom_nodes_dir):
+    """Returns the custom_nodes entries ComfyUI would try to load (directories and .py files), sorted by name."""
+    entries = []
+    try:
+        for name in os.listdir(custom_nodes_dir):
+            if name.startswith(".") or name == "__pycache__" or name.endswith(DISABLED_SUFFIX):
+                continue
+            path = os.path.join(custom_nodes_dir, name)
+            if os.path.isfile(path) and os.path.splitext(name)[1] != ".py":
+                continue
+            entries.append(name)
+    except OSError as e:
+        print(f"[BootProfiles WARNING] Failed to list {custom_nodes_dir}: {e}")
+    return sorted(entries, key=str.lower)
+
+
+class BootProfileStore:
+    """Named sets of enabled custom nodes, the rename journal used to apply them, and per-profile startup times."""
+    def __init__(self, profiles_file, journal_file, startup_history_file):
+        """
+        Args:
+            profiles_file: JSON file with {profile_name: [enabled node entry names]}.
+            journal_file: JSON file listing entries renamed by the active profile (kept until restored, survives crashes).
+            startup_history_file: JSON history of startup durations per profile.
+        """
+        self.profiles_file = profiles_file
+        self.journal_file = journal_file
+        self.startup_history_file = startup_history_file
+        self._lock = threading.Lock()
+        self.profiles = self._load_profiles()
+
+    # --- Profiles ---
+    def _load_profiles(self):
+        """Loads saved profiles; returns an empty dict if the file is missing or invalid."""
+        data = history_store.load_mapping(self.profiles_file)
+        return {name: list(nodes) for name, nodes in data.items() if isinstance(nodes, list)}
+
+    def _save_profiles(self):
+        """Writes all profiles to disk."""
+        history_store.save_mapping(self.profiles_file, self.profiles)
+
+    def profile_names(self):
+        """Returns the selectable profile names, with the built-in 'all nodes' profile first."""
+        return [ALL_NODES_PROFILE] + sorted(self.profiles)
+
+    def get_nodes(self, profile_name):
+        """Returns the enabled node entries of a profile, or None for the built-in profile / unknown names."""
+        nodes = self.profiles.get(profile_name)
+        return list(nodes) if nodes is not None else None
+
+    def save_profile(self, profile_name, enabled_nodes):
+        """Creates or replaces a profile."""
+        self.profiles[profile_name] = sorted(set(enabled_nodes), key=str.lower)
+        self._save_profiles()
+
+    def delete_profile(self, profile_name):
+        """Removes a profile if it exists."""
+        if self.profiles.pop(profile_name, None) is not None:
+            self._save_profiles()
+
+    # --- Apply / Restore ---
+    def has_pending_restore(self):
+        """Returns True if entries disabled by a profile still need to be renamed back."""
+        return os.path.exists(self.journal_file)
+
+    def apply(self, profile_name, custom_nodes_dir):
+        """
+        Renames every custom_nodes entry not in the profile to '<name>.disabled'.
+        The journal is written before each rename, so restore() can always undo a partial apply.
+        Returns (disabled_names, failed_names).
+        """
+        with self._lock:
+            self._restore_locked() # Never stack two profiles on top of each other
+            enabled = self.get_nodes(profile_name)
+            if enabled is None:
+                return [], []
+            enabled = set(enabled)
+            journal = {"profile": profile_name, "custom_nodes_dir": custom_nodes_dir, "disabled": []}
+            disabled, failed = [], []
+            for name in list_custom_node_entries(custom_nodes_dir):
+                if name in enabled:
+                    continue
+                source = os.path.join(custom_nodes_dir, name)
+                target = source + DISABLED_SUFFIX
+                if os.path.exists(target):
+                    failed.append(name) # A disabled copy already exists, leave both alone
+                    continue
+                journal["disabled"].append(name)
+                if not history_store.save_mapping(self.journal_file, journal):
+                    journal["disabled"].remove(name) # Never rename what the journal doesn't record
+                    failed.append(name)
+                    continue
+                try:
+                    os.rename(source, target)
+                    disabled.append(name)
+                except OSError as e:
+                    print(f"[BootProfiles WARNING] Failed to disable '{name}': {e}")
+                    journal["disabled"].remove(name)
+                    failed.append(name)
+            if not disabled:
+                self._remove_journal()
+            else:
+                history_store.save_mapping(self.journal_file, journal)
+            return disabled, failed
+
+    def restore(self):
+        """Renames entries disabled by the last applied profile back. Returns (restored_names, failed_names)."""
+        with self._lock:
+            return self._restore_locked()
+
+    def _restore_locked(self):
+        """restore() body; caller holds the lock."""
+        if not os.path.exists(self.journal_file):
+            return [], []
+        journal = history_store.load_mapping(self.journal_file)
+        if not journal:
+            return [], [] # Unreadable: kept, so the entries can still be restored by hand
+
+        custom_nodes_dir = journal.get("custom_nodes_dir", "")
+        restored, failed = [], []
+        for name in journal.get("disabled", []):
+            source = os.path.join(custom_nodes_dir, name)
+            disabled_path = source + DISABLED_SUFFIX
+            if not os.path.exists(disabled_path):
+                continue # Journal entry written but rename never happened
+            if os.path.exists(source):
+                failed.append(name)
+                continue
+            try:
+                os.rename(disabled_path, source)
+                restored.append(name)
+            except OSError as e:
+                print(f"[BootProfiles WARNING] Failed to restore '{name}': {e}")
+                failed.append(name)
+
+        if failed:
+            # Keep only what still needs restoring so a later attempt can finish the job
+            journal["disabled"] = failed
+            history_store.save_mapping(self.journal_file, journal)
+        else:
+            self._remove_journal()
+        return restored, failed
+
+    def _remove_journal(self):
+        """Deletes the journal file if present."""
+        try:
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+        except OSError as e:
+            print(f"[BootProfiles WARNING] Failed to remove restore journal: {e}")
+
+    # --- Startup Times ---
+    def record_startup(self, profile_name, seconds, enabled_count):
+        """Appends one startup duration (launch to 'ready' line) for a profile."""
+        history_store.append_record(self.startup_history_file, {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "profile": profile_name,
+            "seconds": round(seconds, 2),
+            "enabled_nodes": enabled_count,
+        }, max_records=MAX_STARTUP_RECORDS)
+
+    def startup_stats(self):
+        """Returns {profile_name: {"count", "mean", "last"}} from the startup history."""
+        stats = {}
+        for record in history_store.load_records(self.startup_history_file):
+            profile_name, seconds = record.get("profile"), record.get("seconds")
+            if profile_name is None or seconds is None:
+                continue
+            entry = stats.setdefault(profile_name, {"count": 0, "total": 0.0, "last": None})
+            entry["count"] += 1
+            entry["total"] += seconds
+            entry["last"] = seconds
+        return {name: {"count": s["count"], "mean": s["total"] / s["count"], "last": s["last"]} for name, s in stats.items()}
+
+
+class BootProfileEditor:
+    """Modal window to create, edit and delete boot profiles."""
+    def __init__(self, app_instance, store):
+        self.app = app_instance
+        self.store = store
+        self.node_entries = list_custom_node_entries(self.app.comfyui_nodes_dir) if self.app.comfyui_nodes_dir else []
+
+        self.window = Toplevel(self.app.root)
+        self.window.title("启动配置 / Boot Profiles")
+        self.window.geometry("520x560")
+        self.window.configure(bg=self.app.root.cget('bg'))
+        self.window.transient(self.app.root)
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+        top_frame = ttk.Frame(self.window, padding=(10, 10, 10, 5))
+        top_frame.grid(row=0, column=0, sticky="ew")
+        top_frame.columnconfigure(1, weight=1)
+        ttk.Label(top_frame, text="配置名称:", style='TLabel').grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.name_var = tk.StringVar()
+        self.name_combo = ttk.Combobox(top_frame, textvariable=self.name_var, values=sorted(self.store.profiles), style='TCombobox')
+        self.name_combo.grid(row=0, column=1, sticky="ew")
+        self.name_combo.bind("<<ComboboxSelected>>", lambda event: self._load_selected_profile())
+        self.stats_label = ttk.Label(top_frame, text="", style='Hint.TLabel')
+        self.stats_label.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+
+        list_frame = ttk.Frame(self.window, padding=(10, 0, 10, 0))
+        list_frame.grid(row=1, column=0, sticky="nsew")
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        self.node_listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, activestyle="none", exportselection=False,
+                                      bg=self.app.TEXT_AREA_BG, fg=self.app.FG_COLOR, selectbackground=self.app.ACCENT_ACTIVE,
+                                      selectforeground="white", highlightthickness=0, borderwidth=0)
+        self.node_listbox.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.node_listbox.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.node_listbox.config(yscrollcommand=scrollbar.set)
+        for name in self.node_entries:
+            self.node_listbox.insert(tk.END, name)
+
+        button_frame = ttk.Frame(self.window, padding=(10, 5, 10, 10))
+        button_frame.grid(row=2, column=0, sticky="ew")
+        ttk.Label(button_frame, text="选中的节点在该配置下加载，其余节点启动时临时禁用。", style='Hint.TLabel').pack(side=tk.TOP, anchor=tk.W, pady=(0, 5))
+        ttk.Button(button_frame, text="全选", style="Tab.TButton", command=lambda: self.node_listbox.select_set(0, tk.END)).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="全不选", style="Tab.TButton", command=lambda: self.node_listbox.select_clear(0, tk.END)).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_frame, text="关闭", style="Tab.TButton", command=self.window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="删除", style="Tab.TButton", command=self._delete_profile).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(button_frame, text="保存", style="Accent.TButton", command=self._save_profile).pack(side=tk.RIGHT, padx=(0, 5))
+
+        current = self.app.boot_profile_var.get()
+        if current in self.store.profiles:
+            self.name_var.set(current)
+            self._load_selected_profile()
+        self._update_stats_label()
+
+    def _load_selected_profile(self):
+        """Selects the nodes of the profile named in the name box."""
+        enabled = set(self.store.get_nodes(self.name_var.get().strip()) or [])
+        self.node_listbox.select_clear(0, tk.END)
+        for index, name in enumerate(self.node_entries):
+            if name in enabled:
+                self.node_listbox.select_set(index)
+        self._update_stats_label()
+
+    def _update_stats_label(self):
+        """Shows recorded startup times for the selected profile next to the full launch."""
+        stats = self.store.startup_stats()
+        parts = []
+        for profile_name in (self.name_var.get().strip(), ALL_NODES_PROFILE):
+            if profile_name and profile_name in stats:
+                s = stats[profile_name]
+                parts.append(f"{profile_name}: 平均启动 {s['mean']:.1f}s (最近 {s['last']:.1f}s, {s['count']} 次)")
+        self.stats_label.config(text="  |  ".join(parts) if parts else "暂无启动耗时记录")
+
+    def _save_profile(self):
+        """Saves the selection under the entered name."""
+        profile_name = self.name_var.get().strip()
+        if not profile_name or profile_name == ALL_NODES_PROFILE:
+            messagebox.showwarning("名称无效", f"请输入配置名称（不能为“{ALL_NODES_PROFILE}”）。", parent=self.window)
+            return
+        enabled = [self.node_entries[index] for index in self.node_listbox.curselection()]
+        self.store.save_profile(profile_name, enabled)
+        self.name_combo.config(values=sorted(self.store.profiles))
+        self.app._refresh_boot_profile_choices()
+        self.app.log_to_gui("Launcher", f"启动配置 '{profile_name}' 已保存 ({len(enabled)}/{len(self.node_entries)} 个节点启用)。", "info")
+        self._update_stats_label()
+
+    def _delete_profile(self):
+        """Deletes the profile named in the name box."""
+        profile_name = self.name_var.get().strip()
+        if profile_name not in self.store.profiles:
+            return
+        if not messagebox.askyesno("确认删除", f"删除启动配置 '{profile_name}'？", parent=self.window):
+            return
+        self.store.delete_profile(profile_name)
+        self.name_var.set("")
+        self.name_combo.config(values=sorted(self.store.profiles))
+        self.node_listbox.select_clear(0, tk.END)
+        if self.app.boot_profile_var.get() == profile_name:
+            self.app.boot_profile_var.set(ALL_NODES_PROFILE)
+        self.app._refresh_boot_profile_choices()
+        self._update_stats_label()
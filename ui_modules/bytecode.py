@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/bytecode.py
+# Bytecode Precompile Module (compileall of updated code trees before the next ComfyUI start)
+
+import os
+import re
+import time
+from datetime import datetime
+
+from ui_modules import history_store
+from ui_modules.dependency_check import COMFYUI_LABEL
+
+COMPILE_TIMEOUT_SEC = 900
+MAX_COMPILE_RECORDS = 100
+# Never imported as code, at any depth: VCS metadata and caches (searched in each file's full path)
+SKIP_PATH_RE = r"[\\/](\.git|__pycache__)[\\/]"
+# User data folders of the main body; only skipped at its top level, since comfy/ldm/models and nodes' models/ packages are code
+MAIN_BODY_DATA_DIRS = ("models", "input", "output", "user", "temp")
+COMPILED_LINE_RE = re.compile(r"^Compiling ", re.MULTILINE)
+
+
+def _exclude_pattern(targets, skip_custom_nodes):
+    """compileall -x regex: SKIP_PATH_RE plus the data folders (and optionally custom_nodes) right under each main body target."""
+    patterns = [SKIP_PATH_RE]
+    top_level_dirs = MAIN_BODY_DATA_DIRS + (("custom_nodes",) if skip_custom_nodes else ())
+    for label, path in targets.items():
+        if label == COMFYUI_LABEL:
+            patterns.append(re.escape(path) + r"[\\/](" + "|".join(top_level_dirs) + r")[\\/]")
+    return "|".join(patterns)
+
+
+class BytecodePrecompiler:
+    """Writes __pycache__ for changed sources after updates, so the next start doesn't compile them while importing."""
+    def __init__(self, app_instance, history_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, python_exe_var and _run_process_command).
+            history_file: JSON file with one record per precompile run and the startup that followed it.
+        """
+        self.app = app_instance
+        self.history_file = history_file
+
+    def is_enabled(self):
+        """Reads the precompile toggle from the app config on every call."""
+        return self.app.config.get("bytecode_precompile", "启用") == "启用"
+
+    def precompile(self, targets, skip_custom_nodes=False):
+        """
+        Compiles the given {label: directory} trees with the target interpreter. Runs in worker thread.
+
+        compileall -j 0 spreads the files over a process pool (one worker per CPU) and only recompiles files whose
+        .pyc is missing or records another source mtime/size, so unchanged files cost one header read.
+        The main body target is labelled COMFYUI_LABEL; only its top-level data folders are excluded.
+        skip_custom_nodes leaves the nodes inside a main body directory alone (they did not change).
+        Returns the number of compiled files.
+        """
+        python_exe = self.app.python_exe_var.get()
+        # Absolute, so the anchored excludes match the paths compileall builds from these arguments
+        targets = {label: os.path.abspath(path) for label, path in targets.items() if path}
+        if not self.is_enabled() or not targets or not python_exe:
+            return 0
+        exclude = _exclude_pattern(targets, skip_custom_nodes)
+        compile_cmd = [python_exe, "-m", "compileall", "-j", "0", "-x", exclude] + list(targets.values())
+
+        started = time.time()
+        self.app.log_to_gui("Bytecode", f"预编译字节码: {', '.join(targets)}...", "info")
+        stdout, stderr, rc = self.app._run_process_command(compile_cmd, cwd=next(iter(targets.values())), timeout=COMPILE_TIMEOUT_SEC, log_output=False, log_source="Bytecode")
+        seconds = time.time() - started
+        compiled = len(COMPILED_LINE_RE.findall(stdout or ""))
+        if rc != 0:
+            # Files with syntax errors for this interpreter (e.g. Python 2 leftovers) fail here as they would on import
+            print(f"[Bytecode WARNING] compileall reported errors: {(stdout or '')[-1000:]} {(stderr or '').strip()[-500:]}")
+            self.app.log_to_gui("Bytecode", "部分文件无法编译 (详见控制台输出)，其余文件已预编译。", "warn")
+        self.app.log_to_gui("Bytecode", f"字节码预编译完成: {compiled} 个文件，耗时 {seconds:.1f} 秒。", "info")
+
+        if compiled:
+            history_store.append_record(self.history_file, {
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "targets": list(targets),
+                "files": compiled,
+                "seconds": round(seconds, 2),
+                "startup_seconds": None,
+                "baseline_seconds": None,
+            }, max_records=MAX_COMPILE_RECORDS)
+        return compiled
+
+    def record_startup(self, seconds, baseline_seconds):
+        """
+        Attaches the first startup after a precompile to its record and logs the difference to the profile's
+        previous mean startup time. Runs in GUI thread (the history file is small).
+        """
+        records = history_store.load_records(self.history_file)
+        if not records or records[-1].get("startup_seconds") is not None:
+            return
+        record = records[-1]
+        record["startup_seconds"] = round(seconds, 2)
+        record["baseline_seconds"] = round(baseline_seconds, 2) if baseline_seconds else None
+        history_store.save_records(self.history_file, records)
+        if baseline_seconds:
+            saved = baseline_seconds - seconds
+            self.app.log_to_gui("Bytecode", f"预编译 {record['files']} 个文件后首次启动 {seconds:.1f}s，此前平均 {baseline_seconds:.1f}s ({'快' if saved >= 0 else '慢'} {abs(saved):.1f}s, {abs(saved) / baseline_seconds:.0%})。", "info")
+        else:
+            self.app.log_to_gui("Bytecode", f"预编译 {record['files']} 个文件后首次启动 {seconds:.1f}s (尚无此前的启动耗时可对比)。", "info")
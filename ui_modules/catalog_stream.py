@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/catalog_stream.py
+# Catalog Stream Module (incremental parsing of the custom node catalog while it downloads)
+
+import re
+import json
+import codecs
+
+# ComfyUI-Manager format: {"custom_nodes": [...], ...}; plain format: [...]
+LIST_KEY_RE = re.compile(r'"custom_nodes"\s*:\s*\[')
+COMPACT_THRESHOLD_CHARS = 64 * 1024 # Consumed text is dropped from the buffer once this much has piled up
+_WHITESPACE_AND_COMMAS = " \t\r\n,"
+
+
+def iter_catalog_entries(byte_chunks):
+    """
+    Yields the entries of a node catalog one by one from an iterable of byte chunks (e.g. response.iter_content()),
+    so memory holds one entry plus one chunk instead of the whole document and its parsed copy.
+    Raises ValueError (json.JSONDecodeError) if the document is malformed or has no entry list.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = iter(byte_chunks)
+    buffer = ""
+    pos = None # Index just past the '[' of the entry list once found
+    finished = False
+
+    def read_more():
+        nonlocal buffer, finished
+        chunk = next(chunks, None)
+        if chunk is None:
+            buffer += text_decoder.decode(b"", final=True)
+            finished = True
+        else:
+            buffer += text_decoder.decode(chunk)
+
+    # Locate the start of the entry list
+    while pos is None:
+        stripped = buffer.lstrip("\ufeff \t\r\n")
+        if stripped.startswith("["):
+            pos = len(buffer) - len(stripped) + 1
+        elif stripped.startswith("{"):
+            match = LIST_KEY_RE.search(buffer)
+            if match:
+                pos = match.end()
+        elif stripped:
+            raise ValueError("节点配置既不是列表也不是对象")
+        if pos is None:
+            if finished:
+                raise ValueError("节点配置中没有节点列表")
+            read_more()
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE_AND_COMMAS:
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        try:
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("incomplete", buffer, pos)
+            entry, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if finished:
+                raise
+            read_more() # The entry continues in the next chunk
+            continue
+        yield entry
+        if pos > COMPACT_THRESHOLD_CHARS:
+            buffer = buffer[pos:]
+            pos = 0
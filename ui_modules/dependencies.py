@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/dependencies.py
+# Dependency Manager Module (one pip resolution for all affected requirements files)
+
+import os
+import re
+import sys
+import hashlib
+import platform
+import tempfile
+import threading
+from datetime import datetime
+
+from ui_modules import history_store
+
+PYTORCH_EXTRA_INDEX_URLS = ["https://download.pytorch.org/whl/cu118", "https://download.pytorch.org/whl/cu121"]
+PIP_TIMEOUT_SEC = 1800
+# Requirement lines that point at paths relative to the working directory (pip resolves them against cwd,
+# not against the requirements file), so such files can't be merged and are installed from their own folder.
+CWD_RELATIVE_PREFIXES = (".", "-e .", "-e ./", "--editable .", "file:")
+# Lines that pull in other files, whose content a line diff can't see
+NESTED_FILE_PREFIXES = ("-r", "--requirement", "-c", "--constraint")
+REQUIREMENT_NAME_RE = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def file_sha256(path):
+    """Returns the sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _normalize_requirement_line(line):
+    """Strips comments and redundant whitespace so cosmetic edits don't count as changes."""
+    line = line.split(" #", 1)[0].split("\t#", 1)[0].strip()
+    return "" if line.startswith("#") else " ".join(line.split())
+
+
+def _requirement_name(line):
+    """Normalized project name of a requirement line (the line itself for URLs/paths)."""
+    match = REQUIREMENT_NAME_RE.match(line)
+    return re.sub(r"[-_.]+", "-", match.group(1)).lower() if match else line
+
+
+def diff_requirements(old_text, new_text):
+    """
+    Line diff of two requirements.txt versions.
+
+    Returns:
+        dict with "added" (new or changed requirement lines), "removed" (lines of packages no longer required at all),
+        "options" (global option lines of the new file, e.g. --extra-index-url) and "nested" (True if the
+        new file includes other files, so a line diff is not sufficient).
+    """
+    old_lines = {_normalize_requirement_line(line) for line in old_text.splitlines()} - {""}
+    new_lines = [_normalize_requirement_line(line) for line in new_text.splitlines()]
+    new_lines = [line for line in dict.fromkeys(new_lines) if line]
+    options = [line for line in new_lines if line.startswith("-") and not line.startswith(("-e", "--editable"))]
+    requirements = [line for line in new_lines if line not in options]
+    required_names = {_requirement_name(line) for line in requirements}
+    return {
+        "added": [line for line in requirements if line not in old_lines],
+        "removed": sorted(line for line in old_lines - set(new_lines) if not line.startswith("-") and _requirement_name(line) not in required_names),
+        "options": options,
+        "nested": any(line.startswith(NESTED_FILE_PREFIXES) for line in options),
+    }
+
+
+def _needs_own_cwd(requirements_path):
+    """Returns True if the requirements file references paths relative to its own directory."""
+    try:
+        with open(requirements_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                stripped = line.strip()
+                if stripped and not stripped.startswith("#") and stripped.startswith(CWD_RELATIVE_PREFIXES):
+                    return True
+    except OSError:
+        pass
+    return False
+
+
+class DependencyManager:
+    """Merges the requirements files of every affected node (plus ComfyUI's own) into one pip run."""
+    def __init__(self, app_instance, state_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, wheelhouse and _run_process_command).
+            state_file: JSON file remembering the sha256 of each requirements file after its last successful install.
+        """
+        self.app = app_instance
+        self.state_file = state_file
+        self._lock = threading.Lock() # Installs into the configured Python and the state file
+        self._locks = {} # Other interpreter (cached environment builds) -> Lock, so those builds don't wait for the configured Python
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, python_exe):
+        """Returns the lock serializing pip runs into one interpreter other than the configured one."""
+        with self._locks_guard:
+            return self._locks.setdefault(os.path.normcase(os.path.abspath(python_exe)), threading.Lock())
+
+    # --- Install State ---
+    def _state_key(self, requirements_path):
+        """Normalized absolute path used as the key in the state file."""
+        return os.path.normcase(os.path.abspath(requirements_path))
+
+    def _is_unchanged(self, state, requirements_path, python_exe, file_hash):
+        """Returns True if this exact file was installed successfully into the same Python before."""
+        entry = state.get(self._state_key(requirements_path))
+        return bool(entry) and entry.get("sha256") == file_hash and entry.get("python") == python_exe
+
+    def _mark_installed(self, state, requirements_path, python_exe, file_hash):
+        """Records a successful install in the (in-memory) state."""
+        state[self._state_key(requirements_path)] = {
+            "sha256": file_hash,
+            "python": python_exe,
+            "installed": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    def _mark_deferred(self, state, requirements_path, label, python_exe):
+        """Records a file whose install was skipped because a cached environment is used; it has no hash, so it never counts as unchanged."""
+        state[self._state_key(requirements_path)] = {
+            "deferred": True,
+            "label": label,
+            "python": python_exe,
+            "deferred_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+    # --- Pip Command ---
+    def pip_install_command(self, python_exe):
+        """Base 'pip install' command shared by every dependency install."""
+        pip_cmd = [python_exe, "-m", "pip", "install"]
+        for index_url in PYTORCH_EXTRA_INDEX_URLS:
+            pip_cmd.extend(["--extra-index-url", index_url])
+        is_venv = sys.prefix != sys.base_prefix
+        # Check if the target python_exe is NOT within the launcher's base prefix (heuristic for standalone/portable env)
+        try:
+            relative_path_to_base = os.path.relpath(python_exe, sys.base_prefix)
+            is_outside_launcher_base = relative_path_to_base.startswith('..') or os.path.isabs(relative_path_to_base)
+        except ValueError: # Assume it's outside on path error
+            is_outside_launcher_base = True
+        # Add --user only if on Linux/macOS AND (the launcher is NOT in a venv AND the target python is NOT in the launcher's base path)
+        if platform.system() != "Windows" and not is_venv and is_outside_launcher_base:
+            self.app.log_to_gui("Dependencies", "目标Python路径可能非系统或虚拟环境安装，使用 --user 选项安装依赖。", "warn")
+            pip_cmd.append("--user")
+        return pip_cmd
+
+    # --- Install ---
+    def install(self, requirement_files, include_comfyui=True, force=False, python_exe=None):
+        """
+        Installs the given requirements files with a single pip resolution. Runs in worker thread.
+
+        Args:
+            requirement_files: {label: requirements.txt path} of the nodes (or main body) that changed.
+            include_comfyui: Also pass ComfyUI's own requirements.txt so node pins cannot break it.
+            force: Ignore the unchanged-hash shortcut.
+            python_exe: Install into this interpreter instead of the configured one (cached environment builds);
+                such installs are not recorded in the unchanged-hash state and only wait for other installs into the same interpreter.
+
+        Returns:
+            dict with "ok" (False if any file failed), "installed", "skipped" and "failed" label lists.
+        """
+        result = {"ok": True, "installed": [], "skipped": [], "failed": []}
+        record_state = python_exe is None
+        if record_state and self._cached_environment_ready():
+            # The configured Python doesn't get them now; recorded so a later launch with it installs them
+            self._defer(requirement_files)
+            result["skipped"].extend(requirement_files)
+            return result
+        python_exe = python_exe or self.app.python_exe_var.get()
+        if not python_exe or not os.path.isfile(python_exe):
+            self.app.log_to_gui("Dependencies", "Python 可执行文件无效，跳过依赖安装。", "warn")
+            return result
+
+        with self._lock if record_state else self._lock_for(python_exe):
+            state = history_store.load_mapping(self.state_file)
+            pending = {} # label -> (path, sha256)
+            for label, path in requirement_files.items():
+                if not path or not os.path.isfile(path):
+                    continue
+                try:
+                    file_hash = file_sha256(path)
+                except OSError as e:
+                    self.app.log_to_gui("Dependencies", f"无法读取 {path}: {e}", "warn")
+                    continue
+                if not force and self._is_unchanged(state, path, python_exe, file_hash):
+                    result["skipped"].append(label)
+                else:
+                    pending[label] = (path, file_hash)
+
+            if result["skipped"]:
+                self.app.log_to_gui("Dependencies", f"requirements 未变化，跳过 {len(result['skipped'])} 个: {', '.join(result['skipped'])}", "info")
+            if not pending:
+                return result
+
+            # Files with cwd-relative entries keep their own pip run; everything else is merged
+            separate = {label: item for label, item in pending.items() if _needs_own_cwd(item[0])}
+            merged = {label: item for label, item in pending.items() if label not in separate}
+
+            if merged:
+                comfyui_requirements = os.path.join(self.app.comfyui_install_dir, "requirements.txt") if self.app.comfyui_install_dir else ""
+                extra_paths = [comfyui_requirements] if include_comfyui and os.path.isfile(comfyui_requirements) else []
+                self.app.log_to_gui("Dependencies", f"合并解析 {len(merged)} 个 requirements 文件 (单次 pip 调用): {', '.join(merged)}", "info")
+                if self._run_pip([path for path, _ in merged.values()] + extra_paths, python_exe, cwd=self.app.comfyui_install_dir or os.getcwd()):
+                    for label, (path, file_hash) in merged.items():
+                        if record_state:
+                            self._mark_installed(state, path, python_exe, file_hash)
+                        result["installed"].append(label)
+                elif len(merged) > 1:
+                    # A conflict in one file fails the whole resolution; fall back to one run per file to isolate it
+                    self.app.log_to_gui("Dependencies", "合并安装失败，逐个安装以定位冲突的 requirements...", "warn")
+                    separate.update(merged)
+                else:
+                    result["failed"].extend(merged)
+
+            for label, (path, file_hash) in separate.items():
+                self.app.log_to_gui("Dependencies", f"单独安装依赖: {label}", "info")
+                if self._run_pip([path], python_exe, cwd=os.path.dirname(path)):
+                    if record_state:
+                        self._mark_installed(state, path, python_exe, file_hash)
+                    result["installed"].append(label)
+                else:
+                    result["failed"].append(label)
+
+            if record_state:
+                history_store.save_mapping(self.state_file, state)
+
+        result["ok"] = not result["failed"]
+        if result["failed"]:
+            self.app.log_to_gui("Dependencies", f"依赖安装失败: {', '.join(result['failed'])}", "error")
+        else:
+            self.app.log_to_gui("Dependencies", f"依赖安装完成: {', '.join(result['installed'])}", "info")
+        return result
+
+    def install_requirement_lines(self, label, lines, cwd):
+        """Installs only the given requirement lines (e.g. the added/changed lines of a requirements diff). Runs in worker thread."""
+        if self._cached_environment_ready():
+            return True
+        python_exe = self.app.python_exe_var.get()
+        if not python_exe or not os.path.isfile(python_exe):
+            self.app.log_to_gui("Dependencies", "Python 可执行文件无效，跳过依赖安装。", "warn")
+            return False
+        lines_file = None
+        try:
+            with tempfile.NamedTemporaryFile("w", suffix="-requirements.txt", delete=False, encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+                lines_file = f.name
+            self.app.log_to_gui("Dependencies", f"仅安装 {label} 中新增/变更的 {len(lines)} 行依赖: {', '.join(lines)}", "info")
+            with self._lock:
+                return self._run_pip([lines_file], python_exe, cwd=cwd)
+        finally:
+            if lines_file:
+                try:
+                    os.remove(lines_file)
+                except OSError:
+                    pass
+
+    def mark_installed(self, requirement_files):
+        """
+        Records {label: path} files as installed in their current state, so later installs skip them while unchanged.
+        While a cached environment is used the lines went nowhere (install_requirement_lines skipped them), so the files
+        are recorded as deferred instead.
+        """
+        if self.app.env_cache.ready_python():
+            self._defer(requirement_files)
+            return
+        python_exe = self.app.python_exe_var.get()
+        with self._lock:
+            state = history_store.load_mapping(self.state_file)
+            for path in requirement_files.values():
+                try:
+                    self._mark_installed(state, path, python_exe, file_sha256(path))
+                except OSError:
+                    continue
+            history_store.save_mapping(self.state_file, state)
+
+    def _defer(self, requirement_files):
+        """Records {label: path} files as not installed into the configured Python (see install_deferred)."""
+        python_exe = self.app.python_exe_var.get()
+        with self._lock:
+            state = history_store.load_mapping(self.state_file)
+            for label, path in requirement_files.items():
+                if path and os.path.isfile(path):
+                    self._mark_deferred(state, path, label, python_exe)
+            history_store.save_mapping(self.state_file, state)
+
+    def install_deferred(self):
+        """
+        Installs the files skipped while a cached environment was used, once a launch falls back to the configured Python
+        (cache disabled, environment evicted or not built yet). Runs in the backend start thread. Returns False if pip failed.
+        """
+        with self._lock:
+            state = history_store.load_mapping(self.state_file)
+            deferred = {path: entry for path, entry in state.items() if entry.get("deferred")}
+            missing = [path for path in deferred if not os.path.isfile(path)]
+            if missing:
+                for path in missing:
+                    del state[path] # Node uninstalled since
+                history_store.save_mapping(self.state_file, state)
+        requirement_files = {entry.get("label") or path: path for path, entry in deferred.items() if path not in missing}
+        if not requirement_files:
+            return True
+        self.app.log_to_gui("Dependencies", f"配置的 Python 尚未安装缓存环境期间跳过的依赖，先安装: {', '.join(requirement_files)}", "info")
+        return self.install(requirement_files)["ok"]
+
+    def _cached_environment_ready(self):
+        """True if the environment cache is enabled and holds a ready environment for the code state on disk; the launch then uses it as is."""
+        env_cache = self.app.env_cache
+        if not env_cache.is_enabled() or not env_cache.ready_python():
+            return False
+        self.app.log_to_gui("Dependencies", "当前依赖组合已有缓存的 Python 环境，跳过依赖安装。", "info")
+        return True
+
+    def _run_pip(self, requirements_paths, python_exe, cwd):
+        """Runs one pip install over all given requirements files (merged through a temporary -r file)."""
+        merged_file = None
+        try:
+            if len(requirements_paths) == 1:
+                req_args = ["-r", requirements_paths[0]]
+            else:
+                # Nested -r paths are resolved relative to the including file, so absolute paths are used
+                with tempfile.NamedTemporaryFile("w", suffix="-requirements.txt", delete=False, encoding="utf-8") as f:
+                    for path in requirements_paths:
+                        f.write(f"-r {os.path.abspath(path)}\n")
+                    merged_file = f.name
+                req_args = ["-r", merged_file]
+            pip_cmd = self.pip_install_command(python_exe) + req_args
+            wheelhouse = self.app.wheelhouse
+            # Offline first: succeeds when everything is already installed or prefetched
+            if wheelhouse.has_wheels() and self._run_pip_offline(pip_cmd, cwd):
+                return True
+            stdout_pip, stderr_pip, rc_pip = self.app._run_process_command(pip_cmd + wheelhouse.find_links_args(), cwd=cwd, timeout=PIP_TIMEOUT_SEC, log_source="Pip")
+            if rc_pip != 0:
+                self.app.log_to_gui("Dependencies", f"Pip 安装失败: {stderr_pip.strip()[-2000:]}", "error")
+            else:
+                wheelhouse.mark_used_from_output(stdout_pip)
+                # Archived for later offline installs in the background, outside the install lock
+                wheelhouse.archive_installed_async(stdout_pip, python_exe)
+            return rc_pip == 0
+        finally:
+            if merged_file:
+                try:
+                    os.remove(merged_file)
+                except OSError:
+                    pass
+
+    def _run_pip_offline(self, pip_cmd, cwd):
+        """Runs the install against the wheelhouse only (--no-index). Failure is expected and not reported as an error."""
+        offline_cmd = pip_cmd + ["--no-index"] + self.app.wheelhouse.find_links_args()
+        stdout_pip, stderr_pip, rc_pip = self.app._run_process_command(offline_cmd, cwd=cwd, timeout=PIP_TIMEOUT_SEC, log_output=False, log_source="Pip")
+        if rc_pip != 0:
+            print(f"[Dependencies INFO] Offline install from wheelhouse not possible, going online: {stderr_pip.strip()[-500:]}")
+            return False
+        if stdout_pip:
+            self.app.log_to_gui("Pip", stdout_pip, "stdout", target_override="Launcher")
+        self.app.log_to_gui("Dependencies", "已从本地 wheelhouse 离线完成安装。", "info")
+        self.app.wheelhouse.mark_used_from_output(stdout_pip)
+        return True
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/dependency_check.py
+# Dependency Conflict Pre-check Module (offline: requirements files + site-packages metadata, no pip)
+
+import os
+import glob
+import json
+import threading
+from itertools import combinations
+
+# packaging is optional: without it the pre-check is skipped and installs proceed as before
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+    from packaging.specifiers import SpecifierSet
+    from packaging.utils import canonicalize_name
+    from packaging.version import Version, InvalidVersion
+except ImportError:
+    print("[DependencyCheck WARNING] 'packaging' library not found. Dependency conflict pre-check is disabled.")
+    Requirement = None
+
+COMFYUI_LABEL = "ComfyUI"
+DISABLED_SUFFIX = ".disabled" # Disabled custom node folders are not loaded, so their requirements don't count
+SITE_PACKAGES_PATTERNS = [
+    os.path.join("Lib", "site-packages"), # Windows embedded / venv
+    os.path.join("lib", "python3*", "site-packages"), # POSIX venv / prefix install
+    os.path.join("lib", "python3*", "dist-packages"),
+    os.path.join("lib", "python3", "dist-packages"), # Debian system python
+    os.path.join("local", "lib", "python3*", "dist-packages"),
+]
+
+
+def _parse_requirement_line(line):
+    """Returns a packaging Requirement for one requirements.txt line, or None for options/paths/URLs/invalid lines."""
+    line = line.split(" #", 1)[0].split("\t#", 1)[0].strip()
+    if not line or line.startswith(("#", "-", ".", "/")) or "://" in line.split("@", 1)[0]:
+        return None
+    line = line.split(" --", 1)[0].strip() # Per-requirement options such as --hash
+    try:
+        req = Requirement(line)
+    except InvalidRequirement:
+        return None
+    if req.url:
+        return None
+    return req
+
+
+def _marker_applies(req, extra=""):
+    """Evaluates environment markers against the launcher's interpreter (close enough for the target in practice)."""
+    if not req.marker:
+        return True
+    try:
+        return req.marker.evaluate({"extra": extra})
+    except Exception:
+        return False
+
+
+def parse_requirements_text(text):
+    """Parses requirements.txt content into {canonical_name: SpecifierSet}, merging repeated entries."""
+    parsed = {}
+    for line in text.splitlines():
+        req = _parse_requirement_line(line)
+        if req is None or not _marker_applies(req):
+            continue
+        name = canonicalize_name(req.name)
+        parsed[name] = parsed[name] & req.specifier if name in parsed else SpecifierSet(str(req.specifier))
+    return parsed
+
+
+def _boundary_versions(specifier_sets, installed_version=None):
+    """
+    Candidate versions probing every interval the specifiers can form: each boundary, a version just above it,
+    and 0. A combination no candidate satisfies has (in practice) no solution. "Just above" is X.0.0.1 rather than
+    X.1, so narrow ranges such as >1.0,<1.0.1 still get a candidate inside.
+    """
+    candidates = {Version("0")}
+    if installed_version is not None:
+        candidates.add(installed_version)
+    for spec_set in specifier_sets:
+        for spec in spec_set:
+            if spec.operator == "===":
+                continue
+            try:
+                version = Version(spec.version.replace(".*", ""))
+            except InvalidVersion:
+                continue
+            candidates.add(version)
+            candidates.add(Version(f"{version.base_version}.0.0.1"))
+    return candidates
+
+
+def specifiers_compatible(specifier_sets, installed_version=None):
+    """Returns True if at least one version satisfies all specifier sets together."""
+    specifier_sets = [s for s in specifier_sets if str(s)]
+    if len(specifier_sets) < 2:
+        return True
+    for version in _boundary_versions(specifier_sets, installed_version):
+        if all(s.contains(version, prereleases=True) for s in specifier_sets):
+            return True
+    return False
+
+
+def find_site_packages(python_exe):
+    """Locates the site-packages directories belonging to a Python executable from the file layout alone."""
+    exe_dir = os.path.dirname(os.path.abspath(python_exe))
+    found = []
+    for root in (exe_dir, os.path.dirname(exe_dir)): # <env>/python.exe, <env>/Scripts|bin/python
+        for pattern in SITE_PACKAGES_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(root, pattern))):
+                if os.path.isdir(path) and path not in found:
+                    found.append(path)
+    return found
+
+
+def _read_metadata_headers(path):
+    """Reads the RFC 822 header block of a METADATA / PKG-INFO file (stops before the long description)."""
+    headers = {"Name": None, "Version": None, "Requires-Dist": []}
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    break
+                key, _, value = line.partition(":")
+                if key == "Requires-Dist":
+                    headers["Requires-Dist"].append(value.strip())
+                elif key in ("Name", "Version") and headers[key] is None:
+                    headers[key] = value.strip()
+    except OSError:
+        return None
+    return headers
+
+
+class InstalledDistributions:
+    """Snapshot of the distributions installed in a site-packages directory list, read from their metadata files."""
+    def __init__(self, site_dirs):
+        self.versions = {} # canonical name -> Version (or raw string if not PEP 440)
+        self.display_names = {} # canonical name -> "Name version"
+        self.dependents = {} # canonical name -> [(dependent canonical name, dependent display name, SpecifierSet)]
+        for site_dir in site_dirs: # Earlier directories win, like on sys.path
+            try:
+                entries = sorted(os.listdir(site_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.endswith(".dist-info"):
+                    metadata_path = os.path.join(site_dir, entry, "METADATA")
+                elif entry.endswith(".egg-info"):
+                    metadata_path = os.path.join(site_dir, entry, "PKG-INFO")
+                    if not os.path.isfile(metadata_path): # Legacy single-file egg-info
+                        metadata_path = os.path.join(site_dir, entry)
+                else:
+                    continue
+                headers = _read_metadata_headers(metadata_path) if os.path.isfile(metadata_path) else None
+                if not headers or not headers["Name"]:
+                    continue
+                name = canonicalize_name(headers["Name"])
+                if name in self.versions:
+                    continue
+                try:
+                    self.versions[name] = Version(headers["Version"] or "0")
+                except InvalidVersion:
+                    self.versions[name] = headers["Version"]
+                display = f"{headers['Name']} {headers['Version']}"
+                self.display_names[name] = display
+                for requirement_str in headers["Requires-Dist"]:
+                    try:
+                        req = Requirement(requirement_str)
+                    except InvalidRequirement:
+                        continue
+                    if req.url or not str(req.specifier) or not _marker_applies(req):
+                        continue
+                    self.dependents.setdefault(canonicalize_name(req.name), []).append((name, display, req.specifier))
+
+
+class DependencyConflictChecker:
+    """Checks all node requirements, ComfyUI's requirements and the installed environment for conflicts before pip runs."""
+    def __init__(self, app_instance):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for paths and _run_process_command).
+        """
+        self.app = app_instance
+        self._lock = threading.Lock()
+        self._installed_cache_key = None
+        self._installed_cache = None
+        self._site_dirs_cache = {} # python_exe -> site-packages dirs
+
+    def is_available(self):
+        """Returns True if packaging is installed (the pre-check needs its specifier logic)."""
+        return Requirement is not None
+
+    # --- Environment ---
+    def _site_dirs(self, python_exe):
+        """site-packages dirs of the target Python; asks the interpreter (not pip) only if the layout is unknown."""
+        if python_exe in self._site_dirs_cache:
+            return self._site_dirs_cache[python_exe]
+        site_dirs = find_site_packages(python_exe)
+        if not site_dirs:
+            script = "import json, sys; print(json.dumps([p for p in sys.path if p.endswith(('site-packages', 'dist-packages'))]))"
+            stdout, _, rc = self.app._run_process_command([python_exe, "-c", script], cwd=os.path.dirname(python_exe) or os.getcwd(), timeout=30, log_output=False, log_source="Python")
+            if rc == 0:
+                try:
+                    site_dirs = [path for path in json.loads(stdout.strip().splitlines()[-1]) if os.path.isdir(path)]
+                except (ValueError, IndexError):
+                    site_dirs = []
+        self._site_dirs_cache[python_exe] = site_dirs
+        return site_dirs
+
+    def installed_distributions(self, python_exe):
+        """Returns the InstalledDistributions of the target Python, re-read only when a site-packages dir changed."""
+        site_dirs = self._site_dirs(python_exe)
+        cache_key = tuple((path, os.path.getmtime(path)) for path in site_dirs if os.path.isdir(path))
+        with self._lock:
+            if cache_key != self._installed_cache_key or self._installed_cache is None:
+                self._installed_cache = InstalledDistributions(site_dirs)
+                self._installed_cache_key = cache_key
+            return self._installed_cache
+
+    # --- Requirement Sources ---
+    def current_requirement_sources(self):
+        """Returns {label: requirements text} for ComfyUI and every enabled custom node, as currently on disk."""
+        sources = {}
+        comfyui_dir = self.app.comfyui_install_dir
+        nodes_dir = self.app.comfyui_nodes_dir
+        if comfyui_dir:
+            text = self._read_text(os.path.join(comfyui_dir, "requirements.txt"))
+            if text is not None:
+                sources[COMFYUI_LABEL] = text
+        if nodes_dir and os.path.isdir(nodes_dir):
+            for entry in sorted(os.listdir(nodes_dir)):
+                if entry.endswith(DISABLED_SUFFIX) or entry.startswith((".", "__")):
+                    continue
+                text = self._read_text(os.path.join(nodes_dir, entry, "requirements.txt"))
+                if text is not None:
+                    sources[entry] = text
+        return sources
+
+    def _read_text(self, path):
+        """Reads a requirements file, returning None if it is missing or unreadable."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    # --- Check ---
+    def _will_be_replaced(self, name, by_package, installed):
+        """True if some requirements file pins the installed distribution to a different version (its metadata is then stale)."""
+        version = installed.versions.get(name)
+        if name not in by_package or not isinstance(version, Version):
+            return False
+        return any(str(spec) and not spec.contains(version, prereleases=True) for _, spec in by_package[name])
+
+    def check(self, pending):
+        """
+        Evaluates the environment as it would be after the pending changes. Runs in milliseconds, no network, no pip.
+
+        Args:
+            pending: {label: requirements text} for the node(s) / main body about to change. A label equal to an
+                installed node name (or "ComfyUI") replaces that source's current requirements.
+
+        Returns:
+            dict with "conflicts" (list of {"package", "sources": [(label, spec)], "introduced_by": [labels], "installed"}),
+            "changes" ([{"package", "source", "spec", "installed"}]: installed versions a pending requirement would replace)
+            and "checked" (number of requirement sources evaluated).
+        """
+        result = {"conflicts": [], "changes": [], "checked": 0}
+        python_exe = self.app.python_exe_var.get()
+        if not self.is_available() or not python_exe or not os.path.isfile(python_exe):
+            return result
+
+        sources = self.current_requirement_sources()
+        sources.update(pending)
+        result["checked"] = len(sources)
+        installed = self.installed_distributions(python_exe)
+
+        by_package = {} # package -> [(label, SpecifierSet)]
+        for label, text in sources.items():
+            for name, spec in parse_requirements_text(text).items():
+                by_package.setdefault(name, []).append((label, spec))
+
+        for name, requirement_specs in sorted(by_package.items()):
+            installed_version = installed.versions.get(name)
+            if not isinstance(installed_version, Version):
+                installed_version = None
+            # Installed packages that depend on this one constrain it too, unless the requirements replace them anyway
+            dependent_specs = [(f"{display} (已安装)", spec) for dependent, display, spec in installed.dependents.get(name, [])
+                               if not self._will_be_replaced(dependent, by_package, installed)]
+            all_specs = requirement_specs + dependent_specs
+
+            for label, spec in requirement_specs:
+                if label in pending and installed_version is not None and str(spec) and not spec.contains(installed_version, prereleases=True):
+                    result["changes"].append({"package": name, "source": label, "spec": str(spec), "installed": str(installed_version)})
+
+            if specifiers_compatible([spec for _, spec in all_specs], installed_version):
+                continue
+            # Narrow the blame down to the pairs that can't coexist (all sources if only the full combination fails)
+            pairs = [(a, b) for a, b in combinations(all_specs, 2) if not specifiers_compatible([a[1], b[1]])]
+            involved = {item for pair in pairs for item in pair} if pairs else set(all_specs)
+            involved = sorted(involved, key=all_specs.index)
+            requirement_labels = {label for label, _ in requirement_specs}
+            if not any(label in requirement_labels for label, _ in involved):
+                continue # Conflict among installed packages only; pip didn't cause it and won't fix it here
+            result["conflicts"].append({
+                "package": name,
+                "sources": [(label, str(spec)) for label, spec in involved],
+                "introduced_by": [label for label, _ in involved if label in pending],
+                "installed": str(installed.versions[name]) if name in installed.versions else None,
+            })
+        return result
+
+
+def format_conflict_report(result, limit=12):
+    """Human-readable (Chinese) summary lines of a check() result."""
+    lines = []
+    for conflict in result["conflicts"][:limit]:
+        sources = "; ".join(f"{label}: {spec}" for label, spec in conflict["sources"])
+        introduced = f" ← 由 {', '.join(conflict['introduced_by'])} 引入" if conflict["introduced_by"] else " (已存在)"
+        installed = f" [当前 {conflict['installed']}]" if conflict["installed"] else ""
+        lines.append(f"冲突 {conflict['package']}{installed}: {sources}{introduced}")
+    if len(result["conflicts"]) > limit:
+        lines.append(f"... 另有 {len(result['conflicts']) - limit} 个冲突")
+    for change in result["changes"][:limit]:
+        lines.append(f"变更 {change['package']} {change['installed']} → {change['spec']} ({change['source']})")
+    if len(result["changes"]) > limit:
+        lines.append(f"... 另有 {len(result['changes']) - limit} 个版本变更")
+    return lines
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/env_cache.py
+# Environment Cache Module (one prepared Python environment per combined-requirements hash)
+
+import os
+import time
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+
+from ui_modules import history_store
+from ui_modules.dependencies import _normalize_requirement_line
+
+ENV_CACHE_MAX_ENVS = 5 # Least recently launched environments beyond this are deleted
+FAILED_BUILD_RETRY_SEC = 6 * 3600 # A failed build of the same requirements combination is attempted again after this
+PYVENV_CFG = "pyvenv.cfg"
+
+
+def find_env_root(python_exe):
+    """
+    Returns the directory that makes up the environment of python_exe (venv root or portable/embedded Python dir),
+    or None for interpreters whose packages live in a system location that can't be cloned.
+    """
+    exe_dir = os.path.dirname(os.path.abspath(python_exe))
+    parent = os.path.dirname(exe_dir)
+    if os.path.isfile(os.path.join(exe_dir, PYVENV_CFG)):
+        return exe_dir
+    if os.path.isfile(os.path.join(parent, PYVENV_CFG)): # <venv>/Scripts|bin/python
+        return parent
+    if os.path.isdir(os.path.join(exe_dir, "Lib", "site-packages")): # python_embeded / portable
+        return exe_dir
+    return None
+
+
+def hardlink_tree(src_root, dst_root, skip_dirs=()):
+    """
+    Recreates src_root under dst_root with hard links (copies where linking fails, e.g. across drives).
+    Returns (linked, copied) file counts. pip replaces files instead of writing them in place, so the source stays intact.
+    """
+    linked, copied = 0, 0
+    skip = {os.path.normcase(os.path.abspath(path)) for path in skip_dirs}
+    for dirpath, dirnames, filenames in os.walk(src_root):
+        dirnames[:] = [d for d in dirnames if os.path.normcase(os.path.abspath(os.path.join(dirpath, d))) not in skip]
+        target_dir = os.path.join(dst_root, os.path.relpath(dirpath, src_root))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in dirnames + filenames:
+            src = os.path.join(dirpath, name)
+            if not os.path.islink(src):
+                continue
+            os.symlink(os.readlink(src), os.path.join(target_dir, name)) # venv bin/python -> base interpreter
+        dirnames[:] = [d for d in dirnames if not os.path.islink(os.path.join(dirpath, d))]
+        for name in filenames:
+            src = os.path.join(dirpath, name)
+            if os.path.islink(src):
+                continue
+            dst = os.path.join(target_dir, name)
+            try:
+                os.link(src, dst)
+                linked += 1
+            except OSError:
+                shutil.copy2(src, dst)
+                copied += 1
+    return linked, copied
+
+
+class EnvironmentCache:
+    """Maps each combined-requirements hash to a prepared clone of the configured Python environment."""
+    def __init__(self, app_instance, cache_dir, index_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, dependency_checker and dependency_manager).
+            cache_dir: Directory holding one environment per requirements hash.
+            index_file: JSON file mapping hash -> {"path", "python", "status", "created", "last_used"}.
+        """
+        self.app = app_instance
+        self.cache_dir = cache_dir
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._build_thread = None
+        self._building_key = None
+
+    def is_enabled(self):
+        """Reads the cache toggle from the app config on every call."""
+        return self.app.config.get("env_cache_enabled", "禁用") == "启用"
+
+    # --- Keys ---
+    def current_key(self):
+        """Hash of the base interpreter plus every requirement line of ComfyUI and the enabled nodes (order-insensitive)."""
+        base_python = self.app.config.get("python_exe", "")
+        if not base_python:
+            return None
+        lines = set()
+        for text in self.app.dependency_checker.current_requirement_sources().values():
+            lines.update(_normalize_requirement_line(line) for line in text.splitlines())
+        lines.discard("")
+        digest = hashlib.sha256(os.path.normcase(os.path.abspath(base_python)).encode("utf-8"))
+        for line in sorted(lines):
+            digest.update(b"\n" + line.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def ready_python(self, key=None):
+        """Interpreter of the ready environment for key (default: the current code state), or None."""
+        if not self.is_enabled():
+            return None
+        key = key or self.current_key()
+        entry = history_store.load_mapping(self.index_file).get(key) if key else None
+        if entry and entry.get("status") == "ready" and os.path.isfile(entry.get("python", "")):
+            return entry["python"]
+        return None
+
+    # --- Launch ---
+    def python_for_launch(self):
+        """
+        Called right before the backend starts: returns the cached environment matching the active code state,
+        or the configured interpreter while that environment is (re)built in the background.
+        """
+        base_python = self.app.config.get("python_exe", "")
+        if not self.is_enabled():
+            self.app.dependency_manager.install_deferred()
+            return base_python
+        key = self.current_key()
+        python = self.ready_python(key)
+        if python:
+            with self._lock:
+                index = history_store.load_mapping(self.index_file)
+                index[key]["last_used"] = time.time()
+                history_store.save_mapping(self.index_file, index)
+            self.app.log_to_gui("EnvCache", f"使用缓存的 Python 环境 {key} (依赖与当前代码状态一致)。", "info")
+            return python
+        # Files skipped while a cached environment was used go into the configured Python before it launches
+        self.app.dependency_manager.install_deferred()
+        self.build_async(key)
+        return base_python
+
+    # --- Build ---
+    def build_async(self, key):
+        """Builds the environment for key in a background thread (one build at a time)."""
+        if not key or find_env_root(self.app.config.get("python_exe", "")) is None:
+            return
+        with self._lock:
+            entry = history_store.load_mapping(self.index_file).get(key, {})
+            # last_used of a failed entry is the time of the failed build
+            if entry.get("status") == "failed" and time.time() - entry.get("last_used", 0) < FAILED_BUILD_RETRY_SEC:
+                return
+            if self._build_thread and self._build_thread.is_alive():
+                return
+            self._building_key = key
+            self._build_thread = threading.Thread(target=self._build, args=(key,), name="EnvCacheBuild", daemon=True)
+            self._build_thread.start()
+
+    def _build(self, key):
+        """Background build: hardlink-clone the configured environment, then install all current requirements into it."""
+        base_python = self.app.config.get("python_exe", "")
+        env_root = find_env_root(base_python)
+        env_path = os.path.join(self.cache_dir, key)
+        started = time.time()
+        self.app.log_to_gui("EnvCache", f"后台构建 Python 环境 {key}...", "info")
+        try:
+            if os.path.isdir(env_path):
+                shutil.rmtree(env_path, ignore_errors=True)
+            linked, copied = hardlink_tree(env_root, env_path, skip_dirs=[self.cache_dir])
+            env_python = os.path.join(env_path, os.path.relpath(os.path.abspath(base_python), env_root))
+
+            requirement_files = {}
+            if self.app.comfyui_install_dir:
+                requirement_files["ComfyUI"] = os.path.join(self.app.comfyui_install_dir, "requirements.txt")
+            nodes_dir = self.app.comfyui_nodes_dir
+            for label in self.app.dependency_checker.current_requirement_sources():
+                if label != "ComfyUI" and nodes_dir:
+                    requirement_files[label] = os.path.join(nodes_dir, label, "requirements.txt")
+            result = self.app.dependency_manager.install(requirement_files, include_comfyui=False, force=True, python_exe=env_python)
+            status = "ready" if result["ok"] else "failed"
+        except Exception as e:
+            print(f"[EnvCache ERROR] Building environment {key} failed: {e}")
+            status, env_python, linked, copied = "failed", "", 0, 0
+
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            index[key] = {
+                "path": env_path,
+                "python": env_python,
+                "status": status,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "last_used": time.time(),
+                "build_seconds": round(time.time() - started, 1),
+            }
+            history_store.save_mapping(self.index_file, index)
+            self._building_key = None
+        if status == "ready":
+            self.app.log_to_gui("EnvCache", f"Python 环境 {key} 已就绪 ({linked} 个文件硬链接, {copied} 个复制, 耗时 {time.time() - started:.0f} 秒)，下次启动时使用。", "info")
+        else:
+            self.app.log_to_gui("EnvCache", f"Python 环境 {key} 构建失败，继续使用配置的 Python。", "warn")
+        self.evict()
+
+    # --- Eviction ---
+    def evict(self, max_envs=ENV_CACHE_MAX_ENVS):
+        """Deletes the least recently launched environments beyond max_envs, and failed ones."""
+        removed = []
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            ready = sorted((k for k, e in index.items() if e.get("status") == "ready"), key=lambda k: index[k].get("last_used", 0), reverse=True)
+            for key in ready[max_envs:] + [k for k, e in index.items() if e.get("status") == "failed"]:
+                if key == self._building_key:
+                    continue
+                path = index[key].get("path")
+                if path and os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True) # Removing hard links leaves the base environment's files intact
+                if index[key].get("status") == "ready":
+                    del index[key]
+                    removed.append(key)
+            history_store.save_mapping(self.index_file, index)
+        if removed:
+            self.app.log_to_gui("EnvCache", f"已删除最久未使用的缓存环境: {', '.join(removed)}", "info")
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/git_maintenance.py
+# Git Maintenance Module (idle-time gc / commit-graph / pack-refs across the main body and node repositories)
+
+import os
+import sys
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ui_modules import history_store
+
+MAINTENANCE_INTERVAL_SEC = 24 * 3600 # Minimum time between two passes
+IDLE_POLL_INTERVAL_SEC = 300 # How often the scheduler checks whether a pass is due and the backend is idle
+MAX_PARALLEL_REPOS = 3 # Repositories maintained at the same time (git gc is I/O heavy)
+MAX_PASS_RECORDS = 100
+STEP_TIMEOUT_SEC = 600
+# Read-only commands the management tab runs per repository; their latency is measured before and after each pass
+LATENCY_PROBES = (
+    ["for-each-ref", "--count=50", "refs/"],
+    ["log", "-1", "--format=%H"],
+    ["status", "--porcelain"],
+)
+MAINTENANCE_STEPS = (
+    ["gc", "--auto", "--quiet"], # Packs loose objects only when git's own thresholds are exceeded
+    ["commit-graph", "write", "--reachable"],
+    ["pack-refs", "--all"],
+)
+
+
+class GitMaintenanceScheduler:
+    """Runs periodic repository maintenance in the background while the backend is idle."""
+    def __init__(self, app_instance, history_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, paths, state and _run_git_command).
+            history_file: JSON file with one record per maintenance pass (repositories, duration, probe latency).
+        """
+        self.app = app_instance
+        self.history_file = history_file
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+    def is_enabled(self):
+        """Reads the maintenance toggle from the app config on every call."""
+        return self.app.config.get("git_maintenance_enabled", "启用") == "启用"
+
+    def _fs_cache_enabled(self):
+        return self.app.config.get("git_fs_cache_enabled", "禁用") == "启用"
+
+    # --- Scheduling ---
+    def start(self):
+        """Starts the scheduler thread (once)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._schedule_loop, name="GitMaintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Signals the scheduler to stop; a running pass finishes its current repositories and skips the rest."""
+        self._stop_flag.set()
+
+    def _schedule_loop(self):
+        while not self._stop_flag.wait(IDLE_POLL_INTERVAL_SEC):
+            try:
+                if self.is_enabled() and self._pass_due() and self._backend_idle():
+                    self.run_pass()
+            except Exception as e:
+                print(f"[GitMaintenance WARNING] Maintenance pass failed: {e}")
+
+    def _pass_due(self):
+        records = history_store.load_records(self.history_file)
+        if not records:
+            return True
+        try:
+            last = datetime.fromisoformat(records[-1].get("time", "")).timestamp()
+        except ValueError:
+            return True
+        return time.time() - last >= MAINTENANCE_INTERVAL_SEC
+
+    def _backend_idle(self):
+        """True if no update task runs and the backend is stopped or has an empty queue."""
+        if self.app._is_update_task_running() or self.app.stop_event_set():
+            return False
+        if not self.app._is_comfyui_running():
+            return True
+        try:
+            response = requests.get(f"http://127.0.0.1:{self.app.comfyui_backend_port}/queue", timeout=2)
+            data = response.json() if response.status_code == 200 else {}
+        except (requests.exceptions.RequestException, ValueError):
+            return False # Starting up or unresponsive: not idle
+        return response.status_code == 200 and not data.get("queue_running") and not data.get("queue_pending")
+
+    # --- Pass ---
+    def repositories(self):
+        """Main body repository plus every node directory with a .git (disabled nodes included)."""
+        repos = {}
+        repo_dir = self.app.comfyui_repo_dir
+        if repo_dir and os.path.isdir(os.path.join(repo_dir, ".git")):
+            repos["ComfyUI"] = repo_dir
+        nodes_dir = self.app.comfyui_nodes_dir
+        if nodes_dir and os.path.isdir(nodes_dir):
+            for entry in sorted(os.listdir(nodes_dir)):
+                path = os.path.join(nodes_dir, entry)
+                if os.path.isdir(os.path.join(path, ".git")):
+                    repos[entry] = path
+        return repos
+
+    def run_pass(self):
+        """Maintains all repositories with bounded concurrency and records probe latency before/after. Returns the record."""
+        repos = self.repositories()
+        if not repos:
+            return None
+        started = time.time()
+        self.app.log_to_gui("GitMaintenance", f"后台空闲，开始维护 {len(repos)} 个 Git 仓库...", "info")
+        results = {}
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REPOS, thread_name_prefix="GitMaintenance") as executor:
+            futures = {label: executor.submit(self._maintain_repo, path) for label, path in repos.items()}
+            for label, future in futures.items():
+                try:
+                    results[label] = future.result()
+                except Exception as e:
+                    print(f"[GitMaintenance WARNING] {label}: {e}")
+
+        done = {label: r for label, r in results.items() if r and not r.get("skipped")}
+        if not done:
+            self.app.log_to_gui("GitMaintenance", "后台不再空闲，Git 维护推迟到下次空闲时。", "info")
+            return None # Not recorded, so the pass stays due
+        failed = sorted(label for label, r in done.items() if r["failed_steps"])
+        before_ms = sum(r["before_ms"] for r in done.values())
+        after_ms = sum(r["after_ms"] for r in done.values())
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "repos": len(done),
+            "skipped": len(repos) - len(done),
+            "failed": failed,
+            "seconds": round(time.time() - started, 1),
+            "latency_before_ms": round(before_ms, 1),
+            "latency_after_ms": round(after_ms, 1),
+        }
+        history_store.append_record(self.history_file, record, max_records=MAX_PASS_RECORDS)
+
+        change = f"{(after_ms - before_ms) / before_ms:+.0%}" if before_ms else "-"
+        self.app.log_to_gui("GitMaintenance", f"Git 维护完成: {len(done)} 个仓库，耗时 {record['seconds']:.0f} 秒；"
+                            f"常用 Git 命令总延迟 {before_ms:.0f}ms -> {after_ms:.0f}ms ({change})。", "info")
+        if failed:
+            self.app.log_to_gui("GitMaintenance", f"部分维护步骤失败的仓库: {', '.join(failed)}", "warn")
+        return record
+
+    def _maintain_repo(self, path):
+        """Runs the probes, the maintenance steps and the probes again for one repository. Runs in a pool thread."""
+        # Re-checked per repository so a launch or an update task stops the rest of the pass
+        if self._stop_flag.is_set() or not self._backend_idle():
+            return {"skipped": True}
+        before_ms = self._probe_latency_ms(path)
+        failed_steps = []
+        for step in MAINTENANCE_STEPS + self._fs_cache_steps():
+            _, stderr, rc = self.app._run_git_command(step, cwd=path, timeout=STEP_TIMEOUT_SEC, log_output=False)
+            if rc != 0:
+                failed_steps.append(step[0])
+                print(f"[GitMaintenance WARNING] git {' '.join(step)} failed in {path}: {stderr.strip()[-300:]}")
+        return {"before_ms": before_ms, "after_ms": self._probe_latency_ms(path), "failed_steps": failed_steps}
+
+    def _fs_cache_steps(self):
+        """Optional config: untracked cache everywhere, the built-in fsmonitor daemon where git ships it (Windows/macOS)."""
+        if not self._fs_cache_enabled():
+            return ()
+        steps = (["config", "core.untrackedCache", "true"],)
+        if os.name == 'nt' or sys.platform == 'darwin':
+            steps += (["config", "core.fsmonitor", "true"],)
+        return steps
+
+    def _probe_latency_ms(self, path):
+        total = 0.0
+        for probe in LATENCY_PROBES:
+            started = time.perf_counter()
+            self.app._run_git_command(probe, cwd=path, timeout=60, log_output=False)
+            total += (time.perf_counter() - started) * 1000
+        return total
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/history_store.py
+# Small JSON history files (bounded lists of records) shared by launcher modules
+
+import os
+import json
+import threading
+
+_write_lock = threading.Lock()
+
+
+def load_records(file_path):
+    """Returns the list of records stored in file_path, or an empty list if missing/corrupt."""
+    try:
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                return data
+            print(f"[History WARNING] Unexpected format in {file_path}, ignoring.")
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        print(f"[History ERROR] Failed to read {file_path}: {e}")
+    return []
+
+
+def save_records(file_path, records):
+    """Replaces the records in file_path. Written to a temp file first so a crash never leaves half a file."""
+    with _write_lock:
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            temp_path = file_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, indent=4, ensure_ascii=False)
+            os.replace(temp_path, file_path)
+            return True
+        except (IOError, OSError, TypeError) as e:
+            print(f"[History ERROR] Failed to write {file_path}: {e}")
+            return False
+
+
+def load_mapping(file_path):
+    """Returns the dict stored in file_path, or an empty dict if missing/corrupt."""
+    try:
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+            print(f"[History WARNING] Unexpected format in {file_path}, ignoring.")
+    except (json.JSONDecodeError, IOError, OSError) as e:
+        print(f"[History ERROR] Failed to read {file_path}: {e}")
+    return {}
+
+
+def save_mapping(file_path, mapping):
+    """Replaces the dict stored in file_path (same atomic write as save_records)."""
+    return save_records(file_path, mapping)
+
+
+def append_record(file_path, record, max_records=200):
+    """Appends one record and keeps only the newest max_records entries."""
+    records = load_records(file_path)
+    records.append(record)
+    if max_records and len(records) > max_records:
+        records = records[-max_records:]
+    return save_records(file_path, records)
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/idle_proxy.py
+# Idle Sleep Proxy Module (socket-activated ComfyUI backend)
+
+import socket
+import threading
+import time
+import requests
+
+# The proxy owns the user-facing port (comfyui_api_port) and forwards raw TCP
+# to the backend, which listens on an internal port. It never parses more than
+# the first request of a connection, so HTTP, websockets and uploads pass through
+# untouched.
+
+PROXY_BUFFER_SIZE = 65536
+PEEK_TIMEOUT_SEC = 5
+READY_WAIT_TIMEOUT_SEC = 300 # How long an incoming connection is held while the backend cold-starts
+MONITOR_INTERVAL_SEC = 1.0
+IDLE_CHECK_INTERVAL_SEC = 15
+WAKE_FAILED_BODY = "ComfyUI 后台未能唤醒，请查看启动器日志。\n".encode("utf-8")
+# Sent to held connections when the launcher refuses or fails to wake the backend, instead of holding them until the timeout
+WAKE_FAILED_RESPONSE = (b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: text/plain; charset=utf-8\r\nRetry-After: 30\r\n"
+                        b"Connection: close\r\nContent-Length: " + str(len(WAKE_FAILED_BODY)).encode("ascii") + b"\r\n\r\n" + WAKE_FAILED_BODY)
+
+
+class IdleSleepProxy:
+    """Local TCP proxy that stops the backend when idle and respawns it on demand."""
+    def __init__(self, app_instance, listen_port, backend_port):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, state and wake/sleep callbacks).
+            listen_port: The user-facing port the proxy binds to.
+            backend_port: The internal port the ComfyUI backend listens on.
+        """
+        self.app = app_instance
+        self.listen_port = int(listen_port)
+        self.backend_port = int(backend_port)
+
+        self._server_socket = None
+        self._stop_flag = threading.Event()
+        self._backend_ready = threading.Event()
+        self._wake_failed = threading.Event() # Set when the pending wake was refused or the backend died before becoming ready
+        self._wake_pending = False
+        self._wake_seen_running = False
+        self._last_activity = time.time()
+        self._last_idle_check = 0.0
+        self._sleep_requested = False
+        self._threads = []
+
+    # --- Lifecycle ---
+    def start(self):
+        """Binds the listening socket and starts the accept and monitor threads. Raises OSError if the port is taken."""
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            # SO_EXCLUSIVEADDRUSE on Windows / SO_REUSEADDR elsewhere keeps restarts quick without allowing port sharing
+            if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+                server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+            else:
+                server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server_socket.bind(("127.0.0.1", self.listen_port))
+            server_socket.listen(64)
+            server_socket.settimeout(1.0) # Lets the accept loop notice stop()
+        except OSError:
+            server_socket.close()
+            raise
+
+        self._server_socket = server_socket
+        self._stop_flag.clear()
+        self._last_activity = time.time()
+
+        for target, name in ((self._accept_loop, "IdleProxyAccept"), (self._monitor_loop, "IdleProxyMonitor")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        self.app.log_to_gui("IdleProxy", f"空闲休眠代理已启动: 127.0.0.1:{self.listen_port} -> 后台端口 {self.backend_port}", "info")
+
+    def stop(self):
+        """Closes the listening socket. Established connections end when the backend closes them."""
+        self._stop_flag.set()
+        self._backend_ready.clear()
+        if self._server_socket:
+            try:
+                self._server_socket.close()
+            except OSError:
+                pass
+            self._server_socket = None
+        self._threads = []
+        self.app.log_to_gui("IdleProxy", "空闲休眠代理已停止。", "info")
+
+    def is_running(self):
+        """Returns True while the proxy is accepting connections."""
+        return self._server_socket is not None and not self._stop_flag.is_set()
+
+    def matches_ports(self, listen_port, backend_port):
+        """Returns True if the proxy is bound with the given port pair (used to detect config changes)."""
+        try:
+            return self.listen_port == int(listen_port) and self.backend_port == int(backend_port)
+        except (TypeError, ValueError):
+            return False
+
+    def reset_idle_timer(self):
+        """Restarts the idle clock, e.g. after the app declined a sleep request."""
+        self._last_activity = time.time()
+        self._sleep_requested = False
+
+    def wake_failed(self, reason):
+        """Called by the app when it refused or failed to wake the backend; held connections get a 503 right away."""
+        if not self._wake_pending:
+            return
+        self._wake_pending = False
+        self._wake_failed.set()
+        self.app.log_to_gui("IdleProxy", f"后台未能唤醒 ({reason})，向等待中的连接返回 503。", "warn")
+
+    def _request_wake(self):
+        """Asks the app (GUI thread) to start the backend; a wake already in flight is not reset."""
+        if not self._wake_pending:
+            self._wake_failed.clear()
+            self._wake_seen_running = False
+            self._wake_pending = True
+        self.app.root.after(0, self.app._wake_from_idle_sleep)
+
+    # --- Backend State ---
+    def _backend_queue_state(self):
+        """Returns (reachable, queue_empty) for the backend's /queue endpoint."""
+        try:
+            response = requests.get(f"http://127.0.0.1:{self.backend_port}/queue", timeout=2)
+            if response.status_code != 200:
+                return True, False
+            data = response.json()
+            queue_empty = not data.get("queue_running") and not data.get("queue_pending")
+            return True, queue_empty
+        except (requests.exceptions.RequestException, ValueError):
+            return False, False
+
+    def _idle_timeout_sec(self):
+        """Reads the idle timeout from the app config on every check so edits apply without a restart."""
+        try:
+            minutes = float(self.app.config.get("idle_sleep_timeout_min", "30"))
+        except (TypeError, ValueError):
+            minutes = 30.0
+        return max(1.0, minutes) * 60
+
+    def _monitor_loop(self):
+        """Tracks backend readiness and requests sleep once the backend has been idle long enough."""
+        while not self._stop_flag.is_set():
+            try:
+                if not self.app._is_comfyui_running() or self.app.comfyui_idle_sleeping:
+                    self._backend_ready.clear() # Down, or still being stopped for idle sleep
+                    if self._wake_pending and self._wake_seen_running:
+                        self.wake_failed("后台进程在就绪前退出")
+                elif not self._backend_ready.is_set():
+                    self._wake_seen_running = True
+                    reachable, _ = self._backend_queue_state()
+                    if reachable:
+                        # Readiness check passed: release held connections and start the idle clock
+                        self._last_activity = time.time()
+                        self._sleep_requested = False
+                        self._wake_pending = False
+                        self._backend_ready.set()
+                        self.app.log_to_gui("IdleProxy", "后台已就绪，释放等待中的连接。", "info")
+                elif not self._sleep_requested:
+                    now = time.time()
+                    idle_for = now - self._last_activity
+                    if idle_for >= self._idle_timeout_sec() and now - self._last_idle_check >= IDLE_CHECK_INTERVAL_SEC:
+                        self._last_idle_check = now
+                        reachable, queue_empty = self._backend_queue_state()
+                        if reachable and queue_empty:
+                            self._sleep_requested = True
+                            self._backend_ready.clear()
+                            self.app.log_to_gui("IdleProxy", f"后台已空闲 {int(idle_for // 60)} 分钟且队列为空，进入休眠。", "info")
+                            self.app.root.after(0, self.app._enter_idle_sleep)
+            except Exception as e:
+                print(f"[IdleProxy ERROR] Monitor loop error: {e}")
+            self._stop_flag.wait(MONITOR_INTERVAL_SEC)
+
+    # --- Connection Handling ---
+    def _accept_loop(self):
+        """Accepts client connections and hands each one to its own thread."""
+        while not self._stop_flag.is_set():
+            server_socket = self._server_socket
+            if server_socket is None:
+                break
+            try:
+                client_socket, _ = server_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break # Socket closed by stop()
+            threading.Thread(target=self._handle_client, args=(client_socket,), daemon=True).start()
+
+    def _is_websocket_upgrade(self, client_socket):
+        """Peeks at the first request without consuming it and reports whether it is a websocket upgrade."""
+        try:
+            client_socket.settimeout(PEEK_TIMEOUT_SEC)
+            head = client_socket.recv(4096, socket.MSG_PEEK)
+        except OSError:
+            return False
+        finally:
+            try:
+                client_socket.settimeout(None)
+            except OSError:
+                pass
+        return b"upgrade: websocket" in head.lower()
+
+    def _handle_client(self, client_socket):
+        """Wakes the backend if needed, waits for readiness, then pipes bytes in both directions."""
+        backend_socket = None
+        try:
+            if not self._backend_ready.is_set():
+                # An open browser tab keeps reconnecting its websocket; that alone must not wake the backend.
+                if not self.app._is_comfyui_running() and self._is_websocket_upgrade(client_socket):
+                    return
+                self._request_wake()
+                deadline = time.time() + READY_WAIT_TIMEOUT_SEC
+                while not self._backend_ready.wait(MONITOR_INTERVAL_SEC):
+                    if self._wake_failed.is_set() or self._stop_flag.is_set():
+                        client_socket.sendall(WAKE_FAILED_RESPONSE)
+                        return
+                    if time.time() >= deadline:
+                        self.app.log_to_gui("IdleProxy", "等待后台就绪超时，关闭客户端连接。", "warn")
+                        client_socket.sendall(WAKE_FAILED_RESPONSE)
+                        return
+                if self._stop_flag.is_set():
+                    return
+
+            self._last_activity = time.time()
+            backend_socket = socket.create_connection(("127.0.0.1", self.backend_port), timeout=10)
+            backend_socket.settimeout(None)
+
+            upstream = threading.Thread(target=self._pipe, args=(client_socket, backend_socket, True), daemon=True)
+            upstream.start()
+            self._pipe(backend_socket, client_socket, False)
+            upstream.join(timeout=1)
+        except OSError as e:
+            print(f"[IdleProxy WARNING] Connection forwarding failed: {e}")
+        finally:
+            for sock in (client_socket, backend_socket):
+                if sock:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+
+    def _pipe(self, source, destination, counts_as_activity):
+        """Copies bytes from source to destination until either side closes."""
+        try:
+            while True:
+                data = source.recv(PROXY_BUFFER_SIZE)
+                if not data:
+                    break
+                if counts_as_activity:
+                    self._last_activity = time.time()
+                destination.sendall(data)
+        except OSError:
+            pass
+        finally:
+            # Half-close so the peer sees EOF and the opposite pipe finishes too
+            try:
+                destination.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
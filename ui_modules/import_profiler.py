@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/import_profiler.py
+# Custom Node Import Profiler Module (parses ComfyUI startup output)
+
+import os
+import re
+import threading
+
+IMPORT_TIMES_HEADER = "Import times for custom nodes:"
+IMPORT_TIME_LINE_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?) seconds( \(IMPORT FAILED\))?: (.+?)\s*$")
+CANNOT_IMPORT_RE = re.compile(r"Cannot import (.+?) module for custom nodes")
+# python -X importtime: "import time: self [us] | cumulative | imported package"
+PY_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)")
+
+TOP_MODULES_REPORTED = 15
+
+
+def node_name_from_path(path):
+    """Maps a path from ComfyUI's import report to the custom_nodes entry name shown in the node list."""
+    return os.path.basename(os.path.normpath(path.strip()))
+
+
+class NodeImportProfiler:
+    """Collects one launch's custom-node import times and optional -X importtime module totals."""
+    def __init__(self, on_block_complete=None):
+        """
+        Args:
+            on_block_complete: Called (from the reader thread) with {node_name: {"seconds", "failed"}}
+                once the "Import times for custom nodes" block has been read.
+        """
+        self.on_block_complete = on_block_complete
+        self._lock = threading.Lock()
+        self._in_block = False
+        self._block_done = False
+        self.node_times = {}
+        self.failed_imports = set() # From "Cannot import ..." lines printed before the block
+        self.module_self_us = {} # Top-level package -> summed self time (us)
+
+    def feed_line(self, line):
+        """Parses one output line. Returns True if the line is -X importtime noise that should not reach the GUI log."""
+        if line.startswith("import time:"):
+            self._feed_importtime_line(line)
+            return True
+
+        completed = None
+        with self._lock:
+            if self._in_block:
+                match = IMPORT_TIME_LINE_RE.match(line)
+                if match:
+                    name = node_name_from_path(match.group(3))
+                    failed = bool(match.group(2)) or name in self.failed_imports
+                    self.node_times[name] = {"seconds": float(match.group(1)), "failed": failed}
+                    return False
+                # First line that isn't a timing row (normally a blank line) ends the block
+                self._in_block = False
+                self._block_done = True
+                completed = dict(self.node_times)
+            elif not self._block_done and IMPORT_TIMES_HEADER in line:
+                self._in_block = True
+                return False
+            elif "Cannot import" in line:
+                match = CANNOT_IMPORT_RE.search(line)
+                if match:
+                    self.failed_imports.add(node_name_from_path(match.group(1)))
+                return False
+
+        if completed is not None and self.on_block_complete:
+            self.on_block_complete(completed)
+        return False
+
+    def _feed_importtime_line(self, line):
+        """Aggregates python -X importtime rows by top-level package."""
+        match = PY_IMPORTTIME_RE.match(line)
+        if not match:
+            return # Header row ("self [us] | cumulative | imported package")
+        # Self time summed per package attributes nested imports to the package that owns them
+        self_us, package = int(match.group(1)), match.group(2).split(".", 1)[0]
+        with self._lock:
+            self.module_self_us[package] = self.module_self_us.get(package, 0) + self_us
+
+    def top_modules(self, limit=TOP_MODULES_REPORTED):
+        """Returns [(package, self_seconds)] sorted slowest first."""
+        with self._lock:
+            ranked = sorted(self.module_self_us.items(), key=lambda item: item[1], reverse=True)
+        return [(package, us / 1_000_000) for package, us in ranked[:limit]]
+
+    def has_module_data(self):
+        """Returns True if -X importtime output was seen."""
+        return bool(self.module_self_us)
@@ -3,9 +3,23 @@
 # Logs Tab Module
 
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk, scrolledtext, filedialog, messagebox, Toplevel
+import os
+from datetime import datetime
+from ui_modules import telemetry
 # setup_text_tags is accessed via app_instance
 
+PERF_REFRESH_MS = 1000
+# (sample key, label, colour attribute on app, formatter)
+PERF_METRICS = [
+    ("rss_bytes", "内存 RSS", "FG_INFO", lambda v: f"{v / (1024 * 1024):.0f} MB"),
+    ("cpu_percent", "CPU", "FG_WARN", lambda v: f"{v:.0f}%"),
+    ("threads", "线程数", "FG_HIGHLIGHT", lambda v: f"{v}"),
+    ("open_fds", "打开句柄", "FG_API", lambda v: f"{v}"),
+    ("read_rate", "磁盘读取", "FG_CMD", lambda v: f"{v / 1024:.0f} KB/s"),
+    ("write_rate", "磁盘写入", "FG_STDERR", lambda v: f"{v / 1024:.0f} KB/s"),
+]
+
 class LogsTab:
     """Handles the UI for the Logs tab."""
     def __init__(self, parent_frame, app_instance):
@@ -51,9 +65,155 @@ class LogsTab:
         self.app.main_output_text.grid(row=0, column=0, sticky="nsew", padx=1, pady=1)
         self.app.setup_text_tags(self.app.main_output_text) # Apply color tags using app's method
 
+        # Performance Sub-tab (resource sampler sparklines)
+        self._setup_performance_tab()
+
         # Store notebook reference in app_instance for switching tabs
         self.app.logs_notebook = self.logs_notebook
 
+    def _setup_performance_tab(self):
+        """Builds the sparkline view for the backend resource sampler."""
+        perf_frame = ttk.Frame(self.logs_notebook, style='Logs.TFrame', padding=5)
+        perf_frame.columnconfigure(0, weight=1)
+        self.logs_notebook.add(perf_frame, text=' 性能 / Performance ')
+
+        perf_control_frame = ttk.Frame(perf_frame, style='TabControl.TFrame', padding=(10, 6))
+        perf_control_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        perf_control_frame.columnconfigure(0, weight=1)
+        self.perf_status_label = ttk.Label(perf_control_frame, text="后台未运行，无采样数据。", style='Hint.TLabel')
+        self.perf_status_label.grid(row=0, column=0, sticky="w")
+        ttk.Button(perf_control_frame, text="导出 CSV", style="Tab.TButton", command=lambda: self._export_samples("csv")).grid(row=0, column=1, padx=(5, 0))
+        ttk.Button(perf_control_frame, text="导出 JSONL", style="Tab.TButton", command=lambda: self._export_samples("jsonl")).grid(row=0, column=2, padx=(5, 0))
+        ttk.Button(perf_control_frame, text="会话历史", style="Tab.TButton", command=self._show_telemetry_history).grid(row=0, column=3, padx=(5, 0))
+        self.telemetry_label = ttk.Label(perf_control_frame, text="执行遥测: 暂无数据", style='Hint.TLabel')
+        self.telemetry_label.grid(row=1, column=0, columnspan=4, sticky="w", pady=(4, 0))
+
+        self.perf_canvases = {}
+        for index, (key, label, _, _) in enumerate(PERF_METRICS, start=1):
+            perf_frame.rowconfigure(index, weight=1)
+            canvas = tk.Canvas(perf_frame, height=60, bg=self.app.TEXT_AREA_BG, highlightthickness=1, highlightbackground=self.app.BORDER_COLOR, borderwidth=0)
+            canvas.grid(row=index, column=0, sticky="nsew", pady=2)
+            self.perf_canvases[key] = canvas
+
+        self.app.root.after(PERF_REFRESH_MS, self._refresh_performance_view)
+
+    def _with_rates(self, samples):
+        """Adds per-second I/O rates derived from the cumulative byte counters."""
+        previous = None
+        for sample in samples:
+            sample = dict(sample)
+            read_rate = write_rate = 0
+            if previous is not None:
+                try:
+                    elapsed = (datetime.fromisoformat(sample["timestamp"]) - datetime.fromisoformat(previous["timestamp"])).total_seconds()
+                except (KeyError, ValueError):
+                    elapsed = 0
+                if elapsed > 0:
+                    read_rate = max(0, sample["read_bytes"] - previous["read_bytes"]) / elapsed
+                    write_rate = max(0, sample["write_bytes"] - previous["write_bytes"]) / elapsed
+            sample["read_rate"], sample["write_rate"] = read_rate, write_rate
+            previous = sample
+            yield sample
+
+    def _draw_sparkline(self, canvas, values, label, color, formatter):
+        """Draws one metric as a polyline scaled to its own min/max, with the latest value as text."""
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return
+        text = f"{label}: {formatter(values[-1])}" if values else f"{label}: -"
+        if len(values) >= 2:
+            low, high = min(values), max(values)
+            span = (high - low) or 1
+            pad = 4
+            step = (width - 2 * pad) / (len(values) - 1)
+            points = []
+            for i, value in enumerate(values):
+                points.extend((pad + i * step, height - pad - (value - low) / span * (height - 2 * pad)))
+            canvas.create_line(*points, fill=color, width=1.5)
+            text += f"   (最小 {formatter(low)} / 最大 {formatter(high)})"
+        canvas.create_text(8, 6, text=text, anchor="nw", fill=self.app.FG_COLOR, font=(self.app.FONT_FAMILY_MONO, self.app.FONT_SIZE_MONO))
+
+    def _refresh_performance_view(self):
+        """Redraws the sparklines from the sampler ring buffer, then reschedules itself."""
+        try:
+            if not self.frame.winfo_exists():
+                return
+            sampler = getattr(self.app, 'resource_sampler', None)
+            samples = list(self._with_rates(sampler.snapshot())) if sampler else []
+            if sampler and samples:
+                state = "采样中" if sampler.is_running() else "已停止"
+                self.perf_status_label.config(text=f"{state} · PID {sampler.pid} · 进程数 {samples[-1]['process_count']} · 样本 {len(samples)}/{sampler.samples.maxlen}")
+            elif sampler:
+                self.perf_status_label.config(text="等待首个采样...")
+            for key, label, color_attr, formatter in PERF_METRICS:
+                self._draw_sparkline(self.perf_canvases[key], [s[key] for s in samples], label, getattr(self.app, color_attr), formatter)
+            self.telemetry_label.config(text=self._format_telemetry_summary())
+        except tk.TclError:
+            return
+        self.app.root.after(PERF_REFRESH_MS, self._refresh_performance_view)
+
+    def _format_telemetry_summary(self):
+        """One-line summary of the current session's prompt times, throughput and model loads."""
+        session = getattr(self.app, 'comfyui_telemetry', None)
+        if not session:
+            return "执行遥测: 暂无数据"
+        stats = session.summary()
+        fmt = lambda v, unit="s": f"{v:.2f}{unit}" if v is not None else "-"
+        return (f"执行遥测: {stats['prompts']} 次执行 · p50 {fmt(stats['p50'])} · p95 {fmt(stats['p95'])} · p99 {fmt(stats['p99'])}"
+                f" · 近{telemetry.RECENT_WINDOW}次 p50 {fmt(stats['recent_p50'])} · 吞吐 {fmt(stats['prompts_per_min'], '/分钟')}"
+                f" · 模型加载 {stats['model_loads']} 次 (平均 {fmt(stats['model_load_mean_sec'])}) · 卸载 {stats['unloads']} 次")
+
+    def _show_telemetry_history(self):
+        """Shows saved session summaries side by side with the settings they ran under."""
+        sessions = telemetry.load_sessions(self.app.telemetry_history_file)
+        if not sessions:
+            messagebox.showinfo("会话历史", "暂无已保存的执行遥测会话。", parent=self.app.root)
+            return
+        window = Toplevel(self.app.root)
+        window.title("执行遥测会话历史 / Telemetry Sessions")
+        window.geometry("980x420")
+        window.configure(bg=self.app.BG_COLOR)
+        window.transient(self.app.root)
+        window.rowconfigure(0, weight=1); window.columnconfigure(0, weight=1)
+
+        columns = ("started", "prompts", "p50", "p95", "p99", "ppm", "loads", "vram", "unet", "clip")
+        headings = {"started": "开始时间", "prompts": "执行次数", "p50": "p50(s)", "p95": "p95(s)", "p99": "p99(s)", "ppm": "吞吐(/分钟)",
+                    "loads": "模型加载(平均s)", "vram": "显存模式", "unet": "UNET精度", "clip": "CLIP精度"}
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column in columns:
+            tree.heading(column, text=headings[column])
+            tree.column(column, width=150 if column in ("started", "vram") else 90, anchor=tk.W if column in ("started", "vram", "unet", "clip") else tk.CENTER)
+        scrollbar = ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=0, column=0, sticky="nsew", padx=(10, 0), pady=10)
+        scrollbar.grid(row=0, column=1, sticky="ns", pady=10, padx=(0, 10))
+
+        fmt = lambda v: f"{v:.2f}" if isinstance(v, (int, float)) else "-"
+        for record in sessions:
+            settings = record.get("settings", {})
+            tree.insert("", tk.END, values=(
+                record.get("started", "").replace("T", " "), record.get("prompts", 0), fmt(record.get("p50")), fmt(record.get("p95")),
+                fmt(record.get("p99")), fmt(record.get("prompts_per_min")), f"{record.get('model_loads', 0)} ({fmt(record.get('model_load_mean_sec'))})",
+                settings.get("vram_mode", ""), settings.get("unet_precision", ""), settings.get("clip_precision", "")))
+
+    def _export_samples(self, file_format):
+        """Exports the sampler ring buffer to CSV or JSONL."""
+        sampler = getattr(self.app, 'resource_sampler', None)
+        if not sampler or not sampler.snapshot():
+            messagebox.showinfo("无数据", "暂无资源采样数据可导出。", parent=self.app.root)
+            return
+        default_name = f"comfyui_resources_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+        file_path = filedialog.asksaveasfilename(title="导出资源采样 / Export Samples", initialdir=self.app.base_project_dir, initialfile=default_name,
+                                                 defaultextension=f".{file_format}", filetypes=[(file_format.upper(), f"*.{file_format}"), ("All Files", "*.*")], parent=self.app.root)
+        if not file_path:
+            return
+        try:
+            count = sampler.export_csv(file_path) if file_format == "csv" else sampler.export_jsonl(file_path)
+            self.app.log_to_gui("Monitor", f"已导出 {count} 条资源采样到 {os.path.normpath(file_path)}", "info")
+        except OSError as e:
+            messagebox.showerror("导出失败", f"无法写入文件:\n{e}", parent=self.app.root)
+
 
 # Function to be called by launcher.py to setup this tab
 def setup_logs_tab(parent_frame, app_instance):
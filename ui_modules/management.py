@@ -11,11 +11,17 @@ import time
 import json
 import shlex
 import shutil
-import platform
-import sys
 from datetime import datetime, timezone
 from functools import cmp_to_key
-import requests # Import requests for _fetch_online_node_config
+from concurrent.futures import ThreadPoolExecutor
+import requests # Import requests for _iter_online_node_config
+
+from ui_modules import history_store
+from ui_modules.dependencies import diff_requirements
+from ui_modules.node_trash import TRASH_RETENTION_SEC
+from ui_modules.catalog_stream import iter_catalog_entries
+from ui_modules.node_catalog import NodeCatalog, NodeRecord, matches_search
+from ui_modules.node_history import NodeHistoryCache, HistoryIndex, VirtualHistoryList, REF_TYPE_FILTERS, HISTORY_COLUMNS
 
 # Attempt to import packaging for version parsing, allow fallback
 try:
@@ -25,6 +31,40 @@ except ImportError:
     parse_version = None
     InvalidVersion = Exception
 
+# Node install modes (config "node_install_mode") -> extra git clone arguments
+NODE_INSTALL_MODES = {
+    "完整克隆": [],
+    "浅克隆 (--depth 1)": ["--depth", "1"],
+    "部分克隆 (--filter=blob:none)": ["--filter=blob:none"],
+}
+DEFAULT_NODE_INSTALL_MODE = "完整克隆"
+# Multi-selection batch operations: nodes processed at the same time and the action -> label used in logs/summary
+MAX_PARALLEL_NODE_OPS = 4
+BATCH_NODE_ACTIONS = {"install": "安装", "switch": "切换版本", "uninstall": "卸载"}
+# Dependency step taken on main body activation -> log label
+ACTIVATION_DEPENDENCY_PATHS = {
+    "skipped": "requirements 无新增/变更，跳过 pip",
+    "diff": "仅安装新增/变更的依赖行",
+    "full": "完整安装 requirements.txt",
+    "none": "无 requirements.txt",
+}
+# Online catalog streaming: download chunk size, and how many matching entries / how long before they are added to the view
+CATALOG_CHUNK_BYTES = 64 * 1024
+CATALOG_VIEW_BATCH = 200
+CATALOG_VIEW_INTERVAL_SEC = 0.5
+
+
+def _dir_size_bytes(path):
+    """Returns the total size of the files under path."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
 # Note: Styling constants, setup_text_tags, and sorting helpers
 # are now accessed via the app_instance.
 # _parse_iso_date_for_sort, _parse_version_string_for_sort, _compare_versions_for_sort
@@ -46,9 +86,10 @@ class ManagementTab:
         self.frame.columnconfigure(0, weight=1)
         self.frame.rowconfigure(1, weight=1)
 
-        self.all_known_nodes = []
-        self.local_nodes_only = []
+        self.catalog = NodeCatalog() # Local and all known (local + online) nodes, swapped whole on refresh
         self.remote_main_body_versions = []
+        # Per-node import time history from ComfyUI startup output: {name: [{"time", "seconds", "failed"}, ...]}
+        self.import_time_history = {}
 
         # Modal state variables (kept within this module instance)
         self._node_history_modal_versions_data = []
@@ -56,6 +97,7 @@ class ManagementTab:
         self._node_history_modal_node_path = ""
         self._node_history_modal_current_commit = ""
         self._node_history_modal_window = None
+        self._node_history_modal_rerender = None # Set while the modal is open; redraws the list from page one
 
         # UI widget references needed for state updates/logic from launcher
         self.main_body_tree = None
@@ -68,11 +110,15 @@ class ManagementTab:
         self.refresh_nodes_button = None
         self.switch_install_node_button = None
         self.uninstall_node_button = None
+        self.restore_node_button = None
+        self.snapshot_button = None
         self.update_all_nodes_button = None
 
         # Persistence file paths relative to ui_modules directory (Correct path)
         self.MAIN_BODY_VERSIONS_FILE = os.path.join(self.app.base_project_dir, "ui_modules", "main_body_versions.json")
         self.NODES_LIST_FILE = os.path.join(self.app.base_project_dir, "ui_modules", "nodes_list.json")
+        self.ACTIVATION_HISTORY_FILE = os.path.join(self.app.base_project_dir, "ui_modules", "main_body_activations.json")
+        self.node_history = NodeHistoryCache(self.app, os.path.join(self.app.base_project_dir, "ui_modules", "node_history_cache.json"))
 
         self._setup_ui()
         self._load_state() # Load persisted data on initialization
@@ -184,6 +230,10 @@ class ManagementTab:
         self.switch_install_node_button.pack(side=tk.LEFT, padx=5)
         self.uninstall_node_button = ttk.Button(nodes_buttons_container, text="卸载节点", style="Tab.TButton", command=self.app._queue_node_uninstall)
         self.uninstall_node_button.pack(side=tk.LEFT, padx=5)
+        self.restore_node_button = ttk.Button(nodes_buttons_container, text="撤销卸载", style="Tab.TButton", command=self.app._queue_node_restore)
+        self.restore_node_button.pack(side=tk.LEFT, padx=5)
+        self.snapshot_button = ttk.Button(nodes_buttons_container, text="环境快照", style="Tab.TButton", command=self.app._open_snapshot_manager)
+        self.snapshot_button.pack(side=tk.LEFT, padx=5)
         self.update_all_nodes_button = ttk.Button(nodes_buttons_container, text="更新全部", style="TabAccent.TButton", command=self.app._queue_all_nodes_update)
         self.update_all_nodes_button.pack(side=tk.LEFT, padx=5)
 
@@ -191,12 +241,14 @@ class ManagementTab:
         ttk.Label(self.nodes_frame, text="列表默认显示本地 custom_nodes 目录下的全部节点。输入内容后点击“搜索”显示匹配的本地/在线节点。", style='Hint.TLabel').grid(row=1, column=0, sticky=tk.W, padx=5, pady=(0, 5), columnspan=2)
 
         # Nodes List
-        self.nodes_tree = ttk.Treeview(self.nodes_frame, columns=("name", "status", "local_id", "repo_info", "repo_url"), show="headings", style='Treeview')
+        self.nodes_tree = ttk.Treeview(self.nodes_frame, columns=("name", "status", "local_id", "repo_info", "repo_url", "import_time"), show="headings", selectmode="extended", style='Treeview') # Ctrl/Shift-click selects several nodes for batch actions
         self.nodes_tree.heading("name", text="节点名称"); self.nodes_tree.column("name", width=200, stretch=tk.YES)
         self.nodes_tree.heading("status", text="状态"); self.nodes_tree.column("status", width=80, stretch=tk.NO, anchor=tk.CENTER)
         self.nodes_tree.heading("local_id", text="本地ID"); self.nodes_tree.column("local_id", width=100, stretch=tk.NO, anchor=tk.CENTER) # 8-char ID
         self.nodes_tree.heading("repo_info", text="仓库信息"); self.nodes_tree.column("repo_info", width=180, stretch=tk.NO) # Remote commit + date
         self.nodes_tree.heading("repo_url", text="仓库地址"); self.nodes_tree.column("repo_url", width=300, stretch=tk.YES)
+        # Rank / seconds / trend from the latest launch; clicking the heading sorts slowest first
+        self.nodes_tree.heading("import_time", text="加载耗时", command=self._sort_nodes_by_import_time); self.nodes_tree.column("import_time", width=110, stretch=tk.NO, anchor=tk.CENTER)
         self.nodes_tree.grid(row=2, column=0, sticky="nsew")
         self.nodes_scrollbar = ttk.Scrollbar(self.nodes_frame, orient=tk.VERTICAL, command=self.nodes_tree.yview)
         self.nodes_tree.configure(yscrollcommand=self.nodes_scrollbar.set)
@@ -245,14 +297,13 @@ class ManagementTab:
                     with open(self.NODES_LIST_FILE, 'r', encoding='utf-8') as f:
                         loaded_data = json.load(f)
                         if isinstance(loaded_data, dict):
-                             self.local_nodes_only = loaded_data.get('local_nodes_only', [])
-                             self.all_known_nodes = loaded_data.get('all_known_nodes', [])
+                             self.catalog = NodeCatalog.from_dicts(loaded_data.get('local_nodes_only', []), loaded_data.get('all_known_nodes', []))
+                             self.import_time_history = loaded_data.get('import_time_history', {})
                         else:
                              self.app.log_to_gui("Management", f"节点列表持久化文件 {self.NODES_LIST_FILE} 格式无效，无法加载。", "warn")
-                             self.local_nodes_only = []
-                             self.all_known_nodes = []
+                             self.catalog = NodeCatalog()
 
-                    self.app.log_to_gui("Management", f"从 {self.NODES_LIST_FILE} 加载了 {len(self.local_nodes_only)} 条本地节点和 {len(self.all_known_nodes)} 条全部节点数据。", "info")
+                    self.app.log_to_gui("Management", f"从 {self.NODES_LIST_FILE} 加载了 {len(self.catalog.local_nodes)} 条本地节点和 {len(self.catalog.all_nodes)} 条全部节点数据。", "info")
 
                     # Populate Treeview immediately in the GUI thread based on initial search term (usually empty)
                     search_term_value = ""
@@ -263,32 +314,24 @@ class ManagementTab:
                         pass
 
                     # Apply initial filter (empty search shows local only)
-                    filtered_nodes = sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()) if search_term_value == "" else sorted([
-                        node for node in self.all_known_nodes
-                        if search_term_value in node.get('name', '').lower() or \
-                           search_term_value in node.get('repo_url', '').lower() or \
-                           search_term_value in node.get('status', '').lower()
-                    ], key=lambda x: x.get('name', '').lower())
+                    filtered_nodes = self.catalog.search(search_term_value)
                     self.app.root.after(0, lambda list_to_populate=filtered_nodes: self._populate_nodes_treeview(list_to_populate, persisted=True))
 
                 except (json.JSONDecodeError, IOError, OSError) as e:
                      self.app.log_to_gui("Management", f"加载节点列表持久化文件时出错: {e}", "error")
-                     self.local_nodes_only = [] # Clear on error
-                     self.all_known_nodes = []   # Clear on error
+                     self.catalog = NodeCatalog() # Clear on error
                      self.app.root.after(0, lambda list_to_populate=[]: self._populate_nodes_treeview(list_to_populate, persisted=True))
 
             else:
                 self.app.log_to_gui("Management", f"节点列表持久化文件 {self.NODES_LIST_FILE} 未找到。", "warn")
-                self.local_nodes_only = []
-                self.all_known_nodes = []
+                self.catalog = NodeCatalog()
                 self.app.root.after(0, lambda list_to_populate=[]: self._populate_nodes_treeview(list_to_populate, persisted=True))
 
         except Exception as e:
             self.app.log_to_gui("Management", f"加载持久化数据时发生意外错误: {e}", "error")
             # Clear data and populate empty treeviews on unexpected error
             self.remote_main_body_versions = []
-            self.local_nodes_only = []
-            self.all_known_nodes = []
+            self.catalog = NodeCatalog()
             self.app.root.after(0, lambda: [
                  self._populate_main_body_treeview([], persisted=True),
                  self._populate_nodes_treeview([], persisted=True)
@@ -314,8 +357,9 @@ class ManagementTab:
             # Save Nodes List
             os.makedirs(os.path.dirname(self.NODES_LIST_FILE), exist_ok=True)
             nodes_save_data = {
-                 'local_nodes_only': self.local_nodes_only,
-                 'all_known_nodes': self.all_known_nodes
+                 'local_nodes_only': NodeCatalog.to_dicts(self.catalog.local_nodes),
+                 'all_known_nodes': NodeCatalog.to_dicts(self.catalog.all_nodes),
+                 'import_time_history': self.import_time_history
             }
             with open(self.NODES_LIST_FILE, 'w', encoding='utf-8') as f:
                 # Ensure list is serializable
@@ -402,39 +446,13 @@ class ManagementTab:
                       pass
                   # Display message based on search term or persistence state
                   display_message = "未找到匹配的节点" if search_term_value else ("未找到本地节点" if not persisted else "从持久化文件加载失败或无数据")
-                  self.nodes_tree.insert("", tk.END, values=("", display_message, "", "", ""))
+                  self.nodes_tree.insert("", tk.END, values=("", display_message, "", "", "", ""))
                   return
 
-              for node_data in nodes_list:
-                  # Ensure keys exist with default empty strings if missing
-                  node_data.setdefault("name", "N/A")
-                  node_data.setdefault("status", "未知")
-                  node_data.setdefault("local_id", "N/A")
-                  node_data.setdefault("repo_info", "N/A")
-                  node_data.setdefault("repo_url", "N/A")
-                  # Internal fields used during scanning/fetching, not displayed directly in columns
-                  node_data.setdefault("is_git", False)
-                  node_data.setdefault("local_commit_full", None)
-                  node_data.setdefault("remote_branch", None)
+              import_ranks = self._import_time_ranks()
 
-
-                  tags = ()
-                  if node_data.get('status') == '已安装':
-                      tags += ('installed',)
-                  else:
-                      tags += ('not_installed',)
-                  # Add tag for items loaded from persistence
-                  if persisted:
-                      tags += ('persisted',)
-
-                  # Insert item into Treeview
-                  self.nodes_tree.insert("", tk.END, values=(
-                       node_data.get("name", "N/A"),
-                       node_data.get("status", "未知"),
-                       node_data.get("local_id", "N/A"), # Display short ID
-                       node_data.get("repo_info", "N/A"),
-                       node_data.get("repo_url", "N/A")
-                  ), tags=tags)
+              for node_data in nodes_list:
+                  self._insert_node_row(node_data, import_ranks, persisted)
 
               self.app.log_to_gui("Management", f"节点列表已在 GUI中显示 ({len(nodes_list)} 条)。", "info")
 
@@ -443,6 +461,176 @@ class ManagementTab:
          except Exception as e:
              self.app.log_to_gui("Management", f"意外错误 populating nodes treeview: {e}", "error")
 
+    def _append_nodes_treeview(self, nodes_list):
+         """Appends catalog matches to the nodes Treeview while the online catalog is still streaming in (GUI thread)."""
+         if not self.nodes_tree or not self.nodes_tree.winfo_exists():
+              return
+         try:
+              # Drop the "no matches" placeholder row of the local-only view
+              for item in self.nodes_tree.get_children():
+                  if not self.nodes_tree.item(item, "values")[0]:
+                      self.nodes_tree.delete(item)
+              import_ranks = self._import_time_ranks()
+              for node_data in nodes_list:
+                  self._insert_node_row(node_data, import_ranks, False)
+         except tk.TclError as e:
+             self.app.log_to_gui("Management", f"TclError populating nodes treeview: {e}", "error")
+
+    def _insert_node_row(self, node_data, import_ranks, persisted):
+         """Inserts one node row with its status tags (GUI thread)."""
+         # Ensure keys exist with default empty strings if missing
+         node_data.setdefault("name", "N/A")
+         node_data.setdefault("status", "未知")
+         node_data.setdefault("local_id", "N/A")
+         node_data.setdefault("repo_info", "N/A")
+         node_data.setdefault("repo_url", "N/A")
+         # Internal fields used during scanning/fetching, not displayed directly in columns
+         node_data.setdefault("is_git", False)
+         node_data.setdefault("local_commit_full", None)
+         node_data.setdefault("remote_branch", None)
+
+         tags = ()
+         if node_data.get('status') == '已安装':
+             tags += ('installed',)
+         else:
+             tags += ('not_installed',)
+         # Add tag for items loaded from persistence
+         if persisted:
+             tags += ('persisted',)
+
+         # Insert item into Treeview
+         self.nodes_tree.insert("", tk.END, values=(
+              node_data.get("name", "N/A"),
+              node_data.get("status", "未知"),
+              node_data.get("local_id", "N/A"), # Display short ID
+              node_data.get("repo_info", "N/A"),
+              node_data.get("repo_url", "N/A"),
+              self._format_import_time(node_data.get("name", ""), import_ranks)
+         ), tags=tags)
+
+
+    def _read_requirements_at_ref(self, repo_path, ref):
+        """Returns requirements.txt as it is at a ref (read from git objects, no checkout), or None."""
+        stdout, _, rc = self.app._run_git_command(["show", f"{ref}:requirements.txt"], cwd=repo_path, timeout=10, log_output=False)
+        return stdout if rc == 0 and stdout.strip() else None
+
+
+    # --- Shallow / Partial Clone Helpers ---
+    def _is_shallow_repo(self, repo_path):
+        """Returns True if the repository was cloned with --depth and not yet deepened."""
+        stdout, _, rc = self.app._run_git_command(["rev-parse", "--is-shallow-repository"], cwd=repo_path, timeout=10, log_output=False)
+        return rc == 0 and stdout.strip() == "true"
+
+    def _ensure_full_history(self, node_name, repo_path):
+        """
+        Converts a shallow install into a full clone (all branches, tags and history). Runs in worker thread.
+        Partial (blob:none) clones already have every commit; their blobs are fetched by git on checkout.
+        Returns True if the repository was deepened.
+        """
+        if not self._is_shallow_repo(repo_path):
+            return False
+        self.app.log_to_gui("Management", f"节点 '{node_name}' 为浅克隆，正在补全完整历史...", "info")
+        size_before = _dir_size_bytes(os.path.join(repo_path, ".git"))
+        # --depth implies --single-branch; widen the refspec so other branches become visible too
+        self.app._run_git_command(["config", "remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*"], cwd=repo_path, timeout=10, log_output=False)
+        _, stderr_fetch, rc_fetch = self.app._run_git_command(["fetch", "--unshallow", "--tags", "origin"], cwd=repo_path, timeout=600)
+        if rc_fetch != 0:
+            self.app.log_to_gui("Management", f"补全历史失败: {stderr_fetch.strip()}", "warn")
+            return False
+        size_after = _dir_size_bytes(os.path.join(repo_path, ".git"))
+        self.app.log_to_gui("Management", f"节点 '{node_name}' 已补全历史 (.git {size_before / 1048576:.1f} MB -> {size_after / 1048576:.1f} MB)。", "info")
+        return True
+
+    def _log_clone_footprint(self, node_install_path, repo_url, install_mode, seconds):
+        """Logs clone time and .git size; compares against the full-history mirror when one is cached."""
+        git_size = _dir_size_bytes(os.path.join(node_install_path, ".git"))
+        message = f"克隆用时 {seconds:.1f}s, 模式 {install_mode}, .git 占用 {git_size / 1048576:.1f} MB"
+        if NODE_INSTALL_MODES.get(install_mode) and self.app.repo_cache.has_mirror(repo_url):
+            full_size = _dir_size_bytes(self.app.repo_cache.mirror_path(repo_url))
+            if full_size > git_size:
+                message += f" (完整历史约 {full_size / 1048576:.1f} MB, 节省 {(full_size - git_size) / 1048576:.1f} MB)"
+        self.app.log_to_gui("Management", message, "info")
+
+
+    # --- Custom Node Import Times (fed from ComfyUI startup output) ---
+    IMPORT_HISTORY_PER_NODE = 10
+
+    def record_import_times(self, node_times):
+        """Appends one launch's import times to the history, saves it and refreshes the column. Runs in GUI thread."""
+        if not node_times:
+            return
+        launch_time = datetime.now().isoformat(timespec="seconds")
+        for name, result in node_times.items():
+            history = self.import_time_history.setdefault(name, [])
+            history.append({"time": launch_time, "seconds": result["seconds"], "failed": result["failed"]})
+            del history[:-self.IMPORT_HISTORY_PER_NODE]
+        self._save_state()
+
+        ranked = sorted(node_times.items(), key=lambda item: item[1]["seconds"], reverse=True)
+        total = sum(result["seconds"] for result in node_times.values())
+        slowest = ", ".join(f"{name} {result['seconds']:.1f}s" for name, result in ranked[:5])
+        failed = [name for name, result in node_times.items() if result["failed"]]
+        self.app.log_to_gui("Management", f"自定义节点导入耗时: 共 {len(node_times)} 个, 合计 {total:.1f}s。最慢: {slowest}", "info")
+        if failed:
+            self.app.log_to_gui("Management", f"导入失败的节点: {', '.join(sorted(failed))}", "warn")
+
+        # Update only the import time column so selection and scroll position are kept
+        try:
+            if self.nodes_tree and self.nodes_tree.winfo_exists():
+                ranks = self._import_time_ranks()
+                for item in self.nodes_tree.get_children():
+                    values = list(self.nodes_tree.item(item, 'values'))
+                    if len(values) >= 6 and values[0]:
+                        values[5] = self._format_import_time(values[0], ranks)
+                        self.nodes_tree.item(item, values=values)
+        except tk.TclError:
+            pass
+
+    def _import_time_ranks(self):
+        """Ranks nodes by their latest import time (1 = slowest), considering only the most recent launch."""
+        latest = {name: history[-1] for name, history in self.import_time_history.items() if history}
+        if not latest:
+            return {}
+        last_launch = max(entry.get("time", "") for entry in latest.values())
+        ranked = sorted((name for name, entry in latest.items() if entry.get("time") == last_launch),
+                        key=lambda name: latest[name].get("seconds", 0), reverse=True)
+        return {name: index + 1 for index, name in enumerate(ranked)}
+
+    def _format_import_time(self, node_name, ranks):
+        """Column text such as '#1 4.2s ↑': rank in the latest launch, seconds, trend against earlier launches."""
+        history = self.import_time_history.get(node_name)
+        if not history:
+            return ""
+        latest = history[-1]
+        if latest.get("failed"):
+            return "导入失败"
+        seconds = latest.get("seconds", 0.0)
+        trend = ""
+        previous = [entry.get("seconds", 0.0) for entry in history[-5:-1] if not entry.get("failed")]
+        if previous:
+            baseline = sum(previous) / len(previous)
+            if seconds - baseline > max(0.1, baseline * 0.2):
+                trend = " ↑"
+            elif baseline - seconds > max(0.1, baseline * 0.2):
+                trend = " ↓"
+            else:
+                trend = " →"
+        rank = f"#{ranks[node_name]} " if node_name in ranks else ""
+        return f"{rank}{seconds:.1f}s{trend}"
+
+    def _sort_nodes_by_import_time(self):
+        """Reorders the visible rows slowest-to-load first (nodes without data go last)."""
+        if not self.nodes_tree or not self.nodes_tree.winfo_exists():
+            return
+        def sort_key(item):
+            values = self.nodes_tree.item(item, 'values')
+            history = self.import_time_history.get(values[0]) if values else None
+            if not history:
+                return (2, 0.0)
+            return (0 if history[-1].get("failed") else 1, -history[-1].get("seconds", 0.0))
+        for index, item in enumerate(sorted(self.nodes_tree.get_children(), key=sort_key)):
+            self.nodes_tree.move(item, "", index)
+
 
     # --- Git Execution Helper (Accessed via app._run_git_command) ---
     # Moved to launcher.py
@@ -470,22 +658,26 @@ class ManagementTab:
         # Get Current Local Version
         local_version_display = "未知 / Unknown"
         current_local_commit = None
+        # With the worktree pool the launched version lives in the active worktree, not in comfyui_dir
+        launched_dir = (self.app.worktree_pool.active_path(comfyui_dir) if is_git_repo else None) or comfyui_dir
         if is_git_repo:
              # Use app instance method for git command
-             stdout_id_full, _, rc_full = self.app._run_git_command(["rev-parse", "HEAD"], cwd=comfyui_dir, timeout=10, log_output=False)
+             stdout_id_full, _, rc_full = self.app._run_git_command(["rev-parse", "HEAD"], cwd=launched_dir, timeout=10, log_output=False)
              if rc_full == 0 and stdout_id_full:
                   current_local_commit = stdout_id_full.strip() # Store full ID
                   stdout_id_short = current_local_commit[:8] # Display short ID
                   local_version_display = f"本地 Commit: {stdout_id_short}"
 
                   # Try to find a symbolic ref (branch/tag) if HEAD is not detached
-                  stdout_sym_ref, _, rc_sym_ref = self.app._run_git_command(["symbolic-ref", "-q", "--short", "HEAD"], cwd=comfyui_dir, timeout=5, log_output=False)
+                  stdout_sym_ref, _, rc_sym_ref = self.app._run_git_command(["symbolic-ref", "-q", "--short", "HEAD"], cwd=launched_dir, timeout=5, log_output=False)
                   if rc_sym_ref == 0 and stdout_sym_ref:
                        local_version_display = f"本地 Branch: {stdout_sym_ref.strip()} ({stdout_id_short})"
                   else: # If detached HEAD, try describe
-                       stdout_desc, _, rc_desc = self.app._run_git_command(["describe", "--all", "--long", "--always"], cwd=comfyui_dir, timeout=10, log_output=False)
+                       stdout_desc, _, rc_desc = self.app._run_git_command(["describe", "--all", "--long", "--always"], cwd=launched_dir, timeout=10, log_output=False)
                        if rc_desc == 0 and stdout_desc:
                             local_version_display = f"本地: {stdout_desc.strip()}"
+                  if launched_dir != comfyui_dir:
+                       local_version_display = f"工作树 {local_version_display}"
 
              else:
                   local_version_display = "读取本地版本失败"
@@ -616,6 +808,16 @@ class ManagementTab:
              # Sort the combined list (MOD1: Using custom comparison via app instance method)
              all_versions.sort(key=cmp_to_key(self.app._compare_versions_for_sort))
 
+             # An update for the checked-out branch is available: prefetch its dependencies in the background
+             upstream_stdout, _, rc_upstream = self.app._run_git_command(["rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"], cwd=comfyui_dir, timeout=5, log_output=False)
+             upstream_ref = upstream_stdout.strip() if rc_upstream == 0 and upstream_stdout else None
+             if upstream_ref and current_local_commit and self.app.wheelhouse.is_enabled():
+                  upstream_commit_stdout, _, rc_upstream_commit = self.app._run_git_command(["rev-parse", upstream_ref], cwd=comfyui_dir, timeout=5, log_output=False)
+                  if rc_upstream_commit == 0 and upstream_commit_stdout.strip() != current_local_commit:
+                       upstream_requirements = self._read_requirements_at_ref(comfyui_dir, upstream_ref)
+                       if upstream_requirements:
+                            self.app.wheelhouse.prefetch_async({"ComfyUI": upstream_requirements})
+
         else:
              self.app.log_to_gui("Management", "无法获取远程版本信息 (非Git仓库或缺少URL)。", "warn")
              # Populate Treeview with info message in GUI thread
@@ -648,6 +850,11 @@ class ManagementTab:
             if self.app.stop_event_set():
                 raise threading.ThreadExit
 
+            # Worktree pool: switch the launch to a per-version worktree, comfyui_dir itself is left untouched
+            if self.app.worktree_pool.is_enabled():
+                self._activate_main_body_in_worktree(comfyui_dir, target_ref)
+                return
+
             # 2. Check for local changes and reset hard
             stdout_status, _, _ = self.app._run_git_command(["status", "--porcelain"], cwd=comfyui_dir, timeout=10, log_output=False) # No logging status unless needed
             if stdout_status.strip():
@@ -663,7 +870,13 @@ class ManagementTab:
             if self.app.stop_event_set():
                 raise threading.ThreadExit
 
-            # 3. Checkout target commit/ref
+            # 3. Read requirements.txt of the current and the target commit from git objects (before checkout)
+            stdout_prev, _, rc_prev = self.app._run_git_command(["rev-parse", "HEAD"], cwd=comfyui_dir, timeout=10, log_output=False)
+            previous_commit = stdout_prev.strip() if rc_prev == 0 and stdout_prev.strip() else None
+            old_requirements = self._read_requirements_at_ref(comfyui_dir, previous_commit) if previous_commit else None
+            new_requirements = self._read_requirements_at_ref(comfyui_dir, target_ref)
+
+            # Checkout target commit/ref
             # Use checkout --force to handle local changes and ensure the target ref is checked out
             self.app.log_to_gui("Management", f"执行 Git checkout --force {target_ref[:8]}...", "info")
             # Use app instance method for git command
@@ -690,49 +903,13 @@ class ManagementTab:
             if self.app.stop_event_set():
                 raise threading.ThreadExit
 
-            # 5. Re-install Python dependencies
-            python_exe = self.app.python_exe_var.get()
-            requirements_path = os.path.join(comfyui_dir, "requirements.txt")
-            if python_exe and os.path.isfile(python_exe) and os.path.isfile(requirements_path):
-                 self.app.log_to_gui("Management", "执行 pip 安装依赖...", "info")
-                 pip_cmd_base = [python_exe, "-m", "pip", "install", "-r", requirements_path, "--upgrade"]
-                 # Conditional extra index URLs based on platform/needs (adjust if needed)
-                 pip_cmd_extras = []
-                 # Example: Add cu118 or cu121 index based on detected CUDA or user preference
-                 # For simplicity, keep the current approach of adding both as extras
-                 pip_cmd_extras.extend(["--extra-index-url", "https://download.pytorch.org/whl/cu118", "--extra-index-url", "https://download.pytorch.org/whl/cu121"])
-
-                 pip_cmd = pip_cmd_base + pip_cmd_extras
-                 is_venv = sys.prefix != sys.base_prefix # Check if the LAUNCHER's python is in a venv
-                 # Check if the target python_exe itself is NOT within the launcher's base prefix (heuristic for standalone/portable env)
-                 try:
-                      # os.path.relpath can raise ValueError if paths are on different drives on Windows
-                      relative_path_to_base = os.path.relpath(python_exe, sys.base_prefix)
-                      is_outside_launcher_base = relative_path_to_base.startswith('..') or os.path.isabs(relative_path_to_base)
-                 except ValueError: # Assume it's outside on path error
-                      is_outside_launcher_base = True
-
-                 # Add --user only if on Linux/macOS AND (the launcher is NOT in a venv AND the target python is NOT in the launcher's base path)
-                 if platform.system() != "Windows" and not is_venv and is_outside_launcher_base:
-                      # This heuristic tries to guess if the target python is a 'user' install vs a system/venv install
-                      # It's imperfect but safer than always adding --user.
-                      self.app.log_to_gui("Management", "目标Python路径可能非系统或虚拟环境安装，使用 --user 选项安装依赖。", "warn")
-                      pip_cmd.append("--user")
-
-
-                 # Added --no-cache-dir to save space, --compile could speed up subsequent imports
-                 pip_cmd.extend(["--no-cache-dir"])
-
-                 # Use app instance method for running pip command
-                 _, stderr_pip, rc_pip = self.app._run_git_command(pip_cmd, cwd=comfyui_dir, timeout=600) # Longer timeout for pip
-                 if rc_pip != 0:
-                      self.app.log_to_gui("Management", f"Pip 安装依赖失败: {stderr_pip.strip()}", "error")
-                      # Show warning in GUI thread
-                      self.app.root.after(0, lambda: messagebox.showwarning("依赖安装失败", "Python 依赖安装失败，新版本可能无法正常工作。\n请查看日志获取详情。", parent=self.app.root))
-                 else:
-                      self.app.log_to_gui("Management", "Pip 安装依赖完成。", "info")
-            else:
-                 self.app.log_to_gui("Management", "Python 可执行文件或 requirements.txt 无效，跳过依赖安装。", "warn")
+            # 5. Install Python dependencies according to the requirements.txt diff between the two commits
+            if not self._install_main_body_requirements(comfyui_dir, previous_commit, target_ref, old_requirements, new_requirements):
+                 # Show warning in GUI thread
+                 self.app.root.after(0, lambda: messagebox.showwarning("依赖安装失败", "Python 依赖安装失败，新版本可能无法正常工作。\n请查看日志获取详情。", parent=self.app.root))
+
+            # 6. Compile the changed main body sources now instead of during the next start
+            self.app.bytecode_compiler.precompile({"ComfyUI": comfyui_dir}, skip_custom_nodes=True)
 
             # Success
             self.app.log_to_gui("Management", f"本体版本激活流程完成 (引用: {target_ref[:8]})。", "info")
@@ -751,6 +928,89 @@ class ManagementTab:
             self.app._queue_main_body_refresh()
 
 
+    def _activate_main_body_in_worktree(self, comfyui_dir, target_ref):
+        """Pool mode of the activation task: reuse or create the target's worktree, install the requirements diff, switch the pointer."""
+        started = time.time()
+        pool = self.app.worktree_pool
+        stdout_commit, stderr_commit, rc_commit = self.app._run_git_command(["rev-parse", "--verify", f"{target_ref}^{{commit}}"], cwd=comfyui_dir, timeout=10, log_output=False)
+        if rc_commit != 0 or not stdout_commit.strip():
+            raise Exception(f"无法解析版本引用 {target_ref[:8]}: {stderr_commit.strip()}")
+        commit = stdout_commit.strip()
+
+        # The version currently launched (active worktree or comfyui_dir) is the base of the requirements diff
+        active_dir = self.app.comfyui_install_dir or comfyui_dir
+        stdout_prev, _, rc_prev = self.app._run_git_command(["rev-parse", "HEAD"], cwd=active_dir, timeout=10, log_output=False)
+        previous_commit = stdout_prev.strip() if rc_prev == 0 and stdout_prev.strip() else None
+        if previous_commit == commit:
+            self.app.log_to_gui("Management", f"版本 {commit[:8]} 已是当前启动版本。", "info")
+            self.app.root.after(0, lambda ref=commit[:8]: messagebox.showinfo("激活完成", f"本体版本已是: {ref}", parent=self.app.root))
+            return
+        old_requirements = self._read_requirements_at_ref(comfyui_dir, previous_commit) if previous_commit else None
+        new_requirements = self._read_requirements_at_ref(comfyui_dir, commit)
+
+        worktree_path, created = pool.checkout(comfyui_dir, commit)
+        if self.app.stop_event_set():
+            raise threading.ThreadExit
+        if not self._install_main_body_requirements(worktree_path or comfyui_dir, previous_commit, commit, old_requirements, new_requirements):
+            self.app.root.after(0, lambda: messagebox.showwarning("依赖安装失败", "Python 依赖安装失败，新版本可能无法正常工作。\n请查看日志获取详情。", parent=self.app.root))
+
+        pool.set_active(comfyui_dir, commit, worktree_path)
+        self.app.update_derived_paths()
+        pool.evict(comfyui_dir)
+        self.app.bytecode_compiler.precompile({"ComfyUI": worktree_path or comfyui_dir}, skip_custom_nodes=True)
+
+        seconds = time.time() - started
+        location = "主目录" if worktree_path is None else ("新建工作树" if created else "已有工作树")
+        self.app.log_to_gui("Management", f"本体版本已切换到 {commit[:8]} ({location}, 耗时 {seconds:.1f} 秒)。", "info")
+        self.app.root.after(0, lambda ref=commit[:8], loc=location, sec=seconds: messagebox.showinfo("激活完成", f"本体版本已激活到: {ref}\n({loc}, 耗时 {sec:.1f} 秒)", parent=self.app.root))
+
+
+    def _install_main_body_requirements(self, comfyui_dir, previous_commit, target_ref, old_requirements, new_requirements):
+        """
+        Dependency step of an activation: skips pip if requirements.txt gained no lines, installs only the added/changed
+        lines otherwise, and falls back to a full install when the old version can't be compared. Runs in worker thread.
+        Records the path taken and its duration. Returns False if pip failed.
+        """
+        started = time.time()
+        requirements_path = os.path.join(comfyui_dir, "requirements.txt")
+        path_taken, ok, lines_installed, removed = "none", True, 0, []
+
+        if not os.path.isfile(requirements_path):
+            self.app.log_to_gui("Management", "requirements.txt 不存在，跳过依赖安装。", "warn")
+        else:
+            diff = diff_requirements(old_requirements, new_requirements) if old_requirements is not None and new_requirements is not None else None
+            if diff is None or diff["nested"]:
+                path_taken = "full"
+                reason = "无法读取旧版本的 requirements.txt" if diff is None else "requirements.txt 引用了其他文件"
+                self.app.log_to_gui("Management", f"{reason}，执行完整依赖安装...", "info")
+                ok = self.app.dependency_manager.install({"ComfyUI": requirements_path}, include_comfyui=False)["ok"]
+            else:
+                removed = diff["removed"]
+                if not diff["added"]:
+                    path_taken = "skipped"
+                else:
+                    path_taken, lines_installed = "diff", len(diff["added"])
+                    ok = self.app.dependency_manager.install_requirement_lines("ComfyUI", diff["options"] + diff["added"], cwd=comfyui_dir)
+                    if ok:
+                        self.app.dependency_manager.mark_installed({"ComfyUI": requirements_path})
+                if removed:
+                    self.app.log_to_gui("Management", f"新版本不再需要的依赖不会自动卸载: {', '.join(removed)}", "info")
+
+        seconds = time.time() - started
+        self.app.log_to_gui("Management", f"依赖步骤: {ACTIVATION_DEPENDENCY_PATHS[path_taken]} (耗时 {seconds:.1f} 秒)。", "info" if ok else "warn")
+        history_store.append_record(self.ACTIVATION_HISTORY_FILE, {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "from": previous_commit,
+            "to": target_ref,
+            "dependency_path": path_taken,
+            "lines_installed": lines_installed,
+            "lines_removed": len(removed),
+            "seconds": round(seconds, 2),
+            "ok": ok,
+        })
+        return ok
+
+
     # Called by app._run_initial_background_tasks and app._queue_node_list_refresh
     def refresh_node_list(self):
         """Fetches and displays custom node list (local scan + online config), applying filter. Runs in worker thread."""
@@ -759,7 +1019,7 @@ class ManagementTab:
             # Repopulate with current cached data if available
             # Safely access nodes_tree before attempting to populate
             if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
-                 self.app.root.after(0, lambda list_to_populate=sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()): self._populate_nodes_treeview(list_to_populate))
+                 self.app.root.after(0, lambda list_to_populate=list(self.catalog.local_nodes): self._populate_nodes_treeview(list_to_populate))
             return
         self.app.log_to_gui("Management", "刷新节点列表...", "info")
 
@@ -788,10 +1048,12 @@ class ManagementTab:
         if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
              self.app.root.after(0, lambda: [self.nodes_tree.delete(item) for item in self.nodes_tree.get_children()])
 
-        self.local_nodes_only = [] # Reset local node cache
+        self.catalog = self.catalog.with_local_nodes([]) # Reset local node cache
 
         # --- Scan Local custom_nodes directory ---
         local_nodes = []
+        update_requirements = {} # node name -> upstream requirements.txt, prefetched into the wheelhouse
+        wheelhouse_enabled = self.app.wheelhouse.is_enabled()
         if is_nodes_dir_valid:
              self.app.log_to_gui("Management", f"扫描本地 custom_nodes 目录: {comfyui_nodes_dir}...", "info")
              try:
@@ -844,6 +1106,10 @@ class ManagementTab:
                                           remote_commit_date = date_obj.strftime('%Y-%m-%d') if date_obj else "未知日期"
                                           # Display branch, short commit, and date
                                           repo_info_display = f"{remote_branch_name} {remote_commit_id_short} ({remote_commit_date})"
+                                          if wheelhouse_enabled and node_info["local_commit_full"] and node_info["local_commit_full"] != full_commit_id_remote:
+                                               upstream_requirements = self._read_requirements_at_ref(item_path, upstream_ref)
+                                               if upstream_requirements:
+                                                    update_requirements[item_name] = upstream_requirements
                                           # Could add subject to tooltip later if needed
                                      else:
                                           repo_info_display = f"{remote_branch_name} (日志解析失败)"
@@ -854,14 +1120,18 @@ class ManagementTab:
 
                             node_info["repo_info"] = repo_info_display
 
-                       local_nodes.append(node_info)
+                       local_nodes.append(NodeRecord.from_dict(node_info))
+
+                  if update_requirements:
+                       self.app.log_to_gui("Management", f"检测到 {len(update_requirements)} 个节点有更新，后台预取其依赖到 wheelhouse...", "info")
+                       self.app.wheelhouse.prefetch_async(update_requirements)
 
              except threading.ThreadExit:
                  self.app.log_to_gui("Management", "节点列表扫描任务已取消 (停止信号)。", "warn")
                  # Repopulate with current cached data if available
                  # Safely access nodes_tree before attempting to populate
                  if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
-                      self.app.root.after(0, lambda list_to_populate=sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()): self._populate_nodes_treeview(list_to_populate))
+                      self.app.root.after(0, lambda list_to_populate=list(self.catalog.local_nodes): self._populate_nodes_treeview(list_to_populate))
                  return
              except Exception as e:
                   self.app.log_to_gui("Management", f"扫描本地 custom_nodes 目录时出错: {e}", "error", target_override="Launcher")
@@ -877,81 +1147,109 @@ class ManagementTab:
              self.app.log_to_gui("Management", "节点列表刷新任务已取消 (停止信号)。", "warn")
              # Repopulate with current cached data if available
              if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
-                  self.app.root.after(0, lambda list_to_populate=sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()): self._populate_nodes_treeview(list_to_populate))
+                  self.app.root.after(0, lambda list_to_populate=list(self.catalog.local_nodes): self._populate_nodes_treeview(list_to_populate))
              return
 
-        # --- Fetching Online Config Data ---
-        online_nodes_config = []
+        # --- Show local results right away; the online catalog streams in behind them ---
+        self.catalog = self.catalog.with_local_nodes(local_nodes) # Store the scanned local list
+        search_term_value = ""
+        try:
+            if hasattr(self, 'nodes_search_entry') and self.nodes_search_entry and self.nodes_search_entry.winfo_exists():
+                 search_term_value = self.nodes_search_entry.get().strip().lower()
+        except tk.TclError:
+            pass
+        local_matches = [node for node in self.catalog.local_nodes if matches_search(node, search_term_value)] if search_term_value else list(self.catalog.local_nodes)
+        self.app.root.after(0, lambda list_to_populate=local_matches: self._populate_nodes_treeview(list_to_populate))
+
+        # --- Stream the online config and merge it entry by entry ---
+        local_node_dict_lower = {node.name_lower: node for node in local_nodes}
+        combined_nodes_dict = dict(local_node_dict_lower) # Start with local
+        # Catalog entries also join to installed nodes by exact repository identity (renamed folders, https/ssh, .git)
+        local_repo_index = self.catalog.local_repo_index
+        repo_joined_count = 0
+        pending_matches = [] # Catalog matches not yet added to the view
+        last_view_update = time.time()
+        fetch_status = {"complete": not node_config_url} # Set by _iter_online_node_config once the whole catalog was read
+
         if node_config_url:
-            online_nodes_config = self._fetch_online_node_config() # Runs in this worker thread
+            for online_node in self._iter_online_node_config(fetch_status): # Runs in this worker thread
+                if self.app.stop_event_set(): # Use the getter method
+                    break
+                try:
+                    node_name = online_node.get('title') or online_node.get('name')
+                    if not node_name:
+                        continue
+                    node_name_lower = node_name.lower()
+                    # Find the first git URL in files list
+                    repo_url = None
+                    files = online_node.get('files', [])
+                    if isinstance(files, list):
+                         for file_entry in files:
+                              # Check if the file_entry is a dictionary with a 'url' key ending in .git
+                              if isinstance(file_entry, dict) and file_entry.get('url', '').strip().endswith(".git"):
+                                   repo_url = file_entry['url'].strip()
+                                   break
+                              # Fallback for old format where files list contained just urls (strings)
+                              elif isinstance(file_entry, str) and file_entry.strip().endswith(".git"):
+                                   repo_url = file_entry.strip()
+                                   break
+
+                    if not repo_url:
+                        continue
+
+                    target_ref = online_node.get('reference') or online_node.get('branch') or 'main'
+
+                    installed_node = local_node_dict_lower.get(node_name_lower) or local_repo_index.match(repo_url)
+                    if installed_node is not None and installed_node.name_lower != node_name_lower:
+                        # Installed under another folder name: not listed twice, but found by its catalog title
+                        if installed_node.catalog_name is None: # The first catalog entry of a repository names it
+                            repo_joined_count += 1
+                            installed_node.catalog_name = node_name
+                    elif installed_node is None:
+                        # Only add online node if it's NOT already installed locally
+                        online_repo_info_display = f"在线目标: {target_ref}"
+                        is_new = node_name_lower not in combined_nodes_dict
+                        combined_nodes_dict[node_name_lower] = NodeRecord(
+                            name=online_node.get('title') or online_node.get('name', '未知名称'), # Use title preferentially for display
+                            status="未安装",
+                            repo_info=online_repo_info_display,
+                            repo_url=repo_url,
+                            is_git=True, # Assume online nodes are git repos
+                            remote_branch=target_ref # Store potential target ref
+                        )
+                        if is_new and search_term_value and matches_search(combined_nodes_dict[node_name_lower], search_term_value):
+                            pending_matches.append(combined_nodes_dict[node_name_lower])
+                except Exception as e:
+                    print(f"[Management Module WARNING] Error processing online node entry: {online_node}. Error: {e}")
+                    self.app.log_to_gui("Management", f"处理在线节点条目时出错: {e}", "warn")
+
+                # Matches appear in batches while the download continues; the final sorted list replaces them below
+                if pending_matches and (len(pending_matches) >= CATALOG_VIEW_BATCH or time.time() - last_view_update >= CATALOG_VIEW_INTERVAL_SEC):
+                    self.app.root.after(0, lambda batch=pending_matches: self._append_nodes_treeview(batch))
+                    pending_matches = []
+                    last_view_update = time.time()
+            if repo_joined_count:
+                self.app.log_to_gui("Management", f"{repo_joined_count} 个本地节点的目录名与在线配置不同，已按仓库地址匹配。", "info")
         else:
             self.app.log_to_gui("Management", "节点配置地址未设置，跳过在线配置获取。", "warn")
 
-        if self.app.stop_event_set(): # Use the getter method
-            self.app.log_to_gui("Management", "节点列表刷新任务已取消 (停止信号)。", "warn")
-            # Repopulate with current cached data if available
-            if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
-                 self.app.root.after(0, lambda list_to_populate=sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()): self._populate_nodes_treeview(list_to_populate))
-            return
-
-        # --- Combine local and online data ---
-        local_node_dict_lower = {node['name'].lower(): node for node in local_nodes}
-        combined_nodes_dict = {node['name'].lower(): node for node in local_nodes} # Start with local
-
-        for online_node in online_nodes_config:
-             if self.app.stop_event_set(): # Use the getter method
-                 break
-             try:
-                 node_name = online_node.get('title') or online_node.get('name')
-                 if not node_name:
-                     continue
-                 node_name_lower = node_name.lower()
-                 # Find the first git URL in files list
-                 repo_url = None
-                 files = online_node.get('files', [])
-                 if isinstance(files, list):
-                      for file_entry in files:
-                           # Check if the file_entry is a dictionary with a 'url' key ending in .git
-                           if isinstance(file_entry, dict) and file_entry.get('url', '').strip().endswith(".git"):
-                                repo_url = file_entry['url'].strip()
-                                break
-                           # Fallback for old format where files list contained just urls (strings)
-                           elif isinstance(file_entry, str) and file_entry.strip().endswith(".git"):
-                                repo_url = file_entry.strip()
-                                break
-
-                 if not repo_url:
-                     continue
+        if not fetch_status["complete"] and not self.app.stop_event_set():
+            # A truncated download must not replace the catalog: keep the previous online entries, joined to the new local scan
+            combined_nodes_dict = dict(local_node_dict_lower)
+            for record in self.catalog.all_nodes:
+                if record.status == "未安装" and record.name_lower not in combined_nodes_dict and local_repo_index.match(record.repo_url) is None:
+                    combined_nodes_dict[record.name_lower] = record
+            self.app.log_to_gui("Management", f"在线节点配置未完整获取，保留上次的 {len(combined_nodes_dict) - len(local_node_dict_lower)} 个在线条目，本次结果不保存。", "warn")
 
-                 target_ref = online_node.get('reference') or online_node.get('branch') or 'main'
-
-                 if node_name_lower not in local_node_dict_lower:
-                     # Only add online node if it's NOT already installed locally
-                     online_repo_info_display = f"在线目标: {target_ref}"
-                     combined_nodes_dict[node_name_lower] = {
-                         "name": online_node.get('title') or online_node.get('name', '未知名称'), # Use title preferentially for display
-                         "status": "未安装",
-                         "local_id": "N/A",
-                         "local_commit_full": None,
-                         "repo_info": online_repo_info_display,
-                         "repo_url": repo_url,
-                         "is_git": True, # Assume online nodes are git repos
-                         "remote_branch": target_ref # Store potential target ref
-                     }
-             except Exception as e:
-                 print(f"[Management Module WARNING] Error processing online node entry: {online_node}. Error: {e}")
-                 self.app.log_to_gui("Management", f"处理在线节点条目时出错: {e}", "warn")
-
-        # Convert combined dict back to list and sort by name
-        self.local_nodes_only = sorted(local_nodes, key=lambda x: x.get('name', '').lower()) # Store the scanned local list
-        self.all_known_nodes = sorted(list(combined_nodes_dict.values()), key=lambda x: x.get('name', '').lower()) # Store the combined list
+        # Build the catalog (name order, name and repository indexes) from the merged entries
+        self.catalog = NodeCatalog(local_nodes, combined_nodes_dict.values()) # Store the combined list
 
 
         if self.app.stop_event_set(): # Use the getter method
             self.app.log_to_gui("Management", "节点列表刷新任务已取消 (停止信号)。", "warn")
             # Repopulate with current cached data if available
             if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
-                 self.app.root.after(0, lambda list_to_populate=sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower()): self._populate_nodes_treeview(list_to_populate))
+                 self.app.root.after(0, lambda list_to_populate=list(self.catalog.local_nodes): self._populate_nodes_treeview(list_to_populate))
             return
 
         # --- Apply Filtering Logic ---
@@ -964,19 +1262,12 @@ class ManagementTab:
         except tk.TclError:
             pass
 
-        if search_term_value == "": # Empty search -> show local only
-            filtered_nodes = sorted(self.local_nodes_only, key=lambda x: x.get('name', '').lower())
-        else: # Search term present -> filter combined list
-            filtered_nodes = [
-                node for node in self.all_known_nodes
-                if search_term_value in node.get('name', '').lower() or \
-                   search_term_value in node.get('repo_url', '').lower() or \
-                   search_term_value in node.get('status', '').lower()
-            ]
-            filtered_nodes.sort(key=lambda x: x.get('name', '').lower()) # Sort filtered results by name
+        # Empty search -> local only; search term present -> filter combined list (both already in name order)
+        filtered_nodes = self.catalog.search(search_term_value)
 
         # --- Save State ---
-        self._save_state() # Save the fetched and combined data
+        if fetch_status["complete"]:
+            self._save_state() # Save the fetched and combined data
 
         # --- Populate Treeview ---
         # Populate the Treeview in the GUI thread
@@ -986,40 +1277,153 @@ class ManagementTab:
 
 
     # Called by refresh_node_list
-    def _fetch_online_node_config(self):
-         """Fetches and parses the online custom node list config. Runs in worker thread."""
+    def _iter_online_node_config(self, fetch_status):
+         """
+         Streams the online custom node list config (list or Manager format) and yields its entries while downloading,
+         so neither the full document nor its parsed copy is held in memory. Runs in worker thread.
+         Errors are logged and end the stream; fetch_status["complete"] is set to True only if the whole document was read,
+         so the caller can tell a truncated catalog from a complete one.
+         """
          node_config_url = self.app.node_config_url_var.get()
          if not node_config_url:
-             return []
+             return
 
          self.app.log_to_gui("Management", f"尝试从 {node_config_url} 获取节点配置...", "info")
+         entry_count = 0
          try:
-              response = requests.get(node_config_url, timeout=20) # Increased timeout
-              response.raise_for_status()
-              config_data = response.json()
-
-              if isinstance(config_data, list) and all(isinstance(item, dict) for item in config_data):
-                   self.app.log_to_gui("Management", f"已获取在线节点配置 (共 {len(config_data)} 条)。", "info")
-                   return config_data
-              elif isinstance(config_data, dict) and 'custom_nodes' in config_data and isinstance(config_data['custom_nodes'], list):
-                   self.app.log_to_gui("Management", f"已获取在线节点配置 (Manager格式，共 {len(config_data['custom_nodes'])} 条)。", "info")
-                   return config_data['custom_nodes']
-              else:
-                   self.app.log_to_gui("Management", f"在线节点配置格式无法识别。", "error")
-                   return []
+              with self.app.mirrors.http_get(node_config_url, timeout=20, stream=True) as response: # Fastest mirror, failover on errors
+                   response.raise_for_status()
+                   for entry in iter_catalog_entries(response.iter_content(chunk_size=CATALOG_CHUNK_BYTES)):
+                        if isinstance(entry, dict):
+                             entry_count += 1
+                             yield entry
+              fetch_status["complete"] = True
+              self.app.log_to_gui("Management", f"已获取在线节点配置 (共 {entry_count} 条)。", "info")
 
          except requests.exceptions.Timeout:
-              self.app.log_to_gui("Management", f"获取在线节点配置超时: {node_config_url}", "error")
-              return []
+              self.app.log_to_gui("Management", f"获取在线节点配置超时: {node_config_url} (已读取 {entry_count} 条)", "error")
          except requests.exceptions.RequestException as e:
               self.app.log_to_gui("Management", f"获取在线节点配置失败: {e}", "error")
-              return []
-         except json.JSONDecodeError as e:
-              self.app.log_to_gui("Management", f"在线节点配置解析失败 (非JSON): {e}", "error")
-              return []
+         except ValueError as e: # json.JSONDecodeError included
+              self.app.log_to_gui("Management", f"在线节点配置解析失败 (非JSON或格式无法识别): {e}", "error")
          except Exception as e:
               self.app.log_to_gui("Management", f"处理在线节点配置时发生意外错误: {e}", "error")
-              return []
+
+
+    def _clone_node(self, node_name, node_install_path, repo_url, target_ref):
+        """
+        Git part of a node install: clone (via the mirror cache), checkout target_ref and update submodules.
+        Raises on failure; returns False if the clone succeeded but target_ref could not be checked out.
+        Runs in worker thread or in a batch pool thread.
+        """
+        comfyui_nodes_dir = self.app.comfyui_nodes_dir
+        if not comfyui_nodes_dir: # Should be validated earlier, but defensive check
+             raise Exception("ComfyUI custom_nodes 目录未设置或无效。")
+
+        if not os.path.exists(comfyui_nodes_dir):
+             self.app.log_to_gui("Management", f"创建 custom_nodes 目录: {comfyui_nodes_dir}", "info")
+             os.makedirs(comfyui_nodes_dir, exist_ok=True)
+
+        if os.path.exists(node_install_path):
+             if os.path.isdir(node_install_path) and len(os.listdir(node_install_path)) > 0:
+                  # If the directory exists and is not empty, maybe it's a failed partial clone?
+                  # Offer to clean it up? Or just fail? Let's fail and let the user decide.
+                  raise Exception(f"节点安装目录已存在且不为空: {node_install_path}")
+             elif not os.path.isdir(node_install_path):
+                  # If it exists but is a file, we can't clone here.
+                  raise Exception(f"目标路径已存在但不是目录: {node_install_path}")
+             else:
+                  # If it exists and is an empty directory, try to remove it first (maybe from a previous failed attempt)
+                  try:
+                       self.app.log_to_gui("Management", f"移除已存在的空目录: {node_install_path}", "info")
+                       os.rmdir(node_install_path)
+                  except OSError as e:
+                       # If rmdir fails for some reason (e.g., permissions), raise an error
+                       raise Exception(f"无法移除已存在的空目录 {node_install_path}: {e}")
+
+        if self.app.stop_event_set(): # Use the getter method
+            raise threading.ThreadExit
+
+        install_mode = self.app.config.get("node_install_mode", DEFAULT_NODE_INSTALL_MODE)
+        mode_args = NODE_INSTALL_MODES.get(install_mode, [])
+
+        # Reuse objects from the local mirror cache so reinstalls and repeated installs stay on disk.
+        # Shallow/partial installs only use a mirror that already exists; creating one would download full history.
+        mirror_path = self.app.repo_cache.ensure_mirror(repo_url, create_missing=not mode_args)
+        if mirror_path:
+             self.app.log_to_gui("Management", f"使用本地镜像缓存: {mirror_path}", "info")
+
+        if self.app.stop_event_set(): # Use the getter method
+            raise threading.ThreadExit
+
+        self.app.log_to_gui("Management", f"执行 Git clone {repo_url} {node_install_path}...", "info")
+        clone_cmd = ["clone", "--progress"] # --progress gives output during clone
+        clone_cmd.extend(self.app.repo_cache.clone_reference_args(mirror_path))
+        clone_cmd.extend(mode_args)
+        if mode_args:
+             self.app.log_to_gui("Management", f"安装模式: {install_mode} (查看历史或切换旧版本时自动补全历史)", "info")
+        # Check if target_ref looks like a commit hash (approx 7+ hex chars)
+        is_likely_commit_hash = len(target_ref) >= 7 and all(c in '0123456789abcdefABCDEF' for c in target_ref.lower())
+
+        # If target_ref is specified and is not a likely commit hash, try cloning the specific branch
+        # Git clone -b <branch> only works for branches. Tags/Commits need checkout after clone.
+        if target_ref and not is_likely_commit_hash:
+             # Add branch flag. If it's not a branch name, the clone will proceed with default branch,
+             # and the subsequent checkout step will handle tags or commits.
+             clone_cmd.extend(["--branch", target_ref])
+
+        clone_cmd.extend([repo_url, node_install_path])
+
+        # Run clone command from the custom_nodes directory, targeting node_install_path
+        # Use app instance method
+        clone_started = time.time()
+        stdout_clone, stderr_clone, returncode = self.app._run_git_command(clone_cmd, cwd=comfyui_nodes_dir, timeout=300, log_output=True)
+
+        if returncode != 0:
+             # Clean up potentially created partial directory on failure
+             if os.path.exists(node_install_path):
+                  try:
+                       self.app.log_to_gui("Management", f"Git clone 失败，尝试移除失败目录: {node_install_path}", "warn")
+                       self.app.node_trash.discard(node_install_path, node_name) # Rename now, delete in the background
+                       self.app.log_to_gui("Management", f"已移除失败的节点目录: {node_install_path}", "info")
+                  except Exception as rm_err:
+                       self.app.log_to_gui("Management", f"移除失败的节点目录 '{node_install_path}' 失败: {rm_err}", "error")
+             raise Exception(f"Git clone 失败 (退出码 {returncode})")
+
+        self.app.log_to_gui("Management", "Git clone 完成。", "info")
+        self._log_clone_footprint(node_install_path, repo_url, install_mode, time.time() - clone_started)
+
+        # If target_ref was specified, checkout the specific ref after cloning
+        # This handles tags, commit hashes, and ensures the correct state if --branch failed or wasn't used.
+        checkout_ok = True
+        if target_ref:
+             self.app.log_to_gui("Management", f"尝试执行 Git checkout {target_ref}...", "info")
+             # Use --force to ensure checkout succeeds even if clone resulted in unexpected state (shouldn't happen but safe)
+             # Use app instance method
+             _, stderr_checkout, rc_checkout = self.app._run_git_command(["checkout", "--force", target_ref], cwd=node_install_path, timeout=60)
+             if rc_checkout != 0 and self._ensure_full_history(node_name, node_install_path):
+                  # Shallow clone did not contain the requested commit/tag; retry with full history
+                  _, stderr_checkout, rc_checkout = self.app._run_git_command(["checkout", "--force", target_ref], cwd=node_install_path, timeout=60)
+             if rc_checkout != 0:
+                  # Log warning, not fatal error, as the node is still installed, just maybe not the exact version.
+                  self.app.log_to_gui("Management", f"Git checkout {target_ref[:8]} 失败: {stderr_checkout.strip()}", "warn")
+                  checkout_ok = False
+             else:
+                  self.app.log_to_gui("Management", f"Git checkout {target_ref[:8]} 完成。", "info")
+
+
+        if self.app.stop_event_set(): # Use the getter method
+            raise threading.ThreadExit
+
+        # Update submodules if .gitmodules exists
+        if os.path.exists(os.path.join(node_install_path, ".gitmodules")):
+             self.app.log_to_gui("Management", f"执行 Git submodule update for '{node_name}'...", "info")
+             # Use app instance method
+             _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=node_install_path, timeout=180)
+             if rc_sub != 0:
+                 self.app.log_to_gui("Management", f"Git submodule update 失败: {stderr_sub.strip()}", "warn")
+
+        return checkout_ok
 
 
     # Called by app._queue_node_switch_or_show_history (for install scenario)
@@ -1034,127 +1438,24 @@ class ManagementTab:
         self.app.log_to_gui("Management", f"  目标目录: {node_install_path}", "info")
 
         try:
-            comfyui_nodes_dir = self.app.comfyui_nodes_dir
-            if not comfyui_nodes_dir: # Should be validated earlier, but defensive check
-                 raise Exception("ComfyUI custom_nodes 目录未设置或无效。")
-
-            if not os.path.exists(comfyui_nodes_dir):
-                 self.app.log_to_gui("Management", f"创建 custom_nodes 目录: {comfyui_nodes_dir}", "info")
-                 os.makedirs(comfyui_nodes_dir, exist_ok=True)
-
-            if os.path.exists(node_install_path):
-                 if os.path.isdir(node_install_path) and len(os.listdir(node_install_path)) > 0:
-                      # If the directory exists and is not empty, maybe it's a failed partial clone?
-                      # Offer to clean it up? Or just fail? Let's fail and let the user decide.
-                      raise Exception(f"节点安装目录已存在且不为空: {node_install_path}")
-                 elif not os.path.isdir(node_install_path):
-                      # If it exists but is a file, we can't clone here.
-                      raise Exception(f"目标路径已存在但不是目录: {node_install_path}")
-                 else:
-                      # If it exists and is an empty directory, try to remove it first (maybe from a previous failed attempt)
-                      try:
-                           self.app.log_to_gui("Management", f"移除已存在的空目录: {node_install_path}", "info")
-                           os.rmdir(node_install_path)
-                      except OSError as e:
-                           # If rmdir fails for some reason (e.g., permissions), raise an error
-                           raise Exception(f"无法移除已存在的空目录 {node_install_path}: {e}")
-
-            if self.app.stop_event_set(): # Use the getter method
-                raise threading.ThreadExit
-
-            self.app.log_to_gui("Management", f"执行 Git clone {repo_url} {node_install_path}...", "info")
-            clone_cmd = ["clone", "--progress"] # --progress gives output during clone
-            # Check if target_ref looks like a commit hash (approx 7+ hex chars)
-            is_likely_commit_hash = len(target_ref) >= 7 and all(c in '0123456789abcdefABCDEF' for c in target_ref.lower())
-
-            # If target_ref is specified and is not a likely commit hash, try cloning the specific branch
-            # Git clone -b <branch> only works for branches. Tags/Commits need checkout after clone.
-            if target_ref and not is_likely_commit_hash:
-                 # Add branch flag. If it's not a branch name, the clone will proceed with default branch,
-                 # and the subsequent checkout step will handle tags or commits.
-                 clone_cmd.extend(["--branch", target_ref])
-
-            clone_cmd.extend([repo_url, node_install_path])
-
-            # Run clone command from the custom_nodes directory, targeting node_install_path
-            # Use app instance method
-            stdout_clone, stderr_clone, returncode = self.app._run_git_command(clone_cmd, cwd=comfyui_nodes_dir, timeout=300, log_output=True)
-
-            if returncode != 0:
-                 # Clean up potentially created partial directory on failure
-                 if os.path.exists(node_install_path):
-                      try:
-                           self.app.log_to_gui("Management", f"Git clone 失败，尝试移除失败目录: {node_install_path}", "warn")
-                           shutil.rmtree(node_install_path)
-                           self.app.log_to_gui("Management", f"已移除失败的节点目录: {node_install_path}", "info")
-                      except Exception as rm_err:
-                           self.app.log_to_gui("Management", f"移除失败的节点目录 '{node_install_path}' 失败: {rm_err}", "error")
-                 raise Exception(f"Git clone 失败 (退出码 {returncode})")
-
-            self.app.log_to_gui("Management", "Git clone 完成。", "info")
-
-            # If target_ref was specified, checkout the specific ref after cloning
-            # This handles tags, commit hashes, and ensures the correct state if --branch failed or wasn't used.
-            if target_ref:
-                 self.app.log_to_gui("Management", f"尝试执行 Git checkout {target_ref}...", "info")
-                 # Use --force to ensure checkout succeeds even if clone resulted in unexpected state (shouldn't happen but safe)
-                 # Use app instance method
-                 _, stderr_checkout, rc_checkout = self.app._run_git_command(["checkout", "--force", target_ref], cwd=node_install_path, timeout=60)
-                 if rc_checkout != 0:
-                      # Log warning, not fatal error, as the node is still installed, just maybe not the exact version.
-                      self.app.log_to_gui("Management", f"Git checkout {target_ref[:8]} 失败: {stderr_checkout.strip()}", "warn")
-                      # Show warning in GUI thread
-                      self.app.root.after(0, lambda name=node_name, ref=target_ref[:8]: messagebox.showwarning("版本切换警告", f"节点 '{name}' 安装后尝试切换到版本 {ref} 失败。\n请查看日志。", parent=self.app.root))
-                 else:
-                      self.app.log_to_gui("Management", f"Git checkout {target_ref[:8]} 完成。", "info")
-
-
-            if self.app.stop_event_set(): # Use the getter method
-                raise threading.ThreadExit
-
-            # Update submodules if .gitmodules exists
-            if os.path.exists(os.path.join(node_install_path, ".gitmodules")):
-                 self.app.log_to_gui("Management", f"执行 Git submodule update for '{node_name}'...", "info")
-                 # Use app instance method
-                 _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=node_install_path, timeout=180)
-                 if rc_sub != 0:
-                     self.app.log_to_gui("Management", f"Git submodule update 失败: {stderr_sub.strip()}", "warn")
+            checkout_ok = self._clone_node(node_name, node_install_path, repo_url, target_ref)
+            if not checkout_ok:
+                 # Show warning in GUI thread
+                 self.app.root.after(0, lambda name=node_name, ref=target_ref[:8]: messagebox.showwarning("版本切换警告", f"节点 '{name}' 安装后尝试切换到版本 {ref} 失败。\n请查看日志。", parent=self.app.root))
 
             if self.app.stop_event_set(): # Use the getter method
                 raise threading.ThreadExit
 
             # Install Python dependencies if requirements.txt exists
-            python_exe = self.app.python_exe_var.get()
             requirements_path = os.path.join(node_install_path, "requirements.txt")
-            if python_exe and os.path.isfile(python_exe) and os.path.isfile(requirements_path):
+            if os.path.isfile(requirements_path):
                  self.app.log_to_gui("Management", f"执行 pip 安装节点依赖 for '{node_name}'...", "info")
-                 pip_cmd_base = [python_exe, "-m", "pip", "install", "-r", requirements_path, "--upgrade"]
-                 pip_cmd_extras = ["--extra-index-url", "https://download.pytorch.org/whl/cu118", "--extra-index-url", "https://download.pytorch.org/whl/cu121"]
-                 pip_cmd = pip_cmd_base + pip_cmd_extras
-                 is_venv = sys.prefix != sys.base_prefix
-                 # Check if the target python_exe is NOT within the launcher's base prefix (heuristic for standalone/portable env)
-                 try:
-                      relative_path_to_base = os.path.relpath(python_exe, sys.base_prefix)
-                      is_outside_launcher_base = relative_path_to_base.startswith('..') or os.path.isabs(relative_path_to_base)
-                 except ValueError: # Assume it's outside on path error
-                      is_outside_launcher_base = True
-
-                 # Add --user only if on Linux/macOS AND (the launcher is NOT in a venv AND the target python is NOT in the launcher's base path)
-                 if platform.system() != "Windows" and not is_venv and is_outside_launcher_base:
-                       self.app.log_to_gui("Management", "目标Python路径可能非系统或虚拟环境安装，使用 --user 选项安装依赖。", "warn")
-                       pip_cmd.append("--user")
-
-                 pip_cmd.extend(["--no-cache-dir"]) # Added --no-cache-dir
-
-                 # Use app instance method
-                 _, stderr_pip, rc_pip = self.app._run_git_command(pip_cmd, cwd=node_install_path, timeout=180)
-                 if rc_pip != 0:
-                      self.app.log_to_gui("Management", f"Pip 安装节点依赖失败: {stderr_pip.strip()}", "error")
+                 dep_result = self.app.dependency_manager.install({node_name: requirements_path})
+                 if not dep_result["ok"]:
                       # Show warning in GUI thread
                       self.app.root.after(0, lambda name=node_name: messagebox.showwarning("依赖安装失败", f"节点 '{name}' 的 Python 依赖可能安装失败。\n请查看日志。", parent=self.app.root))
-                 else:
-                      self.app.log_to_gui("Management", f"Pip 安装节点依赖完成 for '{node_name}'.", "info")
 
+            self.app.bytecode_compiler.precompile({node_name: node_install_path})
             self.app.log_to_gui("Management", f"节点 '{node_name}' 安装流程完成。", "info")
             # Show success message in GUI thread
             self.app.root.after(0, lambda name=node_name: messagebox.showinfo("安装完成", f"节点 '{name}' 已成功安装。", parent=self.app.root))
@@ -1165,7 +1466,7 @@ class ManagementTab:
              if os.path.exists(node_install_path):
                  try:
                       self.app.log_to_gui("Management", f"安装任务取消，尝试移除部分创建的目录: {node_install_path}", "warn")
-                      shutil.rmtree(node_install_path)
+                      self.app.node_trash.discard(node_install_path, node_name)
                       self.app.log_to_gui("Management", f"已移除部分创建的目录: {node_install_path}", "info")
                  except Exception as rm_err:
                       self.app.log_to_gui("Management", f"移除部分创建的目录 '{node_install_path}' 失败: {rm_err}", "error")
@@ -1180,13 +1481,35 @@ class ManagementTab:
             self.app._queue_node_list_refresh()
 
 
+    def _remove_node_dir(self, node_name, node_install_path):
+         """
+         Removes an installed node directory after seeding its history into the mirror cache. Raises on failure.
+         The directory is renamed into the trash area (instant, restorable); it is only deleted here if the rename fails.
+         Returns the trash entry id or None.
+         """
+         # Keep the node's history in the mirror cache so a reinstall does not download it again
+         if os.path.isdir(os.path.join(node_install_path, ".git")):
+              stdout_url, _, rc_url = self.app._run_git_command(["remote", "get-url", "origin"], cwd=node_install_path, timeout=10, log_output=False)
+              if rc_url == 0 and stdout_url.strip():
+                   self.app.repo_cache.seed_from_local_repo(stdout_url.strip(), node_install_path)
+
+         entry_id = self.app.node_trash.move_to_trash(node_install_path, node_name)
+         if entry_id:
+              self.app.log_to_gui("Management", f"节点目录 '{node_install_path}' 已移入回收区 (可撤销，稍后在后台删除)。", "info")
+              return entry_id
+         self.app.log_to_gui("Management", f"无法移入回收区，直接删除目录: {node_install_path}", "cmd") # Log the action
+         shutil.rmtree(node_install_path)
+         self.app.log_to_gui("Management", f"节点目录 '{node_install_path}' 已删除。", "info")
+         return None
+
+
     # Called by app._queue_node_uninstall
     def _node_uninstall_task(self, node_name, node_install_path):
-         """Task to uninstall a node by deleting its directory. Runs in worker thread."""
+         """Task to uninstall a node by moving its directory into the trash area. Runs in worker thread."""
          if self.app.stop_event_set(): # Use the getter method
              self.app.log_to_gui("Management", f"节点 '{node_name}' 卸载任务已取消 (停止信号)。", "warn")
              return
-         self.app.log_to_gui("Management", f"正在卸载节点 '{node_name}' (删除目录: {node_install_path})...", "info")
+         self.app.log_to_gui("Management", f"正在卸载节点 '{node_name}' (目录: {node_install_path})...", "info")
 
          try:
               if not os.path.isdir(node_install_path):
@@ -1198,12 +1521,11 @@ class ManagementTab:
               if self.app.stop_event_set(): # Use the getter method
                   raise threading.ThreadExit
 
-              self.app.log_to_gui("Management", f"删除目录: {node_install_path}", "cmd") # Log the action
-              shutil.rmtree(node_install_path)
-              self.app.log_to_gui("Management", f"节点目录 '{node_install_path}' 已删除。", "info")
+              entry_id = self._remove_node_dir(node_name, node_install_path)
               self.app.log_to_gui("Management", f"节点 '{node_name}' 卸载流程完成。", "info")
+              undo_hint = f"\n可在 {TRASH_RETENTION_SEC // 3600} 小时内通过“撤销卸载”恢复。" if entry_id else ""
               # Show success message in GUI thread
-              self.app.root.after(0, lambda name=node_name: messagebox.showinfo("卸载完成", f"节点 '{name}' 已成功卸载。", parent=self.app.root))
+              self.app.root.after(0, lambda name=node_name, hint=undo_hint: messagebox.showinfo("卸载完成", f"节点 '{name}' 已成功卸载。{hint}", parent=self.app.root))
 
          except threading.ThreadExit:
               self.app.log_to_gui("Management", f"节点 '{node_name}' 卸载任务已取消。", "warn")
@@ -1217,6 +1539,21 @@ class ManagementTab:
              self.app._queue_node_list_refresh()
 
 
+    # Called by app._queue_node_restore
+    def _node_restore_task(self, entry_id):
+         """Task to undo an uninstall by renaming the node back out of the trash area. Runs in worker thread."""
+         try:
+              entry = self.app.node_trash.restore(entry_id)
+              self.app.log_to_gui("Management", f"节点 '{entry['name']}' 已从回收区恢复: {entry['original_path']}", "info")
+              self.app.root.after(0, lambda name=entry["name"]: messagebox.showinfo("撤销卸载完成", f"节点 '{name}' 已恢复。", parent=self.app.root))
+         except Exception as e:
+              error_msg = f"恢复节点失败: {e}"
+              self.app.log_to_gui("Management", error_msg, "error")
+              self.app.root.after(0, lambda msg=error_msg: messagebox.showerror("撤销卸载失败", msg, parent=self.app.root))
+         finally:
+              self.app._queue_node_list_refresh()
+
+
     # Called by app._queue_all_nodes_update
     def _update_all_nodes_task(self, nodes_to_process):
         """Task to iterate and update all specified installed nodes. Runs in worker thread."""
@@ -1224,8 +1561,11 @@ class ManagementTab:
             self.app.log_to_gui("Management", "更新全部节点任务已取消 (停止信号)。", "warn")
             return
         self.app.log_to_gui("Management", f"开始更新全部节点 ({len(nodes_to_process)} 个)...", "info")
+        self.app.snapshots.capture("更新全部节点之前") # Known-good state to roll back to if the update breaks something
         updated_count = 0
         failed_nodes = []
+        pending_requirements = {} # node name -> requirements.txt of nodes that changed
+        updated_paths = {} # node name -> directory of nodes that changed (bytecode precompile)
 
         for index, node_info in enumerate(nodes_to_process):
              if self.app.stop_event_set(): # Use the getter method
@@ -1285,7 +1625,10 @@ class ManagementTab:
                  # Fetch the remote branch specifically using app instance method
                  self.app.log_to_gui("Management", f"[{index+1}/{len(nodes_to_process)}] 执行 Git fetch origin {remote_branch}...", "info")
                  # Increase timeout slightly for fetch
-                 _, stderr_fetch, rc_fetch = self.app._run_git_command(["fetch", "origin", remote_branch], cwd=node_install_path, timeout=60)
+                 fetch_cmd = ["fetch", "origin", remote_branch]
+                 if self._is_shallow_repo(node_install_path):
+                      fetch_cmd.extend(["--depth", "1"]) # Keep shallow installs shallow when updating
+                 _, stderr_fetch, rc_fetch = self.app._run_git_command(fetch_cmd, cwd=node_install_path, timeout=60)
                  if rc_fetch != 0:
                       self.app.log_to_gui("Management", f"Git fetch 失败 for '{node_name}': {stderr_fetch.strip()}", "error")
                       failed_nodes.append(f"{node_name} (Fetch失败)")
@@ -1344,38 +1687,12 @@ class ManagementTab:
                  if self.app.stop_event_set(): # Use the getter method
                      raise threading.ThreadExit
 
-                 # Re-install Python dependencies if requirements.txt exists
-                 python_exe = self.app.python_exe_var.get()
+                 # Dependencies of all updated nodes are resolved together after the loop
                  requirements_path = os.path.join(node_install_path, "requirements.txt")
-                 if python_exe and os.path.isfile(python_exe) and os.path.isfile(requirements_path):
-                      self.app.log_to_gui("Management", f"执行 pip 安装节点依赖 for '{node_name}'...", "info")
-                      pip_cmd_base = [python_exe, "-m", "pip", "install", "-r", requirements_path, "--upgrade"]
-                      pip_cmd_extras = ["--extra-index-url", "https://download.pytorch.org/whl/cu118", "--extra-index-url", "https://download.pytorch.org/whl/cu121"]
-                      pip_cmd = pip_cmd_base + pip_cmd_extras
-                      is_venv = sys.prefix != sys.base_prefix
-                      # Check if the target python_exe is NOT within the launcher's base prefix (heuristic for standalone/portable env)
-                      try:
-                          relative_path_to_base = os.path.relpath(python_exe, sys.base_prefix)
-                          is_outside_launcher_base = relative_path_to_base.startswith('..') or os.path.isabs(relative_path_to_base)
-                      except ValueError:
-                          is_outside_launcher_base = True
-
-                      if platform.system() != "Windows" and not is_venv and is_outside_launcher_base:
-                           self.app.log_to_gui("Management", "目标Python路径可能非系统或虚拟环境安装，使用 --user 选项安装依赖。", "warn")
-                           pip_cmd.append("--user")
-
-                      pip_cmd.extend(["--no-cache-dir"])
-
-                      # Use app instance method
-                      _, stderr_pip, rc_pip = self.app._run_git_command(pip_cmd, cwd=node_install_path, timeout=180)
-                      if rc_pip != 0:
-                           self.app.log_to_gui("Management", f"Pip 安装节点依赖失败: {stderr_pip.strip()}", "error")
-                           failed_nodes.append(f"{node_name} (依赖安装失败)")
-                           # Show warning in GUI thread
-                           self.app.root.after(0, lambda name=node_name: messagebox.showwarning("依赖安装失败", f"节点 '{name}' 的 Python 依赖可能安装失败。\n请查看日志。", parent=self.app.root))
-                      else:
-                           self.app.log_to_gui("Management", f"Pip 安装节点依赖完成.", "info")
+                 if os.path.isfile(requirements_path):
+                      pending_requirements[node_name] = requirements_path
 
+                 updated_paths[node_name] = node_install_path
                  updated_count += 1
                  self.app.log_to_gui("Management", f"节点 '{node_name}' 更新成功。", "info")
 
@@ -1387,6 +1704,14 @@ class ManagementTab:
                  self.app.log_to_gui(f"Management", f"更新节点 '{node_name}' 时发生意外错误: {e}", "error")
                  failed_nodes.append(f"{node_name} (发生错误)")
 
+        # One pip resolution for every updated node instead of one per node
+        if pending_requirements and not self.app.stop_event_set():
+             self.app.log_to_gui("Management", f"合并安装 {len(pending_requirements)} 个已更新节点的依赖...", "info")
+             dep_result = self.app.dependency_manager.install(pending_requirements)
+             failed_nodes.extend(f"{name} (依赖安装失败)" for name in dep_result["failed"])
+        if updated_paths and not self.app.stop_event_set():
+             self.app.bytecode_compiler.precompile(updated_paths)
+
         # --- Update All Task Summary ---
         self.app.log_to_gui("Management", f"更新全部节点流程完成。", "info")
         final_message = f"全部节点更新流程完成。\n成功更新: {updated_count} 个。"
@@ -1411,26 +1736,39 @@ class ManagementTab:
              self.app.root.after(0, self._cleanup_modal_state)
              return
 
-         self.app.log_to_gui("Management", f"正在获取节点 '{node_name}' 的版本历史...", "info")
-
-         history_data = []
-         current_local_commit = None # Full ID
+         cached_history = None
          try:
              if not os.path.isdir(node_install_path) or not os.path.exists(os.path.join(node_install_path, ".git")):
                   raise Exception(f"节点目录不是有效的 Git 仓库: {node_install_path}")
 
-             # Get current local commit ID (full) using app instance method
-             local_commit_stdout, _, rc_local = self.app._run_git_command(["rev-parse", "HEAD"], cwd=node_install_path, timeout=5, log_output=False)
-             if rc_local == 0 and local_commit_stdout:
-                 current_local_commit = local_commit_stdout.strip()
-                 self.app.log_to_gui("Management", f"当前本地 Commit ID: {current_local_commit[:8]}", "info")
+             # Show the cached history right away (file reads only); a recently viewed node needs no git call at all
+             cached_history, cached_commit, fresh = self.node_history.cached_history(node_name, node_install_path)
+             if cached_history:
+                 self._node_history_modal_versions_data = cached_history
+                 self._node_history_modal_node_name = node_name
+                 self._node_history_modal_node_path = node_install_path
+                 self._node_history_modal_current_commit = cached_commit
+                 self.app.root.after(0, self._show_node_history_modal)
+                 if fresh:
+                     self.app.log_to_gui("Management", f"节点 '{node_name}' 版本历史来自缓存 ({len(cached_history)} 条记录)。", "info")
+                     return
+                 self.app.log_to_gui("Management", f"已显示节点 '{node_name}' 的缓存历史，后台获取最新版本...", "info")
              else:
-                 self.app.log_to_gui("Management", f"无法获取节点 '{node_name}' 的当前 Commit ID。", "warn")
-                 # Even if we can't get the current commit, try fetching history
+                 # Not cached yet: show the refs already on disk before the network fetch, which then only adds new or moved refs
+                 cached_history, cached_commit = self.node_history.refresh(node_name, node_install_path)
+                 if cached_history:
+                     self._node_history_modal_versions_data = cached_history
+                     self._node_history_modal_node_name = node_name
+                     self._node_history_modal_node_path = node_install_path
+                     self._node_history_modal_current_commit = cached_commit
+                     self.app.root.after(0, self._show_node_history_modal)
+                     self.app.log_to_gui("Management", f"已显示节点 '{node_name}' 的本地历史 ({len(cached_history)} 条记录)，后台获取最新版本...", "info")
+                 else:
+                     self.app.log_to_gui("Management", f"正在获取节点 '{node_name}' 的版本历史...", "info")
 
              # Ensure origin remote exists and is correct before fetching history
-             # Find the correct repo_url from cached list (local_nodes_only) if available, otherwise try reading from local git config
-             found_node_info = next((node for node in self.local_nodes_only if node.get("name") == node_name), None)
+             # Find the correct repo_url from the cached catalog if available, otherwise try reading from local git config
+             found_node_info = self.catalog.find_local(node_name)
              repo_url = found_node_info.get("repo_url") if found_node_info else None
 
              if not repo_url or repo_url in ("本地安装，无Git信息", "无法获取远程 URL", "本地安装", "N/A", "无远程仓库"):
@@ -1466,6 +1804,8 @@ class ManagementTab:
                  # After ensuring remote is set, fetch
                  if self.app.stop_event_set(): # Use the getter method
                      raise threading.ThreadExit
+                 # The history list needs every commit and branch; deepen shallow installs first
+                 self._ensure_full_history(node_name, node_install_path)
                  self.app.log_to_gui("Management", f"执行 Git fetch origin --prune --tags -f for '{node_name}'...", "info")
                  # Increase timeout slightly for fetch
                  # Use app instance method
@@ -1483,95 +1823,19 @@ class ManagementTab:
                  self.app.root.after(0, self._cleanup_modal_state)
                  return
 
-             # Get all local and fetched remote references (branches, tags, HEAD) with their commits and dates
-             # Format: %(refname) %(objectname) %(committerdate:iso-strict) %(contents:subject)
-             # Use full refname to distinguish local/remote/tags
-             # Added %(contents:subject) to get commit message for description
-             log_cmd = ["for-each-ref", "refs/", "--sort=-committerdate", "--format=%(refname) %(objectname) %(committerdate:iso-strict) %(contents:subject)"]
-             # Use app instance method
-             history_output, _, rc_history = self.app._run_git_command(log_cmd, cwd=node_install_path, timeout=60)
-
-             if rc_history != 0:
-                  self.app.log_to_gui("Management", f"获取 Git 历史失败: {history_output.strip()}", "error")
-                  self.app.log_to_gui("Management", "无法获取节点历史。", "error")
-             else:
-                  processed_commits = set() # To avoid duplicates for the same commit reachable by multiple refs
-                  # Parse history output
-                  for line in history_output.splitlines():
-                       parts = line.split(' ', 3) # Split into refname, commit_id, date_iso, subject (optional)
-                       if len(parts) >= 3:
-                           refname, commit_id, date_iso = parts[0], parts[1], parts[2]
-                           description = parts[3].strip() if len(parts) == 4 else ""
-
-                           # Skip if we've already listed this commit hash
-                           if commit_id in processed_commits:
-                                continue
-
-                           ref_type = "commit" # Default type
-                           display_name = commit_id[:8] # Default display name is short commit ID
-
-                           if refname == "HEAD":
-                                # Find the symbolic ref for HEAD if possible to show local branch name using app instance method
-                                head_sym_ref_out, _, _ = self.app._run_git_command(["symbolic-ref", "-q", "--short", "HEAD"], cwd=node_install_path, timeout=2, log_output=False)
-                                if head_sym_ref_out:
-                                    ref_type = "branch (HEAD)"
-                                    display_name = head_sym_ref_out.strip()
-                                else: # Detached HEAD
-                                    ref_type = "commit (HEAD)"
-                                    # display_name remains commit_id[:8] or set below
-
-                                description = f"HEAD - {description}" # Add HEAD marker to description
-                           elif refname.startswith("refs/heads/"):
-                                ref_type = "branch"
-                                display_name = refname.replace("refs/heads/", "")
-                           elif refname.startswith("refs/remotes/origin/"):
-                                ref_type = "branch (remote)" # Indicate remote branch
-                                display_name = refname.replace("refs/remotes/origin/", "")
-                                if "HEAD" in display_name: # Skip remote HEAD alias more robustly
-                                     continue
-                           elif refname.startswith("refs/tags/"):
-                                ref_type = "tag"
-                                display_name = refname.replace("refs/tags/", "")
-                                description = f"TAG - {description}" # Add TAG marker to description
-
-                           history_data.append({"type": ref_type, "name": display_name, "commit_id": commit_id, "date_iso": date_iso, "description": description})
-                           processed_commits.add(commit_id)
-
-             # Sort the history data (MOD1: Using custom comparison via app instance method)
-             history_data.sort(key=cmp_to_key(self.app._compare_versions_for_sort))
-
-             # --- Add current local commit if not already in the list (e.g., local-only commits) ---
-             if current_local_commit and current_local_commit not in processed_commits:
-                  self.app.log_to_gui("Management", "获取当前本地 Commit 信息...", "info")
-                  # Use app instance methods
-                  head_date_stdout, _, rc_head_date = self.app._run_git_command(["log", "-1", "--format=%ci", "HEAD"], cwd=node_install_path, timeout=5, log_output=False)
-                  head_subject_stdout, _, rc_head_subject = self.app._run_git_command(["log", "-1", "--format=%s", "HEAD"], cwd=node_install_path, timeout=5, log_output=False)
-                  head_date_iso = head_date_stdout.strip() if rc_head_date == 0 else None
-                  head_description = head_subject_stdout.strip() if rc_head_subject == 0 else "当前工作目录"
-                  # Parse date safely via app instance method
-                  date_obj = self.app._parse_iso_date_for_sort(head_date_iso)
-                  final_date_iso = date_obj.isoformat() if date_obj else datetime.now(timezone.utc).isoformat()
-
-                  # Determine type (detached HEAD or local branch not tracking remote) using app instance method
-                  head_sym_ref_out, _, rc_head_sym_ref = self.app._run_git_command(["symbolic-ref", "-q", "--short", "HEAD"], cwd=node_install_path, timeout=2, log_output=False)
-                  head_type = "commit (HEAD)" if rc_head_sym_ref != 0 else "branch (local)"
-                  head_name = head_sym_ref_out.strip() if head_type == "branch (local)" else f"Detached at {current_local_commit[:8]}"
-
-                  history_data.append({"type": head_type, "name": head_name, "commit_id": current_local_commit, "date_iso": final_date_iso, "description": head_description})
-                  self.app.log_to_gui("Management", f"添加当前本地 HEAD ({current_local_commit[:8]}) 到列表。", "info")
-
-                  # Re-sort to include the added local HEAD using app instance method
-                  history_data.sort(key=cmp_to_key(self.app._compare_versions_for_sort))
-
-
-             self._node_history_modal_versions_data = history_data # Store in the designated variable
-             self._node_history_modal_node_name = node_name
-             self._node_history_modal_node_path = node_install_path
-             self._node_history_modal_current_commit = current_local_commit # Full local commit ID
-
+             # Merge the fetched refs into the node's cache (only new or moved refs are read in detail)
+             history_data, current_local_commit = self.node_history.refresh(node_name, node_install_path)
              self.app.log_to_gui("Management", f"节点 '{node_name}' 版本历史获取完成。找到 {len(history_data)} 条记录。", "info")
-             # Show modal in GUI thread
-             self.app.root.after(0, self._show_node_history_modal)
+             if cached_history:
+                 # The modal already shows the cached list; redraw it if it is still open for this node
+                 self.app.root.after(0, lambda name=node_name, data=history_data, commit=current_local_commit: self._reload_node_history_modal(name, data, commit))
+             else:
+                 self._node_history_modal_versions_data = history_data # Store in the designated variable
+                 self._node_history_modal_node_name = node_name
+                 self._node_history_modal_node_path = node_install_path
+                 self._node_history_modal_current_commit = current_local_commit # Full local commit ID
+                 # Show modal in GUI thread
+                 self.app.root.after(0, self._show_node_history_modal)
 
          except threading.ThreadExit:
               self.app.log_to_gui("Management", f"节点 '{node_name}' 历史获取任务已取消。", "warn")
@@ -1580,6 +1844,8 @@ class ManagementTab:
          except Exception as e:
              error_msg = f"获取节点 '{node_name}' 版本历史失败: {e}"
              self.app.log_to_gui("Management", error_msg, "error")
+             if cached_history:
+                  return # Keep showing the cached list
              # Clean up state and show error in GUI thread
              self.app.root.after(0, self._cleanup_modal_state)
              self.app.root.after(0, lambda msg=error_msg: messagebox.showerror("获取历史失败", msg, parent=self.app.root))
@@ -1600,8 +1866,6 @@ class ManagementTab:
             return
 
         node_name = self._node_history_modal_node_name
-        history_data = self._node_history_modal_versions_data # Use stored data
-        current_commit = self._node_history_modal_current_commit # Full local commit ID
 
         modal_window = Toplevel(self.app.root)
         self.app.root.eval(f'tk::PlaceWindow {str(modal_window)} center') # Center the modal
@@ -1617,26 +1881,40 @@ class ManagementTab:
         self._node_history_modal_window = modal_window # Store reference
 
 
-        # Use a single frame to hold header and canvas/scrollbar for items
+        # Use a single frame to hold the filter bar, header and the virtualized item list
         # Use app instance constant
         main_modal_frame = ttk.Frame(modal_window, style='Modal.TFrame', padding=10)
         main_modal_frame.grid(row=0, column=0, sticky="nsew")
-        main_modal_frame.rowconfigure(1, weight=1) # Allow canvas row to expand
-        main_modal_frame.columnconfigure(0, weight=1) # Allow canvas col to expand
+        main_modal_frame.rowconfigure(2, weight=1) # Allow list row to expand
+        main_modal_frame.columnconfigure(0, weight=1) # Allow list col to expand
+
+        # --- Filter Bar --- (type-ahead name/commit filter, date range, ref type)
+        filter_frame = ttk.Frame(main_modal_frame, style='Modal.TFrame', padding=(0, 0, 0, 6))
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+        filter_frame.columnconfigure(1, weight=1)
+        name_filter_var = tk.StringVar()
+        date_from_var = tk.StringVar()
+        date_to_var = tk.StringVar()
+        ref_type_var = tk.StringVar(value=next(iter(REF_TYPE_FILTERS)))
+        ttk.Label(filter_frame, text="筛选:", style='TLabel').grid(row=0, column=0, sticky='w', padx=(0, 5))
+        name_filter_entry = ttk.Entry(filter_frame, textvariable=name_filter_var, style='TEntry')
+        name_filter_entry.grid(row=0, column=1, sticky='ew', padx=5)
+        ttk.Label(filter_frame, text="日期(YYYY-MM-DD):", style='TLabel').grid(row=0, column=2, sticky='w', padx=5)
+        ttk.Entry(filter_frame, textvariable=date_from_var, width=11, style='TEntry').grid(row=0, column=3, sticky='w')
+        ttk.Label(filter_frame, text="~", style='TLabel').grid(row=0, column=4, sticky='w', padx=3)
+        ttk.Entry(filter_frame, textvariable=date_to_var, width=11, style='TEntry').grid(row=0, column=5, sticky='w')
+        ttk.Combobox(filter_frame, textvariable=ref_type_var, values=list(REF_TYPE_FILTERS), width=9, style='TCombobox', state="readonly").grid(row=0, column=6, sticky='w', padx=5)
+        match_count_label = ttk.Label(filter_frame, text="", style='TLabel', anchor=tk.E, width=12)
+        match_count_label.grid(row=0, column=7, sticky='e', padx=(5, 0))
 
 
         # --- Header Row --- Style and alignment confirmed/refined
         # Use app instance constant
         header_frame = ttk.Frame(main_modal_frame, style='TabControl.TFrame', padding=(0, 5, 0, 8)) # MOD1: Use TabControl BG for header
-        header_frame.grid(row=0, column=0, columnspan=2, sticky="ew") # MOD1: Span both canvas and potential scrollbar column
-        # MOD1: Adjusted column weights/minsizes for visual similarity to Nodes tab Treeview
-        # Columns: Version (Name+Type), Status, Commit ID, Date, Action
-        # Assign weights to distribute extra space proportionally
-        header_frame.columnconfigure(0, weight=4, minsize=250) # Version Name (wider)
-        header_frame.columnconfigure(1, weight=1, minsize=80)  # Status
-        header_frame.columnconfigure(2, weight=1, minsize=100) # Commit ID
-        header_frame.columnconfigure(3, weight=1, minsize=110) # Date
-        header_frame.columnconfigure(4, weight=0, minsize=80)  # Button (fixed size)
+        header_frame.grid(row=1, column=0, columnspan=2, sticky="ew") # MOD1: Span both list and scrollbar column
+        # Columns: Version (Name+Type), Status, Commit ID, Date, Action (same weights/minsizes as the rows)
+        for column, weight, minsize in HISTORY_COLUMNS:
+            header_frame.columnconfigure(column, weight=weight, minsize=minsize)
 
         # MOD1: Use ModalHeader style, ensure alignment
         ttk.Label(header_frame, text="版本", style='ModalHeader.TLabel', anchor=tk.W).grid(row=0, column=0, sticky='w', padx=5)
@@ -1646,154 +1924,45 @@ class ManagementTab:
         ttk.Label(header_frame, text="操作", style='ModalHeader.TLabel', anchor=tk.CENTER).grid(row=0, column=4, sticky='ew', padx=(5,10))
 
 
-        # --- Scrollable Item List ---
-        # FIX 1: Removed style='Modal.TCanvas' as tk.Canvas doesn't support it.
-        # Use app instance constants
-        canvas = tk.Canvas(main_modal_frame, bg=self.app.TEXT_AREA_BG, highlightthickness=1, highlightbackground=self.app.BORDER_COLOR, borderwidth=0) # Use bg directly
-        scrollbar = ttk.Scrollbar(main_modal_frame, orient=tk.VERTICAL, command=canvas.yview)
-        # scrollable_frame will contain the actual row frames
-        # Use app instance constant
-        scrollable_frame = ttk.Frame(canvas, style='Modal.TFrame')
-
-        # Bind the scrollable frame's size changes to update the canvas scrollregion
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        # Create the window on the canvas that holds the scrollable frame
-        canvas_window = canvas.create_window((0, 0), window=scrollable_frame, anchor="nw") # Remove width=1, let it determine size
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.grid(row=1, column=0, sticky="nsew")
-        scrollbar.grid(row=1, column=1, sticky="ns")
-
-        # Bind canvas width changes to the scrollable frame's width
-        # This ensures the scrollable_frame fills the canvas width horizontally
-        canvas.bind('<Configure>', lambda e: canvas.itemconfigure(canvas_window, width=e.width))
-
-
-        # Configure columns of the scrollable frame to match header
-        # FIX 2: Configure columns *only* on the scrollable_frame.
-        # These weights and minsizes will govern the width of the columns for ALL rows placed inside scrollable_frame.
-        scrollable_frame.columnconfigure(0, weight=4, minsize=250) # Version Name
-        scrollable_frame.columnconfigure(1, weight=1, minsize=80)  # Status
-        scrollable_frame.columnconfigure(2, weight=1, minsize=100) # Commit ID
-        scrollable_frame.columnconfigure(3, weight=1, minsize=110) # Date
-        scrollable_frame.columnconfigure(4, weight=0, minsize=80)  # Button
-
-
-        # Populate with history items using new styles
-        for i, item_data in enumerate(history_data):
-             # Ensure necessary keys exist with default empty strings if missing
-             item_data.setdefault('type', '未知')
-             item_data.setdefault('name', 'N/A')
-             item_data.setdefault('commit_id', 'N/A')
-             item_data.setdefault('date_iso', '')
-             item_data.setdefault('description', 'N/A')
-
-             # Determine styles for alternating backgrounds
-             row_frame_style = f'ModalRow{"Odd" if i % 2 == 0 else "Even"}.TFrame'
-             label_style = f'ModalRow{"Odd" if i % 2 == 0 else "Even"}.TLabel'
-             highlight_style = f'ModalRow{"Odd" if i % 2 == 0 else "Even"}Highlight.TLabel'
-
-             # Create a frame for this row to hold the background color and contain the widgets
-             row_frame = ttk.Frame(scrollable_frame, style=row_frame_style, padding=(0, 3)) # Keep padding here
-             # FIX 2: Grid row_frame into scrollable_frame, spanning ALL columns
-             row_frame.grid(row=i, column=0, columnspan=5, sticky="ew", padx=0, pady=0) # No padx/pady on the row_frame itself
-
-             # FIX 2: DO NOT configure columns on row_frame itself.
-             # row_frame.columnconfigure(...) <-- REMOVED
-             # MODIFICATION: Configure columns on row_frame to match the header
-             row_frame.columnconfigure(0, weight=4, minsize=250) # Version Name
-             row_frame.columnconfigure(1, weight=1, minsize=80)  # Status
-             row_frame.columnconfigure(2, weight=1, minsize=100) # Commit ID
-             row_frame.columnconfigure(3, weight=1, minsize=110) # Date
-             row_frame.columnconfigure(4, weight=0, minsize=80)  # Button
+        # --- Virtualized Item List ---
+        # Only the rows that fit the window exist as widgets; scrolling re-binds them to other entries
+        version_list = VirtualHistoryList(main_modal_frame, self.app, lambda c_id, win=modal_window, name=node_name: self._on_modal_switch_confirm(win, name, c_id))
+        version_list.grid(row=2)
+        list_state = {"index": None}
 
+        def apply_filter(*_):
+            index = list_state["index"]
+            if index is None or not modal_window.winfo_exists():
+                return
+            positions = index.filter(name_filter_var.get(), date_from_var.get(), date_to_var.get(), REF_TYPE_FILTERS.get(ref_type_var.get()))
+            version_list.set_items(index, positions, self._node_history_modal_current_commit)
+            match_count_label.config(text=f"{len(positions)} / {len(index.entries)}")
 
-             try:
-                 date_str = item_data['date_iso']
-                 # Parse date safely via app instance method
-                 date_obj = self.app._parse_iso_date_for_sort(date_str)
-                 date_display = date_obj.strftime('%Y-%m-%d') if date_obj else ("解析失败" if date_str else "无日期")
-             except Exception:
-                 date_display = "日期错误"
-
-             commit_id = item_data['commit_id']
-             version_name = item_data['name']
-             version_type = item_data['type']
-             # description = item_data['description'] # Description is not displayed in columns in the screenshot
-
-             # Concatenate type and name for the first column (Version)
-             version_display = f"{version_type} / {version_name}"
-
-             status_text = ""
-             status_label_actual_style = label_style # Default style
-             # Compare full commit IDs for "当前" status
-             if current_commit and commit_id == current_commit:
-                  status_text = "当前"
-                  status_label_actual_style = highlight_style # Use highlight style
-
-
-             # Add labels and button, gridding them *into the row_frame*
-             # FIX 2: Ensure widgets within row_frame are gridded into columns 0 through 4.
-             # Their size and placement within these columns will be influenced by the
-             # *parent* scrollable_frame's column configuration and their own sticky settings.
-             # MODIFICATION: Grid into row_frame's columns
-             # Use app instance constant for font
-             version_label_widget = ttk.Label(row_frame, text=version_display, style=label_style, anchor=tk.W, wraplength=240) # Use fixed wrap for simplicity
-             # MODIFICATION: Grid into row_frame, column 0
-             version_label_widget.grid(row=0, column=0, sticky='w', padx=(5,0), pady=1) # Use padx for internal horizontal spacing
-
-             status_label_widget = ttk.Label(row_frame, text=status_text, style=status_label_actual_style, anchor=tk.CENTER)
-             # MODIFICATION: Grid into row_frame, column 1
-             status_label_widget.grid(row=0, column=1, sticky='ew', padx=5, pady=1) # Sticky EW for centering
-
-             # MODIFICATION: Grid into row_frame, column 2
-             ttk.Label(row_frame, text=commit_id[:8], style=label_style, anchor=tk.W).grid(row=0, column=2, sticky='w', padx=5, pady=1)
-             # MODIFICATION: Grid into row_frame, column 3
-             ttk.Label(row_frame, text=date_display, style=label_style, anchor=tk.W).grid(row=0, column=3, sticky='w', padx=5, pady=1)
-             # Adding a description label here if needed
-             # ttk.Label(row_frame, text=description, style=label_style, anchor=tk.W, wraplength=300).grid(row=0, column=4, sticky='w', padx=5, pady=1) # Example if adding description col
-
-
-             switch_btn = ttk.Button(row_frame, text="切换", style="Modal.TButton", width=6,
-                                     command=lambda c_id=commit_id, win=modal_window, name=node_name: self._on_modal_switch_confirm(win, name, c_id)) # Pass node_name and modal_window
-             # MODIFICATION: Grid into row_frame, column 4
-             switch_btn.grid(row=0, column=4, sticky='e', padx=(5, 10), pady=1) # Align button right
-
-             if status_text == "当前":
-                  switch_btn.config(state=tk.DISABLED)
-
-        # Mousewheel scrolling
-        def _on_mousewheel(event):
-             scroll_amount = 0
-             # Calculate scroll units based on OS/event type
-             if platform.system() == "Windows":
-                 # Windows event.delta is 120 per notch
-                 scroll_amount = int(-1*(event.delta/120))
-             elif platform.system() == "Darwin": # macOS uses event.delta directly
-                 scroll_amount = int(-1 * event.delta) # Adjust sensitivity if needed
-             else: # Linux, event.num indicates button 4 (up) or 5 (down)
-                 if event.num == 4:
-                     scroll_amount = -1
-                 elif event.num == 5:
-                     scroll_amount = 1
-             # Check if canvas exists before scrolling
-             if canvas and canvas.winfo_exists():
-                canvas.yview_scroll(scroll_amount, "units")
-
-        # Bind mousewheel to canvas and its children for broader coverage
-        # Bind directly to the canvas first, which often covers the area
-        if canvas and canvas.winfo_exists():
-            canvas.bind("<MouseWheel>", _on_mousewheel)
-            # Optionally bind to the scrollable frame *inside* the canvas
-            if scrollable_frame and scrollable_frame.winfo_exists():
-                 scrollable_frame.bind("<MouseWheel>", _on_mousewheel)
-            # Binding to individual row frames/labels is usually not necessary and adds complexity
+        def rerender():
+            # New data (e.g. after the background fetch): rebuild the index, keep the filters
+            list_state["index"] = HistoryIndex(self._node_history_modal_versions_data, self.app._parse_iso_date_for_sort)
+            apply_filter()
 
+        for var in (name_filter_var, date_from_var, date_to_var, ref_type_var):
+            var.trace_add("write", apply_filter)
+        self._node_history_modal_rerender = rerender
+        rerender()
+        name_filter_entry.focus_set()
 
         # Keep the modal open until explicitly closed by the user (or WM_DELETE_WINDOW protocol)
         # modal_window.wait_window() # Removed, as WM_DELETE_WINDOW protocol handles cleanup
 
 
+    # Called by _node_history_fetch_task after a cached list was shown and the fetch finished
+    def _reload_node_history_modal(self, node_name, history_data, current_commit):
+        """Replaces the list of an open history modal with refreshed data. Runs in GUI thread."""
+        if not self.is_modal_open() or self._node_history_modal_node_name != node_name or not self._node_history_modal_rerender:
+            return # Closed (or reopened for another node) while fetching; the cache is updated anyway
+        self._node_history_modal_versions_data = history_data
+        self._node_history_modal_current_commit = current_commit
+        self._node_history_modal_rerender()
+
+
     # Called by modal closing protocol and task cancellations
     def _cleanup_modal_state(self, modal_window=None):
          """Cleans up modal-related instance variables and destroys the window."""
@@ -1825,6 +1994,7 @@ class ManagementTab:
 
          # Always clear the reference after attempting destruction
          self._node_history_modal_window = None
+         self._node_history_modal_rerender = None
          self.app.log_to_gui("Management", "Modal state variables cleared.", "info")
 
          # Schedule a UI state update to re-enable buttons (Bug 3 Fix)
@@ -1865,11 +2035,58 @@ class ManagementTab:
             return # User cancelled, leave modal open
 
         self.app.log_to_gui("Management", f"将节点 '{modal_node_name}' 切换到版本 {target_ref[:8]} 任务添加到队列...", "info")
-        # Queue the switch task method of this module instance
-        self.app.update_task_queue.put((self._switch_node_to_ref_task, [modal_node_name, modal_node_path, target_ref], {})) # Pass correct arguments
+        # Queue the switch task method of this module instance behind the dependency pre-check; the modal stays open
+        # until it is queued, so a cancelled pre-check lets another version be chosen
+        self.app._queue_after_dependency_precheck(
+            [(modal_node_name, modal_node_path, target_ref)], f"切换节点 '{modal_node_name}'",
+            (self._switch_node_to_ref_task, [modal_node_name, modal_node_path, target_ref], {}), # Pass correct arguments
+            parent=modal_window, on_queued=lambda: self._cleanup_modal_state(modal_window)) # Close modal after queuing task
+
 
-        self._cleanup_modal_state(modal_window) # Close modal after queuing task
-        self.app._update_ui_state() # Update UI state to show task running
+    def _checkout_node_ref(self, node_name, node_install_path, target_ref):
+         """Git part of a version switch: checkout --force target_ref (fetching it if needed) and update submodules. Raises on failure."""
+         if not os.path.isdir(node_install_path) or not os.path.exists(os.path.join(node_install_path, ".git")):
+              raise Exception(f"节点目录不是有效的 Git 仓库: {node_install_path}")
+
+         # Check for local changes and warn/force checkout using app instance method
+         stdout_status, _, _ = self.app._run_git_command(["status", "--porcelain"], cwd=node_install_path, timeout=10, log_output=False)
+         if stdout_status.strip():
+              self.app.log_to_gui("Management", f"节点 '{node_name}' 存在未提交的本地修改，将通过 checkout --force 覆盖。", "warn")
+
+         if self.app.stop_event_set(): # Use the getter method
+             raise threading.ThreadExit
+
+         # Ref not present locally: pull it in from the mirror cache over the local filesystem
+         _, _, rc_has_ref = self.app._run_git_command(["cat-file", "-e", f"{target_ref}^{{commit}}"], cwd=node_install_path, timeout=10, log_output=False)
+         if rc_has_ref != 0:
+             stdout_url, _, rc_url = self.app._run_git_command(["remote", "get-url", "origin"], cwd=node_install_path, timeout=10, log_output=False)
+             if rc_url == 0 and stdout_url.strip() and self.app.repo_cache.fetch_from_mirror(stdout_url.strip(), node_install_path):
+                 self.app.log_to_gui("Management", f"已从本地镜像缓存获取引用 {target_ref[:8]}。", "info")
+             # Older refs of a shallow install are only reachable after deepening
+             _, _, rc_has_ref = self.app._run_git_command(["cat-file", "-e", f"{target_ref}^{{commit}}"], cwd=node_install_path, timeout=10, log_output=False)
+             if rc_has_ref != 0:
+                 self._ensure_full_history(node_name, node_install_path)
+
+         # Checkout the target reference (commit hash, tag, branch name, remote branch name)
+         self.app.log_to_gui("Management", f"执行 Git checkout --force {target_ref[:8]}...", "info")
+         # Use --force to discard local changes if any and handle detached HEAD gracefully
+         # Use app instance method
+         _, stderr_checkout, rc_checkout = self.app._run_git_command(["checkout", "--force", target_ref], cwd=node_install_path, timeout=60)
+         if rc_checkout != 0:
+             raise Exception(f"Git checkout 失败: {stderr_checkout.strip()}")
+
+         self.app.log_to_gui("Management", f"Git checkout 完成 (引用: {target_ref[:8]}).", "info")
+
+         if self.app.stop_event_set(): # Use the getter method
+             raise threading.ThreadExit
+
+         # Update submodules if .gitmodules exists using app instance method
+         if os.path.exists(os.path.join(node_install_path, ".gitmodules")):
+             self.app.log_to_gui("Management", f"执行 Git submodule update for '{node_name}'...", "info")
+             # Use app instance method
+             _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=node_install_path, timeout=180)
+             if rc_sub != 0:
+                 self.app.log_to_gui("Management", f"Git submodule update 失败: {stderr_sub.strip()}", "warn")
 
 
     # Called by _on_modal_switch_confirm
@@ -1881,72 +2098,21 @@ class ManagementTab:
          self.app.log_to_gui("Management", f"正在将节点 '{node_name}' 切换到版本 (引用: {target_ref[:8]})...", "info")
 
          try:
-             if not os.path.isdir(node_install_path) or not os.path.exists(os.path.join(node_install_path, ".git")):
-                  raise Exception(f"节点目录不是有效的 Git 仓库: {node_install_path}")
-
-             # Check for local changes and warn/force checkout using app instance method
-             stdout_status, _, _ = self.app._run_git_command(["status", "--porcelain"], cwd=node_install_path, timeout=10, log_output=False)
-             if stdout_status.strip():
-                  self.app.log_to_gui("Management", f"节点 '{node_name}' 存在未提交的本地修改，将通过 checkout --force 覆盖。", "warn")
+             self._checkout_node_ref(node_name, node_install_path, target_ref)
 
              if self.app.stop_event_set(): # Use the getter method
                  raise threading.ThreadExit
 
-             # Checkout the target reference (commit hash, tag, branch name, remote branch name)
-             self.app.log_to_gui("Management", f"执行 Git checkout --force {target_ref[:8]}...", "info")
-             # Use --force to discard local changes if any and handle detached HEAD gracefully
-             # Use app instance method
-             _, stderr_checkout, rc_checkout = self.app._run_git_command(["checkout", "--force", target_ref], cwd=node_install_path, timeout=60)
-             if rc_checkout != 0:
-                 raise Exception(f"Git checkout 失败: {stderr_checkout.strip()}")
-
-             self.app.log_to_gui("Management", f"Git checkout 完成 (引用: {target_ref[:8]}).", "info")
-
-             if self.app.stop_event_set(): # Use the getter method
-                 raise threading.ThreadExit
-
-             # Update submodules if .gitmodules exists using app instance method
-             if os.path.exists(os.path.join(node_install_path, ".gitmodules")):
-                 self.app.log_to_gui("Management", f"执行 Git submodule update for '{node_name}'...", "info")
-                 # Use app instance method
-                 _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=node_install_path, timeout=180)
-                 if rc_sub != 0:
-                     self.app.log_to_gui("Management", f"Git submodule update 失败: {stderr_sub.strip()}", "warn")
-
-             if self.app.stop_event_set(): # Use the getter method
-                 raise threading.ThreadExit
-
-             # Re-install Python dependencies if requirements.txt exists
-             python_exe = self.app.python_exe_var.get()
+             # Re-install Python dependencies (skipped when requirements.txt is unchanged since its last install)
              requirements_path = os.path.join(node_install_path, "requirements.txt")
-             if python_exe and os.path.isfile(python_exe) and os.path.isfile(requirements_path):
-                  self.app.log_to_gui("Management", f"执行 pip 安装节点依赖 for '{node_name}'...", "info")
-                  pip_cmd_base = [python_exe, "-m", "pip", "install", "-r", requirements_path, "--upgrade"]
-                  pip_cmd_extras = ["--extra-index-url", "https://download.pytorch.org/whl/cu118", "--extra-index-url", "https://download.pytorch.org/whl/cu121"]
-                  pip_cmd = pip_cmd_base + pip_cmd_extras
-                  is_venv = sys.prefix != sys.base_prefix
-                  # Check if the target python_exe is NOT within the launcher's base prefix (heuristic for standalone/portable env)
-                  try:
-                      relative_path_to_base = os.path.relpath(python_exe, sys.base_prefix)
-                      is_outside_launcher_base = relative_path_to_base.startswith('..') or os.path.isabs(relative_path_to_base)
-                  except ValueError:
-                      is_outside_launcher_base = True
-
-                  if platform.system() != "Windows" and not is_venv and is_outside_launcher_base:
-                       self.app.log_to_gui("Management", "目标Python路径可能非系统或虚拟环境安装，使用 --user 选项安装依赖。", "warn")
-                       pip_cmd.append("--user")
-
-                  pip_cmd.extend(["--no-cache-dir"])
-
-                  # Use app instance method
-                  _, stderr_pip, rc_pip = self.app._run_git_command(pip_cmd, cwd=node_install_path, timeout=180)
-                  if rc_pip != 0:
-                       self.app.log_to_gui("Management", f"Pip 安装节点依赖失败: {stderr_pip.strip()}", "error")
+             if os.path.isfile(requirements_path):
+                  self.app.log_to_gui("Management", f"检查节点依赖 for '{node_name}'...", "info")
+                  dep_result = self.app.dependency_manager.install({node_name: requirements_path})
+                  if not dep_result["ok"]:
                        # Show warning in GUI thread
                        self.app.root.after(0, lambda name=node_name: messagebox.showwarning("依赖安装失败", f"节点 '{name}' 的 Python 依赖可能安装失败。\n请查看日志。", parent=self.app.root))
-                  else:
-                       self.app.log_to_gui("Management", f"Pip 安装节点依赖完成.", "info")
 
+             self.app.bytecode_compiler.precompile({node_name: node_install_path})
              self.app.log_to_gui("Management", f"节点 '{node_name}' 已成功切换到版本 (引用: {target_ref[:8]})。", "info")
              # Show success message in GUI thread
              self.app.root.after(0, lambda name=node_name, ref=target_ref[:8]: messagebox.showinfo("切换完成", f"节点 '{name}' 已成功切换到版本: {ref}", parent=self.app.root))
@@ -1963,6 +2129,84 @@ class ManagementTab:
              self.app._queue_node_list_refresh()
 
 
+    # Called by app._queue_node_switch_or_show_history / app._queue_node_uninstall when several nodes are selected
+    def _batch_nodes_task(self, operations):
+        """
+        Task to install / switch / uninstall several nodes at once. Runs in worker thread.
+        operations: list of {"action": "install"|"switch"|"uninstall", "name", "path", "repo_url", "ref"}.
+        The git work of up to MAX_PARALLEL_NODE_OPS nodes runs concurrently; dependencies of all changed nodes are
+        installed in one pip run afterwards, followed by one precompile, one list refresh and one summary dialog.
+        """
+        if self.app.stop_event_set(): # Use the getter method
+            self.app.log_to_gui("Management", "批量节点操作任务已取消 (停止信号)。", "warn")
+            return
+        self.app.log_to_gui("Management", f"开始批量处理 {len(operations)} 个节点 (最多 {MAX_PARALLEL_NODE_OPS} 个同时进行)...", "info")
+        self.app.snapshots.capture(f"批量处理 {len(operations)} 个节点之前")
+        started = time.time()
+        done_counts = {action: 0 for action in BATCH_NODE_ACTIONS}
+        failed_nodes = []
+        pending_requirements = {} # node name -> requirements.txt of installed/switched nodes
+        changed_paths = {} # node name -> directory of installed/switched nodes (bytecode precompile)
+
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_NODE_OPS, thread_name_prefix="NodeBatch") as executor:
+                futures = [(op, executor.submit(self._run_batch_node_operation, op)) for op in operations]
+                for op, future in futures:
+                    node_name, action_label = op["name"], BATCH_NODE_ACTIONS[op["action"]]
+                    try:
+                        warning = future.result()
+                    except Exception as e:
+                        self.app.log_to_gui("Management", f"节点 '{node_name}' {action_label}失败: {e}", "error")
+                        failed_nodes.append(f"{node_name} ({action_label}失败)")
+                        continue
+                    done_counts[op["action"]] += 1
+                    if warning:
+                        failed_nodes.append(f"{node_name} ({warning})")
+                    if op["action"] != "uninstall":
+                        requirements_path = os.path.join(op["path"], "requirements.txt")
+                        if os.path.isfile(requirements_path):
+                            pending_requirements[node_name] = requirements_path
+                        changed_paths[node_name] = op["path"]
+
+            # One pip resolution for every changed node instead of one per node
+            if pending_requirements and not self.app.stop_event_set():
+                self.app.log_to_gui("Management", f"合并安装 {len(pending_requirements)} 个节点的依赖...", "info")
+                dep_result = self.app.dependency_manager.install(pending_requirements)
+                failed_nodes.extend(f"{name} (依赖安装失败)" for name in dep_result["failed"])
+            if changed_paths and not self.app.stop_event_set():
+                self.app.bytecode_compiler.precompile(changed_paths)
+        finally:
+            self.app._queue_node_list_refresh()
+
+        # --- Batch Summary ---
+        counts_text = "，".join(f"{BATCH_NODE_ACTIONS[action]} {count} 个" for action, count in done_counts.items() if count) or "无"
+        self.app.log_to_gui("Management", f"批量节点操作完成 ({counts_text})，耗时 {time.time() - started:.0f} 秒。", "info")
+        final_message = f"批量节点操作完成。\n成功: {counts_text}。"
+        if failed_nodes:
+            final_message += f"\n\n失败/警告节点 ({len(failed_nodes)} 个):\n- " + "\n- ".join(failed_nodes)
+            self.app.root.after(0, lambda msg=final_message: messagebox.showwarning("批量操作完成 (有失败)", msg, parent=self.app.root))
+        else:
+            self.app.root.after(0, lambda msg=final_message: messagebox.showinfo("批量操作完成", msg, parent=self.app.root))
+
+    def _run_batch_node_operation(self, op):
+        """Git/file part of one batch operation. Runs in a pool thread; raises on failure, returns a warning text or None."""
+        if self.app.stop_event_set(): # Use the getter method
+            raise Exception("已取消")
+        action, node_name, node_path = op["action"], op["name"], op["path"]
+        self.app.log_to_gui("Management", f"[批量] {BATCH_NODE_ACTIONS[action]}节点 '{node_name}'...", "info")
+        if action == "install":
+            if not self._clone_node(node_name, node_path, op["repo_url"], op["ref"]):
+                return f"已安装，但切换到 {op['ref'][:8]} 失败"
+        elif action == "switch":
+            self._checkout_node_ref(node_name, node_path, op["ref"])
+        elif action == "uninstall":
+            if not os.path.isdir(node_path):
+                raise Exception(f"节点目录不存在: {node_path}")
+            self._remove_node_dir(node_name, node_path)
+        self.app.log_to_gui("Management", f"[批量] 节点 '{node_name}' {BATCH_NODE_ACTIONS[action]}完成。", "info")
+        return None
+
+
     # Helper methods for launcher.py to get state
     def get_selected_main_body_item_data(self):
          """Returns the item data for the currently selected main body version."""
@@ -1982,6 +2226,12 @@ class ManagementTab:
                    return self.nodes_tree.item(selected_item, 'values')
          return None
 
+    def get_selected_nodes_item_data(self):
+         """Returns the item data of every selected node (in list order) for batch actions."""
+         if hasattr(self, 'nodes_tree') and self.nodes_tree and self.nodes_tree.winfo_exists():
+              return [self.nodes_tree.item(item, 'values') for item in self.nodes_tree.selection()]
+         return []
+
     def get_nodes_search_term(self):
          """Returns the current text in the node search entry."""
          # Safely check if the Entry widget exists
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/mirrors.py
+# Mirror Selection Module (mirror registry, background latency/throughput probes, git insteadOf rewriting with failover)
+
+import os
+import time
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from ui_modules import history_store
+
+# Origin prefix -> probe path (relative to the prefix) and mirror prefixes serving the same paths.
+# Written to mirrors.json on first use; users can add or remove mirrors there. These are third-party proxies that see
+# and could alter the code they serve, so selection is off unless the user enables it (and trusts the list).
+DEFAULT_MIRROR_REGISTRY = {
+    "https://github.com/": {
+        "probe": "comfyanonymous/ComfyUI.git/info/refs?service=git-upload-pack",
+        "mirrors": ["https://ghfast.top/https://github.com/", "https://gh-proxy.com/https://github.com/", "https://kkgithub.com/"],
+    },
+    "https://raw.githubusercontent.com/": {
+        "probe": "ltdrdata/ComfyUI-Manager/main/custom-node-list.json",
+        "mirrors": ["https://ghfast.top/https://raw.githubusercontent.com/", "https://gh-proxy.com/https://raw.githubusercontent.com/", "https://raw.kkgithub.com/"],
+    },
+}
+PROBE_INTERVAL_SEC = 6 * 3600 # Measurements older than this are repeated
+PROBE_TIMEOUT_SEC = 8
+PROBE_MAX_BYTES = 512 * 1024 # Enough to measure throughput without downloading whole files
+MAX_PARALLEL_PROBES = 6
+ORIGIN_PREFERENCE = 1.5 # A mirror replaces the origin only if it is this much faster
+FAILOVER_COOLDOWN_SEC = 1800 # A mirror that failed is skipped this long (and re-measured)
+# Abort transfers that stall on a mirror instead of waiting for the full command timeout
+GIT_LOW_SPEED_LIMIT = 1000 # bytes/s
+GIT_LOW_SPEED_TIME = 30 # seconds
+NETWORK_GIT_COMMANDS = ("clone", "fetch", "pull", "ls-remote", "submodule")
+NETWORK_ERROR_MARKERS = ("unable to access", "could not resolve", "timed out", "failed to connect", "connection reset",
+                         "rpc failed", "early eof", "remote end hung up", "ssl", "http2", "502", "503", "504", "命令执行超时")
+
+
+def _host_label(prefix):
+    parts = urlsplit(prefix)
+    return parts.netloc + (parts.path.rstrip("/") if parts.path.strip("/") else "")
+
+
+class MirrorSelector:
+    """Picks the fastest healthy mirror per origin and rewrites git and HTTP downloads to it transparently."""
+    def __init__(self, app_instance, registry_file, probes_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging and config).
+            registry_file: JSON file mapping origin prefix -> {"probe", "mirrors"} (user-editable).
+            probes_file: JSON file mapping origin prefix -> {"time", "selected", "results": {prefix: {"ok", "latency_ms", "speed_kbps"}}}.
+        """
+        self.app = app_instance
+        self.registry_file = registry_file
+        self.probes_file = probes_file
+        self._lock = threading.Lock()
+        self._failed_until = {} # mirror prefix -> time until which it is skipped
+        self._wake = threading.Event()
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+    def is_enabled(self):
+        """Reads the mirror selection toggle from the app config on every call."""
+        return self.app.config.get("mirror_selection_enabled", "禁用") == "启用"
+
+    def registry(self):
+        """Loads the registry, writing the defaults the first time."""
+        if not os.path.exists(self.registry_file):
+            history_store.save_mapping(self.registry_file, DEFAULT_MIRROR_REGISTRY)
+        return history_store.load_mapping(self.registry_file) or DEFAULT_MIRROR_REGISTRY
+
+    # --- Selection ---
+    def _ranked(self, origin, excluded=(), results=None):
+        """Candidate prefixes for an origin, best first; unmeasured, failed or excluded mirrors are left out, the origin is always last at worst."""
+        if results is None:
+            results = history_store.load_mapping(self.probes_file).get(origin, {}).get("results", {})
+        now = time.time()
+        origin_speed = results.get(origin, {}).get("speed_kbps", 0) if results.get(origin, {}).get("ok") else 0
+        scored = []
+        for prefix, result in results.items():
+            if prefix == origin or prefix in excluded or not result.get("ok") or self._failed_until.get(prefix, 0) > now:
+                continue
+            if result.get("speed_kbps", 0) >= origin_speed * ORIGIN_PREFERENCE:
+                scored.append((result["speed_kbps"], prefix))
+        return [prefix for _, prefix in sorted(scored, reverse=True)] + [origin]
+
+    def selected_rewrites(self, excluded=()):
+        """{origin: mirror} for every origin whose best candidate is not the origin itself."""
+        if not self.is_enabled():
+            return {}
+        rewrites = {}
+        for origin in self.registry():
+            best = self._ranked(origin, excluded)[0]
+            if best != origin:
+                rewrites[origin] = best
+        return rewrites
+
+    def rewrite_url(self, url, excluded=()):
+        """Candidate URLs for a download, best mirror first and the original URL last."""
+        if self.is_enabled():
+            for origin in self.registry():
+                if url.startswith(origin):
+                    return [prefix + url[len(origin):] for prefix in self._ranked(origin, excluded)]
+        return [url]
+
+    def mark_failed(self, prefix):
+        """Skips a mirror for FAILOVER_COOLDOWN_SEC and asks the probe thread to measure again."""
+        with self._lock:
+            self._failed_until[prefix] = time.time() + FAILOVER_COOLDOWN_SEC
+        self._wake.set()
+
+    # --- Git / HTTP with failover ---
+    def run_git(self, command_list, run):
+        """
+        Runs a git command through run(args) with url.<mirror>.insteadOf=<origin> for the selected mirrors.
+        If it fails with a network error, the mirrors involved are marked failed and the command is retried
+        with the next candidates, ending with the plain origin URLs.
+        """
+        if not command_list or command_list[0] not in NETWORK_GIT_COMMANDS:
+            return run(command_list)
+        excluded = set()
+        while True:
+            rewrites = self.selected_rewrites(excluded)
+            if not rewrites:
+                return run(command_list)
+            config_args = []
+            for origin, mirror in rewrites.items():
+                config_args += ["-c", f"url.{mirror}.insteadOf={origin}"]
+            config_args += ["-c", f"http.lowSpeedLimit={GIT_LOW_SPEED_LIMIT}", "-c", f"http.lowSpeedTime={GIT_LOW_SPEED_TIME}"]
+            stdout, stderr, rc = run(config_args + command_list)
+            if rc == 0 or not any(marker in stderr.lower() for marker in NETWORK_ERROR_MARKERS):
+                return stdout, stderr, rc
+            # git names the rewritten URL in its error; blame all mirrors in use if it doesn't
+            failed = [mirror for mirror in rewrites.values() if _host_label(mirror) in stderr] or list(rewrites.values())
+            for mirror in failed:
+                self.mark_failed(mirror)
+                excluded.add(mirror)
+            self.app.log_to_gui("Mirrors", f"镜像 {', '.join(_host_label(m) for m in failed)} 出错 (git {command_list[0]})，切换到下一个候选重试。", "warn")
+
+    def http_get(self, url, timeout, stream=False):
+        """requests.get through the fastest mirror of the URL's origin, failing over on timeouts, connection errors and 5xx."""
+        candidates = self.rewrite_url(url)
+        for index, candidate in enumerate(candidates):
+            is_last = index == len(candidates) - 1
+            try:
+                response = requests.get(candidate, timeout=timeout, stream=stream)
+                if response.status_code < 500 or is_last:
+                    return response
+                response.close()
+                error = f"HTTP {response.status_code}"
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if is_last:
+                    raise
+                error = e
+            failed_prefix = next((prefix for prefix in self._all_prefixes() if candidate.startswith(prefix)), candidate)
+            self.mark_failed(failed_prefix)
+            self.app.log_to_gui("Mirrors", f"镜像 {_host_label(failed_prefix)} 下载失败 ({error})，切换到 {urlsplit(candidates[index + 1]).netloc}。", "warn")
+
+    def _all_prefixes(self):
+        prefixes = []
+        for origin, entry in self.registry().items():
+            prefixes += entry.get("mirrors", []) + [origin]
+        return sorted(prefixes, key=len, reverse=True) # Longest first, like git's insteadOf
+
+    # --- Probing ---
+    def start(self):
+        """Starts the probe thread (once)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._probe_loop, name="MirrorProbe", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        self._wake.set()
+
+    def _probe_loop(self):
+        while not self._stop_flag.is_set():
+            try:
+                if self.is_enabled():
+                    self.probe_all(force=self._wake.is_set())
+            except Exception as e:
+                print(f"[Mirrors WARNING] Probing mirrors failed: {e}")
+            self._wake.clear()
+            self._wake.wait(PROBE_INTERVAL_SEC / 6)
+
+    def probe_all(self, force=False):
+        """Measures every candidate of every origin whose results are stale (or all with force) and logs the selection."""
+        stored = history_store.load_mapping(self.probes_file)
+        now = time.time()
+        due = {origin: entry for origin, entry in self.registry().items()
+               if force or now - stored.get(origin, {}).get("probed_at", 0) >= PROBE_INTERVAL_SEC}
+        if not due:
+            return
+        jobs = [(origin, prefix, entry.get("probe", "")) for origin, entry in due.items() for prefix in [origin] + entry.get("mirrors", [])]
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_PROBES, thread_name_prefix="MirrorProbe") as executor:
+            measured = list(executor.map(lambda job: self._probe(job[1] + job[2]), jobs))
+
+        with self._lock:
+            stored = history_store.load_mapping(self.probes_file)
+            for (origin, prefix, _), result in zip(jobs, measured):
+                stored.setdefault(origin, {}).setdefault("results", {})[prefix] = result
+                if result["ok"]:
+                    self._failed_until.pop(prefix, None)
+            for origin, entry in due.items():
+                results = {prefix: result for prefix, result in stored[origin]["results"].items()
+                           if prefix == origin or prefix in entry.get("mirrors", [])}
+                stored[origin].update({"results": results, "selected": self._ranked(origin, results=results)[0],
+                                       "probed_at": now, "time": datetime.now().isoformat(timespec="seconds")})
+            history_store.save_mapping(self.probes_file, stored)
+
+        for origin in due:
+            selected = stored[origin]["selected"]
+            speeds = ", ".join(f"{_host_label(prefix)}: {result['speed_kbps']:.0f} KB/s / {result['latency_ms']:.0f} ms" if result["ok"] else f"{_host_label(prefix)}: 不可用"
+                               for prefix, result in stored[origin]["results"].items())
+            choice = "源站" if selected == origin else _host_label(selected)
+            self.app.log_to_gui("Mirrors", f"{_host_label(origin)} 使用 {choice} ({speeds})", "info")
+
+    def _probe(self, url):
+        """Time to first byte and throughput of up to PROBE_MAX_BYTES of one URL."""
+        started = time.time()
+        try:
+            with requests.get(url, stream=True, timeout=PROBE_TIMEOUT_SEC) as response:
+                latency = time.time() - started
+                if response.status_code != 200:
+                    return {"ok": False, "latency_ms": latency * 1000, "speed_kbps": 0, "error": f"HTTP {response.status_code}"}
+                received = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received >= PROBE_MAX_BYTES or time.time() - started > PROBE_TIMEOUT_SEC:
+                        break
+        except requests.exceptions.RequestException as e:
+            return {"ok": False, "latency_ms": (time.time() - started) * 1000, "speed_kbps": 0, "error": str(e)[:200]}
+        elapsed = max(time.time() - started, 0.001)
+        # Effective speed includes the connection setup, which dominates small git requests
+        return {"ok": received > 0, "latency_ms": latency * 1000, "speed_kbps": received / 1024 / elapsed}
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/node_catalog.py
+# Node Catalog Module (compact node records, maintained sort order, O(1) lookup by name and repository URL)
+
+import sys
+
+from ui_modules.repo_cache import normalize_mirror_key
+
+# Fields persisted in nodes_list.json and readable with record.get()/record[...] like the former node dicts
+# catalog_name: title of the catalog entry an installed node was joined to by repository (folder names often differ)
+NODE_FIELDS = ("name", "status", "local_id", "local_commit_full", "repo_info", "repo_url", "is_git", "remote_branch", "catalog_name")
+NODE_DEFAULTS = {"name": "N/A", "status": "未知", "local_id": "N/A", "local_commit_full": None, "repo_info": "N/A", "repo_url": "N/A", "is_git": False, "remote_branch": None, "catalog_name": None}
+
+
+def matches_search(node, search_term_value):
+    """Search filter of the nodes list: lowercase substring of name, repository URL or status."""
+    return search_term_value in node.get('name', '').lower() or \
+           search_term_value in node.get('repo_url', '').lower() or \
+           search_term_value in node.get('status', '').lower() or \
+           search_term_value in (node.get('catalog_name') or '').lower()
+
+
+class NodeRecord:
+    """One node of the list. Supports get()/[]/setdefault() so code written against the node dicts keeps working."""
+    __slots__ = NODE_FIELDS + ("name_lower", "repo_key")
+
+    def __init__(self, name, status="未知", local_id="N/A", local_commit_full=None, repo_info="N/A", repo_url="N/A", is_git=False, remote_branch=None, catalog_name=None):
+        self.name = name
+        # Values repeated across thousands of entries ("未安装", "在线目标: main", "main", "N/A") share one string each
+        self.status = sys.intern(status) if isinstance(status, str) else status
+        self.local_id = sys.intern(local_id) if isinstance(local_id, str) else local_id
+        self.local_commit_full = local_commit_full
+        self.repo_info = sys.intern(repo_info) if isinstance(repo_info, str) else repo_info
+        self.repo_url = repo_url
+        self.is_git = is_git
+        self.remote_branch = sys.intern(remote_branch) if isinstance(remote_branch, str) else remote_branch
+        self.catalog_name = catalog_name
+        self.name_lower = name.lower()
+        # Placeholders such as "无远程仓库" are not URLs and get no key
+        self.repo_key = normalize_mirror_key(repo_url) if is_git and isinstance(repo_url, str) and "/" in repo_url else None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data.get(field, NODE_DEFAULTS[field]) for field in NODE_FIELDS})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in NODE_FIELDS}
+
+    # --- Dict compatibility ---
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in NODE_FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in NODE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in NODE_FIELDS
+
+    def setdefault(self, key, default=None):
+        return self[key] # Every field always has a value
+
+    def __repr__(self):
+        return f"NodeRecord({self.name!r}, {self.status!r})"
+
+
+class RepoJoinIndex:
+    """
+    Installed nodes keyed by repository identity (normalized 'host/owner/name'), so catalog entries join to them
+    whatever the folder is called and whether the URL uses https/ssh or a .git suffix. Only the exact repository
+    joins: a same-named repository of another owner may be an unrelated project, and joining it would hide that
+    catalog entry as installed.
+    """
+    __slots__ = ("_by_repo",)
+
+    def __init__(self, records):
+        self._by_repo = {record.repo_key: record for record in records if record.repo_key}
+
+    def match(self, repo_url):
+        """The installed node of a repository URL, or None."""
+        repo_key = normalize_mirror_key(repo_url) if isinstance(repo_url, str) and "/" in repo_url else None
+        return self._by_repo.get(repo_key) if repo_key else None
+
+
+class NodeCatalog:
+    """
+    Immutable snapshot of the node list: the local nodes and all known nodes (local + online), each kept sorted
+    by lowercase name, with dict indexes by lowercase name and by normalized repository URL.
+    Refreshes build a new catalog and swap it in, so the GUI thread never sees a half-built one.
+    """
+    __slots__ = ("local_nodes", "all_nodes", "local_repo_index", "_local_by_name", "_by_name", "_by_repo")
+
+    def __init__(self, local_nodes=(), all_nodes=()):
+        self.local_nodes = sorted(local_nodes, key=lambda record: record.name_lower)
+        self.all_nodes = sorted(all_nodes, key=lambda record: record.name_lower)
+        self._local_by_name = {record.name_lower: record for record in self.local_nodes}
+        self._by_name = {record.name_lower: record for record in self.all_nodes}
+        self._by_name.update(self._local_by_name) # An installed node wins over a catalog entry of the same name
+        self._by_repo = {}
+        for record in self.all_nodes + self.local_nodes:
+            if record.repo_key:
+                self._by_repo[record.repo_key] = record
+        self.local_repo_index = RepoJoinIndex(self.local_nodes) # Built once per catalog, reused by every join
+
+    @classmethod
+    def from_dicts(cls, local_dicts, all_dicts):
+        """Builds a catalog from the persisted node dicts; entries without a name are dropped."""
+        return cls([NodeRecord.from_dict(data) for data in local_dicts if isinstance(data, dict) and data.get("name")],
+                   [NodeRecord.from_dict(data) for data in all_dicts if isinstance(data, dict) and data.get("name")])
+
+    @staticmethod
+    def to_dicts(records):
+        return [record.to_dict() for record in records]
+
+    def with_local_nodes(self, local_nodes):
+        """Same catalog entries with a new local scan (used while the online catalog is being fetched again)."""
+        return NodeCatalog(local_nodes, self.all_nodes)
+
+    # --- Lookup ---
+    def find(self, name):
+        """Node by name (case-insensitive), preferring the installed one."""
+        return self._by_name.get(name.lower()) if name else None
+
+    def find_local(self, name):
+        return self._local_by_name.get(name.lower()) if name else None
+
+    def find_by_repo(self, repo_url):
+        """Node by repository URL; https/ssh and .git variants of the same repository match."""
+        return self._by_repo.get(normalize_mirror_key(repo_url)) if repo_url else None
+
+    def search(self, search_term_value):
+        """Local nodes for an empty search term, otherwise all known nodes matching it, in name order."""
+        if not search_term_value:
+            return list(self.local_nodes)
+        return [record for record in self.all_nodes if matches_search(record, search_term_value)]
+
+    def __len__(self):
+        return len(self.all_nodes)
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/node_history.py
+# Node History Cache Module (per-node ref history, refreshed incrementally after fetches)
+
+import os
+import re
+import time
+import platform
+import threading
+import tkinter as tk
+from tkinter import ttk
+from functools import cmp_to_key
+
+from ui_modules import history_store
+
+NODE_HISTORY_TTL_SEC = 600 # A node viewed within this time is shown from the cache without any git call
+REF_DETAIL_FORMAT = "%(refname) %(objectname) %(committerdate:iso-strict) %(contents:subject)"
+REF_LIST_FORMAT = "%(refname) %(objectname)"
+REF_PATTERN_BATCH = 200 # Changed refs passed to one for-each-ref call
+
+
+def git_dir(repo_path):
+    """The repository's git directory (follows the 'gitdir:' file of submodules and worktrees), or None."""
+    dot_git = os.path.join(repo_path, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    path = content[len("gitdir:"):].strip()
+    return os.path.normpath(path if os.path.isabs(path) else os.path.join(repo_path, path))
+
+
+def _read_ref(gdir, refname):
+    """Resolves refname to a commit from the loose ref file or packed-refs (no git call)."""
+    try:
+        with open(os.path.join(gdir, *refname.split("/")), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        pass
+    common_dir = gdir
+    try:
+        with open(os.path.join(gdir, "commondir"), "r", encoding="utf-8") as f: # Worktrees keep branches in the main git dir
+            common_dir = os.path.normpath(os.path.join(gdir, f.read().strip()))
+    except OSError:
+        pass
+    if common_dir != gdir:
+        return _read_ref(common_dir, refname)
+    try:
+        with open(os.path.join(gdir, "packed-refs"), "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == refname:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+def read_head_state(repo_path):
+    """Returns (commit, branch or None) of HEAD by reading the git files directly, or (None, None)."""
+    gdir = git_dir(repo_path)
+    if not gdir:
+        return None, None
+    try:
+        with open(os.path.join(gdir, "HEAD"), "r", encoding="utf-8") as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+    if head.startswith("ref:"):
+        refname = head[len("ref:"):].strip()
+        branch = refname[len("refs/heads/"):] if refname.startswith("refs/heads/") else refname
+        return _read_ref(gdir, refname), branch
+    return head or None, None
+
+
+def read_origin_url(repo_path):
+    """Returns the URL of remote 'origin' from the git config file (no git call), or None."""
+    gdir = git_dir(repo_path)
+    if not gdir:
+        return None
+    try:
+        with open(os.path.join(gdir, "commondir"), "r", encoding="utf-8") as f: # Worktrees share the main config
+            gdir = os.path.normpath(os.path.join(gdir, f.read().strip()))
+    except OSError:
+        pass
+    in_origin = False
+    try:
+        with open(os.path.join(gdir, "config"), "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    in_origin = line.replace(" ", "").replace("'", '"') == '[remote"origin"]'
+                elif in_origin and "=" in line and line.split("=", 1)[0].strip().lower() == "url":
+                    return line.split("=", 1)[1].strip() or None
+    except OSError:
+        pass
+    return None
+
+
+def _refs_signature(repo_path):
+    """mtimes of the files a fetch, pull or pack-refs rewrites; a change means the cached refs may be stale."""
+    gdir = git_dir(repo_path)
+    signature = []
+    for name in ("FETCH_HEAD", "packed-refs"):
+        try:
+            signature.append(os.path.getmtime(os.path.join(gdir, name)) if gdir else None)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def ref_to_entry(refname, commit_id, date_iso, subject):
+    """Converts one ref into a history list entry; returns None for refs not shown (remote HEAD alias, notes, ...)."""
+    if refname.startswith("refs/heads/"):
+        return {"type": "branch", "name": refname[len("refs/heads/"):], "commit_id": commit_id, "date_iso": date_iso, "description": subject}
+    if refname.startswith("refs/remotes/origin/"):
+        name = refname[len("refs/remotes/origin/"):]
+        if "HEAD" in name:
+            return None
+        return {"type": "branch (remote)", "name": name, "commit_id": commit_id, "date_iso": date_iso, "description": subject}
+    if refname.startswith("refs/tags/"):
+        return {"type": "tag", "name": refname[len("refs/tags/"):], "commit_id": commit_id, "date_iso": date_iso, "description": f"TAG - {subject}"}
+    return None
+
+
+class NodeHistoryCache:
+    """Persistent per-node ref cache behind the node version history modal."""
+    def __init__(self, app_instance, cache_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, _run_git_command and version sorting).
+            cache_file: JSON file mapping node name -> {"path", "refs", "head", "fetched", "signature", "entries"}.
+        """
+        self.app = app_instance
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+
+    def _load_entry(self, node_name, repo_path):
+        entry = history_store.load_mapping(self.cache_file).get(node_name)
+        if not entry or os.path.normcase(entry.get("path", "")) != os.path.normcase(os.path.abspath(repo_path)):
+            return None
+        return entry
+
+    # --- Reads without git ---
+    def cached_history(self, node_name, repo_path):
+        """
+        Returns (entries, current_commit, fresh) from the cache using file reads only, or (None, current_commit, False).
+        fresh means the node was refreshed within the TTL and nothing fetched or repacked refs since.
+        """
+        head_commit, _ = read_head_state(repo_path)
+        entry = self._load_entry(node_name, repo_path)
+        if not entry:
+            return None, head_commit, False
+        entries = entry.get("entries", [])
+        known_commits = {item["commit_id"] for item in entries}
+        fresh = (time.time() - entry.get("fetched", 0) < NODE_HISTORY_TTL_SEC
+                 and entry.get("signature") == _refs_signature(repo_path)
+                 and (head_commit in known_commits or head_commit == entry.get("head")))
+        if head_commit and head_commit not in known_commits and head_commit != entry.get("head"):
+            return None, head_commit, False # HEAD moved to a commit the cache can't describe
+        return entries, head_commit, fresh
+
+    # --- Incremental refresh (after fetch) ---
+    def refresh(self, node_name, repo_path):
+        """
+        Updates the cached refs from the repository (after a fetch, and before it when a node is opened without a cache):
+        one cheap for-each-ref lists (refname, commit) pairs and only new or moved refs are read with dates and subjects. Runs in worker thread. Returns (entries, current_commit).
+        """
+        entry = self._load_entry(node_name, repo_path) or {}
+        cached_refs = entry.get("refs", {}) # refname -> [commit, date_iso, subject]
+
+        list_output, list_err, rc_list = self.app._run_git_command(["for-each-ref", f"--format={REF_LIST_FORMAT}", "refs/"], cwd=repo_path, timeout=60, log_output=False)
+        if rc_list != 0:
+            raise Exception(f"获取 Git 引用失败: {list_err.strip()}")
+        current = dict(line.split(" ", 1) for line in list_output.splitlines() if " " in line)
+
+        refs = {name: details for name, details in cached_refs.items() if current.get(name) == details[0]}
+        changed = [name for name in current if name not in refs]
+        for start in range(0, len(changed), REF_PATTERN_BATCH):
+            batch = changed[start:start + REF_PATTERN_BATCH]
+            detail_output, _, rc_detail = self.app._run_git_command(["for-each-ref", f"--format={REF_DETAIL_FORMAT}"] + batch, cwd=repo_path, timeout=60, log_output=False)
+            if rc_detail != 0:
+                continue
+            for line in detail_output.splitlines():
+                parts = line.split(" ", 3)
+                if len(parts) >= 3:
+                    refs[parts[0]] = [parts[1], parts[2], parts[3].strip() if len(parts) == 4 else ""]
+        if changed:
+            self.app.log_to_gui("Management", f"节点 '{node_name}': {len(changed)} 个新增/变更引用，{len(refs) - len(changed)} 个沿用缓存。", "info")
+
+        entries = self._build_entries(refs)
+        head_commit, head_branch = read_head_state(repo_path)
+        if head_commit and head_commit not in {item["commit_id"] for item in entries}:
+            entries.append(self._head_entry(repo_path, head_commit, head_branch))
+            entries.sort(key=cmp_to_key(self.app._compare_versions_for_sort))
+
+        with self._lock:
+            mapping = history_store.load_mapping(self.cache_file)
+            mapping[node_name] = {
+                "path": os.path.abspath(repo_path),
+                "refs": refs,
+                "head": head_commit,
+                "fetched": time.time(),
+                "signature": _refs_signature(repo_path),
+                "entries": entries,
+            }
+            history_store.save_mapping(self.cache_file, mapping)
+        return entries, head_commit
+
+    def _build_entries(self, refs):
+        """One entry per commit (first ref in for-each-ref --sort=-committerdate order wins), sorted for display."""
+        entries, seen = [], set()
+        ordered = sorted(refs.items()) # Ties keep git's refname order (branches before tags)
+        ordered.sort(key=lambda item: item[1][1], reverse=True)
+        for refname, (commit_id, date_iso, subject) in ordered:
+            if commit_id in seen:
+                continue
+            entry = ref_to_entry(refname, commit_id, date_iso, subject)
+            if entry:
+                entries.append(entry)
+                seen.add(commit_id)
+        entries.sort(key=cmp_to_key(self.app._compare_versions_for_sort))
+        return entries
+
+    def _head_entry(self, repo_path, head_commit, head_branch):
+        """Entry for a HEAD that no ref names (local-only commit or detached checkout)."""
+        log_output, _, rc_log = self.app._run_git_command(["log", "-1", "--format=%cI%n%s", head_commit], cwd=repo_path, timeout=5, log_output=False)
+        lines = log_output.splitlines() if rc_log == 0 else []
+        date_iso = lines[0].strip() if lines else ""
+        description = lines[1].strip() if len(lines) > 1 else "当前工作目录"
+        if head_branch:
+            return {"type": "branch (local)", "name": head_branch, "commit_id": head_commit, "date_iso": date_iso, "description": description}
+        return {"type": "commit (HEAD)", "name": f"Detached at {head_commit[:8]}", "commit_id": head_commit, "date_iso": date_iso, "description": description}
+
+
+# --- Version History Modal: index and virtualized list ---
+# Ref type filter choices -> category of ref_category()
+REF_TYPE_FILTERS = {"全部类型": None, "本地分支": "branch", "远程分支": "remote", "标签": "tag", "提交": "commit"}
+DATE_FILTER_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+HISTORY_ROW_HEIGHT_PX = 30
+# (column, weight, minsize) shared by the modal header and the rows
+HISTORY_COLUMNS = ((0, 4, 250), (1, 1, 80), (2, 1, 100), (3, 1, 110), (4, 0, 80))
+
+
+def ref_category(ref_type):
+    """Maps a history entry type ("branch (remote)", "commit (HEAD)", ...) to its filter category."""
+    if ref_type.startswith("branch (remote)"):
+        return "remote"
+    if ref_type.startswith("branch"):
+        return "branch"
+    if ref_type.startswith("tag"):
+        return "tag"
+    return "commit"
+
+
+class HistoryIndex:
+    """In-memory search keys of a history list, built once per list so filtering never touches widgets or git."""
+    def __init__(self, entries, parse_date):
+        """
+        Args:
+            entries: History entries in display order.
+            parse_date: Callable turning an ISO date string into a datetime or None (app._parse_iso_date_for_sort).
+        """
+        self.entries = entries
+        self.search_keys = [f"{entry.get('name', '')} {entry.get('commit_id', '')}".lower() for entry in entries]
+        self.categories = [ref_category(entry.get("type", "")) for entry in entries]
+        self.dates = []
+        for entry in entries:
+            date_obj = parse_date(entry.get("date_iso")) if entry.get("date_iso") else None
+            self.dates.append(date_obj.strftime("%Y-%m-%d") if date_obj else "")
+        self._last_query = None
+        self._last_result = None
+
+    def filter(self, text="", date_from="", date_to="", category=None):
+        """
+        Returns the positions of the entries matching all filters. Incomplete dates are ignored, so the list
+        doesn't empty while a date is typed. Typing more characters only narrows the previous result (type-ahead).
+        """
+        text = text.strip().lower()
+        date_from = date_from.strip() if DATE_FILTER_RE.match(date_from.strip()) else ""
+        date_to = date_to.strip() if DATE_FILTER_RE.match(date_to.strip()) else ""
+        query = (text, date_from, date_to, category)
+        if self._last_query and self._last_query[1:] == query[1:] and text.startswith(self._last_query[0]):
+            candidates = self._last_result
+        else:
+            candidates = range(len(self.entries))
+        result = [
+            i for i in candidates
+            if (not text or text in self.search_keys[i])
+            and (category is None or self.categories[i] == category)
+            and (not date_from or (self.dates[i] and self.dates[i] >= date_from))
+            and (not date_to or (self.dates[i] and self.dates[i] <= date_to))
+        ]
+        self._last_query, self._last_result = query, result
+        return result
+
+
+class VirtualHistoryList:
+    """Scrollable history rows backed by a fixed pool of row widgets (as many as fit the viewport), re-bound on scroll."""
+    def __init__(self, parent, app_instance, on_switch):
+        """
+        Args:
+            parent: Frame the list body (column 0) and its scrollbar (column 1) are gridded into.
+            app_instance: The main ComLauncherApp instance (colors).
+            on_switch: Called with the commit ID of a row's switch button.
+        """
+        self.app = app_instance
+        self.on_switch = on_switch
+        self.index = None
+        self.positions = [] # Index positions currently listed (after filtering)
+        self.current_commit = None
+        self.top = 0
+        self.rows = []
+        self.body = tk.Frame(parent, bg=self.app.TEXT_AREA_BG, highlightthickness=1, highlightbackground=self.app.BORDER_COLOR, borderwidth=0)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.body.bind("<Configure>", lambda e: self._ensure_rows())
+        self._bind_wheel(self.body)
+
+    def grid(self, row):
+        self.body.grid(row=row, column=0, sticky="nsew")
+        self.scrollbar.grid(row=row, column=1, sticky="ns")
+
+    def set_items(self, index, positions, current_commit):
+        """Shows the given index positions from the top."""
+        self.index, self.positions, self.current_commit = index, positions, current_commit
+        self.top = 0
+        self._redraw()
+
+    # --- Row pool ---
+    def _visible_count(self):
+        return max(1, self.body.winfo_height() // HISTORY_ROW_HEIGHT_PX)
+
+    def _ensure_rows(self):
+        """Grows or shrinks the widget pool to the viewport height, then redraws."""
+        needed = self._visible_count()
+        while len(self.rows) < needed:
+            self.rows.append(self._make_row(len(self.rows)))
+        while len(self.rows) > needed:
+            self.rows.pop()["frame"].destroy()
+        self._redraw()
+
+    def _make_row(self, slot):
+        row = {"commit": None}
+        frame = ttk.Frame(self.body, style='ModalRowOdd.TFrame', padding=(0, 3))
+        frame.place(x=0, y=slot * HISTORY_ROW_HEIGHT_PX, relwidth=1, height=HISTORY_ROW_HEIGHT_PX)
+        for column, weight, minsize in HISTORY_COLUMNS:
+            frame.columnconfigure(column, weight=weight, minsize=minsize)
+        row["frame"] = frame
+        row["version"] = ttk.Label(frame, anchor=tk.W)
+        row["version"].grid(row=0, column=0, sticky='w', padx=(5, 0), pady=1)
+        row["status"] = ttk.Label(frame, anchor=tk.CENTER)
+        row["status"].grid(row=0, column=1, sticky='ew', padx=5, pady=1)
+        row["commit_label"] = ttk.Label(frame, anchor=tk.W)
+        row["commit_label"].grid(row=0, column=2, sticky='w', padx=5, pady=1)
+        row["date"] = ttk.Label(frame, anchor=tk.W)
+        row["date"].grid(row=0, column=3, sticky='w', padx=5, pady=1)
+        row["button"] = ttk.Button(frame, text="切换", style="Modal.TButton", width=6, command=lambda r=row: r["commit"] and self.on_switch(r["commit"]))
+        row["button"].grid(row=0, column=4, sticky='e', padx=(5, 10), pady=1)
+        for widget in (frame, row["version"], row["status"], row["commit_label"], row["date"], row["button"]):
+            self._bind_wheel(widget)
+        return row
+
+    def _redraw(self):
+        """Binds the pooled rows to the entries at self.top and updates the scrollbar."""
+        total = len(self.positions)
+        visible = len(self.rows)
+        self.top = max(0, min(self.top, total - visible))
+        for slot, row in enumerate(self.rows):
+            i = self.top + slot
+            if i >= total:
+                row["frame"].place_forget()
+                row["commit"] = None
+                continue
+            row["frame"].place(x=0, y=slot * HISTORY_ROW_HEIGHT_PX, relwidth=1, height=HISTORY_ROW_HEIGHT_PX)
+            position = self.positions[i]
+            entry = self.index.entries[position]
+            parity = "Odd" if i % 2 == 0 else "Even"
+            is_current = bool(self.current_commit) and entry.get("commit_id") == self.current_commit
+            label_style = f'ModalRow{parity}.TLabel'
+            row["frame"].configure(style=f'ModalRow{parity}.TFrame')
+            row["version"].configure(text=f"{entry.get('type', '未知')} / {entry.get('name', 'N/A')}", style=label_style)
+            row["status"].configure(text="当前" if is_current else "", style=f'ModalRow{parity}Highlight.TLabel' if is_current else label_style)
+            row["commit_label"].configure(text=entry.get("commit_id", "N/A")[:8], style=label_style)
+            row["date"].configure(text=self.index.dates[position] or "无日期", style=label_style)
+            row["button"].configure(state=tk.DISABLED if is_current else tk.NORMAL)
+            row["commit"] = entry.get("commit_id")
+        if total > visible:
+            self.scrollbar.set(self.top / total, (self.top + visible) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # --- Scrolling ---
+    def scroll(self, rows):
+        self.top += rows
+        self._redraw()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.positions))
+            self._redraw()
+        elif action == "scroll":
+            self.scroll(int(amount) * (len(self.rows) if unit == "pages" else 1))
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:
+            self.scroll(-3)
+        elif event.num == 5:
+            self.scroll(3)
+        elif event.delta:
+            # Windows reports 120 per notch, macOS small raw deltas
+            self.scroll(-3 * (event.delta // 120) if platform.system() == "Windows" else -event.delta)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_mousewheel)
+        widget.bind("<Button-4>", self._on_mousewheel)
+        widget.bind("<Button-5>", self._on_mousewheel)
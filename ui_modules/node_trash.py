@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/node_trash.py
+# Node Trash Module (uninstall by renaming into a trash area, undo, low-priority background deletion)
+
+import os
+import stat
+import time
+import shutil
+import threading
+from datetime import datetime
+
+from ui_modules import history_store
+
+# Created next to custom_nodes (outside it, so ComfyUI never imports trashed nodes); a rename there never crosses filesystems
+TRASH_DIR_NAME = ".comlauncher_trash"
+TRASH_RETENTION_SEC = 24 * 3600 # Uninstalled nodes stay restorable this long
+PURGE_POLL_INTERVAL_SEC = 600
+PURGE_BATCH_FILES = 200 # Files deleted between two short pauses
+PURGE_PAUSE_SEC = 0.05
+
+
+def _remove_readonly(func, path, _exc_info):
+    """shutil.rmtree error handler: git marks pack files read-only, which blocks deleting them on Windows."""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+
+def _is_link_or_junction(path):
+    """Symlinks and Windows directory junctions (e.g. to a shared models folder) are unlinked, never descended into."""
+    if os.path.islink(path):
+        return True
+    if hasattr(os.path, "isjunction"): # Python 3.12+
+        return os.path.isjunction(path)
+    try:
+        return getattr(os.lstat(path), "st_reparse_tag", None) == getattr(stat, "IO_REPARSE_TAG_MOUNT_POINT", 0xA0000003)
+    except OSError:
+        return False
+
+
+def trash_dir_for(path):
+    """Trash directory for a node directory: <ComfyUI>/.comlauncher_trash next to <ComfyUI>/custom_nodes."""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(path))), TRASH_DIR_NAME)
+
+
+class NodeTrash:
+    """Moves node directories into a trash area with one rename and deletes them later in a background thread."""
+    def __init__(self, app_instance, index_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging and update task state).
+            index_file: JSON file mapping entry id -> {"name", "original_path", "trash_path", "time", "trashed_at", "restorable"}.
+        """
+        self.app = app_instance
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_flag = threading.Event()
+        self._thread = None
+
+    # --- Moving into the trash ---
+    def move_to_trash(self, path, name, restorable=True):
+        """
+        Renames path into the trash area. Returns the entry id, or None if the rename failed
+        (e.g. files still open on Windows); the directory is left untouched in that case.
+        """
+        trash_dir = trash_dir_for(path)
+        entry_id = f"{datetime.now():%Y%m%d-%H%M%S}-{name}"
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            suffix = 1
+            while entry_id in index or os.path.exists(os.path.join(trash_dir, entry_id)):
+                suffix += 1
+                entry_id = f"{datetime.now():%Y%m%d-%H%M%S}-{name}-{suffix}"
+            trash_path = os.path.join(trash_dir, entry_id)
+            try:
+                os.makedirs(trash_dir, exist_ok=True)
+                os.rename(path, trash_path)
+            except OSError as e:
+                print(f"[NodeTrash WARNING] Moving {path} to the trash failed: {e}")
+                return None
+            index[entry_id] = {
+                "name": name,
+                "original_path": os.path.abspath(path),
+                "trash_path": trash_path,
+                "time": datetime.now().isoformat(timespec="seconds"),
+                "trashed_at": time.time(),
+                "restorable": restorable,
+            }
+            history_store.save_mapping(self.index_file, index)
+        self._wake.set()
+        return entry_id
+
+    def discard(self, path, name):
+        """Removes a directory that never needs restoring (failed partial clone): trash it, or delete it right away if that fails."""
+        if self.move_to_trash(path, name, restorable=False) is None:
+            shutil.rmtree(path, onerror=_remove_readonly)
+
+    # --- Undo ---
+    def latest_restorable(self):
+        """(entry_id, entry) of the most recently trashed node that can still be restored, or (None, None)."""
+        index = history_store.load_mapping(self.index_file)
+        candidates = [(entry.get("trashed_at", 0), entry_id) for entry_id, entry in index.items()
+                      if entry.get("restorable") and not entry.get("purging") and os.path.isdir(entry.get("trash_path", ""))]
+        if not candidates:
+            return None, None
+        entry_id = max(candidates)[1]
+        return entry_id, index[entry_id]
+
+    def restore(self, entry_id):
+        """Renames a trashed node back to its original path. Raises if it is gone or the original path is taken again."""
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            entry = index.get(entry_id)
+            if not entry or entry.get("purging") or not os.path.isdir(entry.get("trash_path", "")):
+                raise Exception("回收区中已没有该节点 (可能已被清理)。")
+            if os.path.exists(entry["original_path"]):
+                raise Exception(f"原目录已存在 (节点可能已重新安装): {entry['original_path']}")
+            os.rename(entry["trash_path"], entry["original_path"])
+            del index[entry_id]
+            history_store.save_mapping(self.index_file, index)
+        return entry
+
+    # --- Background deletion ---
+    def start(self):
+        """Starts the purge thread (once); it also removes what earlier sessions left in the trash."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._purge_loop, name="NodeTrashPurge", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_flag.set()
+        self._wake.set()
+
+    def _purge_loop(self):
+        while not self._stop_flag.is_set():
+            try:
+                self.purge_expired()
+            except Exception as e:
+                print(f"[NodeTrash WARNING] Purging the trash failed: {e}")
+            self._wake.wait(PURGE_POLL_INTERVAL_SEC)
+            self._wake.clear()
+
+    def purge_expired(self):
+        """Deletes non-restorable entries and restorable ones older than TRASH_RETENTION_SEC. Runs in the purge thread."""
+        now = time.time()
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            due = [entry_id for entry_id, entry in index.items()
+                   if not entry.get("restorable") or now - entry.get("trashed_at", 0) >= TRASH_RETENTION_SEC]
+            for entry_id in due:
+                index[entry_id]["purging"] = True # Undo no longer offers it
+            history_store.save_mapping(self.index_file, index)
+
+        for entry_id in due:
+            if self._stop_flag.is_set():
+                return # Marked entries are picked up again by the next session
+            trash_path = index[entry_id].get("trash_path", "")
+            if os.path.isdir(trash_path):
+                started = time.time()
+                if not self._delete_tree_slowly(trash_path):
+                    return
+                if index[entry_id].get("restorable"):
+                    self.app.log_to_gui("NodeTrash", f"已从回收区清理节点 '{index[entry_id].get('name')}' ({time.time() - started:.0f} 秒)。", "info")
+            with self._lock:
+                current = history_store.load_mapping(self.index_file)
+                current.pop(entry_id, None)
+                history_store.save_mapping(self.index_file, current)
+
+    def _delete_tree_slowly(self, path):
+        """
+        Deletes in small batches, pausing between batches and while an update task runs,
+        so large .git directories or bundled models never compete with clones and pip installs for disk I/O.
+        Links and junctions are removed without touching what they point to, like shutil.rmtree does.
+        Returns False if interrupted by stop().
+        """
+        if _is_link_or_junction(path):
+            os.unlink(path)
+            return True
+        deleted = 0
+        walked_dirs = []
+        for dirpath, dirnames, filenames in os.walk(path):
+            walked_dirs.append(dirpath)
+            for dirname in list(dirnames):
+                dir_path = os.path.join(dirpath, dirname)
+                if _is_link_or_junction(dir_path):
+                    dirnames.remove(dirname) # Don't descend
+                    try:
+                        os.unlink(dir_path)
+                    except OSError:
+                        pass # Left for the final rmtree, which skips junctions as well
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                try:
+                    if not os.path.islink(file_path) and not os.access(file_path, os.W_OK):
+                        os.chmod(file_path, stat.S_IWRITE)
+                    os.remove(file_path)
+                except OSError:
+                    pass # Left for the final rmtree
+                deleted += 1
+                if deleted % PURGE_BATCH_FILES == 0:
+                    self._pause()
+                    if self._stop_flag.is_set():
+                        return False
+        for dir_path in reversed(walked_dirs): # Deepest first
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
+        shutil.rmtree(path, ignore_errors=True) # Whatever the walk could not remove
+        return True
+
+    def _pause(self):
+        time.sleep(PURGE_PAUSE_SEC)
+        while self.app._is_update_task_running() and not self._stop_flag.is_set():
+            time.sleep(1)
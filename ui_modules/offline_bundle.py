@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/offline_bundle.py
+# Offline Bundle Module (whole installation as git bundles + wheels + manifest in one archive, parallel offline import)
+
+import os
+import json
+import time
+import shutil
+import tarfile
+import tempfile
+from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
+
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_SUFFIX = ".comlauncher.tar"
+MANIFEST_NAME = "manifest.json"
+MAX_PARALLEL_BUNDLE_JOBS = 4 # Repositories bundled / cloned at the same time
+BUNDLE_TIMEOUT_SEC = 1800
+COMFYUI_BUNDLE = "ComfyUI.bundle"
+NODES_BUNDLE_DIR = "nodes"
+WHEELS_DIR = "wheels"
+
+
+class OfflineBundle:
+    """
+    Exports the main body and every git node as `git bundle` files plus (optionally) the wheelhouse into one
+    uncompressed tar (bundles and wheels are compressed already), and imports such an archive onto a fresh
+    ComfyUI directory without network access.
+    """
+    def __init__(self, app_instance):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, paths, git, snapshots, wheelhouse and dependency_manager).
+        """
+        self.app = app_instance
+
+    # --- Export ---
+    def export(self, archive_path, include_wheels):
+        """Task to write the offline bundle of the current installation. Runs in worker thread."""
+        started = time.time()
+        manifest = self.app.snapshots.current_state("离线包")
+        manifest["format"] = BUNDLE_FORMAT_VERSION
+        repos = {COMFYUI_BUNDLE: self.app.comfyui_repo_dir}
+        repos.update({f"{NODES_BUNDLE_DIR}/{name}.bundle": path for name, path in self.app.snapshots.node_repositories().items() if name in manifest["nodes"]})
+        self.app.log_to_gui("Bundle", f"导出离线包: 本体 + {len(repos) - 1} 个节点{' + 依赖 wheel' if include_wheels else ''}...", "info")
+
+        staging = tempfile.mkdtemp(prefix="bundle-", dir=os.path.dirname(os.path.abspath(archive_path)))
+        try:
+            os.makedirs(os.path.join(staging, NODES_BUNDLE_DIR))
+            failed = []
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BUNDLE_JOBS, thread_name_prefix="BundleExport") as executor:
+                futures = {arcname: executor.submit(self._create_bundle, path, os.path.join(staging, *arcname.split("/"))) for arcname, path in repos.items()}
+                for arcname, future in futures.items():
+                    error = future.result()
+                    if error:
+                        self.app.log_to_gui("Bundle", f"打包 {arcname} 失败: {error}", "warn")
+                        failed.append(arcname)
+            if COMFYUI_BUNDLE in failed:
+                raise Exception("本体仓库打包失败")
+            for arcname in failed:
+                manifest["nodes"].pop(arcname[len(NODES_BUNDLE_DIR) + 1:-len(".bundle")], None)
+            wheel_files = self.app.wheelhouse.archive_files() if include_wheels else []
+            manifest["wheels"] = sorted(wheel_files)
+            with open(os.path.join(staging, MANIFEST_NAME), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+            # Uncompressed: git packs and wheels don't shrink further, so the archive is written at disk speed
+            partial_path = archive_path + ".partial"
+            with tarfile.open(partial_path, "w") as tar:
+                tar.add(os.path.join(staging, MANIFEST_NAME), arcname=MANIFEST_NAME)
+                for arcname in repos:
+                    if arcname not in failed:
+                        tar.add(os.path.join(staging, *arcname.split("/")), arcname=arcname)
+                for name in wheel_files:
+                    tar.add(os.path.join(self.app.wheelhouse.wheelhouse_dir, name), arcname=f"{WHEELS_DIR}/{name}")
+            os.replace(partial_path, archive_path)
+        except Exception as e:
+            error_msg = f"离线包导出失败: {e}"
+            self.app.log_to_gui("Bundle", error_msg, "error")
+            self.app.root.after(0, lambda msg=error_msg: messagebox.showerror("导出失败", msg, parent=self.app.root))
+            return
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        size_mb = os.path.getsize(archive_path) / (1024 * 1024)
+        message = (f"离线包已导出: {archive_path}\n本体 + {len(manifest['nodes'])} 个节点, {len(wheel_files)} 个 wheel, "
+                   f"{size_mb:.0f} MB, 耗时 {time.time() - started:.0f} 秒。")
+        if failed:
+            message += "\n\n以下节点未能打包 (例如浅克隆):\n- " + "\n- ".join(failed)
+        self.app.log_to_gui("Bundle", message.replace("\n", " "), "info")
+        self.app.root.after(0, lambda msg=message: messagebox.showinfo("导出完成", msg, parent=self.app.root))
+
+    def _create_bundle(self, repo_path, bundle_path):
+        """git bundle create --all for one repository. Runs in a pool thread; returns an error text or None."""
+        _, stderr, rc = self.app._run_git_command(["bundle", "create", bundle_path, "--all"], cwd=repo_path, timeout=BUNDLE_TIMEOUT_SEC, log_output=False)
+        return stderr.strip()[-300:] or f"退出码 {rc}" if rc != 0 else None
+
+    # --- Import ---
+    @staticmethod
+    def read_manifest(archive_path):
+        """Reads only the manifest member of an archive (GUI thread, for the confirmation)."""
+        with tarfile.open(archive_path, "r") as tar:
+            member = tar.getmember(MANIFEST_NAME)
+            return json.load(tar.extractfile(member))
+
+    def import_bundle(self, archive_path, target_dir):
+        """
+        Task to recreate an installation from an offline bundle in target_dir (must be missing or empty). Runs in worker thread.
+        The main body is cloned first (it contains custom_nodes), then all nodes in parallel; wheels go into the wheelhouse
+        and the requirements are installed from it offline.
+        """
+        started = time.time()
+        self.app.log_to_gui("Bundle", f"导入离线包 {archive_path} 到 {target_dir}...", "info")
+        target_dir = os.path.abspath(target_dir)
+        parent_dir = os.path.dirname(target_dir)
+        os.makedirs(parent_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix="bundle-", dir=parent_dir) # Same disk as the target
+        failed = []
+        try:
+            with tarfile.open(archive_path, "r") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(staging, filter="data")
+                else:
+                    tar.extractall(staging)
+            with open(os.path.join(staging, MANIFEST_NAME), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            if os.path.isdir(target_dir) and not os.listdir(target_dir):
+                os.rmdir(target_dir)
+            comfyui_entry = manifest.get("comfyui") or {}
+            error = self._clone_bundle(os.path.join(staging, COMFYUI_BUNDLE), target_dir, comfyui_entry, comfyui_entry.get("repo_url"))
+            if error:
+                raise Exception(f"本体克隆失败: {error}")
+
+            nodes_dir = os.path.join(target_dir, "custom_nodes")
+            os.makedirs(nodes_dir, exist_ok=True)
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BUNDLE_JOBS, thread_name_prefix="BundleImport") as executor:
+                futures = {name: executor.submit(self._clone_bundle, os.path.join(staging, NODES_BUNDLE_DIR, f"{name}.bundle"), os.path.join(nodes_dir, name), entry, entry.get("repo_url"))
+                           for name, entry in manifest.get("nodes", {}).items()}
+                for name, future in futures.items():
+                    error = future.result()
+                    if error:
+                        self.app.log_to_gui("Bundle", f"节点 '{name}' 导入失败: {error}", "warn")
+                        failed.append(name)
+
+            wheels_dir = os.path.join(staging, WHEELS_DIR)
+            if os.path.isdir(wheels_dir):
+                imported = self.app.wheelhouse.import_archives(wheels_dir)
+                self.app.log_to_gui("Bundle", f"已将 {imported} 个 wheel 放入 wheelhouse。", "info")
+            dependencies_note = self._install_requirements(target_dir, manifest)
+        except Exception as e:
+            error_msg = f"离线包导入失败: {e}"
+            self.app.log_to_gui("Bundle", error_msg, "error")
+            self.app.root.after(0, lambda msg=error_msg: messagebox.showerror("导入失败", msg, parent=self.app.root))
+            return
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        message = f"离线包已导入到 {target_dir}\n本体 + {len(manifest.get('nodes', {})) - len(failed)} 个节点, 耗时 {time.time() - started:.0f} 秒。"
+        if dependencies_note:
+            message += f"\n\n{dependencies_note}"
+        if failed:
+            message += "\n\n导入失败的节点:\n- " + "\n- ".join(failed)
+        if os.path.normcase(target_dir) != os.path.normcase(os.path.abspath(self.app.config.get("comfyui_dir", "") or ".")):
+            message += "\n\n请在设置中将 ComfyUI 安装目录设为该目录后使用。"
+        self.app.log_to_gui("Bundle", message.replace("\n", " "), "info" if not failed and not dependencies_note else "warn")
+        self.app.root.after(0, lambda msg=message: messagebox.showinfo("导入完成", msg, parent=self.app.root))
+        self.app._queue_node_list_refresh()
+
+    def _clone_bundle(self, bundle_path, dest, entry, repo_url):
+        """
+        Clones one bundle, points origin back at the real remote and checks out the recorded commit. Returns an error text or None.
+        Without a recorded remote (bundles of older versions) origin is removed instead of pointing at the deleted staging file.
+        """
+        if not os.path.isfile(bundle_path):
+            return "离线包中缺少该仓库"
+        _, stderr, rc = self.app._run_git_command(["clone", "--no-checkout", bundle_path, dest], cwd=os.path.dirname(dest), timeout=BUNDLE_TIMEOUT_SEC, log_output=False)
+        if rc != 0:
+            return stderr.strip()[-300:] or f"退出码 {rc}"
+        origin_cmd = ["remote", "set-url", "origin", repo_url] if repo_url else ["remote", "remove", "origin"]
+        self.app._run_git_command(origin_cmd, cwd=dest, timeout=10, log_output=False)
+        if entry and entry.get("commit"):
+            try:
+                self.app.snapshots.checkout_commit(dest, entry, None)
+            except Exception as e:
+                return str(e)
+        else:
+            self.app._run_git_command(["checkout", "--force"], cwd=dest, timeout=120, log_output=False)
+        return None
+
+    def _install_requirements(self, target_dir, manifest):
+        """
+        Installs ComfyUI's and the nodes' requirements with one pip run (offline from the wheelhouse when it has everything).
+        Only done when target_dir is the configured installation: pip runs with the configured Python and in the configured
+        directory, which belong to another tree otherwise. Returns a note for the user, or None if nothing is left to do.
+        """
+        requirement_files = {}
+        if os.path.isfile(os.path.join(target_dir, "requirements.txt")):
+            requirement_files["ComfyUI"] = os.path.join(target_dir, "requirements.txt")
+        for name in manifest.get("nodes", {}):
+            path = os.path.join(target_dir, "custom_nodes", name, "requirements.txt")
+            if os.path.isfile(path):
+                requirement_files[name] = path
+        if not requirement_files:
+            return None
+        if not manifest.get("wheels"):
+            self.app.log_to_gui("Bundle", "离线包不含 wheel，依赖将在首次激活或安装时按常规方式安装。", "info")
+            return None
+        install_dir = self.app.comfyui_install_dir
+        if not install_dir or os.path.normcase(os.path.abspath(install_dir)) != os.path.normcase(target_dir):
+            self.app.log_to_gui("Bundle", f"目标目录不是当前的 ComfyUI 安装目录，跳过依赖安装 ({len(requirement_files)} 个 requirements 文件)。", "warn")
+            return ("依赖未安装: 目标目录不是当前的 ComfyUI 安装目录，当前的 Python 环境不属于它。wheel 已放入 wheelhouse，"
+                    "请在该目录的 Python 环境中安装 requirements.txt 及各节点的 requirements.txt。")
+        if not self.app.dependency_manager.install(requirement_files, include_comfyui=False)["ok"]:
+            return "部分依赖未能离线安装，请查看日志。"
+        return None
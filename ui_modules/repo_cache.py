@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/repo_cache.py
+# Repository Mirror Cache Module (local bare mirrors used as clone references)
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+
+MIRROR_REFRESH_MIN_AGE_SEC = 6 * 3600 # Background refresh skips mirrors fetched more recently than this
+MIRROR_CLONE_TIMEOUT_SEC = 900
+MIRROR_FETCH_TIMEOUT_SEC = 300
+# Only branches and tags are cached; `clone --mirror` would also pull refs/pull/* (every pull request ever opened)
+MIRROR_FETCH_REFSPECS = ("+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*")
+
+
+def normalize_mirror_key(repo_url):
+    """Reduces a repo URL to 'host/owner/name' so https/ssh/.git variants share one mirror."""
+    url = repo_url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    url = re.sub(r"^[a-zA-Z][a-zA-Z0-9+.-]*://", "", url) # Drop scheme
+    url = re.sub(r"^[^@/]+@", "", url) # Drop user (git@host:owner/repo)
+    url = url.replace(":", "/", 1) if ":" in url.split("/", 1)[0] else url
+    return url.lower()
+
+
+class RepoMirrorCache:
+    """Keeps one bare clone (branches and tags) per repository URL and hands out clone arguments that reuse its objects."""
+    def __init__(self, app_instance, cache_dir):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging and _run_git_command).
+            cache_dir: Directory holding the '<name>-<hash>.git' bare mirrors.
+        """
+        self.app = app_instance
+        self.cache_dir = cache_dir
+        self._locks = {} # mirror path -> Lock, so a background refresh and an install never fetch the same mirror at once
+        self._locks_guard = threading.Lock()
+        self._refresh_thread = None
+
+    # --- Paths ---
+    def mirror_path(self, repo_url):
+        """Returns the mirror directory for a repo URL (it may not exist yet)."""
+        key = normalize_mirror_key(repo_url)
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", key.rsplit("/", 1)[-1]) or "repo"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"{name}-{digest}.git")
+
+    def has_mirror(self, repo_url):
+        """Returns True if a usable mirror exists for the URL."""
+        path = self.mirror_path(repo_url)
+        return os.path.isfile(os.path.join(path, "HEAD")) and os.path.isdir(os.path.join(path, "objects"))
+
+    def _lock_for(self, path):
+        """Returns the lock guarding one mirror directory."""
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _is_enabled(self):
+        """Reads the cache toggle from the app config on every call."""
+        return self.app.config.get("repo_cache_enabled", "启用") == "启用"
+
+    # --- Mirror Maintenance ---
+    def ensure_mirror(self, repo_url, fetch_existing=True, create_missing=True):
+        """
+        Creates the mirror on first use (unless create_missing is False), otherwise fetches it incrementally.
+        Returns the mirror path, or None if the cache is disabled, no mirror exists or git failed (callers then clone normally).
+        """
+        if not self._is_enabled() or not repo_url:
+            return None
+        path = self.mirror_path(repo_url)
+        with self._lock_for(path):
+            if self.has_mirror(repo_url):
+                if fetch_existing:
+                    self._fetch_mirror(path, log_output=True)
+                return path
+            if not create_missing:
+                return None
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                self.app.log_to_gui("RepoCache", f"无法创建镜像缓存目录 {self.cache_dir}: {e}", "warn")
+                return None
+            self.app.log_to_gui("RepoCache", f"创建本地镜像: {repo_url}", "info")
+            _, stderr, rc = self.app._run_git_command(["clone", "--bare", "--quiet", repo_url, path], cwd=self.cache_dir, timeout=MIRROR_CLONE_TIMEOUT_SEC, log_output=True)
+            if rc != 0 or not self._configure_refspecs(path):
+                self.app.log_to_gui("RepoCache", f"创建镜像失败，将直接从网络克隆: {stderr.strip()}", "warn")
+                self._remove_partial(path)
+                return None
+            return path
+
+    def seed_from_local_repo(self, repo_url, local_repo_path):
+        """Creates a mirror from an existing working copy (no network), e.g. right before the node is uninstalled."""
+        if not self._is_enabled() or not repo_url or self.has_mirror(repo_url):
+            return False
+        path = self.mirror_path(repo_url)
+        with self._lock_for(path):
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError:
+                return False
+            _, stderr, rc = self.app._run_git_command(["clone", "--bare", "--quiet", local_repo_path, path], cwd=self.cache_dir, timeout=MIRROR_CLONE_TIMEOUT_SEC, log_output=False)
+            if rc == 0:
+                # The working copy's upstream branches become the mirror's branches (a bare clone only copies local ones)
+                stdout, _, _ = self.app._run_git_command(["for-each-ref", "--format=%(refname)", "refs/remotes/origin/"], cwd=local_repo_path, timeout=15, log_output=False)
+                prefix = "refs/remotes/origin/"
+                refspecs = [f"+{ref}:refs/heads/{ref[len(prefix):]}" for ref in stdout.split() if ref != prefix + "HEAD"]
+                if refspecs:
+                    _, stderr, rc = self.app._run_git_command(["fetch", "--quiet", local_repo_path] + refspecs, cwd=path, timeout=MIRROR_CLONE_TIMEOUT_SEC, log_output=False)
+            if rc != 0 or not self._configure_refspecs(path):
+                print(f"[RepoCache WARNING] Seeding mirror from {local_repo_path} failed: {stderr.strip()}")
+                self._remove_partial(path)
+                return False
+            # Point the mirror at the real upstream so later refreshes fetch from the network
+            self.app._run_git_command(["remote", "set-url", "origin", repo_url], cwd=path, timeout=15, log_output=False)
+            self.app.log_to_gui("RepoCache", f"已将本地仓库历史保存到镜像缓存: {os.path.basename(path)}", "info")
+            return True
+
+    def _configure_refspecs(self, path):
+        """Sets origin's fetch refspecs of a mirror to branches and tags only. Returns False if git failed."""
+        _, _, rc = self.app._run_git_command(["config", "--replace-all", "remote.origin.fetch", MIRROR_FETCH_REFSPECS[0]], cwd=path, timeout=15, log_output=False)
+        for refspec in MIRROR_FETCH_REFSPECS[1:]:
+            if rc == 0:
+                _, _, rc = self.app._run_git_command(["config", "--add", "remote.origin.fetch", refspec], cwd=path, timeout=15, log_output=False)
+        return rc == 0
+
+    def _fetch_mirror(self, path, log_output=False):
+        """Fetches branches and tags into an existing mirror. Caller holds the mirror lock."""
+        stdout, _, _ = self.app._run_git_command(["config", "--get", "remote.origin.mirror"], cwd=path, timeout=15, log_output=False)
+        if stdout.strip() == "true":
+            # Created by an older version with `clone --mirror`: stop fetching refs/pull/* (refs already fetched stay)
+            self.app._run_git_command(["config", "--unset", "remote.origin.mirror"], cwd=path, timeout=15, log_output=False)
+            self._configure_refspecs(path)
+        _, stderr, rc = self.app._run_git_command(["fetch", "--prune", "--quiet", "origin"], cwd=path, timeout=MIRROR_FETCH_TIMEOUT_SEC, log_output=log_output)
+        if rc != 0:
+            print(f"[RepoCache WARNING] Fetching mirror {path} failed: {stderr.strip()}")
+        return rc == 0
+
+    def _remove_partial(self, path):
+        """Deletes a half-created mirror directory."""
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    def refresh_all_async(self, min_age_sec=MIRROR_REFRESH_MIN_AGE_SEC):
+        """Fetches every mirror older than min_age_sec in a background thread (one refresh at a time)."""
+        if not self._is_enabled() or not os.path.isdir(self.cache_dir):
+            return
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(target=self._refresh_all, args=(min_age_sec,), name="RepoMirrorRefresh", daemon=True)
+        self._refresh_thread.start()
+
+    def _refresh_all(self, min_age_sec):
+        """Background refresh loop body."""
+        refreshed, failed = 0, 0
+        now = time.time()
+        for entry in sorted(os.listdir(self.cache_dir)):
+            path = os.path.join(self.cache_dir, entry)
+            if not entry.endswith(".git") or not os.path.isfile(os.path.join(path, "HEAD")):
+                continue
+            stamp = os.path.join(path, "FETCH_HEAD")
+            last_fetch = os.path.getmtime(stamp) if os.path.exists(stamp) else os.path.getmtime(path)
+            if now - last_fetch < min_age_sec:
+                continue
+            lock = self._lock_for(path)
+            if not lock.acquire(blocking=False):
+                continue # An install is using this mirror right now
+            try:
+                if self._fetch_mirror(path):
+                    refreshed += 1
+                else:
+                    failed += 1
+            finally:
+                lock.release()
+        if refreshed or failed:
+            self.app.log_to_gui("RepoCache", f"镜像缓存后台刷新完成: {refreshed} 个已更新, {failed} 个失败。", "info" if not failed else "warn")
+
+    # --- Clone Helpers ---
+    def clone_reference_args(self, mirror_path):
+        """Clone arguments that take objects from the mirror and then copy them, so the clone stays valid without the cache."""
+        if not mirror_path:
+            return []
+        return ["--reference-if-able", mirror_path, "--dissociate"]
+
+    def fetch_from_mirror(self, repo_url, repo_path):
+        """
+        Refreshes the mirror, then fetches its branches and tags into a working copy over the local filesystem.
+        Returns True on success; False means the caller should fall back to fetching from the network.
+        """
+        mirror = self.ensure_mirror(repo_url)
+        if not mirror:
+            return False
+        _, stderr, rc = self.app._run_git_command(
+            ["fetch", "--quiet", mirror, "+refs/heads/*:refs/remotes/origin/*", "+refs/tags/*:refs/tags/*"],
+            cwd=repo_path, timeout=MIRROR_FETCH_TIMEOUT_SEC, log_output=False)
+        if rc != 0:
+            print(f"[RepoCache WARNING] Fetch from mirror into {repo_path} failed: {stderr.strip()}")
+        return rc == 0
+
+    def cache_size_bytes(self):
+        """Returns the total size of the mirror cache on disk."""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
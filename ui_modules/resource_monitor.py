@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/resource_monitor.py
+# Resource Sampler Module (RSS / CPU / threads / fds / I/O of the managed backend)
+
+import os
+import threading
+import time
+import json
+import csv
+from collections import deque
+from datetime import datetime
+
+# psutil is optional: /proc is read directly on Linux, psutil covers Windows/macOS if installed
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_MAX_SAMPLES = 600 # Ring buffer size (10 minutes at 1 sample/s)
+SAMPLE_FIELDS = ["timestamp", "pid", "process_count", "rss_bytes", "cpu_percent", "threads", "open_fds", "read_bytes", "write_bytes"]
+PROC_ROOT = "/proc"
+
+
+def proc_supported():
+    """Returns True if process stats can be read from /proc."""
+    return os.path.isdir(os.path.join(PROC_ROOT, "self"))
+
+
+class ResourceSampler:
+    """Samples a process tree at a fixed rate into a fixed-size ring buffer."""
+    def __init__(self, app_instance, pid, interval_sec=1.0, max_samples=DEFAULT_MAX_SAMPLES):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging).
+            pid: PID of the root process (the ComfyUI backend). Its children are included.
+            interval_sec: Seconds between samples.
+            max_samples: Ring buffer capacity; older samples are dropped.
+        """
+        self.app = app_instance
+        self.pid = pid
+        self.interval_sec = max(0.1, float(interval_sec))
+        self.samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._stop_flag = threading.Event()
+        self._thread = None
+        self._prev_cpu_ticks = None # (wall_time, total_cpu_seconds) of the previous sample
+        self._clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+        if proc_supported():
+            self.backend = "proc"
+        elif psutil is not None:
+            self.backend = "psutil"
+        else:
+            self.backend = None
+
+    # --- Lifecycle ---
+    def start(self):
+        """Starts the sampler thread. Returns False if no sampling backend is available."""
+        if self.backend is None:
+            self.app.log_to_gui("Monitor", "当前平台不支持资源采样 (无 /proc 且未安装 psutil)。", "warn")
+            return False
+        self._stop_flag.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="ResourceSampler", daemon=True)
+        self._thread.start()
+        self.app.log_to_gui("Monitor", f"资源采样已启动 (PID {self.pid}, 间隔 {self.interval_sec:g}s, 方式 {self.backend})。", "info")
+        return True
+
+    def stop(self):
+        """Stops sampling. Collected samples are kept for display and export."""
+        self._stop_flag.set()
+
+    def is_running(self):
+        """Returns True while the sampler thread is alive."""
+        return self._thread is not None and self._thread.is_alive() and not self._stop_flag.is_set()
+
+    def snapshot(self):
+        """Returns a list copy of the ring buffer (oldest first)."""
+        with self._lock:
+            return list(self.samples)
+
+    # --- Sampling ---
+    def _sample_loop(self):
+        """Collects one sample per interval until stopped or the process disappears."""
+        while not self._stop_flag.is_set():
+            started = time.time()
+            try:
+                sample = self._read_sample()
+            except Exception as e:
+                print(f"[Monitor WARNING] Sampling PID {self.pid} failed: {e}")
+                sample = None
+            if sample is None:
+                # Root process is gone; the backend was stopped or crashed
+                break
+            with self._lock:
+                self.samples.append(sample)
+            self._stop_flag.wait(max(0.0, self.interval_sec - (time.time() - started)))
+
+    def _read_sample(self):
+        """Reads one aggregated sample for the process tree, or None if the root process no longer exists."""
+        totals = self._read_proc_totals() if self.backend == "proc" else self._read_psutil_totals()
+        if totals is None:
+            return None
+
+        now = time.time()
+        cpu_percent = 0.0
+        if self._prev_cpu_ticks is not None:
+            prev_wall, prev_cpu = self._prev_cpu_ticks
+            wall_delta = now - prev_wall
+            if wall_delta > 0:
+                cpu_percent = max(0.0, (totals["cpu_seconds"] - prev_cpu) / wall_delta * 100.0)
+        self._prev_cpu_ticks = (now, totals["cpu_seconds"])
+
+        return {
+            "timestamp": datetime.fromtimestamp(now).isoformat(timespec="milliseconds"),
+            "pid": self.pid,
+            "process_count": totals["process_count"],
+            "rss_bytes": totals["rss_bytes"],
+            "cpu_percent": round(cpu_percent, 1),
+            "threads": totals["threads"],
+            "open_fds": totals["open_fds"],
+            "read_bytes": totals["read_bytes"],
+            "write_bytes": totals["write_bytes"],
+        }
+
+    def _proc_children(self, pid):
+        """Returns direct child PIDs using /proc/<pid>/task/*/children, falling back to a /proc scan."""
+        children = []
+        task_dir = os.path.join(PROC_ROOT, str(pid), "task")
+        try:
+            for tid in os.listdir(task_dir):
+                with open(os.path.join(task_dir, tid, "children"), "r") as f:
+                    children.extend(int(c) for c in f.read().split())
+            return children
+        except (OSError, ValueError):
+            pass
+        # Kernels without CONFIG_PROC_CHILDREN: scan all processes for a matching PPID
+        for entry in os.listdir(PROC_ROOT):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(os.path.join(PROC_ROOT, entry, "stat"), "r") as f:
+                    stat_fields = f.read().rsplit(")", 1)[1].split()
+                if int(stat_fields[1]) == pid:
+                    children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+        return children
+
+    def _read_proc_totals(self):
+        """Aggregates /proc stats for the root PID and all of its descendants."""
+        if not os.path.isdir(os.path.join(PROC_ROOT, str(self.pid))):
+            return None
+        totals = {"process_count": 0, "rss_bytes": 0, "cpu_seconds": 0.0, "threads": 0, "open_fds": 0, "read_bytes": 0, "write_bytes": 0}
+        pending = [self.pid]
+        seen = set()
+        while pending:
+            pid = pending.pop()
+            if pid in seen:
+                continue
+            seen.add(pid)
+            base = os.path.join(PROC_ROOT, str(pid))
+            try:
+                with open(os.path.join(base, "stat"), "r") as f:
+                    # Fields after the ")" closing the command name: state is index 0, utime 11, stime 12, num_threads 17
+                    stat_fields = f.read().rsplit(")", 1)[1].split()
+                totals["cpu_seconds"] += (int(stat_fields[11]) + int(stat_fields[12])) / self._clock_ticks
+                totals["threads"] += int(stat_fields[17])
+                with open(os.path.join(base, "status"), "r") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            totals["rss_bytes"] += int(line.split()[1]) * 1024
+                            break
+            except (OSError, IndexError, ValueError):
+                continue # Process exited between listing and reading
+            totals["process_count"] += 1
+            try:
+                totals["open_fds"] += len(os.listdir(os.path.join(base, "fd")))
+            except OSError:
+                pass
+            try:
+                with open(os.path.join(base, "io"), "r") as f:
+                    for line in f:
+                        key, _, value = line.partition(":")
+                        if key == "read_bytes":
+                            totals["read_bytes"] += int(value)
+                        elif key == "write_bytes":
+                            totals["write_bytes"] += int(value)
+            except (OSError, ValueError):
+                pass # /proc/<pid>/io needs same-user or ptrace access
+            pending.extend(self._proc_children(pid))
+        return totals if totals["process_count"] else None
+
+    def _read_psutil_totals(self):
+        """Aggregates psutil stats for the root PID and all of its descendants."""
+        try:
+            root = psutil.Process(self.pid)
+            processes = [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+        totals = {"process_count": 0, "rss_bytes": 0, "cpu_seconds": 0.0, "threads": 0, "open_fds": 0, "read_bytes": 0, "write_bytes": 0}
+        for proc in processes:
+            try:
+                with proc.oneshot():
+                    totals["rss_bytes"] += proc.memory_info().rss
+                    cpu_times = proc.cpu_times()
+                    totals["cpu_seconds"] += cpu_times.user + cpu_times.system
+                    totals["threads"] += proc.num_threads()
+                    # Windows has handles instead of fds
+                    if hasattr(proc, "num_fds"):
+                        totals["open_fds"] += proc.num_fds()
+                    elif hasattr(proc, "num_handles"):
+                        totals["open_fds"] += proc.num_handles()
+                    if hasattr(proc, "io_counters"):
+                        io = proc.io_counters()
+                        totals["read_bytes"] += io.read_bytes
+                        totals["write_bytes"] += io.write_bytes
+                totals["process_count"] += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return totals if totals["process_count"] else None
+
+    # --- Export ---
+    def export_csv(self, file_path):
+        """Writes the buffered samples to a CSV file. Returns the number of rows written."""
+        samples = self.snapshot()
+        with open(file_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(samples)
+        return len(samples)
+
+    def export_jsonl(self, file_path):
+        """Writes the buffered samples to a JSON Lines file. Returns the number of lines written."""
+        samples = self.snapshot()
+        with open(file_path, "w", encoding="utf-8") as f:
+            for sample in samples:
+                f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+        return len(samples)
@@ -6,6 +6,8 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 import os
 
+from ui_modules.management import NODE_INSTALL_MODES
+
 # Note: Styling constants and setup_text_tags are accessed via app_instance
 
 class SettingsTab:
@@ -195,6 +197,105 @@ class SettingsTab:
         xformers_combo.grid(row=perf_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
         perf_row += 1
 
+        current_row += 1
+
+        # --- Advanced & Acceleration Group ---
+        advanced_group = ttk.LabelFrame(self.frame, text=" 高级与加速 / Advanced & Acceleration ", padding=(10, 5))
+        advanced_group.grid(row=current_row, column=0, sticky="ew", padx=frame_padx, pady=frame_pady)
+        advanced_group.columnconfigure(1, weight=1)
+        advanced_row = 0
+
+        # Idle Sleep (proxy on the API port stops the backend when idle and wakes it on demand)
+        ttk.Label(advanced_group, text="空闲自动休眠:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        idle_sleep_options = ["启用", "禁用"]
+        idle_sleep_combo = ttk.Combobox(advanced_group, textvariable=self.app.idle_sleep_enabled_var, values=idle_sleep_options, style='TCombobox', state="readonly")
+        idle_sleep_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Idle Sleep Timeout
+        ttk.Label(advanced_group, text="空闲休眠超时(分钟):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        idle_timeout_entry = ttk.Entry(advanced_group, textvariable=self.app.idle_sleep_timeout_min_var, width=10, style='TEntry')
+        idle_timeout_entry.grid(row=advanced_row, column=1, sticky="w", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Resource Sample Interval (Logs > Performance sparklines)
+        ttk.Label(advanced_group, text="资源采样间隔(秒):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        sample_interval_entry = ttk.Entry(advanced_group, textvariable=self.app.resource_sample_interval_var, width=10, style='TEntry')
+        sample_interval_entry.grid(row=advanced_row, column=1, sticky="w", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Python import time profiling
+        ttk.Label(advanced_group, text="导入耗时分析(-X importtime):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        importtime_combo = ttk.Combobox(advanced_group, textvariable=self.app.python_importtime_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        importtime_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Repository mirror cache (bare mirrors in cache/repos used as clone references)
+        ttk.Label(advanced_group, text="Git 镜像缓存:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        repo_cache_combo = ttk.Combobox(advanced_group, textvariable=self.app.repo_cache_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        repo_cache_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Node install mode (full / shallow / blobless partial clone)
+        ttk.Label(advanced_group, text="节点安装模式:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        install_mode_combo = ttk.Combobox(advanced_group, textvariable=self.app.node_install_mode_var, values=list(NODE_INSTALL_MODES), style='TCombobox', state="readonly")
+        install_mode_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Local wheelhouse (cache/wheels, prefetched in the background and used by pip via --find-links)
+        ttk.Label(advanced_group, text="本地 Wheelhouse:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        wheelhouse_combo = ttk.Combobox(advanced_group, textvariable=self.app.wheelhouse_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        wheelhouse_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Wheelhouse size budget (least recently used archives are evicted beyond it)
+        ttk.Label(advanced_group, text="Wheelhouse 容量上限(GB):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        wheelhouse_max_entry = ttk.Entry(advanced_group, textvariable=self.app.wheelhouse_max_gb_var, width=10, style='TEntry')
+        wheelhouse_max_entry.grid(row=advanced_row, column=1, sticky="w", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Main body worktree pool (activation switches between git worktrees in cache/worktrees)
+        ttk.Label(advanced_group, text="本体版本工作树池:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        worktree_pool_combo = ttk.Combobox(advanced_group, textvariable=self.app.worktree_pool_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        worktree_pool_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Worktree pool disk budget (least recently used versions are removed beyond it)
+        ttk.Label(advanced_group, text="工作树池容量上限(GB):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        worktree_pool_max_entry = ttk.Entry(advanced_group, textvariable=self.app.worktree_pool_max_gb_var, width=10, style='TEntry')
+        worktree_pool_max_entry.grid(row=advanced_row, column=1, sticky="w", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Cached Python environments (one hardlinked clone per requirements combination in cache/envs)
+        ttk.Label(advanced_group, text="按依赖组合缓存Python环境:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        env_cache_combo = ttk.Combobox(advanced_group, textvariable=self.app.env_cache_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        env_cache_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Bytecode precompile after updates (compileall of the changed trees in a process pool)
+        ttk.Label(advanced_group, text="更新后预编译字节码:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        bytecode_combo = ttk.Combobox(advanced_group, textvariable=self.app.bytecode_precompile_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        bytecode_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Idle-time git maintenance of the main body and node repositories
+        ttk.Label(advanced_group, text="空闲时维护Git仓库:", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        git_maintenance_combo = ttk.Combobox(advanced_group, textvariable=self.app.git_maintenance_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        git_maintenance_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Untracked cache / fsmonitor (applied during maintenance passes)
+        ttk.Label(advanced_group, text="Git 文件系统缓存(untrackedCache/fsmonitor):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        git_fs_cache_combo = ttk.Combobox(advanced_group, textvariable=self.app.git_fs_cache_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        git_fs_cache_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
+        # Fastest-mirror selection for GitHub clones/fetches and the node catalog (registry in mirrors.json, opt-in)
+        ttk.Label(advanced_group, text="自动选择最快镜像 (第三方代理, 仅信任时启用):", anchor=tk.W, style='TLabel').grid(row=advanced_row, column=0, sticky=tk.W, pady=widget_pady, padx=widget_padx)
+        mirror_selection_combo = ttk.Combobox(advanced_group, textvariable=self.app.mirror_selection_enabled_var, values=["启用", "禁用"], style='TCombobox', state="readonly")
+        mirror_selection_combo.grid(row=advanced_row, column=1, sticky="ew", pady=widget_pady, padx=widget_padx)
+        advanced_row += 1
+
         current_row += 1
         self.frame.rowconfigure(current_row, weight=1) # Spacer row
 
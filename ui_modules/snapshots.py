@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/snapshots.py
+# Environment Snapshot Module (lockfile of main body/node commits plus installed package versions, parallel restore)
+
+import os
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog, Toplevel
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from ui_modules import history_store
+from ui_modules.node_history import read_head_state, read_origin_url
+from ui_modules.offline_bundle import BUNDLE_SUFFIX
+
+MAX_SNAPSHOTS = 30
+MAX_PARALLEL_RESTORE = 8 # Repositories checked out at the same time
+FETCH_TIMEOUT_SEC = 300
+COMFYUI_LABEL = "ComfyUI"
+
+
+class EnvironmentSnapshots:
+    """Captures and restores "the exact code and packages that worked" for the main body and every git node."""
+    def __init__(self, app_instance, snapshots_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, paths, git, dependency and trash helpers).
+            snapshots_file: JSON list of snapshot records:
+                {"id", "time", "label", "comfyui": {"commit", "branch"}, "nodes": {name: {"commit", "branch", "repo_url"}},
+                 "python", "packages": {canonical name: version}}.
+        """
+        self.app = app_instance
+        self.snapshots_file = snapshots_file
+
+    # --- Capture ---
+    def capture(self, label):
+        """
+        Records the current state. Only reads files (git HEAD/refs/config and dist-info metadata), so it takes
+        milliseconds even with hundreds of nodes and can run right before every update. Returns the record.
+        """
+        started = time.time()
+        record = self.current_state(label)
+        history_store.append_record(self.snapshots_file, record, max_records=MAX_SNAPSHOTS)
+        self.app.log_to_gui("Snapshots", f"已保存环境快照 '{label}': {len(record['nodes'])} 个节点, {len(record['packages'])} 个包 ({(time.time() - started) * 1000:.0f}ms)。", "info")
+        return record
+
+    def current_state(self, label):
+        """The snapshot record of the current state, without saving it (also the manifest of an offline bundle)."""
+        record = {
+            "id": datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "label": label,
+            "comfyui": None,
+            "nodes": {},
+            "python": self.app.python_exe_var.get(),
+            "packages": {},
+        }
+        comfyui_dir = self.app.comfyui_install_dir
+        if comfyui_dir:
+            commit, branch = read_head_state(comfyui_dir)
+            if commit:
+                record["comfyui"] = {"commit": commit, "branch": branch, "repo_url": read_origin_url(comfyui_dir)}
+        for name, path in self.node_repositories().items():
+            commit, branch = read_head_state(path)
+            if commit:
+                record["nodes"][name] = {"commit": commit, "branch": branch, "repo_url": read_origin_url(path)}
+        python_exe = record["python"]
+        if python_exe and os.path.isfile(python_exe) and self.app.dependency_checker.is_available():
+            installed = self.app.dependency_checker.installed_distributions(python_exe)
+            record["packages"] = {name: str(version) for name, version in sorted(installed.versions.items())}
+        else:
+            self.app.log_to_gui("Snapshots", "无法读取已安装的包 (Python 无效或缺少 packaging)，快照仅包含代码版本。", "warn")
+        return record
+
+    def node_repositories(self):
+        """{name: path} of every node directory with a .git (disabled nodes included)."""
+        repos = {}
+        nodes_dir = self.app.comfyui_nodes_dir
+        if nodes_dir and os.path.isdir(nodes_dir):
+            for entry in sorted(os.listdir(nodes_dir)):
+                path = os.path.join(nodes_dir, entry)
+                if os.path.exists(os.path.join(path, ".git")):
+                    repos[entry] = path
+        return repos
+
+    # --- Listing ---
+    def snapshots(self):
+        """Snapshot records, newest first."""
+        return list(reversed(history_store.load_records(self.snapshots_file)))
+
+    def get(self, snapshot_id):
+        return next((record for record in self.snapshots() if record.get("id") == snapshot_id), None)
+
+    def delete(self, snapshot_id):
+        records = [record for record in history_store.load_records(self.snapshots_file) if record.get("id") != snapshot_id]
+        history_store.save_records(self.snapshots_file, records)
+
+    # --- Diff ---
+    def plan(self, snapshot):
+        """
+        What a restore would change, from file reads only:
+        {"main_body": bool, "checkout": [names], "clone": [names], "extra": [names], "packages": ["name==version"]}.
+        """
+        plan = {"main_body": False, "checkout": [], "clone": [], "extra": [], "packages": []}
+        if snapshot.get("comfyui") and self.app.comfyui_install_dir:
+            plan["main_body"] = read_head_state(self.app.comfyui_install_dir) != (snapshot["comfyui"]["commit"], snapshot["comfyui"]["branch"])
+        current = self.node_repositories()
+        for name, entry in snapshot.get("nodes", {}).items():
+            if name not in current:
+                plan["clone"].append(name)
+            elif read_head_state(current[name]) != (entry["commit"], entry.get("branch")):
+                plan["checkout"].append(name)
+        plan["extra"] = sorted(set(current) - set(snapshot.get("nodes", {})))
+
+        python_exe = self.app.python_exe_var.get()
+        if snapshot.get("packages") and python_exe and os.path.isfile(python_exe) and self.app.dependency_checker.is_available():
+            installed = self.app.dependency_checker.installed_distributions(python_exe).versions
+            plan["packages"] = [f"{name}=={version}" for name, version in snapshot["packages"].items()
+                                if name not in installed or str(installed[name]) != version]
+        return plan
+
+    # --- Restore ---
+    def restore(self, snapshot_id):
+        """
+        Task to bring the main body, the nodes and the packages back to a snapshot. Runs in worker thread.
+        Repositories are checked out in parallel; only packages whose version differs are reinstalled (one pip run).
+        Nodes added after the snapshot are moved to the trash area, so they can be restored individually.
+        """
+        snapshot = self.get(snapshot_id)
+        if not snapshot:
+            self.app.log_to_gui("Snapshots", f"快照 {snapshot_id} 不存在。", "error")
+            return
+        started = time.time()
+        plan = self.plan(snapshot)
+        self.app.log_to_gui("Snapshots", f"开始恢复快照 '{snapshot['label']}' ({snapshot['time']})...", "info")
+        # The state before the restore can be restored in turn
+        self.capture(f"恢复 '{snapshot['label']}' 之前")
+
+        failed = []
+        changed_paths = {}
+        nodes_dir = self.app.comfyui_nodes_dir
+        try:
+            if plan["main_body"]:
+                try:
+                    changed_paths[COMFYUI_LABEL] = self._restore_main_body(snapshot["comfyui"])
+                except Exception as e:
+                    self.app.log_to_gui("Snapshots", f"本体恢复失败: {e}", "error")
+                    failed.append(f"{COMFYUI_LABEL} ({e})")
+
+            jobs = {name: os.path.join(nodes_dir, name) for name in plan["checkout"] + plan["clone"]}
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_RESTORE, thread_name_prefix="SnapshotRestore") as executor:
+                futures = {name: executor.submit(self._restore_node, name, path, snapshot["nodes"][name]) for name, path in jobs.items()}
+                for name, future in futures.items():
+                    try:
+                        future.result()
+                        changed_paths[name] = jobs[name]
+                    except Exception as e:
+                        self.app.log_to_gui("Snapshots", f"节点 '{name}' 恢复失败: {e}", "error")
+                        failed.append(f"{name} ({e})")
+
+            for name in plan["extra"]:
+                if self.app.stop_event_set():
+                    break
+                if self.app.node_trash.move_to_trash(os.path.join(nodes_dir, name), name):
+                    self.app.log_to_gui("Snapshots", f"快照之后安装的节点 '{name}' 已移入回收区 (可撤销卸载)。", "info")
+                else:
+                    failed.append(f"{name} (无法移入回收区)")
+
+            if plan["packages"] and not self.app.stop_event_set():
+                self.app.log_to_gui("Snapshots", f"重新安装 {len(plan['packages'])} 个版本不同的包...", "info")
+                cwd = self.app.comfyui_install_dir or nodes_dir
+                if not self.app.dependency_manager.install_requirement_lines("快照", plan["packages"], cwd=cwd):
+                    failed.append("Python 包 (pip 安装失败)")
+            if not failed:
+                # The environment matches the restored code again; later installs skip these files while unchanged
+                self.app.dependency_manager.mark_installed(self._requirement_files())
+            if changed_paths and not self.app.stop_event_set():
+                self.app.bytecode_compiler.precompile(changed_paths)
+        finally:
+            self.app._queue_node_list_refresh()
+
+        seconds = time.time() - started
+        summary = (f"快照 '{snapshot['label']}' 恢复完成 (耗时 {seconds:.0f} 秒)。\n"
+                   f"本体: {'已切换' if plan['main_body'] else '未变化'}\n"
+                   f"节点: 切换 {len(plan['checkout'])} 个, 重新安装 {len(plan['clone'])} 个, 移入回收区 {len(plan['extra'])} 个\n"
+                   f"Python 包: 重新安装 {len(plan['packages'])} 个")
+        self.app.log_to_gui("Snapshots", summary.replace("\n", "; "), "info" if not failed else "warn")
+        if failed:
+            summary += f"\n\n失败 ({len(failed)} 个):\n- " + "\n- ".join(failed[:20])
+            self.app.root.after(0, lambda msg=summary: messagebox.showwarning("快照恢复完成 (有失败)", msg, parent=self.app.root))
+        else:
+            self.app.root.after(0, lambda msg=summary: messagebox.showinfo("快照恢复完成", msg, parent=self.app.root))
+
+    def _requirement_files(self):
+        files = {}
+        if self.app.comfyui_install_dir and os.path.isfile(os.path.join(self.app.comfyui_install_dir, "requirements.txt")):
+            files[COMFYUI_LABEL] = os.path.join(self.app.comfyui_install_dir, "requirements.txt")
+        for name, path in self.node_repositories().items():
+            if os.path.isfile(os.path.join(path, "requirements.txt")):
+                files[name] = os.path.join(path, "requirements.txt")
+        return files
+
+    def _restore_main_body(self, entry):
+        """Main body: pool mode activates the commit's worktree, otherwise the main directory is checked out. Returns the code dir."""
+        repo_dir = self.app.comfyui_repo_dir
+        pool = self.app.worktree_pool
+        if not pool.is_enabled():
+            self.checkout_commit(repo_dir, entry, None)
+            return repo_dir
+        self._ensure_commit(repo_dir, entry["commit"], None)
+        worktree_path, _ = pool.checkout(repo_dir, entry["commit"])
+        pool.set_active(repo_dir, entry["commit"], worktree_path)
+        self.app.update_derived_paths()
+        return worktree_path or repo_dir
+
+    def _restore_node(self, name, path, entry):
+        """One node in a pool thread: clone it if it is gone, then check out the recorded commit."""
+        if self.app.stop_event_set():
+            raise Exception("已取消")
+        if not os.path.exists(path):
+            mgmt_module = self.app.modules.get('management')
+            if not entry.get("repo_url") or not mgmt_module:
+                raise Exception("节点已不存在且无仓库地址")
+            if not mgmt_module._clone_node(name, path, entry["repo_url"], entry["commit"]):
+                raise Exception(f"无法切换到提交 {entry['commit'][:8]}")
+            if not entry.get("branch"):
+                return
+        self.checkout_commit(path, entry, entry.get("repo_url"))
+
+    def _ensure_commit(self, path, commit, repo_url):
+        """Makes the commit available locally: mirror cache first, then the network (deepening shallow clones)."""
+        _, _, rc = self.app._run_git_command(["cat-file", "-e", f"{commit}^{{commit}}"], cwd=path, timeout=10, log_output=False)
+        if rc == 0:
+            return
+        if repo_url:
+            self.app.repo_cache.fetch_from_mirror(repo_url, path)
+            _, _, rc = self.app._run_git_command(["cat-file", "-e", f"{commit}^{{commit}}"], cwd=path, timeout=10, log_output=False)
+            if rc == 0:
+                return
+        fetch_cmd = ["fetch", "--unshallow", "origin"] if os.path.isfile(os.path.join(path, ".git", "shallow")) else ["fetch", "origin"]
+        self.app._run_git_command(fetch_cmd, cwd=path, timeout=FETCH_TIMEOUT_SEC, log_output=False)
+        _, _, rc = self.app._run_git_command(["cat-file", "-e", f"{commit}^{{commit}}"], cwd=path, timeout=10, log_output=False)
+        if rc != 0:
+            raise Exception(f"提交 {commit[:8]} 在本地和远程均不存在")
+
+    def checkout_commit(self, path, entry, repo_url):
+        """checkout --force of the recorded commit; a recorded branch is reset to it (-B) so HEAD matches exactly."""
+        self._ensure_commit(path, entry["commit"], repo_url)
+        checkout_cmd = ["checkout", "--force"] + (["-B", entry["branch"]] if entry.get("branch") else []) + [entry["commit"]]
+        _, stderr, rc = self.app._run_git_command(checkout_cmd, cwd=path, timeout=60, log_output=False)
+        if rc != 0:
+            raise Exception(f"Git checkout 失败: {stderr.strip()[-300:]}")
+        if os.path.exists(os.path.join(path, ".gitmodules")):
+            _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=path, timeout=180, log_output=False)
+            if rc_sub != 0:
+                self.app.log_to_gui("Snapshots", f"Git submodule update 失败 ({os.path.basename(path)}): {stderr_sub.strip()}", "warn")
+
+
+class SnapshotManagerWindow:
+    """Window listing the snapshots, with create / restore / delete."""
+    def __init__(self, app_instance, store):
+        self.app = app_instance
+        self.store = store
+
+        self.window = Toplevel(self.app.root)
+        self.window.title("环境快照 / Snapshots")
+        self.window.geometry("640x420")
+        self.window.configure(bg=self.app.root.cget('bg'))
+        self.window.transient(self.app.root)
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(1, weight=1)
+
+        top_frame = ttk.Frame(self.window, padding=(10, 10, 10, 5))
+        top_frame.grid(row=0, column=0, sticky="ew")
+        top_frame.columnconfigure(1, weight=1)
+        ttk.Label(top_frame, text="快照名称:", style='TLabel').grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        self.label_var = tk.StringVar()
+        ttk.Entry(top_frame, textvariable=self.label_var).grid(row=0, column=1, sticky="ew")
+        ttk.Button(top_frame, text="保存当前环境", style="Accent.TButton", command=self._create_snapshot).grid(row=0, column=2, padx=(5, 0))
+
+        list_frame = ttk.Frame(self.window, padding=(10, 0, 10, 0))
+        list_frame.grid(row=1, column=0, sticky="nsew")
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        self.tree = ttk.Treeview(list_frame, columns=("time", "label", "comfyui", "nodes", "packages"), show="headings", selectmode="browse", style='Treeview')
+        self.tree.heading("time", text="时间"); self.tree.column("time", width=150, stretch=tk.NO)
+        self.tree.heading("label", text="名称"); self.tree.column("label", width=200, stretch=tk.YES)
+        self.tree.heading("comfyui", text="本体"); self.tree.column("comfyui", width=80, stretch=tk.NO, anchor=tk.CENTER)
+        self.tree.heading("nodes", text="节点"); self.tree.column("nodes", width=60, stretch=tk.NO, anchor=tk.CENTER)
+        self.tree.heading("packages", text="包"); self.tree.column("packages", width=60, stretch=tk.NO, anchor=tk.CENTER)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        button_frame = ttk.Frame(self.window, padding=(10, 5, 10, 10))
+        button_frame.grid(row=2, column=0, sticky="ew")
+        ttk.Label(button_frame, text="更新全部和批量操作前会自动保存快照。恢复时并行切换各仓库，仅重装版本不同的包。", style='Hint.TLabel').pack(side=tk.TOP, anchor=tk.W, pady=(0, 5))
+        ttk.Button(button_frame, text="关闭", style="Tab.TButton", command=self.window.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="删除", style="Tab.TButton", command=self._delete_snapshot).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(button_frame, text="恢复", style="Accent.TButton", command=self._restore_snapshot).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(button_frame, text="导出离线包...", style="Tab.TButton", command=self._export_bundle).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="导入离线包...", style="Tab.TButton", command=self._import_bundle).pack(side=tk.LEFT, padx=(5, 0))
+        self._reload()
+
+    def _reload(self):
+        self.tree.delete(*self.tree.get_children())
+        for record in self.store.snapshots():
+            comfyui = (record.get("comfyui") or {}).get("commit") or ""
+            self.tree.insert("", tk.END, iid=record["id"], values=(record.get("time", "").replace("T", " "), record.get("label", ""), comfyui[:8], len(record.get("nodes", {})), len(record.get("packages", {}))))
+
+    def _create_snapshot(self):
+        label = self.label_var.get().strip() or "手动快照"
+        self.store.capture(label)
+        self.label_var.set("")
+        self._reload()
+
+    def _selected_id(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("未选择快照", "请先从列表中选择一个快照。", parent=self.window)
+            return None
+        return selection[0]
+
+    def _delete_snapshot(self):
+        snapshot_id = self._selected_id()
+        if snapshot_id and messagebox.askyesno("确认删除", "确定要删除选中的快照吗？", parent=self.window):
+            self.store.delete(snapshot_id)
+            self._reload()
+
+    def _restore_snapshot(self):
+        snapshot_id = self._selected_id()
+        if not snapshot_id:
+            return
+        if self.app._is_update_task_running():
+            messagebox.showwarning("操作进行中", "更新任务正在进行中，请稍后再恢复快照。", parent=self.window)
+            return
+        if self.app._is_comfyui_running() or self.app.comfyui_externally_detected:
+            messagebox.showwarning("服务运行中", "请先停止 ComfyUI 后台服务，再恢复快照。", parent=self.window)
+            return
+        snapshot = self.store.get(snapshot_id)
+        plan = self.store.plan(snapshot)
+        if not (plan["main_body"] or plan["checkout"] or plan["clone"] or plan["extra"] or plan["packages"]):
+            messagebox.showinfo("无需恢复", "当前环境与该快照一致。", parent=self.window)
+            return
+        confirm_msg = (f"确定要恢复快照 '{snapshot['label']}' ({snapshot['time'].replace('T', ' ')}) 吗？\n\n"
+                       f"本体: {'切换到 ' + snapshot['comfyui']['commit'][:8] if plan['main_body'] else '不变'}\n"
+                       f"切换版本的节点: {len(plan['checkout'])} 个\n"
+                       f"重新安装的节点: {len(plan['clone'])} 个\n"
+                       f"移入回收区的节点 (快照之后安装): {len(plan['extra'])} 个\n"
+                       f"重新安装的 Python 包: {len(plan['packages'])} 个\n\n"
+                       f"本地修改将通过 checkout --force 覆盖；恢复前会自动保存当前环境的快照。")
+        if not messagebox.askyesno("确认恢复快照", confirm_msg, parent=self.window):
+            return
+        self.app.log_to_gui("Launcher", f"将恢复快照 '{snapshot['label']}' 任务添加到队列...", "info")
+        self.app.update_task_queue.put((self.store.restore, [snapshot_id], {}))
+        self.app.root.after(0, self.app._update_ui_state)
+        self.window.destroy()
+
+    # --- Offline bundle ---
+    def _check_idle(self):
+        if self.app._is_update_task_running():
+            messagebox.showwarning("操作进行中", "更新任务正在进行中，请稍后再试。", parent=self.window)
+            return False
+        return True
+
+    def _export_bundle(self):
+        if not self._check_idle():
+            return
+        archive_path = filedialog.asksaveasfilename(title="导出离线包", parent=self.window, defaultextension=BUNDLE_SUFFIX,
+                                                    initialfile=f"ComfyUI-{datetime.now():%Y%m%d}{BUNDLE_SUFFIX}",
+                                                    filetypes=[("离线包", f"*{BUNDLE_SUFFIX}"), ("所有文件", "*.*")])
+        if not archive_path:
+            return
+        include_wheels = bool(self.app.wheelhouse.archive_files()) and messagebox.askyesno(
+            "包含依赖", f"是否把 wheelhouse 中的 {len(self.app.wheelhouse.archive_files())} 个 wheel 一并打包？\n(目标机器无需联网即可安装依赖，但离线包会更大)", parent=self.window)
+        self.app.log_to_gui("Launcher", "将导出离线包任务添加到队列...", "info")
+        self.app.update_task_queue.put((self.app.offline_bundle.export, [archive_path, include_wheels], {}))
+        self.app.root.after(0, self.app._update_ui_state)
+
+    def _import_bundle(self):
+        if not self._check_idle():
+            return
+        archive_path = filedialog.askopenfilename(title="导入离线包", parent=self.window,
+                                                  filetypes=[("离线包", f"*{BUNDLE_SUFFIX}"), ("所有文件", "*.*")])
+        if not archive_path:
+            return
+        try:
+            manifest = self.app.offline_bundle.read_manifest(archive_path)
+        except Exception as e:
+            messagebox.showerror("无效的离线包", f"无法读取离线包清单:\n{e}", parent=self.window)
+            return
+        target_dir = filedialog.askdirectory(title="选择新的 ComfyUI 安装目录 (需为空目录)", parent=self.window)
+        if not target_dir:
+            return
+        if os.path.isdir(target_dir) and os.listdir(target_dir):
+            messagebox.showerror("目录不为空", f"请选择一个空目录或新目录:\n{target_dir}", parent=self.window)
+            return
+        confirm_msg = (f"将离线包 ({manifest.get('time', '').replace('T', ' ')}) 导入到:\n{target_dir}\n\n"
+                       f"本体 + {len(manifest.get('nodes', {}))} 个节点, {len(manifest.get('wheels', []))} 个 wheel。继续吗？")
+        if not messagebox.askyesno("确认导入", confirm_msg, parent=self.window):
+            return
+        self.app.log_to_gui("Launcher", "将导入离线包任务添加到队列...", "info")
+        self.app.update_task_queue.put((self.app.offline_bundle.import_bundle, [archive_path, target_dir], {}))
+        self.app.root.after(0, self.app._update_ui_state)
+        self.window.destroy()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/telemetry.py
+# Execution Telemetry Module (parsed from ComfyUI backend output)
+
+import re
+import time
+import threading
+from collections import deque
+from datetime import datetime
+
+from ui_modules import history_store
+
+# Patterns for lines printed by ComfyUI's execution and model management code
+PROMPT_STARTED_RE = re.compile(r"\bgot prompt\b")
+PROMPT_EXECUTED_RE = re.compile(r"Prompt executed in ([0-9]+(?:\.[0-9]+)?) seconds")
+REQUESTED_LOAD_RE = re.compile(r"Requested to load (\S+)")
+LOADED_RE = re.compile(r"\bloaded (completely|partially)\b")
+UNLOAD_RE = re.compile(r"\b(?:Unload(?:ing)? models?|unload clone)\b", re.IGNORECASE)
+
+RECENT_WINDOW = 20 # Prompts in the "recent" percentile window
+MAX_SESSIONS = 100 # Sessions kept in the history file
+MAX_LOAD_EVENTS_SAVED = 50
+
+# Settings saved with each session so runs can be compared per configuration
+SETTINGS_KEYS = ["vram_mode", "ckpt_precision", "vae_precision", "clip_precision", "unet_precision",
+                 "cuda_malloc", "ipex_optimization", "xformers_acceleration"]
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile of an already sorted list (pct in 0-100)."""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class ComfyUITelemetry:
+    """Streaming parser for one backend session; fed line by line from the stream reader threads."""
+    def __init__(self, history_file, settings_snapshot=None):
+        """
+        Args:
+            history_file: JSON file the finished session summary is appended to.
+            settings_snapshot: Dict of launcher settings active for this session.
+        """
+        self.history_file = history_file
+        self.settings = dict(settings_snapshot or {})
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._finished = False
+
+        self.prompt_durations = [] # Seconds, in completion order
+        self.recent_durations = deque(maxlen=RECENT_WINDOW)
+        self.first_prompt_at = None # Wall time the first prompt was received
+        self.last_prompt_done_at = None
+        self.load_requests = [] # {"model", "requested_at"} waiting for their "loaded ..." line
+        self.model_loads = [] # {"model", "seconds", "mode"}
+        self.requested_load_count = 0
+        self.unload_count = 0
+
+    def feed_line(self, line):
+        """Parses one output line. Cheap substring checks run first so ordinary lines cost almost nothing."""
+        if "rompt" not in line and "oad" not in line:
+            return
+        now = time.time()
+        with self._lock:
+            if "Prompt executed in" in line:
+                match = PROMPT_EXECUTED_RE.search(line)
+                if match:
+                    seconds = float(match.group(1))
+                    self.prompt_durations.append(seconds)
+                    self.recent_durations.append(seconds)
+                    self.last_prompt_done_at = now
+                    if self.first_prompt_at is None:
+                        self.first_prompt_at = now - seconds
+                return
+            if PROMPT_STARTED_RE.search(line):
+                if self.first_prompt_at is None:
+                    self.first_prompt_at = now
+                return
+            match = REQUESTED_LOAD_RE.search(line)
+            if match:
+                self.requested_load_count += 1
+                self.load_requests.append({"model": match.group(1), "requested_at": now})
+                return
+            match = LOADED_RE.search(line)
+            if match:
+                # ComfyUI prints one "loaded ..." line per requested model, in request order
+                request = self.load_requests.pop(0) if self.load_requests else None
+                self.model_loads.append({
+                    "model": request["model"] if request else "unknown",
+                    "seconds": round(now - request["requested_at"], 3) if request else None,
+                    "mode": match.group(1),
+                })
+                return
+            if UNLOAD_RE.search(line):
+                self.unload_count += 1
+
+    def summary(self):
+        """Returns the current session statistics as a dict."""
+        with self._lock:
+            durations = sorted(self.prompt_durations)
+            recent = sorted(self.recent_durations)
+            load_seconds = [load["seconds"] for load in self.model_loads if load["seconds"] is not None]
+            prompts_per_min = None
+            if durations and self.first_prompt_at is not None and self.last_prompt_done_at is not None:
+                active_minutes = (self.last_prompt_done_at - self.first_prompt_at) / 60.0
+                if active_minutes > 0:
+                    prompts_per_min = len(durations) / active_minutes
+            return {
+                "prompts": len(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "p99": percentile(durations, 99),
+                "mean": sum(durations) / len(durations) if durations else None,
+                "recent_p50": percentile(recent, 50),
+                "recent_p95": percentile(recent, 95),
+                "prompts_per_min": prompts_per_min,
+                "load_requests": self.requested_load_count,
+                "model_loads": len(self.model_loads),
+                "model_load_mean_sec": sum(load_seconds) / len(load_seconds) if load_seconds else None,
+                "unloads": self.unload_count,
+            }
+
+    def finish(self):
+        """Saves the session summary to the history file once. Empty sessions are not recorded."""
+        with self._lock:
+            if self._finished:
+                return None
+            self._finished = True
+        record = self.summary()
+        if not record["prompts"] and not record["model_loads"]:
+            return None
+        for key in ("p50", "p95", "p99", "mean", "recent_p50", "recent_p95", "prompts_per_min", "model_load_mean_sec"):
+            if record[key] is not None:
+                record[key] = round(record[key], 3)
+        record["started"] = datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds")
+        record["ended"] = datetime.now().isoformat(timespec="seconds")
+        record["settings"] = self.settings
+        record["model_load_events"] = self.model_loads[-MAX_LOAD_EVENTS_SAVED:]
+        history_store.append_record(self.history_file, record, max_records=MAX_SESSIONS)
+        return record
+
+
+def load_sessions(history_file):
+    """Returns saved session summaries, newest first."""
+    return list(reversed(history_store.load_records(history_file)))
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/wheelhouse.py
+# Wheelhouse Module (launcher-managed wheel cache, background prefetch, LRU eviction)
+
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+from ui_modules import history_store
+
+DEFAULT_WHEELHOUSE_MAX_GB = "10"
+PREFETCH_TIMEOUT_SEC = 1800
+ARCHIVE_SUFFIXES = (".whl", ".tar.gz", ".zip", ".tar.bz2")
+# pip output lines naming a wheelhouse file it read or wrote (install: "Processing", download: "Saved"/"File was already downloaded")
+USED_FILE_RE = re.compile(r"^\s*(?:Processing|Saved|File was already downloaded)\s+(.+?)\s*$", re.MULTILINE)
+# Last line of a successful pip install: "Successfully installed name-1.0 other-name-2.0+cu121"
+INSTALLED_RE = re.compile(r"^\s*Successfully installed\s+(.+?)\s*$", re.MULTILINE)
+# Requirement lines that can't be resolved from a temporary copy of the file (relative paths, nested files)
+UNPREFETCHABLE_PREFIXES = (".", "-e", "--editable", "-r", "--requirement", "-c", "--constraint", "file:")
+
+
+def _prefetchable_lines(requirements_text):
+    """Drops requirement lines that only make sense next to the original file."""
+    lines = []
+    for line in requirements_text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#") or stripped.startswith(UNPREFETCHABLE_PREFIXES):
+            continue
+        lines.append(stripped)
+    return lines
+
+
+def installed_pins(pip_output):
+    """Returns 'name==version' for every distribution a pip install reports as newly installed."""
+    pins = []
+    for match in INSTALLED_RE.finditer(pip_output or ""):
+        for item in match.group(1).split():
+            name, _, version = item.rpartition("-") # Versions never contain '-', names may
+            if name and version:
+                pins.append(f"{name}=={version}")
+    return pins
+
+
+class Wheelhouse:
+    """A shared directory of downloaded wheels that pip installs read through --find-links."""
+    def __init__(self, app_instance, wheelhouse_dir, index_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, dependency_manager and _run_process_command).
+            wheelhouse_dir: Directory holding the downloaded wheels / sdists.
+            index_file: JSON file mapping archive file name -> last used timestamp (for LRU eviction).
+        """
+        self.app = app_instance
+        self.wheelhouse_dir = wheelhouse_dir
+        self.index_file = index_file
+        self._lock = threading.Lock() # Serializes downloads, index writes and eviction
+        self._pending = {} # label -> requirements text waiting for the background prefetch thread
+        self._pending_guard = threading.Lock()
+        self._prefetch_thread = None
+
+    # --- Config ---
+    def is_enabled(self):
+        """Reads the wheelhouse toggle from the app config on every call."""
+        return self.app.config.get("wheelhouse_enabled", "启用") == "启用"
+
+    def max_bytes(self):
+        """Size budget from the config (GB); falls back to the default on invalid values."""
+        try:
+            max_gb = float(self.app.config.get("wheelhouse_max_gb", DEFAULT_WHEELHOUSE_MAX_GB))
+        except (TypeError, ValueError):
+            max_gb = float(DEFAULT_WHEELHOUSE_MAX_GB)
+        return int(max(max_gb, 0) * 1024 ** 3)
+
+    # --- Install Helpers ---
+    def archive_files(self):
+        """Returns the archive file names currently in the wheelhouse."""
+        try:
+            return [name for name in os.listdir(self.wheelhouse_dir) if name.endswith(ARCHIVE_SUFFIXES)]
+        except OSError:
+            return []
+
+    def has_wheels(self):
+        """Returns True if the wheelhouse is enabled and holds at least one archive."""
+        return self.is_enabled() and bool(self.archive_files())
+
+    def find_links_args(self):
+        """pip arguments that let an install pick archives from the wheelhouse."""
+        if not self.is_enabled() or not os.path.isdir(self.wheelhouse_dir):
+            return []
+        return ["--find-links", self.wheelhouse_dir]
+
+    def mark_used_from_output(self, pip_output):
+        """Refreshes the last-used time of every wheelhouse file named in pip's output."""
+        if not pip_output:
+            return
+        wheelhouse_norm = os.path.normcase(os.path.abspath(self.wheelhouse_dir))
+        used = set()
+        for match in USED_FILE_RE.finditer(pip_output):
+            path = match.group(1).strip().strip("'\"")
+            if path.startswith("file://"):
+                path = path[len("file://"):]
+            path = os.path.normcase(os.path.abspath(path))
+            if os.path.dirname(path) == wheelhouse_norm:
+                used.add(os.path.basename(path))
+        if used:
+            self._touch(used)
+
+    def import_archives(self, source_dir):
+        """Copies archives from source_dir (offline bundle) into the wheelhouse, skipping files it already has. Returns the count."""
+        os.makedirs(self.wheelhouse_dir, exist_ok=True)
+        existing = set(self.archive_files())
+        imported = []
+        for name in os.listdir(source_dir):
+            if name.endswith(ARCHIVE_SUFFIXES) and name not in existing:
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(self.wheelhouse_dir, name))
+                imported.append(name)
+        self._touch(imported)
+        return len(imported)
+
+    def _touch(self, file_names):
+        """Stores 'now' as the last used time of the given files."""
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            now = time.time()
+            for name in file_names:
+                index[name] = now
+            history_store.save_mapping(self.index_file, index)
+
+    # --- Prefetch ---
+    def prefetch_async(self, requirement_texts):
+        """
+        Queues {label: requirements.txt content} for a background download into the wheelhouse.
+        Used when an update is detected, so the later install finds its wheels locally.
+        """
+        if not self.is_enabled() or not requirement_texts:
+            return
+        with self._pending_guard:
+            self._pending.update(requirement_texts)
+            if self._prefetch_thread and self._prefetch_thread.is_alive():
+                return # The running thread picks up the new entries
+            self._prefetch_thread = threading.Thread(target=self._prefetch_loop, name="WheelhousePrefetch", daemon=True)
+            self._prefetch_thread.start()
+
+    def _prefetch_loop(self):
+        """Background thread body: drains the pending requirements in batches."""
+        while True:
+            with self._pending_guard:
+                if not self._pending:
+                    self._prefetch_thread = None
+                    return
+                batch, self._pending = self._pending, {}
+            lines = []
+            for text in batch.values():
+                lines.extend(line for line in _prefetchable_lines(text) if line not in lines)
+            if not lines:
+                continue
+            tmp_dir = tempfile.mkdtemp(prefix="comlauncher-prefetch-")
+            try:
+                requirements_path = os.path.join(tmp_dir, "requirements.txt")
+                with open(requirements_path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                downloaded = self.prefetch([requirements_path], log_output=False)
+                if downloaded:
+                    self.app.log_to_gui("Wheelhouse", f"后台预取完成 ({', '.join(batch)}): 新增 {downloaded} 个安装包。", "info")
+            except Exception as e:
+                print(f"[Wheelhouse WARNING] Background prefetch failed: {e}")
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def archive_installed_async(self, pip_output, python_exe):
+        """
+        Downloads the archives of what an online install just installed into the wheelhouse, in a background thread,
+        so later offline installs (other interpreters, cached environment builds, offline bundles) find them locally.
+        """
+        pins = installed_pins(pip_output)
+        if not self.is_enabled() or not pins:
+            return
+        threading.Thread(target=self._archive_pins, args=(pins, python_exe), name="WheelhouseArchive", daemon=True).start()
+
+    def _archive_pins(self, pins, python_exe):
+        """Background thread body: pip download --no-deps of exact versions, one by one if the batch fails."""
+        try:
+            os.makedirs(self.wheelhouse_dir, exist_ok=True)
+            with self._lock:
+                before = set(self.archive_files())
+                download_cmd = [python_exe, "-m", "pip", "download", "--no-deps", "-d", self.wheelhouse_dir] + self.find_links_args()
+                output, stderr, rc = self.app._run_process_command(download_cmd + pins, cwd=self.wheelhouse_dir, timeout=PREFETCH_TIMEOUT_SEC, log_output=False, log_source="Pip")
+                if rc != 0:
+                    # Typically a package installed from a local path or VCS, which no index has; the others are still archived
+                    print(f"[Wheelhouse WARNING] pip download of installed packages failed, retrying one by one: {stderr.strip()[-500:]}")
+                    for pin in pins:
+                        stdout, _, _ = self.app._run_process_command(download_cmd + [pin], cwd=self.wheelhouse_dir, timeout=PREFETCH_TIMEOUT_SEC, log_output=False, log_source="Pip")
+                        output += stdout
+                added = set(self.archive_files()) - before
+            self.mark_used_from_output(output)
+            self._touch(added)
+            self.evict()
+            if added:
+                self.app.log_to_gui("Wheelhouse", f"已将刚安装的 {len(added)} 个安装包存入 wheelhouse。", "info")
+        except Exception as e:
+            print(f"[Wheelhouse WARNING] Archiving installed packages failed: {e}")
+
+    def prefetch(self, requirements_paths, cwd=None, log_output=True, python_exe=None):
+        """
+        Downloads exactly the archives pip would install for the given requirements files into the wheelhouse.
+
+        A dry-run resolution against the target Python lists only what is missing or outdated there, so
+        already-satisfied packages (torch, ...) are not downloaded again. Returns the number of new archives.
+        python_exe defaults to the configured interpreter.
+        """
+        python_exe = python_exe or self.app.python_exe_var.get()
+        if not self.is_enabled() or not python_exe or not os.path.isfile(python_exe) or not requirements_paths:
+            return 0
+        try:
+            os.makedirs(self.wheelhouse_dir, exist_ok=True)
+        except OSError as e:
+            self.app.log_to_gui("Wheelhouse", f"无法创建 wheelhouse 目录 {self.wheelhouse_dir}: {e}", "warn")
+            return 0
+        cwd = cwd or self.wheelhouse_dir
+
+        with self._lock:
+            urls = self._resolve_download_urls(requirements_paths, python_exe, cwd)
+            if not urls:
+                return 0
+            before = set(self.archive_files())
+            if log_output:
+                self.app.log_to_gui("Wheelhouse", f"下载 {len(urls)} 个安装包到 wheelhouse...", "info")
+            download_cmd = [python_exe, "-m", "pip", "download", "--no-deps", "-d", self.wheelhouse_dir] + urls
+            stdout, stderr, rc = self.app._run_process_command(download_cmd, cwd=cwd, timeout=PREFETCH_TIMEOUT_SEC, log_output=False, log_source="Pip")
+            if rc != 0:
+                print(f"[Wheelhouse WARNING] pip download failed: {stderr.strip()[-1000:]}")
+            added = set(self.archive_files()) - before
+
+        self.mark_used_from_output(stdout)
+        self._touch(added)
+        self.evict()
+        return len(added)
+
+    def _resolve_download_urls(self, requirements_paths, python_exe, cwd):
+        """Runs 'pip install --dry-run --report' and returns the http(s) archive URLs of the packages to install."""
+        report_fd, report_path = tempfile.mkstemp(suffix="-pip-report.json")
+        os.close(report_fd)
+        try:
+            dry_run_cmd = self.app.dependency_manager.pip_install_command(python_exe) + self.find_links_args()
+            dry_run_cmd += ["--dry-run", "--quiet", "--report", report_path]
+            for path in requirements_paths:
+                dry_run_cmd += ["-r", path]
+            _, stderr, rc = self.app._run_process_command(dry_run_cmd, cwd=cwd, timeout=PREFETCH_TIMEOUT_SEC, log_output=False, log_source="Pip")
+            if rc != 0:
+                # Unresolvable requirements, or pip older than 22.2 (no --report); the install itself goes online
+                print(f"[Wheelhouse WARNING] Dry-run resolution failed, skipping prefetch: {stderr.strip()[-1000:]}")
+                return []
+            with open(report_path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Wheelhouse WARNING] Could not read pip report: {e}")
+            return []
+        finally:
+            try:
+                os.remove(report_path)
+            except OSError:
+                pass
+
+        present = set(self.archive_files())
+        urls = []
+        for item in report.get("install", []):
+            download_info = item.get("download_info") or {}
+            url = download_info.get("url", "")
+            # Directories and VCS checkouts are not archives to cache; files already in the wheelhouse need no download
+            if "vcs_info" in download_info or "dir_info" in download_info or not url.startswith(("http://", "https://", "file://")):
+                continue
+            if url.startswith("file://") and url.rsplit("/", 1)[-1] in present:
+                continue
+            urls.append(url)
+        return urls
+
+    # --- Eviction ---
+    def size_bytes(self):
+        """Returns the total size of the archives in the wheelhouse."""
+        total = 0
+        for name in self.archive_files():
+            try:
+                total += os.path.getsize(os.path.join(self.wheelhouse_dir, name))
+            except OSError:
+                pass
+        return total
+
+    def evict(self):
+        """Deletes least recently used archives until the wheelhouse fits its size budget."""
+        budget = self.max_bytes()
+        with self._lock:
+            index = history_store.load_mapping(self.index_file)
+            entries = []
+            total = 0
+            for name in self.archive_files():
+                path = os.path.join(self.wheelhouse_dir, name)
+                try:
+                    size = os.path.getsize(path)
+                    last_used = index.get(name) or os.path.getmtime(path)
+                except OSError:
+                    continue
+                entries.append((last_used, name, size))
+                total += size
+
+            removed = 0
+            for _, name, size in sorted(entries):
+                if total <= budget:
+                    break
+                try:
+                    os.remove(os.path.join(self.wheelhouse_dir, name))
+                except OSError as e:
+                    print(f"[Wheelhouse WARNING] Could not evict {name}: {e}")
+                    continue
+                total -= size
+                removed += 1
+
+            # Drop index entries of files that no longer exist
+            present = set(self.archive_files())
+            pruned = {name: stamp for name, stamp in index.items() if name in present}
+            if removed or len(pruned) != len(index):
+                history_store.save_mapping(self.index_file, pruned)
+        if removed:
+            self.app.log_to_gui("Wheelhouse", f"wheelhouse 超出容量上限，已清理 {removed} 个最久未使用的安装包。", "info")
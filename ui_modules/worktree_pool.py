@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# File: ui_modules/worktree_pool.py
+# Worktree Pool Module (main body versions kept checked out as git worktrees, LRU-evicted by disk budget)
+
+import os
+import time
+import shutil
+import threading
+from datetime import datetime
+
+from ui_modules import history_store
+
+DEFAULT_WORKTREE_POOL_MAX_GB = "20"
+# User data that lives in the main ComfyUI directory and is shared into every worktree through a directory link
+SHARED_DIRS = ("custom_nodes", "models", "input", "output", "user")
+# Untracked config files next to main.py; copied (file links need administrator rights on Windows) and refreshed before each launch
+SHARED_FILES = ("extra_model_paths.yaml",)
+WORKTREE_ADD_TIMEOUT_SEC = 300
+
+
+def _is_dir_link(path):
+    """True for symlinks and Windows junctions (os.readlink resolves both)."""
+    try:
+        os.readlink(path)
+        return True
+    except (OSError, ValueError, AttributeError, NotImplementedError):
+        return False
+
+
+def _tree_size_bytes(path):
+    """Size of a worktree's own files; the shared directory links are not followed."""
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames[:] = [d for d in dirnames if not _is_dir_link(os.path.join(dirpath, d))]
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+class WorktreePool:
+    """Keeps recently activated main body versions as worktrees of the ComfyUI repository (one shared object store)."""
+    def __init__(self, app_instance, pool_dir, state_file):
+        """
+        Args:
+            app_instance: The main ComLauncherApp instance (used for logging, config, _run_git_command and _run_process_command).
+            pool_dir: Directory holding one worktree per commit.
+            state_file: JSON file with the active worktree and each worktree's last use.
+        """
+        self.app = app_instance
+        self.pool_dir = pool_dir
+        self.state_file = state_file
+        self._lock = threading.Lock()
+
+    # --- Config / State ---
+    def is_enabled(self):
+        """Reads the pool toggle from the app config on every call."""
+        return self.app.config.get("worktree_pool_enabled", "禁用") == "启用"
+
+    def max_bytes(self):
+        """Disk budget from the config (GB); falls back to the default on invalid values."""
+        try:
+            max_gb = float(self.app.config.get("worktree_pool_max_gb", DEFAULT_WORKTREE_POOL_MAX_GB))
+        except (TypeError, ValueError):
+            max_gb = float(DEFAULT_WORKTREE_POOL_MAX_GB)
+        return int(max(max_gb, 0) * 1024 ** 3)
+
+    def _repo_key(self, repo_dir):
+        """Normalized repository path stored with the state, so a changed comfyui_dir ignores stale worktrees."""
+        return os.path.normcase(os.path.abspath(repo_dir)) if repo_dir else ""
+
+    def _load_state(self):
+        state = history_store.load_mapping(self.state_file)
+        state.setdefault("worktrees", {}) # commit -> {"path", "last_used", "size"}
+        return state
+
+    def active_path(self, repo_dir):
+        """The worktree the launch should use, or None for the repository checkout itself."""
+        if not self.is_enabled() or not repo_dir:
+            return None
+        state = self._load_state()
+        active = state.get("active")
+        if not active or state.get("repo") != self._repo_key(repo_dir):
+            return None
+        path = state["worktrees"].get(active, {}).get("path")
+        return path if path and os.path.isfile(os.path.join(path, "main.py")) else None
+
+    def worktree_path(self, commit):
+        """Directory of the worktree for a commit (it may not exist yet)."""
+        return os.path.join(self.pool_dir, commit[:12])
+
+    # --- Checkout / Activation ---
+    def checkout(self, repo_dir, commit):
+        """
+        Returns (worktree path, created) for a commit, creating the worktree on first use. Runs in worker thread.
+        Returns (None, False) for the commit checked out in repo_dir itself, which needs no worktree.
+        Raises Exception with a readable message if git fails.
+        """
+        stdout_head, _, rc_head = self.app._run_git_command(["rev-parse", "HEAD"], cwd=repo_dir, timeout=10, log_output=False)
+        if rc_head == 0 and stdout_head.strip() == commit:
+            return None, False
+
+        with self._lock:
+            state = self._load_state()
+            entry = state["worktrees"].get(commit)
+            if entry and os.path.isfile(os.path.join(entry.get("path", ""), "main.py")):
+                return entry["path"], False
+
+            path = self.worktree_path(commit)
+            os.makedirs(self.pool_dir, exist_ok=True)
+            if os.path.exists(path):
+                self._remove_worktree(repo_dir, path) # Leftover of an interrupted creation
+            self.app.log_to_gui("WorktreePool", f"创建版本工作树 {commit[:8]}...", "info")
+            _, stderr_add, rc_add = self.app._run_git_command(["worktree", "add", "--detach", "--force", path, commit], cwd=repo_dir, timeout=WORKTREE_ADD_TIMEOUT_SEC)
+            if rc_add != 0:
+                self._remove_worktree(repo_dir, path)
+                raise Exception(f"创建工作树失败: {stderr_add.strip()}")
+            if os.path.exists(os.path.join(path, ".gitmodules")):
+                _, stderr_sub, rc_sub = self.app._run_git_command(["submodule", "update", "--init", "--recursive", "--force"], cwd=path, timeout=180)
+                if rc_sub != 0:
+                    self.app.log_to_gui("WorktreePool", f"工作树 submodule update 失败: {stderr_sub.strip()}", "warn")
+            self._link_shared_dirs(repo_dir, path)
+            self._copy_shared_files(repo_dir, path)
+
+            state["repo"] = self._repo_key(repo_dir)
+            state["worktrees"][commit] = {"path": path, "last_used": time.time(), "size": _tree_size_bytes(path)}
+            history_store.save_mapping(self.state_file, state)
+            return path, True
+
+    def set_active(self, repo_dir, commit, path):
+        """Points the launch at a worktree (or back at repo_dir when path is None) and refreshes its last use."""
+        with self._lock:
+            state = self._load_state()
+            state["repo"] = self._repo_key(repo_dir)
+            state["active"] = commit if path else None
+            if path and commit in state["worktrees"]:
+                state["worktrees"][commit]["last_used"] = time.time()
+            state["switched"] = datetime.now().isoformat(timespec="seconds")
+            history_store.save_mapping(self.state_file, state)
+
+    def _link_shared_dirs(self, repo_dir, path):
+        """Replaces the worktree's copies of the user data dirs with links to the main ComfyUI directory."""
+        for name in SHARED_DIRS:
+            target = os.path.join(repo_dir, name)
+            link = os.path.join(path, name)
+            if not os.path.isdir(target):
+                continue
+            if os.path.isdir(link) and not _is_dir_link(link):
+                shutil.rmtree(link, ignore_errors=True) # Tracked placeholders of the fresh checkout only
+            if os.name == 'nt':
+                # Junctions need no administrator rights or developer mode, unlike symlinks
+                _, stderr_link, rc_link = self.app._run_process_command(["cmd", "/c", "mklink", "/J", link, target], cwd=path, timeout=30, log_output=False, log_source="WorktreePool")
+                if rc_link != 0:
+                    self.app.log_to_gui("WorktreePool", f"无法链接 {name}: {stderr_link.strip()}", "warn")
+            else:
+                try:
+                    os.symlink(target, link, target_is_directory=True)
+                except OSError as e:
+                    self.app.log_to_gui("WorktreePool", f"无法链接 {name}: {e}", "warn")
+
+    def sync_shared_files(self, repo_dir):
+        """Copies the main directory's config files into the active worktree, so edits made there apply to the next launch."""
+        path = self.active_path(repo_dir)
+        if path:
+            self._copy_shared_files(repo_dir, path)
+
+    def _copy_shared_files(self, repo_dir, path):
+        """Copies SHARED_FILES from the main ComfyUI directory into a worktree (and drops copies whose source is gone)."""
+        for name in SHARED_FILES:
+            source = os.path.join(repo_dir, name)
+            copy = os.path.join(path, name)
+            try:
+                if os.path.isfile(source):
+                    shutil.copy2(source, copy)
+                elif os.path.isfile(copy):
+                    os.remove(copy)
+            except OSError as e:
+                self.app.log_to_gui("WorktreePool", f"无法复制 {name} 到工作树: {e}", "warn")
+
+    def _remove_worktree(self, repo_dir, path):
+        """Removes a worktree without touching the linked user data: the links are deleted before git removes the tree."""
+        for name in SHARED_DIRS:
+            link = os.path.join(path, name)
+            if _is_dir_link(link):
+                try:
+                    os.unlink(link)
+                except OSError:
+                    os.rmdir(link) # Windows junction
+        _, stderr_rm, rc_rm = self.app._run_git_command(["worktree", "remove", "--force", path], cwd=repo_dir, timeout=120, log_output=False)
+        if rc_rm != 0 and os.path.isdir(path):
+            print(f"[WorktreePool WARNING] git worktree remove failed for {path}: {stderr_rm.strip()}")
+            shutil.rmtree(path, ignore_errors=True)
+        self.app._run_git_command(["worktree", "prune"], cwd=repo_dir, timeout=30, log_output=False)
+
+    # --- Eviction ---
+    def evict(self, repo_dir):
+        """Removes least recently used worktrees (never the active one) until the pool fits its disk budget."""
+        budget = self.max_bytes()
+        removed = []
+        with self._lock:
+            state = self._load_state()
+            worktrees = state["worktrees"]
+            for commit in [c for c, e in worktrees.items() if not os.path.isdir(e.get("path", ""))]:
+                del worktrees[commit] # Deleted by hand
+            total = sum(entry.get("size", 0) for entry in worktrees.values())
+            for commit, entry in sorted(worktrees.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= budget:
+                    break
+                if commit == state.get("active"):
+                    continue
+                self._remove_worktree(repo_dir, entry["path"])
+                total -= entry.get("size", 0)
+                removed.append(commit)
+            for commit in removed:
+                del worktrees[commit]
+            history_store.save_mapping(self.state_file, state)
+        if removed:
+            self.app.log_to_gui("WorktreePool", f"工作树池超出容量上限，已移除最久未使用的版本: {', '.join(c[:8] for c in removed)}", "info")